@@ -0,0 +1,88 @@
+"""Benchmark the cache/queue value codecs on typical payloads.
+
+Encodes and decodes the values CernoID passes through CacheManager and
+QueueManager (a face embedding, a batch of embeddings, a detection list
+and a frame thumbnail) with each codec and reports encoded size and
+encode/decode time. JSON cannot carry arrays, so for JSON they are sent
+the way callers do today: as nested lists.
+
+Usage (from backend/src):
+    python ../scripts/benchmark_codecs.py [--repeat 200]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from core.utils.codec import dumps, loads
+
+
+def make_payloads(rng: np.random.Generator) -> dict:
+    embedding = rng.normal(size=512).astype(np.float32)
+    detections = [
+        {
+            'track_id': int(i),
+            'bbox': [float(v) for v in rng.uniform(0, 1080, 4)],
+            'confidence': float(rng.uniform(0.5, 1.0)),
+            'person_id': f'person-{i:05d}',
+            'camera_id': 'cam-lobby-01',
+            'landmarks': [[float(v) for v in point] for point in rng.uniform(0, 1080, (5, 2))]
+        }
+        for i in range(20)
+    ]
+    return {
+        'embedding': {'face_id': 'f-1', 'embedding': embedding},
+        'embedding batch': {'embeddings': rng.normal(size=(64, 512)).astype(np.float32)},
+        'detection list': {'frame': 1234, 'detections': detections},
+        'thumbnail': {'camera_id': 'cam-lobby-01', 'image': rng.integers(0, 255, (112, 112, 3), dtype=np.uint8)}
+    }
+
+
+def as_json_compatible(value):
+    """Arrays as nested lists, the way JSON callers send them"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, dict):
+        return {k: as_json_compatible(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [as_json_compatible(v) for v in value]
+    return value
+
+
+def measure(value, name: str, repeat: int):
+    """Encoded size and mean encode/decode time (microseconds)"""
+    if name == 'json':
+        start = time.perf_counter()
+        for _ in range(repeat):
+            data = dumps(as_json_compatible(value), name)
+        encode = time.perf_counter() - start
+    else:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            data = dumps(value, name)
+        encode = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        loads(data, name)
+    decode = time.perf_counter() - start
+    return len(data), encode / repeat * 1e6, decode / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    payloads = make_payloads(np.random.default_rng(args.seed))
+    print(f"{'payload':<16} {'codec':<8} {'bytes':>10} {'encode us':>11} {'decode us':>11}")
+    for payload_name, value in payloads.items():
+        for name in ('json', 'pickle', 'binary'):
+            size, encode, decode = measure(value, name, args.repeat)
+            print(f"{payload_name:<16} {name:<8} {size:>10} {encode:>11.1f} {decode:>11.1f}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark recall vs. memory of compressed matching indexes.
+
+Builds the indexes FaceMatcher would build for each ``matching.compression``
+setting on a synthetic gallery (several templates per person) and compares
+them with the exact flat inner-product baseline: recall@k of the true
+neighbours, person-level top-1 agreement, index bytes per vector and query
+latency, with and without exact re-ranking from the full-precision store.
+
+Usage (from backend/src):
+    python ../scripts/benchmark_quantization.py [--gallery 100000] [--index-type flat]
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from core.face_recognition.quantization import (
+    COMPRESSIONS, index_description, min_training_points, rerank_inner_product
+)
+
+
+def make_gallery(persons: int, templates: int, dim: int, rng: np.random.Generator):
+    """Unit-norm embeddings clustered around one centre per person."""
+    centres = rng.normal(size=(persons, dim)).astype(np.float32)
+    noise = rng.normal(scale=0.35, size=(persons, templates, dim)).astype(np.float32)
+    gallery = (centres[:, None, :] + noise).reshape(-1, dim)
+    gallery /= np.linalg.norm(gallery, axis=1, keepdims=True)
+    labels = np.repeat(np.arange(persons), templates)
+    return gallery, labels, centres
+
+
+def make_queries(centres: np.ndarray, n: int, rng: np.random.Generator):
+    """New captures of known persons."""
+    persons = rng.integers(0, len(centres), n)
+    queries = centres[persons] + rng.normal(scale=0.35, size=(n, centres.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries.astype(np.float32), persons
+
+
+def build(description: str, gallery: np.ndarray, nprobe: int) -> faiss.Index:
+    index = faiss.index_factory(gallery.shape[1], description, faiss.METRIC_INNER_PRODUCT)
+    if not index.is_trained:
+        index.train(gallery)
+    if description.startswith('IVF'):
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    index.add(gallery)
+    return index
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    """Fraction of the true top-k neighbours that were returned."""
+    hits = sum(len(np.intersect1d(f, t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--gallery', type=int, default=100_000, help='embeddings')
+    parser.add_argument('--templates', type=int, default=5, help='templates per person')
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--index-type', choices=['flat', 'ivf', 'hnsw'], default='flat')
+    parser.add_argument('--nprobe', type=int, default=16)
+    parser.add_argument('--pq-m', type=int, default=64)
+    parser.add_argument('--rerank-factor', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    gallery, labels, centres = make_gallery(args.gallery // args.templates, args.templates, args.dim, rng)
+    queries, persons = make_queries(centres, args.queries, rng)
+
+    baseline = faiss.IndexFlatIP(args.dim)
+    baseline.add(gallery)
+    _, truth = baseline.search(queries, args.k)
+    baseline_bytes = len(faiss.serialize_index(baseline))
+    nlist = min(4096, max(16, len(gallery) // 8))
+
+    print(f"gallery={len(gallery)} dim={args.dim} k={args.k} index={args.index_type}")
+    print(f"{'compression':>12} {'rerank':>6} {'recall@k':>9} {'top1 id':>8} "
+          f"{'B/vector':>9} {'memory':>7} {'ms/query':>9}")
+    for compression in COMPRESSIONS:
+        if len(gallery) < min_training_points(args.index_type, compression, nlist):
+            continue
+        description = index_description(args.index_type, compression, args.dim,
+                                         nlist=nlist, pq_m=args.pq_m)
+        index = build(description, gallery, args.nprobe)
+        index_bytes = len(faiss.serialize_index(index))
+
+        for factor in ([0, args.rerank_factor] if compression != 'none' else [0]):
+            start = time.perf_counter()
+            if factor:
+                # Candidates from the compressed index, exact scores from the store
+                _, candidates = index.search(queries, args.k * factor)
+                vectors = gallery[np.where(candidates >= 0, candidates, 0)]
+                _, found = rerank_inner_product(queries, candidates, vectors, args.k)
+            else:
+                _, found = index.search(queries, args.k)
+            elapsed = (time.perf_counter() - start) * 1000 / len(queries)
+
+            top1 = np.mean(labels[found[:, 0]] == persons)
+            print(f"{compression:>12} {factor or '-':>6} {recall(found, truth):>9.3f} {top1:>8.3f} "
+                  f"{index_bytes / len(gallery):>9.1f} {index_bytes / baseline_bytes:>6.0%} "
+                  f"{elapsed:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
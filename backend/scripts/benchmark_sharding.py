@@ -0,0 +1,111 @@
+"""Benchmark sharded face search throughput against the number of shards.
+
+Writes a synthetic gallery straight into each shard's feature store (the
+layout FaceSearch loads at start), starts ShardedFaceSearch with 1, 2, 4...
+worker processes and runs concurrent clients issuing batched queries.
+Reports queries per second and per-request latency percentiles.
+
+Usage (from backend/src):
+    python ../scripts/benchmark_sharding.py [--gallery 200000] [--shards 1 2 4 8]
+"""
+import argparse
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from core.face_recognition.embedding_store import EmbeddingStore
+from core.face_recognition.sharding import ShardedFaceSearch, shard_for
+
+
+def write_shards(root: Path, gallery: np.ndarray, shards: int) -> None:
+    """Partition the gallery by face ID and write one feature store per shard."""
+    face_ids = [f"face-{i}" for i in range(len(gallery))]
+    owners = np.array([shard_for(face_id, shards) for face_id in face_ids])
+    for shard in range(shards):
+        directory = root / f"shard-{shard}"
+        directory.mkdir(parents=True, exist_ok=True)
+        rows = np.flatnonzero(owners == shard)
+        ids = [face_ids[row] for row in rows]
+        EmbeddingStore.write(directory / 'features.emb', ids, gallery[rows])
+        metadata = {face_id: {'person_id': f"person-{int(face_id[5:]) // 5}"} for face_id in ids}
+        with open(directory / 'metadata.json', 'w') as f:
+            json.dump({'metadata': metadata, 'clusters': {}}, f)
+
+
+async def run_clients(search: ShardedFaceSearch,
+                      queries: np.ndarray,
+                      clients: int,
+                      batch: int,
+                      k: int):
+    """Concurrent clients splitting the queries into batches; returns latencies."""
+    batches = [queries[start:start + batch] for start in range(0, len(queries), batch)]
+    latencies = []
+
+    async def client(assigned):
+        for features in assigned:
+            start = time.perf_counter()
+            await search.match_batch(features, k)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(client(batches[i::clients]) for i in range(clients)))
+    return np.array(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--gallery', type=int, default=200_000)
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--queries', type=int, default=4000)
+    parser.add_argument('--batch', type=int, default=8, help='queries per request')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent requests')
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--index-type', choices=['flat', 'ivf', 'hnsw'], default='flat')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    gallery = rng.normal(size=(args.gallery, args.dim)).astype(np.float32)
+    gallery /= np.linalg.norm(gallery, axis=1, keepdims=True)
+    queries = gallery[rng.integers(0, len(gallery), args.queries)]
+    queries += rng.normal(scale=0.02, size=queries.shape).astype(np.float32)
+
+    print(f"gallery={args.gallery} dim={args.dim} index={args.index_type} "
+          f"batch={args.batch} clients={args.clients}")
+    print(f"{'shards':>6} {'start s':>8} {'queries/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for shards in args.shards:
+        root = Path(tempfile.mkdtemp(prefix='shard-bench-'))
+        try:
+            write_shards(root, gallery, shards)
+            config = {
+                'search.storage_path': str(root),
+                'search.index_type': args.index_type,
+                'search.dimension': args.dim,
+                'search.use_gpu': False,
+                'search.min_similarity': 0.0
+            }
+            start = time.perf_counter()
+            search = ShardedFaceSearch(config, shards=shards)
+            startup = time.perf_counter() - start
+            try:
+                # Warm up, then measure
+                asyncio.run(run_clients(search, queries[:args.batch * shards], shards, args.batch, args.k))
+                start = time.perf_counter()
+                latencies = asyncio.run(run_clients(search, queries, args.clients, args.batch, args.k))
+                elapsed = time.perf_counter() - start
+            finally:
+                search.close()
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+        print(f"{shards:>6} {startup:>8.1f} {len(queries) / elapsed:>10.0f} "
+              f"{np.percentile(latencies, 50) * 1000:>8.2f} {np.percentile(latencies, 99) * 1000:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
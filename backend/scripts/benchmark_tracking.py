@@ -0,0 +1,96 @@
+"""Benchmark track/detection association for 1-200 simultaneous faces.
+
+Compares the vectorized IoU + gated assignment used by FaceTracker with the
+previous nested-loop IoU matrix followed by a full Hungarian assignment.
+
+Usage (from backend/src):
+    python ../scripts/benchmark_tracking.py [--repeat 200]
+"""
+import argparse
+import time
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from core.face_recognition.face_tracking import iou_matrix, match_boxes
+
+TRACK_COUNTS = [1, 5, 10, 25, 50, 100, 150, 200]
+IOU_THRESHOLD = 0.3
+
+
+def make_scene(n: int, rng: np.random.Generator):
+    """Faces on a loose grid (a crowd at a gate) and jittered detections."""
+    columns = int(np.ceil(np.sqrt(n)))
+    index = np.arange(n)
+    tracks = np.stack([
+        (index % columns) * 70 + rng.integers(0, 10, n),
+        (index // columns) * 70 + rng.integers(0, 10, n),
+        rng.integers(40, 60, n),
+        rng.integers(40, 60, n)
+    ], axis=1)
+    detections = tracks.copy()
+    detections[:, :2] += rng.integers(-4, 5, (n, 2))
+    return tracks, detections[rng.permutation(n)]
+
+
+def legacy_match(tracks: np.ndarray, detections: np.ndarray):
+    """Previous implementation: per-pair IoU and list bookkeeping."""
+    def iou(a, b):
+        x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+        x2, y2 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+        if x2 < x1 or y2 < y1:
+            return 0.0
+        inter = (x2 - x1) * (y2 - y1)
+        union = a[2] * a[3] + b[2] * b[3] - inter
+        return inter / union if union > 0 else 0.0
+
+    matrix = np.zeros((len(tracks), len(detections)))
+    for i, track in enumerate(tracks):
+        for j, det in enumerate(detections):
+            matrix[i, j] = iou(track, det)
+
+    track_indices, det_indices = linear_sum_assignment(-matrix)
+    matches = []
+    unmatched_tracks = list(range(len(tracks)))
+    unmatched_detections = list(range(len(detections)))
+    for track_idx, det_idx in zip(track_indices, det_indices):
+        if matrix[track_idx, det_idx] >= IOU_THRESHOLD:
+            matches.append((track_idx, det_idx))
+            unmatched_tracks.remove(track_idx)
+            unmatched_detections.remove(det_idx)
+    return matches, unmatched_tracks, unmatched_detections
+
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of ``fn`` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'tracks':>6} {'iou ms':>8} {'match ms':>9} {'legacy ms':>10} {'speedup':>8}")
+    for n in TRACK_COUNTS:
+        tracks, detections = make_scene(n, rng)
+
+        matches, _, _ = match_boxes(tracks, detections, IOU_THRESHOLD)
+        legacy, _, _ = legacy_match(tracks, detections)
+        assert sorted(matches) == sorted(legacy), "assignments differ"
+
+        iou_ms = timed(lambda: iou_matrix(tracks, detections), args.repeat)
+        match_ms = timed(lambda: match_boxes(tracks, detections, IOU_THRESHOLD), args.repeat)
+        legacy_ms = timed(lambda: legacy_match(tracks, detections), max(1, args.repeat // 10))
+        print(f"{n:>6} {iou_ms:>8.3f} {match_ms:>9.3f} {legacy_ms:>10.3f} {legacy_ms / match_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+File: capture.py
+Purpose: Threaded video capture readers for the CernoID camera pipeline.
+
+Key Features:
+- One dedicated reader thread per capture source
+- Latest-frame semantics (stale frames are overwritten, never queued)
+- Frames decoded straight into the camera's shared-memory ring buffer
+- Event-based hand-off to asyncio consumers (no polling)
+- Grab/retrieve timing, decode latency and drop counters
+
+Architecture:
+- Reader thread is the single producer of its ring buffer
+- Consumers await a sequence number newer than the last one they took
+- Blocking OpenCV calls never run on the event loop
+
+Performance:
+- Slow RTSP sources block only their own thread
+- Capture buffers are drained continuously, keeping latency low
+- No per-frame allocation when the source matches the ring resolution
+"""
+
+from typing import Any, Dict, Optional
+import asyncio
+import threading
+import time
+import logging
+
+import cv2
+
+from .ring_buffer import FrameRingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureReader:
+    """
+    Background reader for one ``cv2.VideoCapture``.
+
+    The reader thread continuously grabs frames and decodes each into the
+    next slot of ``frame_buffer``. Consumers call ``next_frame`` and get the
+    sequence number of the newest frame; frames decoded but superseded
+    before a consumer asked for them are counted as dropped.
+
+    Attributes:
+        name (str): Reader name used in logs and thread names
+        frame_buffer (FrameRingBuffer): Destination ring buffer
+    """
+
+    def __init__(
+        self,
+        capture: Any,
+        frame_buffer: FrameRingBuffer,
+        name: str = 'camera',
+        retry_delay: float = 1.0,
+        stop_timeout: float = 5.0
+    ):
+        """
+        Initialize reader.
+
+        Args:
+            capture: Opened video capture (``grab``/``retrieve``/``release``)
+            frame_buffer: Ring buffer receiving decoded frames
+            name: Reader name
+            retry_delay: Pause after a failed grab before retrying
+            stop_timeout: Seconds ``stop`` waits for the reader thread
+        """
+        self.name = name
+        self.frame_buffer = frame_buffer
+        self._capture = capture
+        self._retry_delay = retry_delay
+        self._stop_timeout = stop_timeout
+
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        # Guards handing the capture release (and buffer close) to a thread
+        # that outlives stop()
+        self._release_lock = threading.Lock()
+        self._reading = False
+        self._release_on_exit = False
+        self._close_buffer_on_exit = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._frame_ready: Optional[asyncio.Event] = None
+        self._last_consumed = 0
+        self._error: Optional[str] = None
+
+        self._stats = {
+            'frames_grabbed': 0,
+            'frames_decoded': 0,
+            'frames_consumed': 0,
+            'frames_dropped': 0,
+            'grab_errors': 0,
+            'retrieve_errors': 0,
+            'average_grab_time': 0.0,
+            'average_retrieve_time': 0.0,
+            'average_decode_latency': 0.0
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def error(self) -> Optional[str]:
+        """Last capture error, cleared once frames flow again"""
+        return self._error
+
+    def start(self) -> None:
+        """Start the reader thread; must be called from the event loop"""
+        if self.is_running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._frame_ready = asyncio.Event()
+        self._stopped.clear()
+        self._reading = True
+        self._release_on_exit = False
+        self._close_buffer_on_exit = False
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"capture-{self.name}",
+            daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """
+        Stop the reader thread and release the capture.
+
+        The capture is never released under a running thread: if the thread
+        is still blocked in ``grab()`` when the join times out, it releases
+        the capture itself once the call returns.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            # grab() may block for a while on dead network sources
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._thread.join, self._stop_timeout
+            )
+            self._thread = None
+        if self._frame_ready is not None:
+            # Wake consumers so they notice the reader has stopped
+            self._frame_ready.set()
+        with self._release_lock:
+            if self._reading:
+                self._release_on_exit = True
+                logger.warning(f"Reader {self.name} still blocked; capture released on exit")
+                return
+        self._capture.release()
+
+    def close_buffer(self) -> None:
+        """
+        Close the ring buffer once the reader thread no longer writes to it.
+
+        Call after ``stop``: a thread still blocked in ``grab()`` closes the
+        buffer itself once the call returns.
+        """
+        with self._release_lock:
+            if self._reading:
+                self._close_buffer_on_exit = True
+                return
+        self.frame_buffer.close()
+
+    async def next_frame(self, timeout: Optional[float] = None) -> Optional[int]:
+        """
+        Wait for a frame newer than the last one consumed.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Optional[int]: Ring buffer sequence of the newest frame, or None
+            on timeout or when the reader is stopped
+        """
+        while not self._stopped.is_set():
+            sequence = self.frame_buffer.latest_sequence
+            if sequence > self._last_consumed:
+                self._stats['frames_consumed'] += 1
+                self._last_consumed = sequence
+                return sequence
+
+            self._frame_ready.clear()
+            # Re-check after clearing so a frame committed in between is not missed
+            if self.frame_buffer.latest_sequence > self._last_consumed:
+                continue
+            try:
+                await asyncio.wait_for(self._frame_ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return None
+
+    def _run(self) -> None:
+        """Reader thread: grab, decode into the ring, notify"""
+        try:
+            self._read_frames()
+        finally:
+            with self._release_lock:
+                self._reading = False
+                if self._release_on_exit:
+                    self._capture.release()
+                if self._close_buffer_on_exit:
+                    self.frame_buffer.close()
+
+    def _read_frames(self) -> None:
+        """Read until stopped"""
+        while not self._stopped.is_set():
+            started = time.perf_counter()
+            if not self._capture.grab():
+                self._stats['grab_errors'] += 1
+                self._error = "Failed to grab frame"
+                self._stopped.wait(self._retry_delay)
+                continue
+            if self._stopped.is_set():
+                # Stopped while blocked in grab(); leave the ring alone
+                break
+            grabbed = time.perf_counter()
+            self._stats['frames_grabbed'] += 1
+
+            # Decode into the next slot; OpenCV reallocates (and the ring
+            # resizes) only when the source resolution differs
+            _, slot = self.frame_buffer.acquire()
+            ok, frame = self._capture.retrieve(slot)
+            if not ok or frame is None:
+                self._stats['retrieve_errors'] += 1
+                self._error = "Failed to decode frame"
+                continue
+            sequence = self.frame_buffer.write(frame)
+            decoded = time.perf_counter()
+
+            self._error = None
+            if sequence - 1 > self._last_consumed:
+                # The previous frame was never handed to a consumer
+                self._stats['frames_dropped'] += 1
+            self._update_stats(started, grabbed, decoded)
+            self._loop.call_soon_threadsafe(self._frame_ready.set)
+
+    def _update_stats(self, started: float, grabbed: float, decoded: float) -> None:
+        """Update timing statistics"""
+        self._stats['frames_decoded'] += 1
+        n = self._stats['frames_decoded']
+        for key, value in (('average_grab_time', grabbed - started),
+                           ('average_retrieve_time', decoded - grabbed),
+                           ('average_decode_latency', decoded - started)):
+            self._stats[key] = (self._stats[key] * (n - 1) + value) / n
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get reader statistics"""
+        return {
+            **self._stats,
+            'running': self.is_running,
+            'error': self._error
+        }
+
+
+def open_capture(source: Any, resolution: Optional[tuple] = None) -> cv2.VideoCapture:
+    """
+    Open a video source with a minimal driver-side buffer.
+
+    Args:
+        source: Device index, file path or stream URL
+        resolution: Optional (width, height) request
+
+    Returns:
+        cv2.VideoCapture: Opened capture
+    """
+    capture = cv2.VideoCapture(source)
+    if resolution:
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+    # The reader thread keeps only the newest frame itself
+    capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return capture
@@ -53,12 +53,12 @@ Performance:
 from typing import Dict, List, Optional, Set
 import asyncio
 from datetime import datetime
-import numpy as np
 from dataclasses import dataclass
-import cv2
 
 from ..base import BaseComponent
 from ..utils.errors import CameraError
+from .ring_buffer import FrameRingBuffer
+from .capture import CaptureReader, open_capture
 
 @dataclass
 class CameraStatus:
@@ -102,6 +102,7 @@ class CameraCoordinator(BaseComponent):
         _resolution (tuple): Target resolution
         _cameras (Dict): Active camera instances
         _active_feeds (Set): Active feed IDs
+        _frame_buffers (Dict): Shared-memory frame ring buffers
         _frame_queues (Dict): Frame processing queues
         _priority_queues (Dict): Priority frame queues
         _camera_loads (Dict): Camera load metrics
@@ -111,6 +112,8 @@ class CameraCoordinator(BaseComponent):
         camera.max_cameras: Maximum cameras (default: 16)
         camera.target_fps: Target frame rate (default: 30)
         camera.resolution: Frame resolution (default: 1280x720)
+        camera.ring_slots: Frames held per camera (default: 16)
+        camera.read_timeout: Seconds without frames before a feed errors (default: 5)
         camera.rebalance_interval: Load balance interval (default: 60)
         
     Features:
@@ -148,6 +151,15 @@ class CameraCoordinator(BaseComponent):
         self._cameras: Dict[str, Dict] = {}
         self._active_feeds: Set[str] = set()
         
+        # Frame storage: frames live in per-camera ring buffers and the
+        # queues only carry sequence numbers
+        self._ring_slots = config.get('camera.ring_slots', 16)
+        self._frame_buffers: Dict[str, FrameRingBuffer] = {}
+        
+        # Capture readers: one thread per source, latest frame wins
+        self._readers: Dict[str, CaptureReader] = {}
+        self._read_timeout = config.get('camera.read_timeout', 5.0)
+        
         # Processing queues
         self._frame_queues: Dict[str, asyncio.Queue] = {}
         self._priority_queues: Dict[str, asyncio.Queue] = {}
@@ -235,9 +247,18 @@ class CameraCoordinator(BaseComponent):
                 'error': None
             }
             
-            self._frame_queues[camera_id] = asyncio.Queue(maxsize=100)
+            # Queued sequences older than the ring are stale, so the queues
+            # never hold more entries than there are slots
+            width, height = self._resolution
+            self._frame_buffers[camera_id] = FrameRingBuffer(
+                self._ring_slots,
+                (height, width, 3)
+            )
+            self._frame_queues[camera_id] = asyncio.Queue(maxsize=self._ring_slots)
             if priority > 1:
-                self._priority_queues[camera_id] = asyncio.Queue(maxsize=50)
+                self._priority_queues[camera_id] = asyncio.Queue(
+                    maxsize=max(1, self._ring_slots // 2)
+                )
                 
             self._cameras[camera_id] = camera
             
@@ -270,12 +291,21 @@ class CameraCoordinator(BaseComponent):
                 return
                 
             # Stop camera feed
+            reader = self._readers.get(camera_id)
             await self._stop_camera_feed(camera_id)
             
             # Clean up queues
             self._frame_queues.pop(camera_id, None)
             self._priority_queues.pop(camera_id, None)
             
+            # Release frame buffer (deferred while the reader thread is
+            # still blocked, like the capture release)
+            frame_buffer = self._frame_buffers.pop(camera_id, None)
+            if reader is not None:
+                reader.close_buffer()
+            elif frame_buffer is not None:
+                frame_buffer.close()
+            
             # Remove camera
             self._cameras.pop(camera_id)
             self._active_feeds.discard(camera_id)
@@ -304,13 +334,14 @@ class CameraCoordinator(BaseComponent):
             camera = self._cameras[camera_id]
             
             # Initialize video capture
-            cap = cv2.VideoCapture(camera['source'])
+            cap = open_capture(camera['source'], self._resolution)
             if not cap.isOpened():
                 raise CameraError(f"Failed to open camera source: {camera['source']}")
                 
-            # Set camera properties
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self._resolution[0])
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self._resolution[1])
+            # Start reader thread; it decodes into the camera's ring buffer
+            reader = CaptureReader(cap, self._frame_buffers[camera_id], name=camera_id)
+            reader.start()
+            self._readers[camera_id] = reader
             
             # Start feed processor
             camera['capture'] = cap
@@ -327,6 +358,30 @@ class CameraCoordinator(BaseComponent):
             camera['error'] = str(e)
             self.logger.error(f"Failed to start camera feed: {str(e)}")
             
+    async def _stop_camera_feed(self, camera_id: str) -> None:
+        """
+        Stop camera feed processing.
+        
+        Args:
+            camera_id: Camera identifier
+            
+        Features:
+            - Feed shutdown
+            - Reader thread stop
+            - Capture release
+            - State update
+        """
+        self._active_feeds.discard(camera_id)
+        
+        reader = self._readers.pop(camera_id, None)
+        if reader is not None:
+            await reader.stop()
+            
+        camera = self._cameras.get(camera_id)
+        if camera is not None:
+            camera.pop('capture', None)
+            camera['status'] = 'inactive'
+            
     async def _process_feed(self, camera_id: str) -> None:
         """
         Process camera feed.
@@ -342,26 +397,29 @@ class CameraCoordinator(BaseComponent):
             - Stats tracking
         """
         camera = self._cameras[camera_id]
-        cap = camera['capture']
+        reader = self._readers[camera_id]
+        loop = asyncio.get_running_loop()
         
-        last_frame_time = datetime.utcnow()
+        next_frame_due = loop.time()
         frame_times = []
         
         while camera_id in self._active_feeds:
             try:
-                # Check frame interval
-                now = datetime.utcnow()
-                if (now - last_frame_time).total_seconds() < self._frame_interval:
-                    await asyncio.sleep(0.001)
-                    continue
+                # Wait out the frame interval instead of polling
+                delay = next_frame_due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
                     
-                # Read frame
-                ret, frame = cap.read()
-                if not ret:
-                    raise CameraError("Failed to read frame")
+                # Take the newest frame decoded by the reader thread
+                sequence = await reader.next_frame(timeout=self._read_timeout)
+                if sequence is None:
+                    if camera_id not in self._active_feeds:
+                        break
+                    raise CameraError(reader.error or "No frame received")
                     
                 # Update timing
-                last_frame_time = now
+                now = datetime.utcnow()
+                next_frame_due = max(next_frame_due + self._frame_interval, loop.time())
                 frame_times.append(now)
                 if len(frame_times) > 30:
                     frame_times.pop(0)
@@ -372,9 +430,11 @@ class CameraCoordinator(BaseComponent):
                     camera['fps'] = fps
                     
                 # Process frame
-                await self._handle_frame(camera_id, frame)
+                await self._handle_frame(camera_id, sequence)
                 
                 # Update statistics
+                camera['status'] = 'active'
+                camera['error'] = None
                 camera['frame_count'] += 1
                 camera['last_frame'] = now
                 self._stats['total_frames'] += 1
@@ -385,16 +445,15 @@ class CameraCoordinator(BaseComponent):
                 self.logger.error(f"Feed processing error: {str(e)}")
                 await asyncio.sleep(1)
                 
-    async def _handle_frame(self, camera_id: str, frame: np.ndarray) -> None:
+    async def _handle_frame(self, camera_id: str, sequence: int) -> None:
         """
         Handle incoming frame.
         
         Args:
             camera_id: Camera identifier
-            frame: Frame data
+            sequence: Ring buffer sequence of the frame
             
         Features:
-            - Frame resizing
             - Queue management
             - Priority handling
             - Drop policies
@@ -403,15 +462,17 @@ class CameraCoordinator(BaseComponent):
         try:
             camera = self._cameras[camera_id]
             
-            # Resize if needed
-            if frame.shape[:2] != self._resolution:
-                frame = cv2.resize(frame, self._resolution)
+            # The reader thread already resized the frame into the ring
+            timestamp = self._frame_buffers[camera_id].timestamp(sequence)
+            if timestamp is None:
+                self._stats['dropped_frames'] += 1
+                return
                 
             # Add to queues
             frame_data = {
                 'camera_id': camera_id,
-                'frame': frame,
-                'timestamp': datetime.utcnow().timestamp(),
+                'sequence': sequence,
+                'timestamp': timestamp,
                 'priority': camera['priority']
             }
             
@@ -440,7 +501,9 @@ class CameraCoordinator(BaseComponent):
             camera_id: Camera identifier
             
         Returns:
-            Optional[Dict]: Frame data if available
+            Optional[Dict]: Frame data if available. ``frame`` is a
+            read-only view into the camera's ring buffer, valid until the
+            ring wraps; copy it to keep it longer.
             
         Features:
             - Queue priority
@@ -453,18 +516,28 @@ class CameraCoordinator(BaseComponent):
             if camera_id not in self._cameras:
                 return None
                 
-            # Check priority queue first
-            if camera_id in self._priority_queues:
-                try:
-                    return self._priority_queues[camera_id].get_nowait()
-                except asyncio.QueueEmpty:
-                    pass
+            frame_buffer = self._frame_buffers[camera_id]
+            queues = [
+                queue for queue in (
+                    self._priority_queues.get(camera_id),
+                    self._frame_queues[camera_id]
+                ) if queue is not None
+            ]
+            
+            # Check priority queue first, skipping frames already overwritten
+            for queue in queues:
+                while True:
+                    try:
+                        frame_data = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    frame = frame_buffer.get(frame_data['sequence'])
+                    if frame is None:
+                        self._stats['dropped_frames'] += 1
+                        continue
+                    return {**frame_data, 'frame': frame}
                     
-            # Try regular queue
-            try:
-                return self._frame_queues[camera_id].get_nowait()
-            except asyncio.QueueEmpty:
-                return None
+            return None
                 
         except Exception as e:
             self.logger.error(f"Frame retrieval error: {str(e)}")
@@ -507,6 +580,32 @@ class CameraCoordinator(BaseComponent):
             self.logger.error(f"Status retrieval error: {str(e)}")
             return None
             
+    async def get_camera_stats(self, camera_id: str) -> Optional[Dict]:
+        """
+        Get capture statistics for one camera.
+        
+        Args:
+            camera_id: Camera identifier
+            
+        Returns:
+            Optional[Dict]: Reader and frame buffer statistics if found
+            
+        Features:
+            - Decode latency
+            - Grab/retrieve timing
+            - Drop counters
+            - Buffer usage
+        """
+        if camera_id not in self._cameras:
+            return None
+            
+        reader = self._readers.get(camera_id)
+        frame_buffer = self._frame_buffers.get(camera_id)
+        return {
+            'capture': reader.get_stats() if reader is not None else None,
+            'frame_buffer': frame_buffer.get_stats() if frame_buffer is not None else None
+        }
+        
     async def get_stats(self) -> Dict:
         """
         Get coordinator statistics.
@@ -523,5 +622,13 @@ class CameraCoordinator(BaseComponent):
         """
         return {
             **self._stats,
-            'camera_loads': self._camera_loads.copy()
+            'camera_loads': self._camera_loads.copy(),
+            'frame_buffers': {
+                camera_id: frame_buffer.get_stats()
+                for camera_id, frame_buffer in self._frame_buffers.items()
+            },
+            'capture': {
+                camera_id: reader.get_stats()
+                for camera_id, reader in self._readers.items()
+            }
         } 
\ No newline at end of file
@@ -0,0 +1,271 @@
+"""
+File: motion.py
+Purpose: Motion-gated, adaptive face detection scheduling for camera feeds.
+
+Key Features:
+- Cheap change detection on downscaled grayscale frames
+- Per-camera idle/active detection rates
+- Track-aware rate boosts
+- Periodic safety detections on idle cameras
+- Gating statistics per camera
+
+Architecture:
+- MotionDetector: frame differencing with preallocated buffers
+- AdaptiveDetectionPolicy: pure timing policy (no image work)
+- DetectionGate: per-camera detectors + shared policy
+
+Performance:
+- Differencing runs on a ~160px wide frame (sub-millisecond)
+- No per-frame allocation after the first frame
+- Idle cameras skip full detection most of the time
+"""
+
+from typing import Any, Dict, Optional
+from dataclasses import dataclass
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionDetector:
+    """
+    Scene change detector based on downscaled frame differencing.
+
+    Each frame is shrunk to ``width`` pixels wide, converted to grayscale
+    and blurred, then compared with the previous one. The score is the
+    fraction of pixels whose intensity changed by more than
+    ``pixel_threshold``.
+    """
+
+    def __init__(self, width: int = 160, pixel_threshold: int = 20):
+        """
+        Args:
+            width: Width of the analysis frame in pixels
+            pixel_threshold: Minimum per-pixel intensity change
+        """
+        self._width = width
+        self._pixel_threshold = pixel_threshold
+        self._size: Optional[tuple] = None
+
+        # Reused analysis buffers
+        self._small: Optional[np.ndarray] = None
+        self._gray: Optional[np.ndarray] = None
+        self._current: Optional[np.ndarray] = None
+        self._previous: Optional[np.ndarray] = None
+        self._diff: Optional[np.ndarray] = None
+
+    def reset(self) -> None:
+        """Forget the reference frame"""
+        self._size = None
+        self._previous = None
+
+    def update(self, frame: np.ndarray) -> float:
+        """
+        Compare a frame with the previous one.
+
+        Args:
+            frame: BGR or grayscale frame
+
+        Returns:
+            float: Fraction of changed pixels (1.0 for the first frame)
+        """
+        height, width = frame.shape[:2]
+        size = (self._width, max(1, round(height * self._width / width)))
+        if size != self._size:
+            self._allocate(size)
+        if self._small is None or self._small.shape[2:] != frame.shape[2:]:
+            self._small = np.empty((size[1], size[0]) + frame.shape[2:], dtype=frame.dtype)
+
+        small = cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        else:
+            gray = small
+        current = cv2.GaussianBlur(gray, (5, 5), 0, dst=self._current)
+
+        if self._previous is None:
+            self._previous = np.empty_like(current)
+            self._previous[:] = current
+            return 1.0
+
+        diff = cv2.absdiff(current, self._previous, dst=self._diff)
+        score = np.count_nonzero(diff > self._pixel_threshold) / diff.size
+
+        # Swap buffers: the current frame becomes the reference
+        self._current, self._previous = self._previous, self._current
+        return float(score)
+
+    def _allocate(self, size: tuple) -> None:
+        """Allocate analysis buffers for a new frame size"""
+        width, height = size
+        self._size = size
+        self._small = None
+        self._gray = np.empty((height, width), dtype=np.uint8)
+        self._current = np.empty((height, width), dtype=np.uint8)
+        self._diff = np.empty((height, width), dtype=np.uint8)
+        self._previous = None
+
+
+@dataclass
+class CameraActivity:
+    """
+    Detection scheduling state for one camera.
+
+    Attributes:
+        last_motion: Time motion was last seen
+        last_detection: Time full detection last ran
+        active_tracks: Tracks reported by the tracker
+        motion_score: Latest change score
+        mode: 'active' or 'idle'
+    """
+    last_motion: float = float('-inf')
+    last_detection: float = float('-inf')
+    active_tracks: int = 0
+    motion_score: float = 0.0
+    mode: str = 'idle'
+    frames_seen: int = 0
+    frames_detected: int = 0
+
+
+class AdaptiveDetectionPolicy:
+    """
+    Decides per frame whether a camera runs full face detection.
+
+    A camera is *active* while it shows motion, while the tracker reports
+    live tracks, and for ``motion_cooldown`` seconds after either. Active
+    cameras detect at most every ``active_interval`` seconds (0 = every
+    frame); idle cameras every ``idle_interval`` seconds, so a motionless
+    person is still picked up eventually.
+    """
+
+    def __init__(self,
+                 motion_threshold: float = 0.005,
+                 active_interval: float = 0.0,
+                 idle_interval: float = 2.0,
+                 motion_cooldown: float = 3.0):
+        """
+        Args:
+            motion_threshold: Change score that counts as motion
+            active_interval: Minimum seconds between detections when active
+            idle_interval: Seconds between safety detections when idle
+            motion_cooldown: Seconds a camera stays active after activity
+        """
+        self.motion_threshold = motion_threshold
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.motion_cooldown = motion_cooldown
+
+    def decide(self,
+               activity: CameraActivity,
+               motion_score: float,
+               now: float) -> bool:
+        """
+        Record a frame's motion score and decide whether to detect.
+
+        Args:
+            activity: Camera state (updated in place)
+            motion_score: Change score of the frame
+            now: Monotonic timestamp of the frame
+
+        Returns:
+            bool: True if full detection should run on this frame
+        """
+        activity.frames_seen += 1
+        activity.motion_score = motion_score
+        if motion_score >= self.motion_threshold or activity.active_tracks > 0:
+            activity.last_motion = now
+
+        active = now - activity.last_motion <= self.motion_cooldown
+        activity.mode = 'active' if active else 'idle'
+
+        interval = self.active_interval if active else self.idle_interval
+        if now - activity.last_detection < interval:
+            return False
+
+        activity.last_detection = now
+        activity.frames_detected += 1
+        return True
+
+
+class DetectionGate:
+    """
+    Motion-gated detection scheduler for a set of cameras.
+
+    Configuration:
+        camera.motion_width: Analysis width in pixels (default: 160)
+        camera.motion_pixel_threshold: Per-pixel change (default: 20)
+        camera.motion_threshold: Changed-pixel fraction (default: 0.005)
+        camera.active_detection_interval: Seconds, active (default: 0)
+        camera.idle_detection_interval: Seconds, idle (default: 2.0)
+        camera.motion_cooldown: Seconds (default: 3.0)
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self._width = config.get('camera.motion_width', 160)
+        self._pixel_threshold = config.get('camera.motion_pixel_threshold', 20)
+        self.policy = AdaptiveDetectionPolicy(
+            motion_threshold=config.get('camera.motion_threshold', 0.005),
+            active_interval=config.get('camera.active_detection_interval', 0.0),
+            idle_interval=config.get('camera.idle_detection_interval', 2.0),
+            motion_cooldown=config.get('camera.motion_cooldown', 3.0)
+        )
+        self._detectors: Dict[Any, MotionDetector] = {}
+        self._activity: Dict[Any, CameraActivity] = {}
+
+    def should_detect(self,
+                      camera_id: Any,
+                      frame: np.ndarray,
+                      now: Optional[float] = None) -> bool:
+        """
+        Decide whether full detection should run on a camera's frame.
+
+        Args:
+            camera_id: Camera identifier
+            frame: Current frame
+            now: Monotonic timestamp (defaults to ``time.monotonic()``)
+
+        Returns:
+            bool: True if detection should run
+        """
+        detector = self._detectors.get(camera_id)
+        if detector is None:
+            detector = self._detectors[camera_id] = MotionDetector(
+                self._width, self._pixel_threshold
+            )
+            self._activity[camera_id] = CameraActivity()
+
+        score = detector.update(frame)
+        return self.policy.decide(
+            self._activity[camera_id],
+            score,
+            time.monotonic() if now is None else now
+        )
+
+    def report_tracks(self, camera_id: Any, active_tracks: int) -> None:
+        """Tell the gate how many faces are being tracked on a camera"""
+        activity = self._activity.setdefault(camera_id, CameraActivity())
+        activity.active_tracks = active_tracks
+
+    def remove_camera(self, camera_id: Any) -> None:
+        """Drop a camera's state"""
+        self._detectors.pop(camera_id, None)
+        self._activity.pop(camera_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-camera gating statistics"""
+        cameras = {}
+        for camera_id, activity in self._activity.items():
+            cameras[camera_id] = {
+                'mode': activity.mode,
+                'motion_score': activity.motion_score,
+                'active_tracks': activity.active_tracks,
+                'frames_seen': activity.frames_seen,
+                'frames_detected': activity.frames_detected,
+                'frames_skipped': activity.frames_seen - activity.frames_detected
+            }
+        return {
+            'cameras': cameras,
+            'idle_cameras': sum(1 for a in self._activity.values() if a.mode == 'idle')
+        }
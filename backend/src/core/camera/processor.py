@@ -15,8 +15,8 @@ Dependencies:
 - NumPy: Frame data manipulation
 - AsyncIO: Asynchronous operations
 - Core services:
-  - FaceRecognition: Face detection
-  - EventBus: Event handling
+  - FaceRecognitionSystem: Face detection
+  - EventManager: Event handling
   - Logging: System logging
 
 Architecture:
@@ -61,8 +61,9 @@ import cv2
 import numpy as np
 
 from ...utils.logging import get_logger
-from ..events import EventBus
-from ..recognition import FaceRecognition
+from ..events.manager import EventManager
+from ..face_recognition import get_face_recognition_system
+from .ring_buffer import FrameRingBuffer
 
 logger = get_logger(__name__)
 
@@ -75,10 +76,10 @@ class StreamProcessor:
         url (str): Stream URL (RTSP/HTTP)
         config (Dict): Stream configuration
         _capture: OpenCV video capture
-        _buffer (List): Frame buffer
+        _buffer (FrameRingBuffer): Shared-memory frame ring buffer
         _running (bool): Processing status
-        _event_bus (EventBus): Event handling
-        _face_recognition (FaceRecognition): Face detection
+        _event_bus (EventManager): Event handling
+        _face_recognition (FaceRecognitionSystem): Face detection
         _stats (Dict): Performance statistics
         
     Configuration:
@@ -123,10 +124,10 @@ class StreamProcessor:
         self.url = url
         self.config = self._validate_config(config or {})
         self._capture = None
-        self._buffer = []
+        self._buffer: Optional[FrameRingBuffer] = None
         self._running = False
-        self._event_bus = EventBus()
-        self._face_recognition = FaceRecognition()
+        self._event_bus = EventManager()
+        self._face_recognition = get_face_recognition_system()
         self._stats = self._init_stats()
         
     async def start(self) -> bool:
@@ -198,8 +199,8 @@ class StreamProcessor:
                 self._capture.release()
                 self._capture = None
                 
-            # Clear buffer
-            self._buffer.clear()
+            # Release buffer
+            self._release_buffer()
             
             # Emit event
             await self._event_bus.emit(
@@ -211,10 +212,14 @@ class StreamProcessor:
             logger.error(f"Stream stop failed: {str(e)}")
             await self._handle_error(e)
             
-    async def get_frame(self) -> Optional[np.ndarray]:
+    async def get_frame(self, copy: bool = True) -> Optional[np.ndarray]:
         """
         Get latest frame from buffer.
         
+        Args:
+            copy: Return a private copy; with False a read-only zero-copy
+                view is returned, valid until the ring buffer wraps
+        
         Returns:
             Optional[np.ndarray]: Frame data if available
             
@@ -226,10 +231,12 @@ class StreamProcessor:
             - Event logging
         """
         try:
-            if not self._buffer:
+            latest = self._buffer.latest() if self._buffer is not None else None
+            if latest is None:
                 return None
                 
-            return self._buffer[-1].copy()
+            frame = latest[2]
+            return frame.copy() if copy else frame
             
         except Exception as e:
             logger.error(f"Frame access failed: {str(e)}")
@@ -341,7 +348,7 @@ class StreamProcessor:
             - Event dispatch
         """
         self._running = False
-        self._buffer.clear()
+        self._release_buffer()
         self._stats = self._init_stats()
         if self._capture:
             self._capture.release()
@@ -409,8 +416,12 @@ class StreamProcessor:
         """
         try:
             while self._running:
-                # Read frame
-                ret, frame = self._capture.read()
+                # Read frame, decoding straight into the next ring slot
+                if self._buffer is not None:
+                    _, slot = self._buffer.acquire()
+                    ret, frame = self._capture.read(slot)
+                else:
+                    ret, frame = self._capture.read()
                 if not ret:
                     raise RuntimeError("Frame capture failed")
                     
@@ -484,12 +495,30 @@ class StreamProcessor:
             - Error handling
             - Stats update
         """
-        # Add frame
-        self._buffer.append(frame)
+        # Allocate the ring on the first frame, sized to the real stream
+        if (self._buffer is None or
+                self._buffer.slots != self.config["buffer_size"]):
+            self._release_buffer()
+            self._buffer = FrameRingBuffer(
+                self.config["buffer_size"],
+                frame.shape,
+                frame.dtype
+            )
+            
+        # Add frame; a no-op copy when it was decoded into the slot
+        self._buffer.write(frame)
+        
+    def _release_buffer(self) -> None:
+        """
+        Release the frame ring buffer.
         
-        # Control size
-        while len(self._buffer) > self.config["buffer_size"]:
-            self._buffer.pop(0)
+        Features:
+            - Shared memory cleanup
+            - State reset
+        """
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
             
     def _update_stats(self) -> None:
         """
@@ -503,7 +532,7 @@ class StreamProcessor:
             - Quality metrics
         """
         self._stats["frames_processed"] += 1
-        self._stats["buffer_size"] = len(self._buffer)
+        self._stats["buffer_size"] = len(self._buffer) if self._buffer is not None else 0
         self._stats["last_frame"] = datetime.now()
         
         # Calculate FPS
@@ -638,4 +667,3 @@ class StreamProcessor:
             logger.error(
                 f"Error handling failed: {str(e)}"
             )
-""" 
\ No newline at end of file
@@ -0,0 +1,269 @@
+"""
+File: ring_buffer.py
+Purpose: Shared-memory frame ring buffer for camera feeds in the CernoID system.
+
+Key Features:
+- Preallocated fixed-slot frame storage per camera
+- In-place writes by the producer (capture/resize straight into a slot)
+- Zero-copy numpy views for consumers
+- Sequence numbers with latest-frame semantics
+- Cross-process access by shared-memory name
+
+Architecture:
+- Single producer, many consumers
+- Seqlock-style slot validation
+- Header (sequence/timestamp table) followed by frame slots
+
+Performance:
+- No per-frame allocation after start-up
+- Constant-time writes and lookups
+- No pickling or copying when frames cross process boundaries
+"""
+
+from typing import Any, Dict, Optional, Tuple
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from ..pool.frame_workers import attach_shared_memory
+
+
+class FrameRingBuffer:
+    """
+    Fixed-slot ring of frames backed by ``multiprocessing.shared_memory``.
+
+    Frame ``n`` (sequence numbers start at 1) lives in slot ``n % slots``.
+    The producer obtains a writable view with ``acquire``, fills it in
+    place and publishes it with ``commit``. Consumers get read-only views
+    that stay valid until the ring wraps around; ``is_current`` tells a
+    consumer whether the slot it read from has since been overwritten.
+
+    Memory layout:
+        int64[1]       latest committed sequence
+        int64[slots]   sequence stored in each slot (-1 while being written)
+        float64[slots] capture timestamp of each slot
+        frames         slots x shape x dtype
+
+    Attributes:
+        shape (tuple): Frame shape (height, width, channels)
+        dtype (np.dtype): Frame dtype
+        slots (int): Number of frame slots
+    """
+
+    _ALIGN = 64
+
+    def __init__(
+        self,
+        slots: int,
+        shape: Tuple[int, ...],
+        dtype: Any = np.uint8,
+        name: Optional[str] = None,
+        create: bool = True
+    ):
+        """
+        Create (or attach to) a ring buffer.
+
+        Args:
+            slots: Number of frame slots
+            shape: Frame shape, e.g. (720, 1280, 3)
+            dtype: Frame dtype
+            name: Shared-memory name (generated when creating)
+            create: Allocate a new block instead of attaching to ``name``
+        """
+        if slots <= 0:
+            raise ValueError("slots must be positive")
+
+        self.slots = int(slots)
+        self.shape = tuple(int(d) for d in shape)
+        self.dtype = np.dtype(dtype)
+        self._owner = create
+
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        header_bytes = 8 + 16 * self.slots
+        self._data_offset = -(-header_bytes // self._ALIGN) * self._ALIGN
+        size = self._data_offset + frame_bytes * self.slots
+
+        if create:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self._shm = attach_shared_memory(name)
+
+        buf = self._shm.buf
+        self._latest = np.ndarray((1,), dtype=np.int64, buffer=buf, offset=0)
+        self._slot_sequences = np.ndarray(
+            (self.slots,), dtype=np.int64, buffer=buf, offset=8
+        )
+        self._slot_timestamps = np.ndarray(
+            (self.slots,), dtype=np.float64, buffer=buf, offset=8 + 8 * self.slots
+        )
+        self._frames = np.ndarray(
+            (self.slots, *self.shape),
+            dtype=self.dtype,
+            buffer=buf,
+            offset=self._data_offset
+        )
+
+        if create:
+            self._latest[0] = 0
+            self._slot_sequences[:] = 0
+            self._slot_timestamps[:] = 0.0
+
+        self._stats = {
+            'frames_written': 0,
+            'stale_reads': 0
+        }
+
+    @classmethod
+    def attach(
+        cls,
+        name: str,
+        slots: int,
+        shape: Tuple[int, ...],
+        dtype: Any = np.uint8
+    ) -> 'FrameRingBuffer':
+        """Attach to a ring buffer created by another process"""
+        return cls(slots, shape, dtype, name=name, create=False)
+
+    @property
+    def name(self) -> str:
+        """Shared-memory name used to attach from other processes"""
+        return self._shm.name
+
+    @property
+    def latest_sequence(self) -> int:
+        """Sequence number of the newest committed frame (0 if empty)"""
+        return int(self._latest[0])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the frame slots"""
+        return int(self._frames.nbytes)
+
+    def __len__(self) -> int:
+        """Number of frames currently held"""
+        return min(self.latest_sequence, self.slots)
+
+    def acquire(self) -> Tuple[int, np.ndarray]:
+        """
+        Reserve the next slot for writing.
+
+        Returns:
+            Tuple of (sequence, writable frame view)
+        """
+        sequence = self.latest_sequence + 1
+        slot = sequence % self.slots
+        # Invalidate the slot before its pixels change
+        self._slot_sequences[slot] = -1
+        return sequence, self._frames[slot]
+
+    def commit(self, sequence: int, timestamp: Optional[float] = None) -> None:
+        """
+        Publish a frame written into the slot returned by ``acquire``.
+
+        Args:
+            sequence: Sequence number returned by ``acquire``
+            timestamp: Capture time (defaults to now)
+        """
+        slot = sequence % self.slots
+        self._slot_timestamps[slot] = time.time() if timestamp is None else timestamp
+        self._slot_sequences[slot] = sequence
+        self._latest[0] = sequence
+        self._stats['frames_written'] += 1
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None) -> int:
+        """
+        Copy (resizing if needed) a frame into the next slot.
+
+        Args:
+            frame: Source frame
+            timestamp: Capture time (defaults to now)
+
+        Returns:
+            int: Sequence number of the written frame
+        """
+        sequence, view = self.acquire()
+        if np.may_share_memory(frame, view):
+            # Already decoded in place, e.g. ``capture.read(view)``
+            pass
+        elif frame.shape == self.shape:
+            np.copyto(view, frame)
+        else:
+            # Resize straight into the slot instead of allocating a new frame
+            cv2.resize(frame, (self.shape[1], self.shape[0]), dst=view)
+        self.commit(sequence, timestamp)
+        return sequence
+
+    def get(self, sequence: int) -> Optional[np.ndarray]:
+        """
+        Zero-copy view of frame ``sequence``.
+
+        Returns:
+            Optional[np.ndarray]: Read-only view, or None if the frame was
+            overwritten or not yet written
+        """
+        if sequence <= 0:
+            return None
+        slot = sequence % self.slots
+        if self._slot_sequences[slot] != sequence:
+            self._stats['stale_reads'] += 1
+            return None
+        view = self._frames[slot]
+        view.flags.writeable = False
+        return view
+
+    def latest(self) -> Optional[Tuple[int, float, np.ndarray]]:
+        """
+        Newest committed frame.
+
+        Returns:
+            Optional[Tuple[int, float, np.ndarray]]: (sequence, timestamp, view)
+        """
+        sequence = self.latest_sequence
+        frame = self.get(sequence)
+        if frame is None:
+            return None
+        return sequence, float(self._slot_timestamps[sequence % self.slots]), frame
+
+    def timestamp(self, sequence: int) -> Optional[float]:
+        """Capture timestamp of frame ``sequence`` if it is still held"""
+        slot = sequence % self.slots
+        if sequence <= 0 or self._slot_sequences[slot] != sequence:
+            return None
+        return float(self._slot_timestamps[slot])
+
+    def is_current(self, sequence: int) -> bool:
+        """Whether frame ``sequence`` is still intact in its slot"""
+        return sequence > 0 and self._slot_sequences[sequence % self.slots] == sequence
+
+    def clear(self) -> None:
+        """Forget all frames, keeping the allocation"""
+        self._slot_sequences[:] = 0
+        self._latest[0] = 0
+
+    def close(self) -> None:
+        """Release this process's mapping, unlinking it if we created it"""
+        # Views must be dropped before the mapping can be closed
+        self._latest = self._slot_sequences = self._slot_timestamps = None
+        self._frames = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # Consumers still hold views; the mapping goes away with them
+            pass
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get ring buffer statistics"""
+        return {
+            **self._stats,
+            'slots': self.slots,
+            'frames_held': len(self),
+            'latest_sequence': self.latest_sequence,
+            'bytes': self.nbytes
+        }
@@ -88,6 +88,7 @@ class Settings(BaseSettings):
     FACE_RECOGNITION_MODEL: str = "face_recognition_model"
     MIN_FACE_CONFIDENCE: float = 0.6
     FACE_ENCODING_BATCH_SIZE: int = 32
+    FACE_ENCODING_BATCH_DELAY_MS: float = 8.0  # max wait to fill an encoding batch
     FACE_RECOGNITION_TOLERANCE: float = 0.6
     
     # Face detection settings
@@ -114,11 +115,17 @@ class Settings(BaseSettings):
     GPU_ENABLED: bool = False
     FACE_RECOGNITION_CACHE_SIZE: int = 1000
     FACE_RECOGNITION_CACHE_TTL: int = 3600  # 1 hour
+    FACE_RECOGNITION_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
     RECOGNITION_FACE_SIZE: int = 224
     RECOGNITION_MIN_QUALITY: float = 0.5
     FACE_RECOGNITION_MIN_FACE_SIZE: int = 20
     FACE_RECOGNITION_SCALE_FACTOR: float = 1.1
     FACE_RECOGNITION_MATCHING_THRESHOLD: float = 0.6
+    FACE_RECOGNITION_INDEX_CAPACITY: int = 65536  # initial rows in matching index
+    FACE_RECOGNITION_INDEX_REFRESH_SECONDS: int = 300  # 0 disables periodic reload
+    RECOGNITION_WORKER_PROCESSES: int = 2  # 0 runs CPU stages inline
+    RECOGNITION_WORKER_MAX_IN_FLIGHT: int = 8
+    RECOGNITION_WORKER_SLOT_BYTES: int = 1920 * 1080 * 3  # one 1080p BGR frame
     
     # Recognition settings
     RECOGNITION_FOCAL_LENGTH: float = 500.0
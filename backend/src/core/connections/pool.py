@@ -1,4 +1,5 @@
 from typing import Dict, Optional, Any, TypeVar, Generic
+from abc import abstractmethod
 import asyncio
 import logging
 from datetime import datetime, timedelta
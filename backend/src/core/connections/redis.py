@@ -16,6 +16,8 @@ class RedisPool(ConnectionPool[Redis]):
         self._db = self.config.get('redis.db', 0)
         self._password = self.config.get('redis.password')
         self._encoding = self.config.get('redis.encoding', 'utf-8')
+        # Binary codecs need raw bytes back
+        self._decode_responses = self.config.get('redis.decode_responses', True)
 
     @handle_errors(logger=None)  # Logger set by parent class
     async def _connect(self) -> Redis:
@@ -25,7 +27,7 @@ class RedisPool(ConnectionPool[Redis]):
             db=self._db,
             password=self._password,
             encoding=self._encoding,
-            decode_responses=True
+            decode_responses=self._decode_responses
         )
 
     async def _close_connection(self, connection: Redis) -> None:
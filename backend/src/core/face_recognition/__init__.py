@@ -2,6 +2,7 @@
 Face recognition package with advanced features.
 """
 from .matcher import FaceMatcher, MatchResult
+from .index import EmbeddingIndex, BatchMatches
 from .video_processor import VideoProcessor, VideoFrame
 from .anti_spoofing import analyze_frame
 from .core import FaceRecognitionSystem
@@ -22,6 +23,8 @@ def get_face_recognition_system():
 __all__ = [
     'FaceMatcher',
     'MatchResult',
+    'EmbeddingIndex',
+    'BatchMatches',
     'VideoProcessor',
     'VideoFrame',
     'analyze_frame',
@@ -0,0 +1,215 @@
+"""
+Micro-batching scheduler for face inference.
+
+This module provides:
+- A shared submission queue for face crops from every camera feed
+- Size- or deadline-triggered batch flushes
+- Per-item futures so callers await only their own result
+- Batch size and latency statistics
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import inspect
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collects individual inference requests and runs them as batches.
+
+    Items submitted from any coroutine are queued centrally. The first item
+    of a batch opens a window of ``max_delay`` seconds; the batch is flushed
+    when the window closes or ``max_batch_size`` items have arrived,
+    whichever comes first. Synchronous batch functions run on a dedicated
+    single-thread executor so the model is never entered concurrently and
+    the event loop is not blocked.
+    """
+
+    def __init__(self,
+                 batch_fn: Callable[[List[Any]], Sequence[Any]],
+                 max_batch_size: int = 32,
+                 max_delay: float = 0.008,
+                 max_queue_size: int = 1024,
+                 name: str = 'inference'):
+        """
+        Args:
+            batch_fn: Function mapping a list of items to a list of results
+                      (sync or async); results must align with the input
+            max_batch_size: Maximum items per batch
+            max_delay: Maximum seconds the oldest item waits for companions
+            max_queue_size: Pending items before submitters are back-pressured
+            name: Name used in logs
+        """
+        self._batch_fn = batch_fn
+        self._is_async = inspect.iscoroutinefunction(batch_fn)
+        self._max_batch_size = max(1, int(max_batch_size))
+        self._max_delay = max(0.0, float(max_delay))
+        self._max_queue_size = max_queue_size
+        self._name = name
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self._stats = {
+            'items_submitted': 0,
+            'batches_run': 0,
+            'average_batch_size': 0.0,
+            'flushed_full': 0,
+            'flushed_deadline': 0,
+            'average_wait_time': 0.0,
+            'average_batch_time': 0.0,
+            'errors': 0
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    async def start(self) -> None:
+        """Start the batching worker on the running event loop"""
+        if self.is_running:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_queue_size)
+        if not self._is_async:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix=f"{self._name}-batch"
+            )
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker and fail any requests still queued"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError(f"{self._name} batcher stopped"))
+            self._queue = None
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue one item and wait for its result.
+
+        Args:
+            item: Input for the batch function (e.g. a face crop)
+
+        Returns:
+            The batch function's result for this item
+        """
+        if not self.is_running:
+            await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        self._stats['items_submitted'] += 1
+        return await future
+
+    async def submit_many(self, items: Sequence[Any]) -> List[Any]:
+        """Queue several items and wait for all results, in order"""
+        return list(await asyncio.gather(*(self.submit(item) for item in items)))
+
+    async def _run(self) -> None:
+        """Worker loop: gather a batch, flush it, repeat"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._max_delay
+
+            while len(batch) < self._max_batch_size:
+                # Take whatever is already queued without yielding
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            if len(batch) >= self._max_batch_size:
+                self._stats['flushed_full'] += 1
+            else:
+                self._stats['flushed_deadline'] += 1
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        """Run the batch function and resolve each item's future"""
+        # Drop requests whose callers have gone away
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+
+        items = [item for item, _, _ in batch]
+        started = time.perf_counter()
+        try:
+            if self._is_async:
+                results = await self._batch_fn(items)
+            else:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._batch_fn, items
+                )
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"{self._name} batch returned {len(results)} results for {len(items)} items"
+                )
+        except asyncio.CancelledError:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError(f"{self._name} batcher stopped"))
+            raise
+        except Exception as e:
+            self._stats['errors'] += 1
+            logger.error(f"{self._name} batch of {len(items)} failed: {str(e)}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+        self._update_stats(batch, started)
+
+    def _update_stats(self, batch: List[Tuple[Any, asyncio.Future, float]],
+                      started: float) -> None:
+        """Update batch statistics"""
+        now = time.perf_counter()
+        self._stats['batches_run'] += 1
+        n = self._stats['batches_run']
+
+        wait_time = sum(started - queued for _, _, queued in batch) / len(batch)
+        for key, value in (('average_batch_size', len(batch)),
+                           ('average_wait_time', wait_time),
+                           ('average_batch_time', now - started)):
+            self._stats[key] = (self._stats[key] * (n - 1) + value) / n
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics"""
+        stats = self._stats.copy()
+        stats['queue_depth'] = self._queue.qsize() if self._queue is not None else 0
+        return stats
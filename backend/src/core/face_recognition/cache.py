@@ -0,0 +1,252 @@
+"""
+Bounded caches for face encodings and match results.
+
+This module provides:
+- Size-bounded LRU cache with per-entry TTL expiry
+- Memory accounting in bytes with a byte budget
+- Hit/miss/eviction/expiry metrics
+- Cache keys from sampled image fingerprints and quantized embeddings
+"""
+
+from typing import Any, Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import sys
+import threading
+import time
+
+import numpy as np
+
+_MISSING = object()
+
+
+def image_cache_key(image: np.ndarray, grid: int = 16) -> str:
+    """
+    Build a cache key from a downsampled fingerprint of an image.
+
+    Only a ``grid`` x ``grid`` lattice of pixels is copied and hashed. As a
+    collision guard the row and column sums are hashed too: they are reduced
+    in place without copying the crop, and every pixel contributes to them,
+    so crops that differ off the lattice still get different keys.
+
+    Args:
+        image: Face crop (any dtype, 2D or 3D)
+        grid: Number of sampled pixels per axis
+
+    Returns:
+        str: Hex digest
+    """
+    height, width = image.shape[:2]
+    sampled = image[::max(1, height // grid), ::max(1, width // grid)]
+    acc = np.float64 if image.dtype.kind in 'fc' else np.int64
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((image.shape, image.dtype.str)).encode())
+    digest.update(np.ascontiguousarray(sampled).tobytes())
+    digest.update(image.sum(axis=1, dtype=acc).tobytes())
+    digest.update(image.sum(axis=0, dtype=acc).tobytes())
+    return digest.hexdigest()
+
+
+def embedding_cache_key(encoding: np.ndarray) -> str:
+    """
+    Build a cache key from an embedding rounded to half precision.
+
+    Args:
+        encoding: Face encoding
+
+    Returns:
+        str: Hex digest
+    """
+    quantized = np.asarray(encoding, dtype=np.float16)
+    return hashlib.blake2b(quantized.tobytes(), digest_size=16).hexdigest()
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate memory held by a cached value in bytes.
+
+    Arrays count their buffers; lists and tuples count their items. Objects
+    referenced from several entries are counted once per entry.
+    """
+    if isinstance(value, np.ndarray):
+        # getsizeof includes the buffer only when the array owns it
+        return sys.getsizeof(value) + (0 if value.flags.owndata else value.nbytes)
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + sum(
+            estimate_size(item) for item in vars(value).values()
+            if isinstance(item, np.ndarray)
+        )
+    return sys.getsizeof(value)
+
+
+class BoundedCache:
+    """
+    Thread-safe LRU cache bounded by entry count, bytes and age.
+
+    Entries expire ``ttl`` seconds after they were stored. When either
+    ``max_items`` or ``max_bytes`` would be exceeded, least recently used
+    entries are evicted first.
+
+    Attributes:
+        name (str): Cache name reported in statistics
+    """
+
+    def __init__(self,
+                 max_items: int = 1000,
+                 max_bytes: Optional[int] = None,
+                 ttl: Optional[float] = None,
+                 name: str = 'cache'):
+        """
+        Args:
+            max_items: Maximum number of entries
+            max_bytes: Maximum accounted size in bytes (None = unbounded)
+            ttl: Entry lifetime in seconds (None = no expiry)
+            name: Cache name
+        """
+        self.name = name
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        # key -> (value, expires_at, nbytes)
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, float, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'rejected': 0
+        }
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Look up an entry and mark it as recently used.
+
+        Args:
+            key: Cache key
+            default: Returned on a miss
+
+        Returns:
+            Cached value or ``default``
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return default
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, nbytes: Optional[int] = None) -> bool:
+        """
+        Store an entry, evicting least recently used entries as needed.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            nbytes: Accounted size (estimated when omitted)
+
+        Returns:
+            bool: False if the value alone exceeds the byte budget
+        """
+        size = estimate_size(value) if nbytes is None else nbytes
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float('inf')
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                self._stats['rejected'] += 1
+                return False
+
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+
+            while (len(self._entries) > self.max_items or
+                   (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+            return True
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value"""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._remove(key)
+
+    def purge_expired(self) -> int:
+        """
+        Drop all expired entries.
+
+        Returns:
+            int: Number of entries removed
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, expires_at, _) in self._entries.items()
+                       if expires_at <= now]
+            for key in expired:
+                self._remove(key)
+            self._stats['expirations'] += len(expired)
+            return len(expired)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable) -> Any:
+        """Remove an entry; caller holds the lock"""
+        value, _, size = self._entries.pop(key)
+        self._bytes -= size
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.set(key, value)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Accounted size of all entries in bytes"""
+        return self._bytes
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'name': self.name,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_items': self.max_items,
+                'max_bytes': self.max_bytes,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0
+            }
@@ -51,7 +51,6 @@ from PIL import Image
 import asyncio
 import GPUtil
 from functools import lru_cache
-from cachetools import TTLCache
 import dlib
 import os
 import json
@@ -68,6 +67,10 @@ from core.config.settings import get_settings
 from gtts import gTTS
 from core.base import BaseComponent
 from core.monitoring.decorators import measure_performance
+from .index import EmbeddingIndex, BatchMatches
+from .batching import MicroBatcher
+from .cache import BoundedCache, image_cache_key
+from core.pool.frame_workers import get_frame_worker_pool, detect_faces_cascade, preprocess_face_array
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -177,11 +180,37 @@ class FaceRecognitionSystem(BaseComponent):
             self.logger.info(f"Using device: {self.device}")
             
             # Initialize caches with size limits
-            self._encoding_cache = TTLCache(maxsize=1000, ttl=3600)  # 1 hour TTL
+            self._encoding_cache = BoundedCache(
+                max_items=settings.FACE_RECOGNITION_CACHE_SIZE,
+                max_bytes=settings.FACE_RECOGNITION_CACHE_MAX_BYTES,
+                ttl=settings.FACE_RECOGNITION_CACHE_TTL,
+                name='face_encodings'
+            )
             self._detector = None
             self._encoder = None
             self._landmark_detector = None
             
+            # OpenCV detection/preprocessing runs in worker processes
+            self._frame_pool = get_frame_worker_pool()
+            
+            # Resident embedding index used for matching
+            self.matching_threshold = settings.FACE_RECOGNITION_MATCHING_THRESHOLD
+            self._index = EmbeddingIndex(
+                initial_capacity=settings.FACE_RECOGNITION_INDEX_CAPACITY
+            )
+            self._index_refresh_task: Optional[asyncio.Task] = None
+            
+            # Shared micro-batcher: face crops submitted by any camera feed
+            # are encoded together in one forward pass
+            self._batch_size = settings.FACE_ENCODING_BATCH_SIZE
+            self.use_amp = self.device == "cuda"
+            self._encoding_batcher = MicroBatcher(
+                self._encode_batch,
+                max_batch_size=self._batch_size,
+                max_delay=settings.FACE_ENCODING_BATCH_DELAY_MS / 1000.0,
+                name='face-encoding'
+            )
+            
             # Initialize statistics
             self._stats = {
                 'total_processed': 0,
@@ -233,10 +262,64 @@ class FaceRecognitionSystem(BaseComponent):
                 await self._init_landmark_detector()
                 self.logger.info("Face recognition system initialized successfully")
             
+            # Warm the matching index once so matching never queries the database
+            await self._warm_index()
+            
+            # Pick up faces deactivated or added by other processes
+            if settings.FACE_RECOGNITION_INDEX_REFRESH_SECONDS > 0:
+                self._index_refresh_task = asyncio.create_task(
+                    self._refresh_index_periodically(
+                        settings.FACE_RECOGNITION_INDEX_REFRESH_SECONDS
+                    )
+                )
+            
         except Exception as e:
             self.logger.error(f"Failed to initialize face recognition system: {e}")
             raise
 
+    async def _warm_index(self) -> None:
+        """Load all active face encodings into the in-memory matching index."""
+        try:
+            async with self.db_pool.get_connection() as conn:
+                stored_faces = await conn.fetch(
+                    """
+                    SELECT user_id, encoding, metadata
+                    FROM face_encodings
+                    WHERE active = true
+                    """
+                )
+            
+            # Swapped in one step so matching never sees a partial index
+            if stored_faces:
+                self._index.replace(
+                    [face['user_id'] for face in stored_faces],
+                    np.asarray([face['encoding'] for face in stored_faces], dtype=np.float32),
+                    [face['metadata'] for face in stored_faces]
+                )
+            else:
+                self._index.clear()
+            
+            self.logger.info(f"Loaded {len(self._index)} face encodings into matching index")
+            
+        except Exception as e:
+            self.logger.error(f"Failed to warm matching index: {e}")
+            raise
+
+    async def refresh_index(self) -> None:
+        """Reload the matching index from the active rows of face_encodings."""
+        await self._warm_index()
+
+    async def _refresh_index_periodically(self, interval: float) -> None:
+        """Refresh the matching index every ``interval`` seconds."""
+        while True:
+            try:
+                await asyncio.sleep(interval)
+                await self._warm_index()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"Matching index refresh failed: {e}")
+
     def _check_memory_usage(self):
         """Monitor memory usage and clear caches if needed."""
         try:
@@ -252,6 +335,14 @@ class FaceRecognitionSystem(BaseComponent):
     async def _do_cleanup(self) -> None:
         """Clean up face recognition system resources."""
         try:
+            if self._index_refresh_task is not None:
+                self._index_refresh_task.cancel()
+                self._index_refresh_task = None
+            
+            # Stop batching before the encoder goes away
+            await self._encoding_batcher.stop()
+            await self._frame_pool.stop()
+            
             # Clear caches
             if self._encoding_cache is not None:
                 self._encoding_cache.clear()
@@ -457,7 +548,7 @@ class FaceRecognitionSystem(BaseComponent):
         """
         try:
             # Preprocess image
-            face_tensor = self._preprocess_face(face_img)
+            face_tensor = await self._preprocess_face_pooled(face_img)
             if face_tensor is None:
                 return None
             
@@ -542,16 +633,28 @@ class FaceRecognitionSystem(BaseComponent):
         Returns:
             List of face detection results
         """
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Detect faces
-        faces = self._detector.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
+        if self._frame_pool.enabled:
+            # Detect faces in a worker process; the frame travels via shared memory
+            faces = await self._frame_pool.run(
+                'detect',
+                detect_faces_cascade,
+                image,
+                CASCADE_PATH,
+                1.1,
+                5,
+                (30, 30)
+            )
+        else:
+            # Convert to grayscale
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            
+            # Detect faces
+            faces = self._detector.detectMultiScale(
+                gray,
+                scaleFactor=1.1,
+                minNeighbors=5,
+                minSize=(30, 30)
+            )
         
         # Convert to list of face objects
         face_list = []
@@ -582,7 +685,7 @@ class FaceRecognitionSystem(BaseComponent):
             face_img = image[y:y+h, x:x+w]
             
             # Preprocess face image
-            face_tensor = self._preprocess_face(face_img)
+            face_tensor = await self._preprocess_face_pooled(face_img)
             if face_tensor is None:
                 raise ValueError("Failed to preprocess face image")
             
@@ -681,7 +784,10 @@ class FaceRecognitionSystem(BaseComponent):
             success = self.database.store_encoding(user_id, encoding, quality_score)
             if success:
                 # Update cache
-                self._encoding_cache[user_id] = encoding
+                self._encoding_cache.set(user_id, encoding)
+                
+                # Make the new template matchable immediately
+                self._index.add(user_id, encoding, {'quality_score': quality_score})
             
             return success
             
@@ -689,6 +795,23 @@ class FaceRecognitionSystem(BaseComponent):
             self.logger.error(f"Face registration failed: {e}")
             return False
 
+    async def unregister_face(self, user_id: int) -> int:
+        """
+        Stop matching a user's face templates.
+        
+        Call after deactivating or deleting the user's rows in
+        face_encodings; other processes drop them on their next index
+        refresh.
+        
+        Args:
+            user_id: User whose templates are removed
+            
+        Returns:
+            int: Number of templates removed from the matching index
+        """
+        self._encoding_cache.pop(user_id)
+        return self._index.remove(user_id)
+
     def _compare_encodings(self, encoding1: np.ndarray, encoding2: np.ndarray) -> float:
         """
         Compare two face encodings.
@@ -756,6 +879,30 @@ class FaceRecognitionSystem(BaseComponent):
             self.logger.error(f"Face preprocessing failed: {str(e)}")
             return None
 
+    async def _preprocess_face_pooled(self, face_img: np.ndarray) -> Optional[torch.Tensor]:
+        """
+        Preprocess a face image with the resize/colour conversion done in a
+        worker process, so it does not block the event loop.
+        
+        Args:
+            face_img: Input face image
+            
+        Returns:
+            Optional[torch.Tensor]: Preprocessed face tensor
+        """
+        if not self._frame_pool.enabled:
+            return self._preprocess_face(face_img)
+        try:
+            face_array = await self._frame_pool.run(
+                'preprocess', preprocess_face_array, face_img, self._face_size
+            )
+            face_tensor = self._normalize(torch.from_numpy(face_array))
+            return face_tensor.to(self.device)
+            
+        except Exception as e:
+            self.logger.error(f"Face preprocessing failed: {str(e)}")
+            return None
+
     async def _estimate_pose(self, landmarks: np.ndarray) -> Tuple[float, float, float]:
         """
         Estimate face pose from landmarks.
@@ -909,98 +1056,187 @@ class FaceRecognitionSystem(BaseComponent):
         """
         Encode multiple detected faces.
         
+        Cache misses are submitted to the shared encoding batcher, so faces
+        from concurrent callers (e.g. different cameras) share forward passes.
+        
         Args:
             detections: List of face detections
             
         Returns:
             List[np.ndarray]: Face encodings
         """
-        encodings = []
-        batch_tensors = []
-        cached_indices = []
+        encodings: List[Optional[np.ndarray]] = [None] * len(detections)
+        pending = []
         
         # Process cache hits first
         for idx, detection in enumerate(detections):
-            cache_key = hash(detection.face_image.tobytes())
-            if cache_key in self._encoding_cache:
-                encodings.append(self._encoding_cache[cache_key])
-                cached_indices.append(idx)
+            cache_key = image_cache_key(detection.face_image)
+            cached = self._encoding_cache.get(cache_key)
+            if cached is not None:
+                encodings[idx] = cached
+                self._stats['cache_hits'] += 1
                 continue
-            # Preprocess for model
-            face_tensor = self._preprocess_face(detection.face_image)
+            self._stats['cache_misses'] += 1
+            pending.append((idx, cache_key))
+        
+        # Encode the remaining faces through the shared batcher
+        if pending:
+            results = await self._encoding_batcher.submit_many(
+                [detections[idx].face_image for idx, _ in pending]
+            )
+            for (idx, cache_key), feature in zip(pending, results):
+                if feature is None:
+                    continue
+                encodings[idx] = feature
+                self._encoding_cache.set(cache_key, feature)
+        
+        return [encoding for encoding in encodings if encoding is not None]
+
+    async def encode_face(self, face_image: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Encode a single face crop via the shared batcher.
+        
+        Intended for per-camera pipelines: each feed awaits its own crop while
+        the batcher groups crops from all feeds into one forward pass.
+        
+        Args:
+            face_image: Cropped face image
+            
+        Returns:
+            Optional[np.ndarray]: Face encoding, None if preprocessing failed
+        """
+        return await self._encoding_batcher.submit(face_image)
+
+    def _encode_batch(self, face_images: List[np.ndarray]) -> List[Optional[np.ndarray]]:
+        """
+        Run the encoder over a batch of face crops.
+        
+        Executed by the encoding batcher on its worker thread.
+        
+        Args:
+            face_images: Face crops collected by the batcher
+            
+        Returns:
+            List[Optional[np.ndarray]]: One encoding per crop, None where
+            preprocessing failed
+        """
+        results: List[Optional[np.ndarray]] = [None] * len(face_images)
+        tensors = []
+        positions = []
+        for idx, face_image in enumerate(face_images):
+            face_tensor = self._preprocess_face(face_image)
             if face_tensor is not None:
-                batch_tensors.append(face_tensor)
+                tensors.append(face_tensor)
+                positions.append(idx)
+        
+        if not tensors:
+            return results
         
-        # Process remaining faces in optimized batches
-        if batch_tensors:
+        batch = torch.cat(tensors).to(self.device)
+        while True:
             try:
+                features = []
                 with torch.cuda.amp.autocast(enabled=self.use_amp):
-                    # Stack tensors for batch processing
-                    batch = torch.cat(batch_tensors).to(self.device)
-                    
                     # Process in sub-batches if needed
                     for i in range(0, len(batch), self._batch_size):
-                        sub_batch = batch[i:i + self._batch_size]
                         with torch.no_grad():
-                            features = self._encoder(sub_batch)
-                            # Move to CPU and convert to numpy
-                            features = features.cpu().numpy()
-                            encodings.extend(features)
-                            
-                            # Update cache
-                            for feat, det_idx in zip(features, range(i, min(i + self._batch_size, len(batch)))):
-                                if det_idx not in cached_indices:
-                                    cache_key = hash(detections[det_idx].face_image.tobytes())
-                                    self._encoding_cache[cache_key] = feat
-            
+                            sub_batch = batch[i:i + self._batch_size]
+                            features.extend(self._encoder(sub_batch).cpu().numpy())
+                break
             except RuntimeError as e:
-                if "out of memory" in str(e):
-                    # Clear cache and retry with smaller batch
-                    torch.cuda.empty_cache()
-                    self._batch_size = max(1, self._batch_size // 2)
-                    self.logger.warning(f"Reduced batch size to {self._batch_size} due to OOM")
-                    return await self.encode_faces(detections)
-                raise
+                if "out of memory" not in str(e) or self._batch_size == 1:
+                    raise
+                # Clear cache and retry with smaller batch
+                torch.cuda.empty_cache()
+                self._batch_size = max(1, self._batch_size // 2)
+                self.logger.warning(f"Reduced batch size to {self._batch_size} due to OOM")
         
-        return encodings
+        for idx, feature in zip(positions, features):
+            results[idx] = feature
+        return results
 
     @handle_errors
     @measure_performance()
-    async def find_matches(self, encoding: np.ndarray) -> List[FaceMatch]:
+    async def find_matches(self,
+                           encoding: np.ndarray,
+                           k: Optional[int] = None) -> List[FaceMatch]:
         """
         Find matching faces for an encoding.
         
+        Matching runs entirely against the resident embedding index, which
+        is warmed at initialization, kept current by register_face and
+        unregister_face, and re-read from the database by refresh_index.
+        
         Args:
             encoding: Face encoding to match
+            k: Maximum number of matches to return (default: every face
+               above the matching threshold)
             
         Returns:
-            List[FaceMatch]: Matching results
+            List[FaceMatch]: Matching results sorted by confidence
         """
-        async with self.db_pool.get_connection() as conn:
-            # Get stored encodings with optimized query
-            stored_faces = await conn.fetch(
-                """
-                SELECT user_id, encoding, metadata
-                FROM face_encodings
-                WHERE active = true
-                """
+        if k is None:
+            distances, rows, snapshot = self._index.range_search(
+                encoding,
+                1 - self.matching_threshold
             )
+        else:
+            snapshot = self._index.snapshot()
+            distances, rows = self._index.search(encoding, k, snapshot)
+            distances, rows = distances[0], rows[0]
+        
+        matches = []
+        for distance, row in zip(distances, rows):
+            # Same similarity measure as before: 1 - euclidean distance
+            similarity = 1 - float(distance)
+            if similarity <= self.matching_threshold:
+                # Results are sorted by distance, nothing further can match
+                break
+            
+            matches.append(FaceMatch(
+                user_id=self._index.label(row, snapshot),
+                confidence=similarity,
+                metadata=self._index.metadata(row, snapshot)
+            ))
+        
+        return matches
+
+    @handle_errors
+    @measure_performance()
+    async def match_batch(self, encodings: np.ndarray, k: int = 5) -> BatchMatches:
+        """
+        Match every face of a frame (or of several cameras) in one search.
+        
+        Args:
+            encodings: Face encodings of shape (n, dimension)
+            k: Maximum number of distinct users returned per face
             
-            matches = []
-            for face in stored_faces:
-                # Calculate similarity
-                similarity = 1 - np.linalg.norm(encoding - np.array(face['encoding']))
-                
-                if similarity > self.matching_threshold:
-                    matches.append(FaceMatch(
-                        user_id=face['user_id'],
-                        confidence=float(similarity),
-                        metadata=face['metadata']
-                    ))
-            
-            # Sort by confidence
-            matches.sort(key=lambda x: x.confidence, reverse=True)
-            return matches
+        Returns:
+            BatchMatches: Columnar results; labels are user IDs and scores
+            use the same similarity as find_matches
+        """
+        encodings = np.asarray(encodings, dtype=np.float32)
+        if encodings.ndim == 1:
+            encodings = encodings.reshape(1, -1)
+        if encodings.shape[0] == 0 or len(self._index) == 0:
+            return BatchMatches.empty()
+        
+        snapshot = self._index.snapshot()
+        distances, rows, keep = self._index.search_unique(
+            encodings,
+            k,
+            max_distance=1 - self.matching_threshold,
+            snapshot=snapshot
+        )
+        
+        query_index, column = np.nonzero(keep)
+        matched_rows = rows[query_index, column]
+        return BatchMatches(
+            query_index=query_index,
+            rows=matched_rows,
+            labels=self._index.labels(matched_rows, snapshot),
+            scores=(1 - distances[query_index, column]).astype(np.float32)
+        )
 
     def clear_caches(self) -> None:
         """Clear all system caches."""
@@ -0,0 +1,159 @@
+"""
+Memory-mapped on-disk embedding store.
+
+This module provides:
+- Single binary file per gallery: header, embedding matrix, ID table
+- Fixed-dimension float32 or float16 rows
+- Read-only ``np.memmap`` access (no parse step, no per-row objects)
+- One physical copy in the page cache shared by all worker processes
+- Atomic writes (temporary file + rename)
+
+File layout (little endian):
+    header   magic, version, dtype, dimension, count, ID table offset/size
+    matrix   count x dimension rows, starting at a 64-byte aligned offset
+    ID table JSON array of row IDs
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+from pathlib import Path
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+_MAGIC = b'CERNOEMB'
+_VERSION = 1
+_HEADER = struct.Struct('<8sH4sIQQQ')
+_DATA_OFFSET = 64
+_WRITE_CHUNK_ROWS = 65536
+
+
+class EmbeddingStore:
+    """
+    Read-only view of an embedding file.
+
+    Attributes:
+        ids (List[str]): Row IDs in file order
+        embeddings (np.ndarray): Memory-mapped matrix of shape (count, dimension)
+    """
+
+    def __init__(self, path: Path, ids: List[str], embeddings: np.ndarray):
+        self.path = Path(path)
+        self.ids = ids
+        self.embeddings = embeddings
+        self._rows: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> 'EmbeddingStore':
+        """
+        Map an embedding file.
+
+        Args:
+            path: File written by ``EmbeddingStore.write``
+
+        Returns:
+            EmbeddingStore
+        """
+        path = Path(path)
+        with open(path, 'rb') as f:
+            magic, version, dtype, dimension, count, ids_offset, ids_size = \
+                _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"Not an embedding store: {path}")
+            f.seek(ids_offset)
+            ids = json.loads(f.read(ids_size))
+
+        dtype = np.dtype(dtype.decode().strip())
+        if count:
+            embeddings = np.memmap(path, dtype=dtype, mode='r',
+                                   offset=_DATA_OFFSET, shape=(count, dimension))
+        else:
+            embeddings = np.zeros((0, dimension), dtype=dtype)
+        return cls(path, ids, embeddings)
+
+    @staticmethod
+    def write(path: Union[str, Path],
+              ids: Sequence[str],
+              embeddings: Union[np.ndarray, Iterable[np.ndarray]],
+              dimension: Optional[int] = None,
+              dtype: Union[str, np.dtype] = np.float32) -> None:
+        """
+        Atomically write an embedding file.
+
+        Args:
+            path: Destination file
+            ids: Row IDs
+            embeddings: Matrix, or blocks of rows written in order (avoids
+                assembling one large matrix first)
+            dimension: Row dimension (required for empty galleries given
+                as blocks)
+            dtype: Stored dtype, float32 or float16
+        """
+        path = Path(path)
+        dtype = np.dtype(dtype).newbyteorder('<')
+        blocks = [embeddings] if isinstance(embeddings, np.ndarray) else embeddings
+        # Unique temporary name: concurrent writers must not share a file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + '.', suffix='.tmp')
+
+        count = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(b'\0' * _DATA_OFFSET)
+                for block in blocks:
+                    block = np.asarray(block)
+                    block = block.reshape(-1, block.shape[-1])
+                    if dimension is None:
+                        dimension = block.shape[1]
+                    elif block.shape[1] != dimension:
+                        raise ValueError(f"Expected dimension {dimension}, got {block.shape[1]}")
+                    for start in range(0, len(block), _WRITE_CHUNK_ROWS):
+                        chunk = block[start:start + _WRITE_CHUNK_ROWS]
+                        f.write(np.ascontiguousarray(chunk, dtype=dtype).tobytes())
+                    count += len(block)
+
+                if count != len(ids):
+                    raise ValueError(f"{len(ids)} IDs for {count} embeddings")
+
+                ids_offset = f.tell()
+                ids_bytes = json.dumps(list(ids)).encode()
+                f.write(ids_bytes)
+                f.seek(0)
+                f.write(_HEADER.pack(_MAGIC, _VERSION, dtype.str.encode().ljust(4),
+                                     dimension or 0, count, ids_offset, len(ids_bytes)))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+
+    @property
+    def dimension(self) -> int:
+        return self.embeddings.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row(self, face_id: str) -> Optional[int]:
+        """Row of an ID (the lookup table is built on first use)"""
+        if self._rows is None:
+            self._rows = {face_id: row for row, face_id in enumerate(self.ids)}
+        return self._rows.get(face_id)
+
+    def vectors(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Copy rows out of the map as float32.
+
+        Args:
+            rows: Row numbers (default: all rows)
+
+        Returns:
+            np.ndarray: Matrix of shape (len(rows), dimension)
+        """
+        embeddings = self.embeddings if rows is None else self.embeddings[rows]
+        return np.array(embeddings, dtype=np.float32)
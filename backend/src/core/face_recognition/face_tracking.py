@@ -1,7 +1,7 @@
 """
 Advanced face tracking system with anti-spoofing capabilities and Kalman filtering.
 """
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 import cv2
 from dataclasses import dataclass
@@ -29,6 +29,105 @@ class TrackingInfo:
     features: Optional[np.ndarray] = None
     anti_spoof_score: Optional[float] = None
     depth_map: Optional[np.ndarray] = None
+    quality: float = 0.0  # quality of the latest detection
+    match_confidence: Optional[float] = None
+    identity_quality: Optional[float] = None  # quality when identity was resolved
+    identified_at: Optional[datetime] = None
+
+def iou_matrix(boxes1: np.ndarray, boxes2: np.ndarray) -> np.ndarray:
+    """
+    Intersection over Union for every pair of boxes.
+    
+    Args:
+        boxes1: Array of shape (n, 4) in (x, y, w, h) format
+        boxes2: Array of shape (m, 4) in (x, y, w, h) format
+        
+    Returns:
+        np.ndarray: IoU matrix of shape (n, m)
+    """
+    boxes1 = np.asarray(boxes1, dtype=np.float32).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=np.float32).reshape(-1, 4)
+    
+    # Intersection width/height, computed in place to limit temporaries
+    width = np.minimum((boxes1[:, 0] + boxes1[:, 2])[:, None],
+                       (boxes2[:, 0] + boxes2[:, 2])[None, :])
+    width -= np.maximum(boxes1[:, 0, None], boxes2[None, :, 0])
+    np.clip(width, 0, None, out=width)
+    
+    height = np.minimum((boxes1[:, 1] + boxes1[:, 3])[:, None],
+                        (boxes2[:, 1] + boxes2[:, 3])[None, :])
+    height -= np.maximum(boxes1[:, 1, None], boxes2[None, :, 1])
+    np.clip(height, 0, None, out=height)
+    
+    inter = width
+    inter *= height
+    
+    union = height
+    np.add((boxes1[:, 2] * boxes1[:, 3])[:, None],
+           (boxes2[:, 2] * boxes2[:, 3])[None, :],
+           out=union)
+    union -= inter
+    
+    # Empty unions only occur for degenerate boxes, whose intersection is 0
+    np.divide(inter, union, out=inter, where=union > 0)
+    return inter
+
+def match_boxes(track_boxes: np.ndarray,
+                detection_boxes: np.ndarray,
+                iou_threshold: float) -> Tuple[List[Tuple[int, int]], List[int], List[int]]:
+    """
+    Assign detections to tracks by IoU.
+    
+    Pairs below ``iou_threshold`` are gated out before assignment. Tracks
+    and detections with exactly one candidate that is mutual are matched
+    directly; only the remaining contested pairs go through the Hungarian
+    algorithm, so sparse scenes never pay for a full n x m assignment.
+    
+    Args:
+        track_boxes: Array of shape (n, 4) in (x, y, w, h) format
+        detection_boxes: Array of shape (m, 4) in (x, y, w, h) format
+        iou_threshold: Minimum IoU for a match
+        
+    Returns:
+        Tuple of (matches, unmatched_tracks, unmatched_detections)
+    """
+    n, m = len(track_boxes), len(detection_boxes)
+    if n == 0 or m == 0:
+        return [], list(range(n)), list(range(m))
+    
+    iou = iou_matrix(track_boxes, detection_boxes)
+    candidates = iou >= iou_threshold
+    
+    # Unambiguous pairs: the only candidate of both its track and detection
+    row_degree = candidates.sum(axis=1)
+    col_degree = candidates.sum(axis=0)
+    rows, cols = np.nonzero(candidates)
+    direct = (row_degree[rows] == 1) & (col_degree[cols] == 1)
+    matched_rows = [rows[direct]]
+    matched_cols = [cols[direct]]
+    
+    # Contested pairs: solve only the sub-problem they span
+    contested_rows = np.unique(rows[~direct])
+    contested_cols = np.unique(cols[~direct])
+    if len(contested_rows):
+        sub = iou[np.ix_(contested_rows, contested_cols)]
+        sub_rows, sub_cols = linear_sum_assignment(-sub)
+        keep = sub[sub_rows, sub_cols] >= iou_threshold
+        matched_rows.append(contested_rows[sub_rows[keep]])
+        matched_cols.append(contested_cols[sub_cols[keep]])
+    
+    matched_rows = np.concatenate(matched_rows)
+    matched_cols = np.concatenate(matched_cols)
+    
+    unmatched_tracks = np.ones(n, dtype=bool)
+    unmatched_tracks[matched_rows] = False
+    unmatched_detections = np.ones(m, dtype=bool)
+    unmatched_detections[matched_cols] = False
+    
+    matches = list(zip(matched_rows.tolist(), matched_cols.tolist()))
+    return (matches,
+            np.flatnonzero(unmatched_tracks).tolist(),
+            np.flatnonzero(unmatched_detections).tolist())
 
 class FaceTracker:
     """Advanced face tracking system with anti-spoofing"""
@@ -43,6 +142,12 @@ class FaceTracker:
         self._iou_threshold = self.config.get('tracking.iou_threshold', 0.3)
         self._max_tracks = self.config.get('tracking.max_tracks', 50)
         
+        # Identity caching: tracks keep their resolved identity and are
+        # re-identified only when new, clearly better, or stale
+        self._reid_interval = self.config.get('tracking.reid_interval', 2.0)
+        self._reid_quality_gain = self.config.get('tracking.reid_quality_gain', 0.1)
+        self._latest_detections: Dict[str, FaceDetection] = {}
+        
         # Initialize Kalman filter parameters
         self._init_kalman_parameters()
         
@@ -67,7 +172,9 @@ class FaceTracker:
             'total_tracks': 0,
             'average_track_length': 0.0,
             'track_switches': 0,
-            'spoof_attempts': 0
+            'spoof_attempts': 0,
+            'identifications': 0,
+            'identity_cache_hits': 0
         }
 
     def _init_kalman_parameters(self) -> None:
@@ -121,28 +228,43 @@ class FaceTracker:
         except Exception as e:
             self.logger.error(f"Failed to load anti-spoofing models: {str(e)}")
 
-    async def update(self, detections: List[FaceDetection], frame: np.ndarray) -> List[TrackingInfo]:
-        """Update tracks with new detections"""
+    async def update(self,
+                     detections: List[FaceDetection],
+                     frame: np.ndarray,
+                     recognizer: Optional[Any] = None) -> List[TrackingInfo]:
+        """
+        Update tracks with new detections.
+        
+        Args:
+            detections: Face detections of the current frame
+            frame: Current frame
+            recognizer: Optional recognition system (``encode_face`` and
+                        ``match_batch``); when given, tracks are identified
+                        through ``identify``
+        """
         try:
+            self._latest_detections = {}
+            
             # Predict new locations
             if self._prediction_enabled:
                 self._predict_tracks()
             
             # Match detections to tracks
+            track_ids = list(self._tracks.keys())
             matches, unmatched_tracks, unmatched_detections = \
                 await self._match_detections(detections)
             
             # Update matched tracks
             for track_idx, det_idx in matches:
                 await self._update_track(
-                    list(self._tracks.keys())[track_idx],
+                    track_ids[track_idx],
                     detections[det_idx],
                     frame
                 )
             
             # Handle unmatched tracks
             for track_idx in unmatched_tracks:
-                track_id = list(self._tracks.keys())[track_idx]
+                track_id = track_ids[track_idx]
                 await self._update_unmatched_track(track_id)
             
             # Create new tracks
@@ -152,6 +274,10 @@ class FaceTracker:
             # Remove old tracks
             await self._remove_old_tracks()
             
+            # Resolve identities for new or stale tracks only
+            if recognizer is not None:
+                await self.identify(recognizer)
+            
             # Update statistics
             self._update_stats()
             
@@ -160,36 +286,31 @@ class FaceTracker:
         except Exception as e:
             raise TrackingError(f"Track update failed: {str(e)}")
 
+    def _predict_tracks(self) -> None:
+        """Advance every track's Kalman state by one frame"""
+        for track_id, state in self._kalman_states.items():
+            state['state'] = np.dot(self._state_matrix, state['state'])
+            state['covariance'] = np.dot(
+                np.dot(self._state_matrix, state['covariance']),
+                self._state_matrix.T
+            ) + self._process_noise
+            
+            track = self._tracks.get(track_id)
+            if track is not None:
+                x, y = state['state'][0, 0], state['state'][1, 0]
+                track.bbox = (int(round(x)), int(round(y)), track.bbox[2], track.bbox[3])
+
     async def _match_detections(self, detections: List[FaceDetection]) -> Tuple[List, List, List]:
         """Match detections to existing tracks"""
         try:
             if not self._tracks or not detections:
                 return [], list(range(len(self._tracks))), list(range(len(detections)))
             
-            # Calculate IoU matrix
-            iou_matrix = np.zeros((len(self._tracks), len(detections)))
-            for i, track in enumerate(self._tracks.values()):
-                for j, det in enumerate(detections):
-                    iou_matrix[i, j] = self._calculate_iou(
-                        track.bbox,
-                        det.bbox
-                    )
+            # Vectorized IoU, gating and assignment
+            track_boxes = np.array([track.bbox for track in self._tracks.values()])
+            detection_boxes = np.array([det.bbox for det in detections])
             
-            # Apply Hungarian algorithm
-            track_indices, det_indices = linear_sum_assignment(-iou_matrix)
-            
-            # Filter matches using threshold
-            matches = []
-            unmatched_tracks = list(range(len(self._tracks)))
-            unmatched_detections = list(range(len(detections)))
-            
-            for track_idx, det_idx in zip(track_indices, det_indices):
-                if iou_matrix[track_idx, det_idx] >= self._iou_threshold:
-                    matches.append((track_idx, det_idx))
-                    unmatched_tracks.remove(track_idx)
-                    unmatched_detections.remove(det_idx)
-            
-            return matches, unmatched_tracks, unmatched_detections
+            return match_boxes(track_boxes, detection_boxes, self._iou_threshold)
             
         except Exception as e:
             self.logger.error(f"Detection matching failed: {str(e)}")
@@ -203,8 +324,10 @@ class FaceTracker:
             # Update bbox and confidence
             track.bbox = detection.bbox
             track.confidence = detection.confidence
+            track.quality = self._detection_quality(detection)
             track.last_seen = datetime.utcnow()
             track.age += 1
+            self._latest_detections[track_id] = detection
             
             # Perform anti-spoofing check
             anti_spoof_score = await self._check_anti_spoofing(frame, detection)
@@ -262,6 +385,16 @@ class FaceTracker:
         except Exception as e:
             self.logger.error(f"Track update failed: {str(e)}")
 
+    async def _update_unmatched_track(self, track_id: str) -> None:
+        """Coast an unmatched track on its motion prediction"""
+        track = self._tracks.get(track_id)
+        if track is None:
+            return
+        # Without a measurement the track keeps its predicted bbox; it is
+        # dropped by _remove_old_tracks once unseen for longer than max_age
+        if not self._prediction_enabled:
+            track.velocity = (0, 0)
+
     async def _check_anti_spoofing(self, frame: np.ndarray, detection: FaceDetection) -> float:
         """Perform comprehensive anti-spoofing check"""
         try:
@@ -312,8 +445,10 @@ class FaceTracker:
                 confidence=detection.confidence,
                 velocity=(0, 0),
                 age=1,
-                last_seen=datetime.utcnow()
+                last_seen=datetime.utcnow(),
+                quality=self._detection_quality(detection)
             )
+            self._latest_detections[track_id] = detection
             
             # Initialize Kalman filter state
             self._kalman_states[track_id] = {
@@ -339,6 +474,92 @@ class FaceTracker:
         except Exception as e:
             self.logger.error(f"Track creation failed: {str(e)}")
 
+    def _detection_quality(self, detection: FaceDetection) -> float:
+        """Quality of a detection, falling back to detector confidence"""
+        if detection.features is not None:
+            return float(detection.features.quality)
+        return float(detection.confidence or 0.0)
+
+    def _needs_identification(self, track: TrackingInfo, now: datetime) -> bool:
+        """Check whether a track's cached identity must be refreshed"""
+        if track.identified_at is None:
+            return True
+        if track.quality - (track.identity_quality or 0.0) >= self._reid_quality_gain:
+            return True
+        return (now - track.identified_at).total_seconds() >= self._reid_interval
+
+    async def identify(self, recognizer: Any) -> List[TrackingInfo]:
+        """
+        Encode and match only the tracks whose identity is missing or stale.
+        
+        Tracks seen in the latest update keep their cached embedding and
+        identity unless they are new, their detection quality improved by
+        ``tracking.reid_quality_gain``, or ``tracking.reid_interval``
+        seconds have passed since they were identified.
+        
+        Args:
+            recognizer: Object providing ``encode_face(face_image)`` and
+                        ``match_batch(encodings, k)`` (e.g. FaceRecognitionSystem)
+            
+        Returns:
+            List[TrackingInfo]: Tracks that were (re-)identified
+        """
+        try:
+            now = datetime.utcnow()
+            spoof_threshold = self.config.get('anti_spoofing.threshold', 0.8)
+            
+            pending = []
+            for track_id, detection in self._latest_detections.items():
+                track = self._tracks.get(track_id)
+                if track is None:
+                    continue
+                if track.anti_spoof_score is not None and track.anti_spoof_score < spoof_threshold:
+                    continue
+                if self._needs_identification(track, now):
+                    pending.append((track, detection))
+                else:
+                    self._stats['identity_cache_hits'] += 1
+                    
+            if not pending:
+                return []
+                
+            # Crops are encoded concurrently so the recognizer can batch them
+            embeddings = await asyncio.gather(*(
+                recognizer.encode_face(detection.face_image)
+                for _, detection in pending
+            ))
+            encoded = [
+                (track, embedding)
+                for (track, _), embedding in zip(pending, embeddings)
+                if embedding is not None
+            ]
+            if not encoded:
+                return []
+                
+            matches = await recognizer.match_batch(
+                np.stack([np.asarray(embedding).ravel() for _, embedding in encoded]),
+                k=1
+            )
+            
+            for query, (track, embedding) in enumerate(encoded):
+                best = matches.for_query(query)
+                face_id = str(best.labels[0]) if len(best) else None
+                if track.face_id is not None and face_id != track.face_id:
+                    self._stats['track_switches'] += 1
+                    
+                track.face_id = face_id
+                track.match_confidence = float(best.scores[0]) if len(best) else None
+                track.features = embedding
+                track.identity_quality = track.quality
+                track.identified_at = now
+                
+            self._stats['identifications'] += len(encoded)
+            return [track for track, _ in encoded]
+            
+        except Exception as e:
+            self.logger.error(f"Track identification failed: {str(e)}")
+            return []
+
     async def _remove_old_tracks(self) -> None:
         """Remove old tracks"""
         try:
@@ -367,29 +588,7 @@ class FaceTracker:
     def _calculate_iou(self, bbox1: Tuple[int, int, int, int], bbox2: Tuple[int, int, int, int]) -> float:
         """Calculate Intersection over Union between two bounding boxes"""
         try:
-            # Convert to (x1, y1, x2, y2) format
-            b1_x1, b1_y1 = bbox1[0], bbox1[1]
-            b1_x2, b1_y2 = bbox1[0] + bbox1[2], bbox1[1] + bbox1[3]
-            b2_x1, b2_y1 = bbox2[0], bbox2[1]
-            b2_x2, b2_y2 = bbox2[0] + bbox2[2], bbox2[1] + bbox2[3]
-            
-            # Calculate intersection area
-            inter_x1 = max(b1_x1, b2_x1)
-            inter_y1 = max(b1_y1, b2_y1)
-            inter_x2 = min(b1_x2, b2_x2)
-            inter_y2 = min(b1_y2, b2_y2)
-            
-            if inter_x2 < inter_x1 or inter_y2 < inter_y1:
-                return 0.0
-                
-            inter_area = (inter_x2 - inter_x1) * (inter_y2 - inter_y1)
-            
-            # Calculate union area
-            b1_area = (b1_x2 - b1_x1) * (b1_y2 - b1_y1)
-            b2_area = (b2_x2 - b2_x1) * (b2_y2 - b2_y1)
-            union_area = b1_area + b2_area - inter_area
-            
-            return inter_area / union_area if union_area > 0 else 0.0
+            return float(iou_matrix([bbox1], [bbox2])[0, 0])
             
         except Exception as e:
             self.logger.error(f"IoU calculation failed: {str(e)}")
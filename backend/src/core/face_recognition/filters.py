@@ -0,0 +1,158 @@
+"""
+Metadata filters applied inside face search instead of after it.
+
+This module provides:
+- Per-field row lists over metadata attributes (site, zone, access group,
+  watchlist, ...), including multi-valued attributes
+- Row selection for filter expressions (AND across fields, OR within one)
+- Stable filter keys for caching per-filter partitions
+- Exact top-k over a gallery partition, costing time proportional to its size
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+
+import numpy as np
+
+DEFAULT_FILTER_FIELDS = ('site', 'zone', 'access_group', 'watchlist')
+
+
+def _values(value: Any) -> Iterable[Any]:
+    """Individual values of a scalar or multi-valued attribute"""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return value
+    return (value,)
+
+
+def filter_key(filters: Optional[Dict[str, Any]]) -> str:
+    """Canonical string for a filter expression ('' for no filter)"""
+    if not filters:
+        return ''
+    return json.dumps(
+        {field: sorted(map(str, _values(value))) for field, value in filters.items()},
+        sort_keys=True
+    )
+
+
+class AttributeIndex:
+    """
+    Inverted index from metadata values to gallery rows.
+
+    Rows are appended in increasing order, so every value's row list stays
+    sorted and selections are plain sorted-array intersections and unions.
+    Removed rows are not tracked here; callers drop dead rows from a
+    selection (or ``remap`` after compaction).
+    """
+
+    def __init__(self, fields: Sequence[str] = DEFAULT_FILTER_FIELDS):
+        self.fields = tuple(fields)
+        self._rows: Dict[str, Dict[Any, List[int]]] = {field: {} for field in self.fields}
+        self._arrays: Dict[Tuple[str, Any], np.ndarray] = {}
+
+    def add(self, row: int, metadata: Optional[Dict[str, Any]]) -> None:
+        """Index the filter fields of a newly appended row"""
+        if not metadata:
+            return
+        for field in self.fields:
+            value = metadata.get(field)
+            if value is None:
+                continue
+            for item in _values(value):
+                self._rows[field].setdefault(item, []).append(row)
+                self._arrays.pop((field, item), None)
+
+    def _array(self, field: str, value: Any) -> np.ndarray:
+        """Sorted rows holding ``value`` in ``field``"""
+        key = (field, value)
+        array = self._arrays.get(key)
+        if array is None:
+            array = np.asarray(self._rows[field].get(value, ()), dtype=np.int64)
+            self._arrays[key] = array
+        return array
+
+    def select(self, filters: Dict[str, Any]) -> np.ndarray:
+        """
+        Rows matching every field of ``filters``.
+
+        Args:
+            filters: Field -> value, or list of accepted values
+
+        Returns:
+            np.ndarray: Sorted row numbers
+
+        Raises:
+            ValueError: If a field is not indexed
+        """
+        selected: Optional[np.ndarray] = None
+        for field, value in filters.items():
+            if field not in self._rows:
+                raise ValueError(f"Metadata field '{field}' is not indexed for filtering")
+            arrays = [self._array(field, item) for item in _values(value)]
+            rows = arrays[0] if len(arrays) == 1 else np.unique(np.concatenate(arrays))
+            selected = rows if selected is None else \
+                np.intersect1d(selected, rows, assume_unique=True)
+            if not len(selected):
+                break
+        return selected if selected is not None else np.empty(0, dtype=np.int64)
+
+    def remap(self, mapping: np.ndarray) -> None:
+        """
+        Renumber rows after compaction.
+
+        Args:
+            mapping: New row for every old row, -1 for dropped rows
+        """
+        for values in self._rows.values():
+            for value, rows in list(values.items()):
+                new_rows = mapping[np.asarray(rows, dtype=np.int64)]
+                new_rows = new_rows[new_rows >= 0]
+                if len(new_rows):
+                    values[value] = new_rows.tolist()
+                else:
+                    del values[value]
+        self._arrays.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Distinct indexed values per field"""
+        return {field: len(values) for field, values in self._rows.items()}
+
+
+def subset_top_k(queries: np.ndarray,
+                 vectors: np.ndarray,
+                 k: int,
+                 metric: str = 'ip') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact top-k over a partition of the gallery.
+
+    Args:
+        queries: Query matrix of shape (n, dimension)
+        vectors: Partition of shape (m, dimension)
+        k: Neighbours per query
+        metric: 'ip' (inner product, best = highest) or 'l2' (squared
+            Euclidean distance, best = lowest)
+
+    Returns:
+        (scores, positions), both of shape (n, k) like a FAISS search;
+        positions index ``vectors`` and are -1 where fewer than k exist
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    fill = -np.inf if metric == 'ip' else np.inf
+    scores = np.full((len(queries), k), fill, dtype=np.float32)
+    positions = np.full((len(queries), k), -1, dtype=np.int64)
+    n = min(k, len(vectors))
+    if n == 0:
+        return scores, positions
+
+    similarity = queries @ vectors.T
+    if metric == 'l2':
+        similarity = 2 * similarity - np.einsum('ij,ij->i', vectors, vectors)
+        similarity -= np.einsum('ij,ij->i', queries, queries)[:, None]
+    top = np.argpartition(-similarity, n - 1, axis=1)[:, :n] if n < len(vectors) else \
+        np.broadcast_to(np.arange(len(vectors)), (len(queries), len(vectors)))
+    top_scores = np.take_along_axis(similarity, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    positions[:, :n] = np.take_along_axis(top, order, axis=1)
+    best = np.take_along_axis(top_scores, order, axis=1)
+    scores[:, :n] = best if metric == 'ip' else -best
+    return scores, positions
@@ -0,0 +1,481 @@
+"""
+In-memory embedding index for low-latency face matching.
+
+This module provides:
+- Resident, contiguous float32 embedding matrix
+- Incremental inserts with amortized capacity growth
+- Vectorized top-k search (one matmul per query batch)
+- Lock-free reads against an immutable snapshot of the index
+- Columnar batch results with vectorized per-label deduplication
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from dataclasses import dataclass
+import threading
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchMatches:
+    """
+    Columnar match results for a batch of queries.
+
+    Every array has one entry per match. Matches are grouped by
+    ``query_index`` (ascending) and ordered best-first within a query.
+
+    Attributes:
+        query_index: Position of the originating query in the batch
+        rows: Index row of the matched embedding
+        labels: Identity of the match (user or person ID)
+        scores: Match score/confidence, higher is better
+    """
+    query_index: np.ndarray
+    rows: np.ndarray
+    labels: np.ndarray
+    scores: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.query_index.shape[0])
+
+    @classmethod
+    def empty(cls) -> 'BatchMatches':
+        """Result with no matches"""
+        return cls(
+            query_index=np.empty(0, dtype=np.int64),
+            rows=np.empty(0, dtype=np.int64),
+            labels=np.empty(0, dtype=object),
+            scores=np.empty(0, dtype=np.float32)
+        )
+
+    def for_query(self, query: int) -> 'BatchMatches':
+        """Matches belonging to a single query of the batch"""
+        start, end = np.searchsorted(self.query_index, [query, query + 1])
+        return BatchMatches(
+            query_index=self.query_index[start:end],
+            rows=self.rows[start:end],
+            labels=self.labels[start:end],
+            scores=self.scores[start:end]
+        )
+
+
+def first_unique_per_query(codes: np.ndarray,
+                           valid: np.ndarray,
+                           k: int) -> np.ndarray:
+    """
+    Select the first ``k`` distinct labels of every query row.
+
+    Args:
+        codes: Integer label codes of shape (queries, candidates), best-first
+        valid: Mask of candidates that passed score filtering
+        k: Maximum number of distinct labels kept per query
+
+    Returns:
+        Boolean mask of shape (queries, candidates) marking kept candidates
+    """
+    n, m = codes.shape
+    if n == 0 or m == 0:
+        return np.zeros((n, m), dtype=bool)
+
+    # Give every (query, label) pair a unique key; invalid slots share -1
+    stride = int(codes.max()) + 1 if codes.size else 1
+    keys = np.where(valid, codes + np.arange(n, dtype=np.int64)[:, None] * stride, -1)
+
+    # np.unique reports the first flat position of every key, which is the
+    # best-ranked candidate for that label within its query row
+    _, first = np.unique(keys.ravel(), return_index=True)
+    keep = np.zeros(n * m, dtype=bool)
+    keep[first] = True
+    keep = keep.reshape(n, m) & valid
+
+    keep &= np.cumsum(keep, axis=1) <= k
+    return keep
+
+
+class IndexSnapshot(NamedTuple):
+    """Immutable view of the index; rows at or beyond ``size`` are not part of it"""
+    size: int
+    vectors: Optional[np.ndarray]
+    sq_norms: Optional[np.ndarray]
+    labels: np.ndarray
+    codes: np.ndarray
+    metadata: List[Optional[Dict[str, Any]]]
+
+
+class EmbeddingIndex:
+    """
+    Resident embedding index answering top-k queries without touching storage.
+
+    Vectors are kept in a preallocated row-major float32 matrix together with
+    their squared norms, labels and metadata. Writers are serialized with a
+    lock and publish the row count and arrays as one ``IndexSnapshot`` with a
+    single assignment; readers take the snapshot once, so a concurrent
+    insert, removal or capacity growth never exposes a half-written row or
+    a row count that does not belong to the arrays.
+
+    Rows returned by a search refer to the snapshot the search used. Pass
+    the same snapshot to ``labels``/``metadata`` when a writer may run in
+    between (``range_search`` returns the snapshot it used).
+
+    Distances are Euclidean, computed as ``|q|^2 + |x|^2 - 2 q.x`` so a whole
+    batch of queries is scored against the gallery with a single matmul.
+    """
+
+    def __init__(self,
+                 dimension: Optional[int] = None,
+                 initial_capacity: int = 1024):
+        self._dimension = dimension
+        self._capacity = max(1, int(initial_capacity))
+        self._snapshot = IndexSnapshot(
+            size=0,
+            vectors=None,
+            sq_norms=None,
+            labels=np.empty(self._capacity, dtype=object),
+            codes=np.empty(self._capacity, dtype=np.int64),
+            metadata=[]
+        )
+
+        # Dense integer code per distinct label, used for vectorized dedup
+        self._label_codes: Dict[Any, int] = {}
+
+        self._write_lock = threading.Lock()
+
+        if dimension is not None:
+            self._allocate(dimension, self._capacity)
+
+    def __len__(self) -> int:
+        return self._snapshot.size
+
+    @property
+    def dimension(self) -> Optional[int]:
+        """Embedding dimension, fixed by the first insert if not configured"""
+        return self._dimension
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the vector matrix and norm array"""
+        snapshot = self._snapshot
+        if snapshot.vectors is None:
+            return 0
+        return int(snapshot.vectors.nbytes + snapshot.sq_norms.nbytes)
+
+    def snapshot(self) -> IndexSnapshot:
+        """Current consistent view of the index"""
+        return self._snapshot
+
+    def _allocate(self, dimension: int, capacity: int) -> None:
+        """Allocate (or grow) the backing arrays, copying existing rows"""
+        current = self._snapshot
+        size = current.size
+        vectors = np.empty((capacity, dimension), dtype=np.float32)
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        labels = np.empty(capacity, dtype=object)
+        codes = np.empty(capacity, dtype=np.int64)
+
+        if current.vectors is not None and size:
+            vectors[:size] = current.vectors[:size]
+            sq_norms[:size] = current.sq_norms[:size]
+        if size:
+            labels[:size] = current.labels[:size]
+            codes[:size] = current.codes[:size]
+
+        # Publish the new arrays only once they hold every committed row
+        self._dimension = dimension
+        self._capacity = capacity
+        self._snapshot = current._replace(
+            vectors=vectors,
+            sq_norms=sq_norms,
+            labels=labels,
+            codes=codes
+        )
+
+    def _ensure_capacity(self, required: int) -> None:
+        """Grow geometrically so inserts stay amortized O(1)"""
+        if self._snapshot.vectors is not None and required <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < required:
+            capacity *= 2
+        self._allocate(self._dimension, capacity)
+
+    def _code_for(self, label: Any) -> int:
+        """Integer code for a label, assigning a new one if needed"""
+        code = self._label_codes.get(label)
+        if code is None:
+            code = len(self._label_codes)
+            self._label_codes[label] = code
+        return code
+
+    def add(self,
+            label: Any,
+            vector: np.ndarray,
+            metadata: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Add a single embedding.
+
+        Args:
+            label: Identifier returned with search hits (e.g. user ID)
+            vector: Embedding vector
+            metadata: Optional metadata returned with search hits
+
+        Returns:
+            Row number assigned to the embedding
+        """
+        return self.add_batch([label], np.asarray(vector).reshape(1, -1),
+                              [metadata])[0]
+
+    def add_batch(self,
+                  labels: Iterable[Any],
+                  vectors: np.ndarray,
+                  metadata: Optional[Iterable[Optional[Dict[str, Any]]]] = None
+                  ) -> List[int]:
+        """
+        Add several embeddings in one copy.
+
+        Args:
+            labels: Identifiers, one per row of ``vectors``
+            vectors: Embedding matrix of shape (n, dimension)
+            metadata: Optional metadata, one entry per row
+
+        Returns:
+            Row numbers assigned to the embeddings
+        """
+        labels = list(labels)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        if len(labels) != vectors.shape[0]:
+            raise ValueError("labels and vectors must have the same length")
+        metadata = list(metadata) if metadata is not None else [None] * len(labels)
+        if len(metadata) != len(labels):
+            raise ValueError("metadata and labels must have the same length")
+        if not labels:
+            return []
+
+        with self._write_lock:
+            if self._dimension is None:
+                self._allocate(vectors.shape[1], self._capacity)
+            elif vectors.shape[1] != self._dimension:
+                raise ValueError(
+                    f"Expected dimension {self._dimension}, got {vectors.shape[1]}"
+                )
+
+            start = self._snapshot.size
+            end = start + vectors.shape[0]
+            self._ensure_capacity(end)
+            current = self._snapshot
+
+            # Rows past the published size are invisible to readers, so they
+            # can be written in place
+            current.vectors[start:end] = vectors
+            current.sq_norms[start:end] = np.einsum('ij,ij->i', vectors, vectors)
+            for offset, label in enumerate(labels):
+                current.labels[start + offset] = label
+                current.codes[start + offset] = self._code_for(label)
+            current.metadata[start:] = metadata
+
+            # Rows become visible to readers only after they are fully written
+            self._snapshot = current._replace(size=end)
+
+            return list(range(start, end))
+
+    def remove(self, label: Any) -> int:
+        """
+        Remove every embedding stored under ``label``.
+
+        Returns:
+            Number of embeddings removed
+        """
+        with self._write_lock:
+            code = self._label_codes.get(label)
+            if code is None:
+                return 0
+            current = self._snapshot
+            keep = np.flatnonzero(current.codes[:current.size] != code)
+            removed = current.size - len(keep)
+            if not removed:
+                return 0
+
+            # Fresh arrays: readers of the old snapshot keep their rows
+            vectors = np.empty_like(current.vectors)
+            sq_norms = np.empty_like(current.sq_norms)
+            labels = np.empty_like(current.labels)
+            codes = np.empty_like(current.codes)
+            vectors[:len(keep)] = current.vectors[keep]
+            sq_norms[:len(keep)] = current.sq_norms[keep]
+            labels[:len(keep)] = current.labels[keep]
+            codes[:len(keep)] = current.codes[keep]
+
+            self._snapshot = IndexSnapshot(
+                size=len(keep),
+                vectors=vectors,
+                sq_norms=sq_norms,
+                labels=labels,
+                codes=codes,
+                metadata=[current.metadata[i] for i in keep]
+            )
+
+            return removed
+
+    def replace(self,
+                labels: Iterable[Any],
+                vectors: np.ndarray,
+                metadata: Optional[Iterable[Optional[Dict[str, Any]]]] = None) -> None:
+        """
+        Swap the whole content for a new set of embeddings.
+
+        Readers see either the old or the new content, never an empty or
+        partially loaded index.
+        """
+        replacement = EmbeddingIndex(self._dimension, self._capacity)
+        replacement.add_batch(labels, vectors, metadata)
+        with self._write_lock:
+            self._dimension = replacement._dimension
+            self._capacity = replacement._capacity
+            self._label_codes = replacement._label_codes
+            self._snapshot = replacement._snapshot
+
+    def clear(self) -> None:
+        """Drop all embeddings, keeping the allocated capacity"""
+        with self._write_lock:
+            current = self._snapshot
+            self._snapshot = current._replace(
+                size=0,
+                labels=np.empty_like(current.labels),
+                codes=np.empty_like(current.codes),
+                metadata=[]
+            )
+            if current.vectors is not None:
+                self._snapshot = self._snapshot._replace(
+                    vectors=np.empty_like(current.vectors),
+                    sq_norms=np.empty_like(current.sq_norms)
+                )
+            self._label_codes = {}
+
+    def label(self, row: int, snapshot: Optional[IndexSnapshot] = None) -> Any:
+        """Label stored at ``row``"""
+        return (snapshot or self._snapshot).labels[row]
+
+    def labels(self, rows: np.ndarray, snapshot: Optional[IndexSnapshot] = None) -> np.ndarray:
+        """Labels stored at ``rows`` (any shape)"""
+        return (snapshot or self._snapshot).labels[rows]
+
+    def label_codes(self, rows: np.ndarray, snapshot: Optional[IndexSnapshot] = None) -> np.ndarray:
+        """Integer label codes stored at ``rows`` (any shape)"""
+        return (snapshot or self._snapshot).codes[rows]
+
+    def metadata(self, row: int, snapshot: Optional[IndexSnapshot] = None) -> Optional[Dict[str, Any]]:
+        """Metadata stored at ``row``"""
+        return (snapshot or self._snapshot).metadata[row]
+
+    @staticmethod
+    def _sq_distances(queries: np.ndarray, snapshot: IndexSnapshot) -> np.ndarray:
+        """Squared distances of each query to every row of the snapshot"""
+        size = snapshot.size
+        gallery = snapshot.vectors[:size]
+        q_norms = np.einsum('ij,ij->i', queries, queries)
+        sq_dist = q_norms[:, None] + snapshot.sq_norms[:size][None, :] - 2.0 * (queries @ gallery.T)
+        np.maximum(sq_dist, 0.0, out=sq_dist)
+        return sq_dist
+
+    def search(self,
+               queries: np.ndarray,
+               k: int,
+               snapshot: Optional[IndexSnapshot] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the ``k`` nearest embeddings for each query.
+
+        Args:
+            queries: Query matrix of shape (n, dimension) or a single vector
+            k: Number of neighbours per query
+            snapshot: View to search (default: the current one)
+
+        Returns:
+            Tuple of (distances, rows), both of shape (n, min(k, len(self))),
+            sorted by ascending distance
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+
+        # One read: size and arrays always belong together
+        snapshot = snapshot or self._snapshot
+        size = snapshot.size
+
+        k = min(int(k), size)
+        if k <= 0 or snapshot.vectors is None:
+            return (np.empty((queries.shape[0], 0), dtype=np.float32),
+                    np.empty((queries.shape[0], 0), dtype=np.int64))
+
+        sq_dist = self._sq_distances(queries, snapshot)
+
+        if k < size:
+            rows = np.argpartition(sq_dist, k - 1, axis=1)[:, :k]
+        else:
+            rows = np.broadcast_to(np.arange(size), (queries.shape[0], size))
+        part = np.take_along_axis(sq_dist, rows, axis=1)
+        order = np.argsort(part, axis=1)
+
+        rows = np.take_along_axis(rows, order, axis=1).astype(np.int64)
+        distances = np.sqrt(np.take_along_axis(part, order, axis=1))
+
+        return distances, rows
+
+    def range_search(self,
+                     query: np.ndarray,
+                     max_distance: float
+                     ) -> Tuple[np.ndarray, np.ndarray, IndexSnapshot]:
+        """
+        Find every embedding closer than ``max_distance`` to one query.
+
+        Returns:
+            Tuple of (distances, rows, snapshot), sorted by ascending
+            distance; rows refer to the returned snapshot
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(1, -1)
+        snapshot = self._snapshot
+        if snapshot.size == 0 or snapshot.vectors is None:
+            return (np.empty(0, dtype=np.float32),
+                    np.empty(0, dtype=np.int64),
+                    snapshot)
+
+        sq_dist = self._sq_distances(query, snapshot)[0]
+        rows = np.flatnonzero(sq_dist < max_distance * max_distance) if max_distance > 0 \
+            else np.empty(0, dtype=np.int64)
+        order = np.argsort(sq_dist[rows], kind='stable')
+        rows = rows[order].astype(np.int64)
+        return np.sqrt(sq_dist[rows]), rows, snapshot
+
+    def search_unique(self,
+                      queries: np.ndarray,
+                      k: int,
+                      max_distance: Optional[float] = None,
+                      candidates: Optional[int] = None,
+                      snapshot: Optional[IndexSnapshot] = None
+                      ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Find up to ``k`` distinct labels per query.
+
+        Args:
+            queries: Query matrix of shape (n, dimension)
+            k: Maximum number of distinct labels per query
+            max_distance: Optional distance cut-off (exclusive)
+            candidates: Neighbours inspected per query before dedup
+                        (defaults to ``4 * k``)
+            snapshot: View to search (default: the current one); pass it
+                      to ``labels`` to resolve the returned rows
+
+        Returns:
+            Tuple of (distances, rows, keep) where ``keep`` masks the
+            candidates that survive filtering and deduplication
+        """
+        snapshot = snapshot or self._snapshot
+        distances, rows = self.search(queries, candidates or 4 * k, snapshot)
+        valid = np.ones(rows.shape, dtype=bool)
+        if max_distance is not None:
+            valid &= distances < max_distance
+        keep = first_unique_per_query(self.label_codes(rows, snapshot), valid, k)
+        return distances, rows, keep
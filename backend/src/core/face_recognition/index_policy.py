@@ -0,0 +1,175 @@
+"""
+Index selection, retraining and search-parameter tuning for face matching.
+
+This module provides:
+- Gallery-size based choice between flat, IVF and HNSW indexes
+- IVF list count heuristic and list imbalance measurement
+- Retrain/retune triggers as the gallery grows or drifts
+- Recall-targeted tuning of ``nprobe`` / ``efSearch``
+- Blocked exact top-k search used as tuning ground truth
+"""
+
+from typing import Any, Callable, Dict, Sequence
+import math
+import time
+
+import numpy as np
+
+INDEX_TYPES = ('flat', 'ivf', 'hnsw')
+NPROBE_VALUES = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+EF_SEARCH_VALUES = (16, 24, 32, 48, 64, 96, 128, 192, 256, 512)
+
+
+class IndexPolicy:
+    """
+    Decides which index a gallery should use and when to rebuild or retune it.
+
+    Attributes:
+        ivf_threshold (int): Gallery size from which IVF replaces flat search
+        hnsw_threshold (int): Gallery size from which HNSW replaces IVF
+        max_imbalance (float): IVF imbalance factor that triggers retraining
+        retrain_growth (float): Gallery growth since training that triggers retraining
+        retune_growth (float): Gallery growth since tuning that triggers retuning
+        target_recall (float): Recall@k the search parameters are tuned for
+    """
+
+    def __init__(self,
+                 ivf_threshold: int = 50_000,
+                 hnsw_threshold: int = 1_000_000,
+                 max_imbalance: float = 1.5,
+                 retrain_growth: float = 2.0,
+                 retune_growth: float = 1.2,
+                 target_recall: float = 0.95):
+        self.ivf_threshold = ivf_threshold
+        self.hnsw_threshold = hnsw_threshold
+        self.max_imbalance = max_imbalance
+        self.retrain_growth = retrain_growth
+        self.retune_growth = retune_growth
+        self.target_recall = target_recall
+
+    def index_type_for(self, size: int) -> str:
+        """Index type for a gallery of ``size`` embeddings"""
+        if size >= self.hnsw_threshold:
+            return 'hnsw'
+        if size >= self.ivf_threshold:
+            return 'ivf'
+        return 'flat'
+
+    @staticmethod
+    def nlist_for(size: int) -> int:
+        """IVF list count (about 4 * sqrt(n), at least 16)"""
+        return int(min(65536, max(16, 4 * math.sqrt(max(size, 1)))))
+
+    def needs_retrain(self, size: int, trained_size: int, imbalance: float) -> bool:
+        """
+        Whether IVF centroids are stale.
+
+        Args:
+            size: Current gallery size
+            trained_size: Gallery size when the centroids were trained
+            imbalance: Current list imbalance factor
+        """
+        if trained_size <= 0:
+            return True
+        return imbalance > self.max_imbalance or size > trained_size * self.retrain_growth
+
+    def needs_retune(self, size: int, tuned_size: int) -> bool:
+        """Whether search parameters should be re-tuned for the gallery size"""
+        return tuned_size <= 0 or size > tuned_size * self.retune_growth
+
+
+def imbalance_factor(list_sizes: Sequence[int]) -> float:
+    """
+    IVF imbalance factor (1.0 = perfectly even lists).
+
+    Defined as ``nlist * sum(s^2) / (sum(s))^2``, the expected number of
+    distance computations relative to evenly filled lists.
+    """
+    sizes = np.asarray(list_sizes, dtype=np.float64)
+    total = sizes.sum()
+    if total == 0:
+        return 1.0
+    return float(len(sizes) * np.square(sizes).sum() / total ** 2)
+
+
+def exact_top_k(queries: np.ndarray,
+                vectors: np.ndarray,
+                k: int,
+                block: int = 65536) -> np.ndarray:
+    """
+    Exact inner-product top-k rows, scanning the gallery in blocks.
+
+    Args:
+        queries: Query matrix of shape (n, dimension)
+        vectors: Gallery of shape (m, dimension) (may be memory-mapped)
+        k: Neighbours per query
+        block: Gallery rows scored at a time
+
+    Returns:
+        np.ndarray: Row numbers of shape (n, min(k, m)), best-first
+    """
+    k = min(k, len(vectors))
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_rows = np.empty((len(queries), 0), dtype=np.int64)
+
+    for start in range(0, len(vectors), block):
+        chunk = np.asarray(vectors[start:start + block], dtype=np.float32)
+        scores = np.concatenate([best_scores, queries @ chunk.T], axis=1)
+        rows = np.concatenate([
+            best_rows,
+            np.broadcast_to(np.arange(start, start + len(chunk)), (len(queries), len(chunk)))
+        ], axis=1)
+        if scores.shape[1] > k:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(scores, top, axis=1)
+            rows = np.take_along_axis(rows, top, axis=1)
+        best_scores, best_rows = scores, rows
+
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_rows, order, axis=1)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Fraction of the true neighbours present in ``found``"""
+    if truth.size == 0:
+        return 1.0
+    hits = sum(len(np.intersect1d(f[f >= 0], t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def tune_search_parameter(search: Callable[[int], np.ndarray],
+                          truth: np.ndarray,
+                          values: Sequence[int],
+                          target_recall: float) -> Dict[str, Any]:
+    """
+    Pick the cheapest search parameter reaching a target recall.
+
+    Values are tried in ascending order (latency grows with the value), so
+    the first one meeting ``target_recall`` is the fastest acceptable one.
+
+    Args:
+        search: Runs the sample queries with a parameter value and returns
+            the found rows of shape (n, k)
+        truth: Exact rows of shape (n, k)
+        values: Candidate parameter values, ascending
+        target_recall: Required recall@k
+
+    Returns:
+        Dict with the chosen ``value``, its ``recall`` and ``latency_ms``
+        per query, and whether the target was ``reached``
+    """
+    result: Dict[str, Any] = {}
+    for value in values:
+        start = time.perf_counter()
+        found = search(value)
+        latency = (time.perf_counter() - start) * 1000 / max(len(truth), 1)
+        result = {
+            'value': value,
+            'recall': recall_at_k(found, truth),
+            'latency_ms': latency,
+            'reached': False
+        }
+        if result['recall'] >= target_recall:
+            result['reached'] = True
+            break
+    return result
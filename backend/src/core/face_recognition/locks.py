@@ -0,0 +1,108 @@
+"""
+Reader-writer locks for the face search and matching indexes.
+
+This module provides:
+- ReadWriteLock for thread-based callers
+- AsyncReadWriteLock for event-loop callers (FaceSearch, FaceMatcher)
+
+Any number of readers hold the lock together; a writer holds it alone.
+Both locks prefer writers: once a writer waits, new readers queue behind
+it, so a steady stream of searches cannot starve enrollment.
+"""
+
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+import asyncio
+import threading
+
+
+class ReadWriteLock:
+    """Writer-preferring reader-writer lock for threads"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Hold the lock shared with other readers"""
+        with self._condition:
+            self._condition.wait_for(lambda: not self._writer and not self._waiting_writers)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Hold the lock exclusively"""
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                self._condition.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+    @property
+    def readers(self) -> int:
+        """Readers currently holding the lock"""
+        return self._readers
+
+
+class AsyncReadWriteLock:
+    """Writer-preferring reader-writer lock for coroutines"""
+
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @asynccontextmanager
+    async def read(self) -> AsyncIterator[None]:
+        """Hold the lock shared with other readers"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writer and not self._waiting_writers)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @asynccontextmanager
+    async def write(self) -> AsyncIterator[None]:
+        """Hold the lock exclusively"""
+        async with self._condition:
+            self._waiting_writers += 1
+            try:
+                await self._condition.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+    @property
+    def readers(self) -> int:
+        """Readers currently holding the lock"""
+        return self._readers
@@ -7,6 +7,7 @@ This module provides:
 - Match quality assessment
 - Caching and performance optimization
 - Cluster-based matching
+- Concurrent searches with batched, atomically published writes
 """
 
 from typing import Dict, List, Optional, Tuple, Union, Any
@@ -18,12 +19,24 @@ from pathlib import Path
 import time
 from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import logging
 import json
 import os
 
 from ..base import BaseComponent
-from ..utils.errors import MatcherError
+from ..utils.errors import ErasureError, MatcherError
+from .index import BatchMatches, first_unique_per_query
+from .cache import BoundedCache, embedding_cache_key
+from .persistence import WriteAheadLog, read_snapshot, write_snapshot
+from .quantization import index_description, min_training_points, rerank_inner_product
+from .person_index import PersonIndex
+from .locks import AsyncReadWriteLock
+from .filters import DEFAULT_FILTER_FIELDS, AttributeIndex, filter_key, subset_top_k
+from .index_policy import (
+    EF_SEARCH_VALUES, NPROBE_VALUES, IndexPolicy,
+    exact_top_k, imbalance_factor, tune_search_parameter
+)
 
 # Only import GPU-related modules if not in test mode
 if os.getenv("TESTING"):
@@ -37,6 +50,9 @@ else:
         faiss = None
         torch = None
 
+# Matcher state lives next to the backend package, not in the working directory
+DEFAULT_STORAGE_PATH = Path(__file__).resolve().parents[3] / 'data' / 'matching'
+
 @dataclass
 class MatchResult:
     """Face matching result with confidence and metadata"""
@@ -59,29 +75,120 @@ class FaceMatcher(BaseComponent):
         self._min_confidence = config.get('matching.min_confidence', 0.6)
         self._max_distance = config.get('matching.max_distance', 0.6)
         self._use_quality_weighting = config.get('matching.use_quality_weighting', True)
+        self._candidate_factor = config.get('matching.candidate_factor', 2)
+        # Two-stage find_matches: nearest person centroids, then exact
+        # scores of those persons' faces
+        self._person_prefilter = config.get('matching.person_prefilter', True)
+        self._person_candidates = config.get('matching.person_candidates', 4)  # x max_matches
+        # Metadata filters: partitions up to this size are scored exactly,
+        # larger ones are searched in the index with an ID selector
+        self._filter_exact_max = config.get('matching.filter_exact_max', 50000)
         
-        # Index settings
-        self._index_type = config.get('matching.index_type', 'flat')  # flat, ivf, hnsw
+        # Index settings; 'auto' picks flat, IVF or HNSW from the gallery size
+        self._configured_index_type = config.get('matching.index_type', 'auto')  # auto, flat, ivf, hnsw
+        self._index_type = 'flat' if self._configured_index_type == 'auto' else self._configured_index_type
         self._nprobe = config.get('matching.nprobe', 10)  # For IVF index
         self._ef_search = config.get('matching.ef_search', 40)  # For HNSW index
         
+        # Index maintenance: type switches, IVF retraining and nprobe/efSearch
+        # tuning, checked in the background every few adds
+        self._index_policy = IndexPolicy(
+            ivf_threshold=config.get('matching.ivf_threshold', 50_000),
+            hnsw_threshold=config.get('matching.hnsw_threshold', 1_000_000),
+            max_imbalance=config.get('matching.max_ivf_imbalance', 1.5),
+            target_recall=config.get('matching.target_recall', 0.95)
+        )
+        self._tuning_queries = config.get('matching.tuning_queries', 200)
+        self._maintenance_interval = config.get('matching.maintenance_interval', 1000)  # adds
+        
+        # Compressed storage: none, fp16, int8 or pq; int8/pq candidates are
+        # re-ranked against the exact (memory-mapped) encodings
+        self._compression = config.get('matching.compression', 'none')
+        self._pq_m = config.get('matching.pq_m', 64)
+        self._pq_bits = config.get('matching.pq_bits', 8)
+        self._rerank_factor = config.get('matching.rerank_factor',
+                                         4 if self._compression in ('int8', 'pq') else 0)
+        
         # Storage settings
-        self._storage_dir = Path(config.get('matching.storage_path', 'data/matching'))
-        self._storage_dir.mkdir(parents=True, exist_ok=True)
-        self._index_file = self._storage_dir / 'face_index.bin'
+        # Created on the first write, not on construction
+        self._storage_dir = Path(config.get('matching.storage_path', DEFAULT_STORAGE_PATH))
         self._metadata_file = self._storage_dir / 'face_metadata.json'
+        self._snapshot_file = self._storage_dir / 'snapshot.json'
+        self._store_dtype = config.get('matching.store_dtype', 'float32')  # float32, float16
+        self._lazy_index = config.get('matching.lazy_index', True)
+        self._wal_sync = config.get('matching.wal_sync', True)
+        self._snapshot_interval = config.get('matching.snapshot_interval', 10000)  # log records
         
         # Cache settings
         self._cache_size = config.get('matching.cache_size', 1000)
         self._cache_ttl = config.get('matching.cache_ttl', 3600)  # 1 hour
+        self._cache_max_bytes = config.get('matching.cache_max_bytes', 16 * 1024 * 1024)
         
-        # State
+        # Deletion settings: compact once this fraction of slots is dead
+        self._compaction_ratio = config.get('matching.compaction_ratio', 0.25)
+        
+        # State; rows are stable slots (also the index IDs), removed
+        # faces leave a tombstone (None) until compaction
         self._index = None
-        self._face_ids: List[str] = []
+        self._face_ids: List[Optional[str]] = []
+        self._face_slots: Dict[str, int] = {}
+        # Encodings of slots loaded from the snapshot (read-only memory map
+        # shared with other workers), then per-slot arrays for later adds
+        self._mapped_encodings: np.ndarray = np.zeros((0, 0), dtype=np.float32)
         self._encodings: List[np.ndarray] = []
         self._metadata: Dict[str, Dict] = {}
-        self._match_cache: Dict[str, Tuple[List[MatchResult], float]] = {}
-        self._index_lock = asyncio.Lock()
+        self._person_index: Optional[PersonIndex] = None  # Built on first use
+        self._attributes = AttributeIndex(
+            config.get('matching.filter_fields', DEFAULT_FILTER_FIELDS)
+        )
+        self._tombstones = 0
+        # Removed slots the index could not delete (HNSW), excluded from
+        # searches by an ID selector until compaction
+        self._index_dead: List[int] = []
+        self._dead_selector = None
+        # Slot of every row of the wrapped index (ID selectors address its rows)
+        self._id_map_cache: Optional[Tuple[Any, int, np.ndarray]] = None
+        self._compaction_task: Optional[asyncio.Task] = None
+        self._trained_size = 0
+        self._tuned_size = 0
+        self._adds_since_maintenance = 0
+        self._maintenance_task: Optional[asyncio.Task] = None
+        
+        # Persistence: operations go to the log, snapshots are written
+        # by a background thread
+        self._wal: Optional[WriteAheadLog] = None
+        self._records_since_snapshot = 0
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._snapshot_executor = ThreadPoolExecutor(max_workers=1)
+        self._wal_executor = ThreadPoolExecutor(max_workers=1)
+        self._match_cache = BoundedCache(
+            max_items=self._cache_size,
+            max_bytes=self._cache_max_bytes,
+            ttl=self._cache_ttl,
+            name='face_matches'
+        )
+        
+        # Concurrency: searches share the index lock and run in worker
+        # threads; writers serialize on the write lock, prepare (and log)
+        # without blocking searches and only take the index lock to publish
+        self._index_lock = AsyncReadWriteLock()
+        self._write_lock = asyncio.Lock()
+        self._search_executor = ThreadPoolExecutor(
+            max_workers=config.get('matching.search_threads', 4),
+            thread_name_prefix='face-match'
+        )
+        # Group commit: adds queued while a batch is written join the next one
+        self._write_batch_size = config.get('matching.write_batch_size', 256)
+        self._pending_adds: List[Tuple[str, np.ndarray, Dict[str, Any], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        # Per-row attributes used by vectorized batch matching
+        self._person_codes: Dict[str, int] = {}
+        self._row_person_ids: List[Optional[str]] = []
+        self._row_person_codes: List[int] = []
+        self._row_quality: List[float] = []
+        self._row_live: List[bool] = []
+        self._row_arrays: Optional[Tuple[np.ndarray, ...]] = None
         
         # GPU support (only if not in test mode)
         if not os.getenv("TESTING") and torch is not None:
@@ -90,12 +197,6 @@ class FaceMatcher(BaseComponent):
         else:
             self.device = 'cpu'
         
-        # Initialize
-        if not os.getenv("TESTING"):
-            self._initialize_matcher()
-        else:
-            self.logger.info("Running in test mode, matcher initialization skipped")
-        
         # Statistics
         self._stats = {
             'total_faces': 0,
@@ -103,10 +204,23 @@ class FaceMatcher(BaseComponent):
             'average_confidence': 0.0,
             'cache_hits': 0,
             'cache_misses': 0,
+            'removed_faces': 0,
+            'compactions': 0,
+            'index_rebuilds': 0,
+            'ivf_imbalance': None,
+            'last_tuning': None,
+            'snapshots': 0,
+            'last_snapshot_time': 0.0,
             'average_match_time': 0.0,
             'last_update': None
         }
         
+        # Initialize
+        if not os.getenv("TESTING"):
+            self._initialize_matcher()
+        else:
+            self.logger.info("Running in test mode, matcher initialization skipped")
+        
         # Start cache cleanup in a separate thread
         self._cleanup_interval = config.get('matching.cleanup_interval', 300)  # 5 minutes
         self._cleanup_thread = ThreadPoolExecutor(max_workers=1)
@@ -129,15 +243,12 @@ class FaceMatcher(BaseComponent):
     def _initialize_matcher(self) -> None:
         """Initialize matching system"""
         try:
-            # Load metadata
+            # Load last snapshot and replay the log
             self._load_metadata()
             
-            # Create index
-            self._create_index()
-            
-            # Load existing index if available
-            if self._index_file.exists():
-                self._load_index()
+            # Create index now, or on first search
+            if not self._lazy_index:
+                self._create_index()
             
             self.logger.info("Matching system initialized")
             
@@ -146,95 +257,401 @@ class FaceMatcher(BaseComponent):
             raise MatcherError(f"Failed to initialize matcher: {str(e)}")
 
     def _create_index(self) -> None:
-        """Create FAISS index with GPU support if available"""
+        """Create FAISS index holding all live rows"""
+        slots = self._live_slots()
+        index_type = self._index_type_for(len(slots))
+        index = self._build_index(self._gather_encodings(slots), slots, index_type)
+        self._install_index(index, index_type, len(slots))
+
+    def _index_type_for(self, size: int) -> str:
+        """Index type for a fresh index over ``size`` faces"""
+        if self._configured_index_type == 'auto':
+            return self._index_policy.index_type_for(size)
+        return self._index_type
+
+    def _install_index(self, index, index_type: str, size: int) -> None:
+        """Use a freshly built index over ``size`` live rows"""
+        self._index_type = index_type
+        if index is not None:
+            self._index = index
+            self._index_dead = []
+            self._dead_selector = None
+            self._trained_size = size
+            self._tuned_size = 0
+
+    async def _create_index_async(self) -> None:
+        """
+        Build the index deferred by a lazy start in a worker thread
+        
+        Writers wait while the live rows are indexed; the index is swapped
+        in between searches, as in ``compact``.
+        """
+        async with self._write_lock:
+            if self._index is not None or not self._face_slots:
+                return
+            slots = self._live_slots()
+            index_type = self._index_type_for(len(slots))
+            index = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self._build_index(self._gather_encodings(slots), slots, index_type)
+            )
+            async with self._index_lock.write():
+                self._install_index(index, index_type, len(slots))
+
+    def _ensure_index(self) -> None:
+        """Build the index on first use after a lazy start"""
+        if self._index is None and self._face_slots:
+            self._create_index()
+        if self._index is not None and self._index_type != 'flat' and not self._tuned_size:
+            self._schedule_maintenance()
+
+    async def _prepare_search(self, persons: bool = False) -> None:
+        """Build lazily created structures before searching from worker threads"""
+        if self._index is None and self._face_slots:
+            await self._create_index_async()
+        if persons and self._person_index is None:
+            async with self._index_lock.write():
+                self._ensure_person_index()
+        if self._index is not None:
+            self._ensure_index()
+
+    def _gather_encodings(self, slots: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Encodings of ascending slots as one float32 matrix
+        
+        Args:
+            slots: Sorted slot numbers
+            
+        Returns:
+            Matrix of shape (len(slots), dimension), or None if empty
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        n_mapped = len(self._mapped_encodings)
+        blocks = []
+        mapped = slots[slots < n_mapped]
+        if len(mapped):
+            blocks.append(np.asarray(self._mapped_encodings[mapped], dtype=np.float32))
+        appended = slots[slots >= n_mapped] - n_mapped
+        if len(appended):
+            blocks.append(np.vstack([self._encodings[row] for row in appended]))
+        return np.vstack(blocks).astype(np.float32, copy=False) if blocks else None
+
+    def _build_index(self,
+                     encodings: Optional[np.ndarray],
+                     slots: np.ndarray,
+                     index_type: Optional[str] = None):
+        """
+        Build an ID-mapped FAISS index with GPU support if available
+        
+        Vectors are stored under their slot number, so rows can be removed
+        with ``remove_ids`` without renumbering the rest of the index.
+        
+        Args:
+            encodings: Normalized encodings of shape (n, dimension), or None
+            slots: Slot (index ID) of each encoding
+            index_type: 'flat', 'ivf' or 'hnsw' (default: the current type)
+            
+        Returns:
+            The new index (None in test mode)
+        """
         try:
             # Skip index creation in test mode
             if os.getenv("TESTING"):
                 self.logger.info("Running in test mode, index creation skipped")
-                return
+                return None
                 
             if faiss is None:
                 raise MatcherError("FAISS is not available")
             
             # Get feature dimension from config or first encoding
-            if self._encodings:
-                dim = self._encodings[0].shape[0]
+            if encodings is not None:
+                dim = encodings.shape[1]
+            elif len(self._mapped_encodings):
+                dim = self._mapped_encodings.shape[1]
+            elif self._encodings:
+                dim = self._encodings[0].shape[-1]
             else:
                 dim = 512  # Default dimension
             
-            if self._index_type == 'flat':
-                if hasattr(self, 'device') and self.device == 'cuda':
-                    # GPU index
-                    res = faiss.StandardGpuResources()
-                    config = faiss.GpuIndexFlatConfig()
-                    config.device = 0
-                    self._index = faiss.GpuIndexFlatIP(res, dim, config)
-                else:
-                    # CPU index
-                    self._index = faiss.IndexFlatIP(dim)
+            index_type = index_type or self._index_type
+            index = None
+            if self._compression != 'none':
+                index = self._build_compressed_index(dim, encodings, index_type)
+            
+            if index is None:
+                if index_type == 'flat':
+                    if hasattr(self, 'device') and self.device == 'cuda':
+                        # GPU index
+                        res = faiss.StandardGpuResources()
+                        config = faiss.GpuIndexFlatConfig()
+                        config.device = 0
+                        index = faiss.GpuIndexFlatIP(res, dim, config)
+                    else:
+                        # CPU index
+                        index = faiss.IndexFlatIP(dim)
                     
-            elif self._index_type == 'ivf':
-                # IVF index (better for large datasets)
-                nlist = min(4096, max(16, len(self._face_ids) // 8))
-                quantizer = faiss.IndexFlatIP(dim)
-                self._index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
-                if not self._index.is_trained and self._encodings:
-                    self._index.train(np.vstack(self._encodings))
-                self._index.nprobe = self._nprobe
+                elif index_type == 'ivf':
+                    # IVF index (better for large datasets)
+                    nlist = self._index_policy.nlist_for(len(slots))
+                    quantizer = faiss.IndexFlatIP(dim)
+                    index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+                    if not index.is_trained and encodings is not None:
+                        index.train(encodings)
+                    index.nprobe = self._nprobe
                 
-            elif self._index_type == 'hnsw':
-                # HNSW index (best for approximate search)
-                self._index = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
-                self._index.hnsw.efSearch = self._ef_search
+                elif index_type == 'hnsw':
+                    # HNSW index (best for approximate search)
+                    index = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+                    index.hnsw.efSearch = self._ef_search
                 
-            else:
-                raise ValueError(f"Unknown index type: {self._index_type}")
+                else:
+                    raise ValueError(f"Unknown index type: {index_type}")
+            
+            index = faiss.IndexIDMap(index)
             
             # Add existing encodings
-            if self._encodings:
-                self._index.add(np.vstack(self._encodings))
+            if encodings is not None:
+                index.add_with_ids(encodings, np.asarray(slots, dtype=np.int64))
+            
+            return index
             
         except Exception as e:
             self.logger.error(f"Index creation failed: {str(e)}")
             raise MatcherError(f"Failed to create index: {str(e)}")
 
+    def _build_compressed_index(self,
+                                dim: int,
+                                encodings: Optional[np.ndarray],
+                                index_type: str):
+        """
+        Build a trained index with compressed vector storage
+        
+        Returns:
+            The index, or None if there are too few encodings to train the
+            quantizer yet (the uncompressed index is used until compaction
+            or a rebuild finds enough)
+        """
+        available = len(encodings) if encodings is not None else 0
+        nlist = self._index_policy.nlist_for(available)
+        required = min_training_points(index_type, self._compression, nlist, self._pq_bits)
+        if available < required:
+            self.logger.warning(
+                f"{self._compression} index needs {required} encodings to train, "
+                f"have {available}; using uncompressed storage for now"
+            )
+            return None
+        
+        description = index_description(
+            index_type, self._compression, dim,
+            nlist=nlist, pq_m=self._pq_m, pq_bits=self._pq_bits
+        )
+        index = faiss.index_factory(dim, description, faiss.METRIC_INNER_PRODUCT)
+        if not index.is_trained:
+            index.train(encodings)
+        
+        if index_type == 'ivf':
+            faiss.extract_index_ivf(index).nprobe = self._nprobe
+        elif index_type == 'hnsw':
+            index.hnsw.efSearch = self._ef_search
+        return index
+
+    def _search(self, queries: np.ndarray, k: int, params=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search the index, re-ranking compressed candidates exactly
+        
+        Args:
+            queries: Normalized queries of shape (n, dimension)
+            k: Neighbours per query
+            params: FAISS search parameters (e.g. with an ID selector)
+            
+        Returns:
+            (scores, slots) like ``index.search``
+        """
+        self._ensure_index()
+        if params is None and self._dead_selector is not None:
+            params = self._search_parameters(self._dead_selector[1])
+        search = self._index.search if params is None else partial(self._search_wrapped, params=params)
+        if not self._rerank_factor:
+            return search(queries, k)
+        
+        _, slots = search(queries, k * self._rerank_factor)
+        return rerank_inner_product(queries, slots, self._encodings_at(slots), k)
+
+    def _search_wrapped(self, queries: np.ndarray, k: int, params) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search with parameters in the index wrapped by the ID map
+        
+        ``IndexIDMap`` rejects search parameters before faiss 1.8, so the
+        selector (built over rows of the wrapped index) is applied there
+        and the rows are mapped back to slots.
+        """
+        scores, rows = faiss.downcast_index(self._index.index).search(queries, k, params=params)
+        return scores, np.where(rows >= 0, self._get_id_map()[np.maximum(rows, 0)], -1)
+
+    def _get_id_map(self) -> np.ndarray:
+        """Slots of the wrapped index's rows, copied once per index change"""
+        cached = self._id_map_cache
+        if cached is None or cached[0] is not self._index or cached[1] != self._index.ntotal:
+            # Adds only append; removals reset the cache and swaps change the index
+            cached = (self._index, self._index.ntotal, faiss.vector_to_array(self._index.id_map))
+            self._id_map_cache = cached
+        return cached[2]
+
+    def _index_rows(self, slots: np.ndarray) -> np.ndarray:
+        """Rows of the wrapped index holding the given slots"""
+        return np.flatnonzero(np.isin(self._get_id_map(), slots)).astype(np.int64)
+
+    def _search_filtered(self,
+                         queries: np.ndarray,
+                         k: int,
+                         filters: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search only the faces whose metadata matches ``filters``
+        
+        Partitions of up to ``matching.filter_exact_max`` live faces are
+        scored exactly, so the work is proportional to the partition; larger
+        ones are searched in the index restricted by an ID selector.
+        
+        Returns:
+            (scores, slots) like ``index.search``
+        """
+        slots = self._attributes.select(filters)
+        slots = slots[self._get_row_arrays()[3][slots]]
+        if len(slots) <= self._filter_exact_max:
+            encodings = self._gather_encodings(slots)
+            if encodings is None:
+                encodings = np.zeros((0, queries.shape[1]), dtype=np.float32)
+            scores, positions = subset_top_k(queries, encodings, k)
+            return scores, np.where(positions >= 0, slots[np.maximum(positions, 0)], -1)
+        
+        self._ensure_index()
+        selector = faiss.IDSelectorBatch(self._index_rows(slots))
+        return self._search(queries, k, self._search_parameters(selector))
+
+    def _search_parameters(self, selector) -> 'faiss.SearchParameters':
+        """Search parameters of the current index type carrying an ID selector"""
+        if self._index_type == 'ivf':
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self._nprobe)
+        if self._index_type == 'hnsw':
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self._ef_search)
+        return faiss.SearchParameters(sel=selector)
+
+    def _exclude_dead(self) -> Tuple[Any, Any]:
+        """ID selector skipping removed slots that are still indexed"""
+        dead = faiss.IDSelectorBatch(self._index_rows(np.asarray(self._index_dead, dtype=np.int64)))
+        # IDSelectorNot does not own the wrapped selector; keep both alive
+        return dead, faiss.IDSelectorNot(dead)
+
+    def _search_persons(self, encoding: np.ndarray, max_matches: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Two-stage search over person centroids
+        
+        The nearest ``max_matches * matching.person_candidates`` centroids
+        select candidate persons; only their faces are scored exactly.
+        
+        Args:
+            encoding: Normalized query of shape (1, dimension)
+            max_matches: Distinct persons wanted
+            
+        Returns:
+            (scores, slots) of shape (1, m) like ``index.search``: the best
+            face of each candidate person, best-first
+        """
+        self._ensure_person_index()
+        _, codes = self._person_index.search(encoding, max_matches * self._person_candidates)
+        groups = [self._person_index.members(code) for code in codes[0] if code >= 0]
+        groups = [members for members in groups if len(members)]
+        if not groups:
+            return np.zeros((1, 0), dtype=np.float32), np.zeros((1, 0), dtype=np.int64)
+        
+        slots = np.concatenate(groups)
+        scores = self._encodings_at(slots.reshape(1, -1))[0] @ encoding.reshape(-1).astype(np.float32)
+        starts = np.cumsum([0] + [len(members) for members in groups[:-1]])
+        best_scores = np.maximum.reduceat(scores, starts)
+        best_slots = np.array([members[np.argmax(scores[start:start + len(members)])]
+                               for members, start in zip(groups, starts)])
+        
+        order = np.argsort(-best_scores)
+        return best_scores[order].reshape(1, -1), best_slots[order].reshape(1, -1)
+
+    def _ensure_person_index(self) -> None:
+        """Build person centroids from the live rows on first use"""
+        if self._person_index is not None:
+            return
+        slots = self._live_slots()
+        codes = np.asarray(self._row_person_codes, dtype=np.int64)
+        persons = PersonIndex(self._dimension_hint() or None)
+        for start in range(0, len(slots), 65536):
+            chunk = slots[start:start + 65536]
+            persons.add_batch(codes[chunk], chunk, self._gather_encodings(chunk))
+        self._person_index = persons
+
+    def _encodings_at(self, slots: np.ndarray) -> np.ndarray:
+        """Exact encodings for a 2D array of slots (-1 gives zeros)"""
+        n_mapped = len(self._mapped_encodings)
+        rows = np.where(slots >= 0, slots, 0)
+        vectors = np.zeros(rows.shape + (self._dimension_hint(),), dtype=np.float32)
+        
+        mapped = (slots >= 0) & (rows < n_mapped)
+        if mapped.any():
+            vectors[mapped] = self._mapped_encodings[rows[mapped]]
+        appended = (slots >= 0) & (rows >= n_mapped)
+        if appended.any():
+            vectors[appended] = np.vstack([self._encodings[row - n_mapped]
+                                           for row in rows[appended]])
+        return vectors
+
     def _load_metadata(self) -> None:
-        """Load face metadata from disk"""
+        """Load the last snapshot and replay the operation log"""
         try:
-            if self._metadata_file.exists():
+            wal_segment = 0
+            if self._snapshot_file.exists():
+                state, encodings = read_snapshot(self._snapshot_file)
+                wal_segment = state['wal_segment']
+                self._load_rows(state['face_ids'], encodings, state['metadata'])
+                    
+            elif self._metadata_file.exists():
+                # State written before the operation log
                 with open(self._metadata_file, 'r') as f:
                     data = json.load(f)
-                    
-                self._metadata = data.get('metadata', {})
-                self._face_ids = data.get('face_ids', [])
-                
-                # Load encodings
-                if (self._storage_dir / 'encodings.npz').exists():
-                    data = np.load(self._storage_dir / 'encodings.npz')
-                    self._encodings = [enc for enc in data['encodings']]
-                    
-                self.logger.info(f"Loaded metadata for {len(self._face_ids)} faces")
+                encodings_file = self._storage_dir / 'encodings.npz'
+                if encodings_file.exists():
+                    encodings = np.load(encodings_file)['encodings']
+                    encodings = encodings.reshape(len(encodings), -1)
+                    face_ids = data.get('face_ids', [])[:len(encodings)]
+                    live = [slot for slot, face_id in enumerate(face_ids) if face_id is not None]
+                    self._load_rows([face_ids[slot] for slot in live], encodings[live],
+                                    data.get('metadata', {}))
+                self._records_since_snapshot = self._snapshot_interval
+            
+            self._wal = WriteAheadLog(self._storage_dir / 'wal', sync=self._wal_sync)
+            for header, vector in self._wal.replay(wal_segment):
+                if header['op'] == 'add':
+                    self._apply_add(header['face_id'], vector, header['metadata'])
+                elif header['op'] == 'remove':
+                    self._remove_slots([self._face_slots[face_id] for face_id in header['face_ids']
+                                        if face_id in self._face_slots])
+                self._records_since_snapshot += 1
+            self._wal.open(wal_segment)
+            
+            self._stats['total_faces'] = len(self._face_slots)
+            self.logger.info(f"Loaded {len(self._face_slots)} faces "
+                             f"({self._records_since_snapshot} log records)")
                 
         except Exception as e:
             self.logger.error(f"Failed to load metadata: {str(e)}")
-            self._metadata = {}
-            self._face_ids = []
-            self._encodings = []
+            raise MatcherError(f"Failed to load matcher state: {str(e)}")
 
-    def _load_index(self) -> None:
-        """Load FAISS index from disk"""
-        try:
-            self._index = faiss.read_index(str(self._index_file))
-            if self.device.type == 'cuda':
-                # Convert to GPU index
-                res = faiss.StandardGpuResources()
-                self._index = faiss.index_cpu_to_gpu(res, 0, self._index)
-                
-            self.logger.info("Loaded face index from disk")
-            
-        except Exception as e:
-            self.logger.error(f"Failed to load index: {str(e)}")
-            self._create_index()
+    def _load_rows(self,
+                   face_ids: List[str],
+                   encodings: np.ndarray,
+                   metadata: Dict[str, Dict]) -> None:
+        """Install snapshot rows as slots 0..n-1 without copying encodings"""
+        self._mapped_encodings = encodings
+        self._face_ids = list(face_ids)
+        self._face_slots = {face_id: slot for slot, face_id in enumerate(self._face_ids)}
+        self._metadata = {face_id: metadata.get(face_id, {}) for face_id in self._face_ids}
+        for face_id in self._face_ids:
+            self._append_row_attributes(self._metadata[face_id])
 
     async def add_face(self,
                       face_id: str,
@@ -252,57 +669,138 @@ class FaceMatcher(BaseComponent):
             True if face was added successfully
         """
         try:
-            async with self._index_lock:
-                # Normalize encoding
-                encoding = self._normalize_encoding(encoding)
-                
-                # Validate encoding
-                if not self._validate_encoding(encoding):
-                    raise MatcherError("Invalid face encoding")
-                
-                # Add to index
-                self._index.add(encoding.reshape(1, -1))
-                self._face_ids.append(face_id)
-                self._encodings.append(encoding)
-                self._metadata[face_id] = {
-                    **metadata,
-                    'added_at': datetime.utcnow().isoformat()
-                }
-                
-                # Update stats
-                self._stats['total_faces'] += 1
-                
-                # Save periodically
-                if len(self._face_ids) % 100 == 0:
-                    await self._save_state()
-                
-                return True
+            # Normalize encoding
+            encoding = self._normalize_encoding(encoding)
+            
+            # Validate encoding
+            if not self._validate_encoding(encoding):
+                raise MatcherError("Invalid face encoding")
+            
+            metadata = {
+                **metadata,
+                'added_at': datetime.utcnow().isoformat()
+            }
+            
+            # Queue for the next group commit and wait until it is published
+            loop = asyncio.get_running_loop()
+            done = loop.create_future()
+            self._pending_adds.append((face_id, encoding, metadata, done))
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = loop.create_task(self._flush_adds())
+            await done
+            return True
                 
         except Exception as e:
             self.logger.error(f"Failed to add face: {str(e)}")
             return False
 
+    async def _flush_adds(self) -> None:
+        """
+        Log and publish queued adds in batches
+        
+        Each batch costs one log sync and one index update. Searches keep
+        running while the batch is logged and only wait for the publish
+        step, after which all of its faces are visible at once.
+        """
+        loop = asyncio.get_running_loop()
+        while self._pending_adds:
+            batch = self._pending_adds[:self._write_batch_size]
+            del self._pending_adds[:len(batch)]
+            items = [(face_id, encoding, metadata) for face_id, encoding, metadata, _ in batch]
+            try:
+                async with self._write_lock:
+                    # Log first, then apply
+                    if self._wal is not None:
+                        await loop.run_in_executor(self._wal_executor, self._wal.append_many, [
+                            ({'op': 'add', 'face_id': face_id, 'metadata': metadata}, encoding)
+                            for face_id, encoding, metadata in items
+                        ])
+                    async with self._index_lock.write():
+                        encodings, slots = self._stage_adds(items)
+                        if self._index is not None and len(slots):
+                            await loop.run_in_executor(
+                                None, self._index.add_with_ids, encodings, slots
+                            )
+                        self._stats['total_faces'] = len(self._face_slots)
+            except Exception as e:
+                for *_, done in batch:
+                    if not done.done():
+                        done.set_exception(e)
+                continue
+            
+            for *_, done in batch:
+                if not done.done():
+                    done.set_result(True)
+            self._record_logged(len(batch))
+            self._adds_since_maintenance += len(batch)
+            if self._adds_since_maintenance >= self._maintenance_interval:
+                self._adds_since_maintenance = 0
+                self._schedule_maintenance()
+
+    def _apply_add(self,
+                   face_id: str,
+                   encoding: np.ndarray,
+                   metadata: Dict[str, Any]) -> None:
+        """Store a normalized encoding under a new slot and index it; caller holds the lock"""
+        encodings, slots = self._stage_adds([(face_id, encoding, metadata)])
+        if self._index is not None and len(slots):
+            self._index.add_with_ids(encodings, slots)
+
+    def _stage_adds(self,
+                    items: List[Tuple[str, np.ndarray, Dict[str, Any]]]
+                    ) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        Store normalized encodings under new slots; caller holds the lock
+        
+        Returns:
+            (encodings, slots) still to be added to the index; faces
+            replaced again within the batch are left out
+        """
+        slots = []
+        for face_id, encoding, metadata in items:
+            # Re-adding a face replaces its previous encoding
+            if face_id in self._face_slots:
+                self._remove_slots([self._face_slots[face_id]])
+            
+            encoding = encoding.reshape(1, -1)
+            slot = len(self._face_ids)
+            self._face_slots[face_id] = slot
+            self._face_ids.append(face_id)
+            self._encodings.append(encoding)
+            self._metadata[face_id] = metadata
+            self._append_row_attributes(metadata)
+            if self._person_index is not None:
+                self._person_index.add(self._row_person_codes[slot], slot, encoding)
+            slots.append(slot)
+        
+        slots = np.asarray([slot for slot in slots if self._row_live[slot]], dtype=np.int64)
+        if not len(slots):
+            return None, slots
+        return self._gather_encodings(slots), slots
+
     async def find_matches(self,
                           encoding: np.ndarray,
-                          max_matches: int = 5) -> List[MatchResult]:
+                          max_matches: int = 5,
+                          filters: Optional[Dict[str, Any]] = None) -> List[MatchResult]:
         """
         Find matching faces for encoding
         
         Args:
             encoding: Query face encoding
             max_matches: Maximum number of matches to return
+            filters: Metadata restriction, e.g. ``{'site': 'hq', 'zone': 'B'}``
+                (only matching faces are searched)
             
         Returns:
             List of MatchResult objects sorted by confidence
         """
         try:
             # Check cache
-            cache_key = self._get_cache_key(encoding)
-            if cache_key in self._match_cache:
-                matches, timestamp = self._match_cache[cache_key]
-                if time.time() - timestamp < self._cache_ttl:
-                    self._stats['cache_hits'] += 1
-                    return matches
+            cache_key = self._get_cache_key(encoding) + filter_key(filters)
+            cached = self._match_cache.get(cache_key)
+            if cached is not None:
+                self._stats['cache_hits'] += 1
+                return cached
                 
             self._stats['cache_misses'] += 1
             start_time = time.time()
@@ -311,59 +809,71 @@ class FaceMatcher(BaseComponent):
             encoding = self._normalize_encoding(encoding)
             
             # Search index
-            k = min(max_matches * 2, len(self._face_ids))  # Get extra matches for filtering
-            if k == 0:
+            if not self._face_slots:
                 return []
+            persons = self._person_prefilter and not filters
+            await self._prepare_search(persons)
+            async with self._index_lock.read():
+                # Get extra matches for filtering
+                k = min(max_matches * 2, len(self._face_ids))
+                if filters:
+                    search = partial(self._search_filtered, encoding.reshape(1, -1), k, filters)
+                elif persons:
+                    # One hit per person by construction
+                    search = partial(self._search_persons, encoding, max_matches)
+                else:
+                    search = partial(self._search, encoding.reshape(1, -1), k)
+                D, I = await asyncio.get_running_loop().run_in_executor(self._search_executor, search)
                 
-            D, I = self._index.search(encoding.reshape(1, -1), k)
-            
-            # Process results
-            matches = []
-            seen_persons = set()
-            
-            for idx, (distance, face_idx) in enumerate(zip(D[0], I[0])):
-                if face_idx >= len(self._face_ids):
-                    continue
-                    
-                face_id = self._face_ids[face_idx]
-                metadata = self._metadata[face_id]
-                person_id = metadata.get('person_id')
+                # Process results
+                matches = []
+                seen_persons = set()
                 
-                # Skip if we already have a better match for this person
-                if person_id in seen_persons:
-                    continue
-                    
-                # Convert distance to confidence
-                confidence = self._distance_to_confidence(distance)
-                if confidence < self._min_confidence:
-                    continue
+                for idx, (distance, face_idx) in enumerate(zip(D[0], I[0])):
+                    if face_idx < 0 or face_idx >= len(self._face_ids):
+                        continue
                 
-                # Apply quality weighting if enabled
-                if self._use_quality_weighting:
-                    quality_score = metadata.get('quality_score', 0.5)
-                    confidence *= quality_score
+                    face_id = self._face_ids[face_idx]
+                    if face_id is None:
+                        continue
+                    metadata = self._metadata[face_id]
+                    person_id = metadata.get('person_id')
                 
-                match = MatchResult(
-                    person_id=person_id,
-                    confidence=confidence,
-                    encoding_id=face_id,
-                    quality_score=metadata.get('quality_score', 0.0),
-                    metadata=metadata,
-                    match_time=time.time() - start_time,
-                    match_distance=float(distance)
-                )
+                    # Skip if we already have a better match for this person
+                    if person_id in seen_persons:
+                        continue
                 
-                matches.append(match)
-                seen_persons.add(person_id)
+                    # Convert distance to confidence
+                    confidence = self._distance_to_confidence(distance)
+                    if confidence < self._min_confidence:
+                        continue
+                
+                    # Apply quality weighting if enabled
+                    if self._use_quality_weighting:
+                        quality_score = metadata.get('quality_score', 0.5)
+                        confidence *= quality_score
+                
+                    match = MatchResult(
+                        person_id=person_id,
+                        confidence=confidence,
+                        encoding_id=face_id,
+                        quality_score=metadata.get('quality_score', 0.0),
+                        metadata=metadata,
+                        match_time=time.time() - start_time,
+                        match_distance=float(distance)
+                    )
+                
+                    matches.append(match)
+                    seen_persons.add(person_id)
+                
+                    if len(matches) >= max_matches:
+                        break
                 
-                if len(matches) >= max_matches:
-                    break
-            
             # Sort by confidence
             matches.sort(key=lambda m: m.confidence, reverse=True)
             
             # Update cache
-            self._match_cache[cache_key] = (matches, time.time())
+            self._match_cache.set(cache_key, matches)
             
             # Update stats
             self._update_stats(matches)
@@ -374,6 +884,113 @@ class FaceMatcher(BaseComponent):
             self.logger.error(f"Face matching failed: {str(e)}")
             raise MatcherError(f"Face matching failed: {str(e)}")
 
+    async def match_batch(self,
+                          encodings: np.ndarray,
+                          k: int = 5,
+                          filters: Optional[Dict[str, Any]] = None) -> BatchMatches:
+        """
+        Match several face encodings with a single index search
+        
+        All faces of a frame (or of several cameras) are searched together,
+        person-level deduplication is done on arrays and the results are
+        returned in columnar form instead of per-match objects.
+        
+        Args:
+            encodings: Query encodings of shape (n, dimension)
+            k: Maximum number of distinct persons per query
+            filters: Metadata restriction applied to every query
+            
+        Returns:
+            BatchMatches with person IDs as labels and confidences as scores
+        """
+        try:
+            start_time = time.time()
+            
+            encodings = np.asarray(encodings, dtype=np.float32)
+            if encodings.size == 0 or not self._face_slots:
+                return BatchMatches.empty()
+            encodings = self._normalize_encoding(encodings)
+            
+            # One search for the whole batch, with headroom for duplicates
+            await self._prepare_search()
+            async with self._index_lock.read():
+                n_faces = len(self._face_ids)
+                candidates = min(k * self._candidate_factor, n_faces)
+                if filters:
+                    search = partial(self._search_filtered, encodings, candidates, filters)
+                else:
+                    search = partial(self._search, encodings, candidates)
+                D, I = await asyncio.get_running_loop().run_in_executor(self._search_executor, search)
+                
+                person_ids, person_codes, quality, live = self._get_row_arrays()
+                valid = (I >= 0) & (I < n_faces)
+                rows = np.where(valid, I, 0)
+                valid &= live[rows]
+                
+                confidence = np.clip((D + 1) / 2, 0.0, 1.0)
+                valid &= confidence >= self._min_confidence
+                if self._use_quality_weighting:
+                    confidence = confidence * quality[rows]
+                
+                keep = first_unique_per_query(person_codes[rows], valid, k)
+                query_index, column = np.nonzero(keep)
+                scores = confidence[query_index, column].astype(np.float32)
+                
+            # Quality weighting can reorder hits; sort best-first per query
+            order = np.lexsort((-scores, query_index))
+            query_index = query_index[order]
+            matched_rows = rows[query_index, column[order]]
+            scores = scores[order]
+            
+            self._update_batch_stats(scores, time.time() - start_time)
+            
+            return BatchMatches(
+                query_index=query_index,
+                rows=matched_rows,
+                labels=person_ids[matched_rows],
+                scores=scores
+            )
+            
+        except Exception as e:
+            self.logger.error(f"Batch face matching failed: {str(e)}")
+            raise MatcherError(f"Batch face matching failed: {str(e)}")
+
+    def face_id_for_row(self, row: int) -> str:
+        """Face ID stored at an index row"""
+        return self._face_ids[row]
+
+    def _append_row_attributes(self, metadata: Dict[str, Any]) -> None:
+        """Record person and quality attributes for a newly added row"""
+        person_id = metadata.get('person_id')
+        self._attributes.add(len(self._row_person_ids), metadata)
+        code = self._person_codes.get(person_id)
+        if code is None:
+            code = len(self._person_codes)
+            self._person_codes[person_id] = code
+        
+        self._row_person_ids.append(person_id)
+        self._row_person_codes.append(code)
+        self._row_quality.append(metadata.get('quality_score', 0.5))
+        self._row_live.append(True)
+        self._row_arrays = None
+
+    def _live_slots(self) -> np.ndarray:
+        """Slots that hold a face (not tombstoned)"""
+        return np.flatnonzero(np.asarray(self._row_live, dtype=bool))
+
+    def _get_row_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Array views of the per-row attributes, rebuilt after changes"""
+        if self._row_arrays is None:
+            person_ids = np.empty(len(self._row_person_ids), dtype=object)
+            person_ids[:] = self._row_person_ids
+            self._row_arrays = (
+                person_ids,
+                np.asarray(self._row_person_codes, dtype=np.int64),
+                np.asarray(self._row_quality, dtype=np.float32),
+                np.asarray(self._row_live, dtype=bool)
+            )
+        return self._row_arrays
+
     def _normalize_encoding(self, encoding: np.ndarray) -> np.ndarray:
         """Normalize face encoding vector"""
         try:
@@ -417,50 +1034,343 @@ class FaceMatcher(BaseComponent):
             self.logger.error(f"Confidence calculation failed: {str(e)}")
             return 0.0
 
-    async def remove_face(self, face_id: str) -> bool:
+    async def remove_face(self, face_id: str, erase: bool = False) -> bool:
         """Remove face from matching system"""
+        return await self.remove_faces([face_id], erase=erase) == 1
+
+    async def remove_faces(self, face_ids: List[str], erase: bool = False) -> int:
+        """
+        Remove several faces (e.g. bulk offboarding or erasure requests)
+        
+        Rows are dropped from the index by ID and tombstoned in place; the
+        index is never rebuilt on the request path. Once enough rows are
+        dead, compaction runs in the background.
+        
+        Args:
+            face_ids: Face identifiers to remove
+            erase: Also purge the templates from disk before returning: a
+                snapshot without them is written and the log segments and
+                older snapshot stores still holding them are deleted. This
+                rewrites the whole gallery, so remove many faces in one
+                call; by default they stay on disk until the next
+                scheduled snapshot.
+            
+        Returns:
+            Number of faces removed
+            
+        Raises:
+            ErasureError: The faces were removed but the purge failed
+                (``removed`` holds the count)
+        """
         try:
-            async with self._index_lock:
-                if face_id not in self._face_ids:
-                    return False
-                    
-                # Get index of face
-                idx = self._face_ids.index(face_id)
+            async with self._write_lock:
+                slots = [self._face_slots[face_id] for face_id in set(face_ids)
+                         if face_id in self._face_slots]
+                if not slots:
+                    return 0
                 
-                # Remove from lists
-                self._face_ids.pop(idx)
-                self._encodings.pop(idx)
-                self._metadata.pop(face_id, None)
+                if self._wal is not None:
+                    await asyncio.get_running_loop().run_in_executor(
+                        self._wal_executor, self._wal.append,
+                        {'op': 'remove', 'face_ids': [self._face_ids[slot] for slot in slots]}
+                    )
+                async with self._index_lock.write():
+                    self._remove_slots(slots)
+                    self._match_cache.clear()
+                self._stats['total_faces'] = len(self._face_slots)
+                self._stats['removed_faces'] += len(slots)
                 
-                # Rebuild index
-                await self._rebuild_index()
+        except Exception as e:
+            self.logger.error(f"Failed to remove faces: {str(e)}")
+            return 0
+        
+        self._schedule_compaction()
+        if erase and self._wal is not None:
+            try:
+                await self._save_state()
+            except MatcherError as e:
+                # The removal is logged and applied; only the purge failed
+                self._record_logged(1)
+                raise ErasureError(len(slots), f"Removed {len(slots)} faces but failed to purge them: {str(e)}")
+        else:
+            self._record_logged(1)
+        return len(slots)
+
+    def _remove_slots(self, slots: List[int]) -> None:
+        """Tombstone rows and drop them from the index; caller holds the lock"""
+        if not slots:
+            return
+        ids = np.asarray(slots, dtype=np.int64)
+        try:
+            if self._index is not None:
+                self._index.remove_ids(ids)
+                # Remaining rows of the wrapped index shift down
+                self._id_map_cache = None
+        except RuntimeError:
+            # HNSW (and some GPU indexes) cannot delete; rows stay in the
+            # index, are excluded by ID at search time and go away on compaction
+            self._index_dead.extend(slots)
+            self._dead_selector = self._exclude_dead()
+        
+        if self._person_index is not None:
+            vectors = self._encodings_at(np.asarray(slots, dtype=np.int64).reshape(1, -1))[0]
+            for slot, vector in zip(slots, vectors):
+                self._person_index.remove(self._row_person_codes[slot], slot, vector)
+        
+        for slot in slots:
+            face_id = self._face_ids[slot]
+            self._face_slots.pop(face_id, None)
+            self._metadata.pop(face_id, None)
+            self._face_ids[slot] = None
+            # Do not keep the biometric template around until compaction
+            # (mapped snapshot rows disappear with the next snapshot)
+            row = slot - len(self._mapped_encodings)
+            if row >= 0:
+                self._encodings[row] = np.zeros_like(self._encodings[row])
+            self._row_live[slot] = False
+        
+        self._row_arrays = None
+        self._tombstones += len(slots)
+
+    def _schedule_compaction(self) -> None:
+        """Start background compaction once enough rows are tombstoned"""
+        if not self._face_ids or self._tombstones < self._compaction_ratio * len(self._face_ids):
+            return
+        if self._compaction_task is None or self._compaction_task.done():
+            self._compaction_task = asyncio.get_running_loop().create_task(self.compact())
+
+    async def compact(self, force: bool = False, index_type: Optional[str] = None) -> None:
+        """
+        Drop tombstoned rows, renumber slots and rebuild the index
+        
+        The new index is built (and tuned) in a worker thread while
+        matching keeps using the current one; both are swapped in a
+        single step once in-flight searches have finished.
+        
+        Args:
+            force: Rebuild even without tombstones (retraining, type switch)
+            index_type: Index type to rebuild as (default: the current type)
+        """
+        try:
+            async with self._write_lock:
+                if not self._tombstones and not force:
+                    return
                 
-                # Clear cache
-                self._match_cache.clear()
+                index_type = index_type or self._index_type
+                slots = self._live_slots()
+                face_ids = [self._face_ids[slot] for slot in slots]
+                codes = np.asarray(self._row_person_codes, dtype=np.int64)[slots]
+                encodings, index, tuning, persons = await asyncio.get_running_loop().run_in_executor(
+                    None, self._compacted_index, slots, index_type,
+                    codes if self._person_index is not None else None
+                )
                 
-                return True
+                # Swap everything at once, between searches
+                async with self._index_lock.write():
+                    mapping = np.full(len(self._face_ids), -1, dtype=np.int64)
+                    mapping[slots] = np.arange(len(slots))
+                    self._attributes.remap(mapping)
+                    self._index = index
+                    self._face_ids = face_ids
+                    self._face_slots = {face_id: slot for slot, face_id in enumerate(face_ids)}
+                    self._mapped_encodings = encodings
+                    self._encodings = []
+                    self._person_index = persons
+                    self._row_person_ids = [self._row_person_ids[slot] for slot in slots]
+                    self._row_person_codes = [self._row_person_codes[slot] for slot in slots]
+                    self._row_quality = [self._row_quality[slot] for slot in slots]
+                    self._row_live = [True] * len(slots)
+                    self._row_arrays = None
+                    if self._tombstones:
+                        self._stats['compactions'] += 1
+                    self._tombstones = 0
+                    self._index_dead = []
+                    self._dead_selector = None
+                    self._index_type = index_type
+                    self._trained_size = len(slots)
+                    self._record_tuning(tuning, len(slots))
+                    self._match_cache.clear()
+                    self._stats['index_rebuilds'] += 1
+                    
+        except Exception as e:
+            self.logger.error(f"Compaction failed: {str(e)}")
+
+    def _compacted_index(self,
+                         slots: np.ndarray,
+                         index_type: str,
+                         person_codes: Optional[np.ndarray] = None
+                         ) -> Tuple[np.ndarray, Any, Dict[str, Any], Optional[PersonIndex]]:
+        """
+        Gather live encodings, index them densely and tune the index (worker thread)
+        
+        Person centroids are rebuilt for the new slots when ``person_codes``
+        (one per slot) are given.
+        """
+        encodings = self._gather_encodings(slots)
+        if encodings is None:
+            encodings = np.zeros((0, self._dimension_hint()), dtype=np.float32)
+        dense = np.arange(len(slots), dtype=np.int64)
+        index = self._build_index(encodings if len(encodings) else None, dense, index_type)
+        tuning = self._tune_index(index, index_type, dense, encodings) if index is not None else {}
+        
+        persons = None
+        if person_codes is not None:
+            persons = PersonIndex(encodings.shape[1] or None)
+            persons.add_batch(person_codes, dense, encodings)
+        return encodings, index, tuning, persons
+
+    def _schedule_maintenance(self) -> None:
+        """Start a background index check unless one is running"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Not on the event loop yet; the next add or search schedules it
+        if self._maintenance_task is None or self._maintenance_task.done():
+            self._maintenance_task = loop.create_task(self.maintain_index())
+
+    async def maintain_index(self) -> None:
+        """
+        Keep the index suited to the gallery
+        
+        Switches index type when the gallery crosses a size threshold
+        (``matching.index_type: auto``), retrains IVF centroids when the
+        lists are imbalanced or the gallery has outgrown the training set,
+        and retunes nprobe/efSearch for the target recall as it grows.
+        """
+        try:
+            if self._index is None:
+                return
+            
+            size = len(self._face_slots)
+            index_type = self._index_type
+            if self._configured_index_type == 'auto':
+                index_type = self._index_policy.index_type_for(size)
+            imbalance = self._ivf_imbalance()
+            self._stats['ivf_imbalance'] = imbalance
+            
+            if index_type != self._index_type or (
+                    index_type == 'ivf' and
+                    self._index_policy.needs_retrain(size, self._trained_size, imbalance)):
+                self.logger.info(f"Rebuilding {index_type} index for {size} faces")
+                await self.compact(force=True, index_type=index_type)
+            elif index_type != 'flat' and self._index_policy.needs_retune(size, self._tuned_size):
+                await self._retune_index()
                 
         except Exception as e:
-            self.logger.error(f"Failed to remove face: {str(e)}")
-            return False
+            self.logger.error(f"Index maintenance failed: {str(e)}")
+
+    def _ivf_imbalance(self) -> Optional[float]:
+        """Imbalance factor of the IVF lists (None for other index types)"""
+        if self._index is None or self._index_type != 'ivf':
+            return None
+        ivf = faiss.extract_index_ivf(self._index)
+        return imbalance_factor([ivf.invlists.list_size(i) for i in range(ivf.nlist)])
+
+    async def _retune_index(self) -> None:
+        """Retune the live index's search parameter for the current gallery"""
+        async with self._write_lock:
+            slots = self._live_slots()
+            tuning = await asyncio.get_running_loop().run_in_executor(
+                None, self._tune_copy, slots
+            )
+            if tuning:
+                async with self._index_lock.write():
+                    self._set_search_parameter(self._index, self._index_type, tuning['value'])
+            self._record_tuning(tuning, len(slots))
+
+    def _tune_copy(self, slots: np.ndarray) -> Dict[str, Any]:
+        """Tune a copy of the live index, so searches never see trial values (worker thread)"""
+        return self._tune_index(faiss.clone_index(self._index), self._index_type, slots)
+
+    def _tune_index(self,
+                    index,
+                    index_type: str,
+                    slots: np.ndarray,
+                    encodings: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        Set the cheapest nprobe/efSearch reaching the target recall
+        
+        Sample queries are perturbed stored encodings; the ground truth is
+        an exact scan of the live encodings.
+        
+        Args:
+            index: ID-mapped index holding ``slots``
+            index_type: 'flat', 'ivf' or 'hnsw'
+            slots: Sorted IDs of the indexed encodings
+            encodings: Their encodings (gathered if not given)
+            
+        Returns:
+            Tuning result (empty for flat indexes and tiny galleries)
+        """
+        if index_type == 'flat' or len(slots) < 2:
+            return {}
+        if encodings is None:
+            encodings = self._gather_encodings(slots)
+        
+        rng = np.random.default_rng()
+        sample = encodings[rng.choice(len(slots), min(len(slots), self._tuning_queries), replace=False)]
+        noise = rng.normal(scale=0.5 / np.sqrt(sample.shape[1]), size=sample.shape)
+        queries = (sample + noise).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        k = min(10, len(slots))
+        truth = np.asarray(slots)[exact_top_k(queries, encodings, k)]
+        
+        if index_type == 'ivf':
+            nlist = faiss.extract_index_ivf(index).nlist
+            values = [value for value in NPROBE_VALUES if value < nlist] + [nlist]
+        else:
+            values = EF_SEARCH_VALUES
+        
+        def search(value: int) -> np.ndarray:
+            self._set_search_parameter(index, index_type, value)
+            return index.search(queries, k)[1]
+        
+        tuning = tune_search_parameter(search, truth, values, self._index_policy.target_recall)
+        self._set_search_parameter(index, index_type, tuning['value'])
+        return {
+            **tuning,
+            'parameter': 'nprobe' if index_type == 'ivf' else 'ef_search',
+            'gallery_size': len(slots)
+        }
+
+    def _set_search_parameter(self, index, index_type: str, value: int) -> None:
+        """Set nprobe (IVF) or efSearch (HNSW) on an ID-mapped index"""
+        if index_type == 'ivf':
+            faiss.extract_index_ivf(index).nprobe = value
+        elif index_type == 'hnsw':
+            faiss.downcast_index(index.index).hnsw.efSearch = value
+
+    def _record_tuning(self, tuning: Dict[str, Any], size: int) -> None:
+        """Remember a tuning result; later rebuilds start from its value"""
+        self._tuned_size = size
+        if not tuning:
+            return
+        if tuning['parameter'] == 'nprobe':
+            self._nprobe = tuning['value']
+        else:
+            self._ef_search = tuning['value']
+        self._stats['last_tuning'] = tuning
+        if not tuning['reached']:
+            self.logger.warning(
+                f"Recall target {self._index_policy.target_recall} not reached "
+                f"({tuning['recall']:.3f} at {tuning['parameter']}={tuning['value']})"
+            )
+
+    def _dimension_hint(self) -> int:
+        """Encoding dimension, if any encoding is known"""
+        if len(self._mapped_encodings):
+            return self._mapped_encodings.shape[1]
+        if self._encodings:
+            return self._encodings[0].shape[-1]
+        return 0
 
     async def _rebuild_index(self) -> None:
         """Rebuild FAISS index"""
         try:
-            if not self._encodings:
-                self._create_index()
-                return
-                
-            # Create new index
+            # Create new index with all live rows
             old_index = self._index
             self._create_index()
             
-            # Add all encodings
-            self._index.add(np.vstack(self._encodings))
-            
-            # Save state
-            await self._save_state()
-            
             # Clean up old index
             del old_index
             
@@ -468,64 +1378,84 @@ class FaceMatcher(BaseComponent):
             self.logger.error(f"Index rebuild failed: {str(e)}")
             raise MatcherError(f"Failed to rebuild index: {str(e)}")
 
+    def _record_logged(self, count: int) -> None:
+        """Count log records and snapshot once enough have accumulated"""
+        self._records_since_snapshot += count
+        if self._records_since_snapshot >= self._snapshot_interval:
+            self._schedule_snapshot()
+
+    def _schedule_snapshot(self) -> None:
+        """Start a background snapshot unless one is running"""
+        if self._wal is None:
+            return
+        if self._snapshot_task is None or self._snapshot_task.done():
+            self._snapshot_task = asyncio.get_running_loop().create_task(self._save_state())
+
     async def _save_state(self) -> None:
-        """Save matcher state to disk"""
+        """
+        Snapshot matcher state and drop the log segments it covers
+        
+        Only references are captured on the event loop; serialization and
+        disk writes happen in the snapshot thread while adds, removes and
+        matching continue (new operations go to a fresh log segment).
+        """
         try:
-            # Save metadata
-            data = {
-                'metadata': self._metadata,
-                'face_ids': self._face_ids
-            }
+            # Capture a consistent view between writes (every logged
+            # record is applied), then rotate the log
+            async with self._write_lock:
+                slots = self._live_slots()
+                n_mapped = len(self._mapped_encodings)
+                face_ids = [self._face_ids[slot] for slot in slots]
+                mapped = (self._mapped_encodings, slots[slots < n_mapped])
+                appended = [self._encodings[slot - n_mapped] for slot in slots[slots >= n_mapped]]
+                metadata = {face_id: self._metadata[face_id] for face_id in face_ids}
+                segment = self._wal.rotate()
+                self._records_since_snapshot = 0
             
-            with open(self._metadata_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            
-            # Save encodings
-            np.savez(
-                self._storage_dir / 'encodings.npz',
-                encodings=np.vstack(self._encodings)
+            state = {'face_ids': face_ids, 'metadata': metadata, 'wal_segment': segment}
+            await asyncio.get_running_loop().run_in_executor(
+                self._snapshot_executor, self._write_snapshot, state, mapped, appended
             )
             
-            # Save index
-            if self.device.type == 'cuda':
-                # Convert to CPU for saving
-                cpu_index = faiss.index_gpu_to_cpu(self._index)
-                faiss.write_index(cpu_index, str(self._index_file))
-            else:
-                faiss.write_index(self._index, str(self._index_file))
-                
         except Exception as e:
             self.logger.error(f"Failed to save state: {str(e)}")
             raise MatcherError(f"Failed to save state: {str(e)}")
 
+    def _write_snapshot(self,
+                        state: Dict[str, Any],
+                        mapped: Tuple[np.ndarray, np.ndarray],
+                        appended: List[np.ndarray]) -> None:
+        """Write a snapshot and delete the log it replaces (snapshot thread)"""
+        start_time = time.time()
+        matrix, rows = mapped
+        
+        def blocks():
+            # Stream rows so a large gallery is never assembled in memory
+            for start in range(0, len(rows), 65536):
+                yield matrix[rows[start:start + 65536]]
+            if appended:
+                yield np.vstack(appended)
+        
+        write_snapshot(self._snapshot_file, state, blocks(),
+                       dimension=self._dimension_hint(), dtype=self._store_dtype)
+        self._wal.remove_segments_before(state['wal_segment'])
+        # State from before the operation log is superseded by the snapshot
+        for legacy in (self._metadata_file, self._storage_dir / 'encodings.npz'):
+            legacy.unlink(missing_ok=True)
+        
+        self._stats['snapshots'] += 1
+        self._stats['last_snapshot_time'] = time.time() - start_time
+
     def _get_cache_key(self, encoding: np.ndarray) -> str:
         """Generate cache key for encoding"""
-        return str(hash(encoding.tobytes()))
+        return embedding_cache_key(encoding)
 
     async def _periodic_cleanup(self) -> None:
-        """Periodically clean up cache"""
-        while True:
-            try:
-                await asyncio.sleep(self._cleanup_interval)
-                
-                # Remove expired cache entries
-                current_time = time.time()
-                expired = [k for k, (_, t) in self._match_cache.items()
-                          if current_time - t > self._cache_ttl]
-                
-                for key in expired:
-                    self._match_cache.pop(key, None)
-                    
-                # Limit cache size
-                if len(self._match_cache) > self._cache_size:
-                    # Remove oldest entries
-                    sorted_cache = sorted(self._match_cache.items(),
-                                       key=lambda x: x[1][1])
-                    for key, _ in sorted_cache[:len(self._match_cache) - self._cache_size]:
-                        self._match_cache.pop(key, None)
-                        
-            except Exception as e:
-                self.logger.error(f"Cache cleanup failed: {str(e)}")
+        """Drop expired cache entries (size is bounded on insert)"""
+        try:
+            self._match_cache.purge_expired()
+        except Exception as e:
+            self.logger.error(f"Cache cleanup failed: {str(e)}")
 
     def _update_stats(self, matches: List[MatchResult]) -> None:
         """Update matching statistics"""
@@ -547,9 +1477,51 @@ class FaceMatcher(BaseComponent):
         except Exception as e:
             self.logger.error(f"Failed to update stats: {str(e)}")
 
+    def _update_batch_stats(self, scores: np.ndarray, match_time: float) -> None:
+        """Update matching statistics from a batch of scores"""
+        try:
+            if scores.size == 0:
+                return
+            
+            previous = self._stats['total_matches']
+            self._stats['total_matches'] += int(scores.size)
+            total = self._stats['total_matches']
+            self._stats['average_confidence'] = (
+                (self._stats['average_confidence'] * previous + float(scores.sum())) / total
+            )
+            self._stats['average_match_time'] = (
+                (self._stats['average_match_time'] * previous + match_time * scores.size) / total
+            )
+            self._stats['last_update'] = datetime.utcnow().isoformat()
+            
+        except Exception as e:
+            self.logger.error(f"Failed to update stats: {str(e)}")
+
     async def get_stats(self) -> Dict:
         """Get matching statistics"""
-        return self._stats.copy()
+        nlist = None
+        if self._index is not None and self._index_type == 'ivf':
+            nlist = faiss.extract_index_ivf(self._index).nlist
+        return {
+            **self._stats,
+            'index': {
+                'type': self._index_type,
+                'configured_type': self._configured_index_type,
+                'nlist': nlist,
+                'nprobe': self._nprobe if self._index_type == 'ivf' else None,
+                'ef_search': self._ef_search if self._index_type == 'hnsw' else None,
+                'trained_size': self._trained_size,
+                'tuned_size': self._tuned_size
+            },
+            'persons': len(self._person_index) if self._person_index is not None else None,
+            'filter_values': self._attributes.get_stats(),
+            'compression': self._compression,
+            'concurrency': {
+                'active_searches': self._index_lock.readers,
+                'pending_adds': len(self._pending_adds)
+            },
+            'match_cache': self._match_cache.get_stats()
+        }
 
 # Global matcher instance
-face_matcher = FaceMatcher({}) 
\ No newline at end of file
+face_matcher = FaceMatcher({}) 
\ No newline at end of file
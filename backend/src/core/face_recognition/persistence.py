@@ -0,0 +1,230 @@
+"""
+Crash-safe persistence for the face matcher gallery.
+
+This module provides:
+- Append-only, segmented write-ahead log of add/remove operations
+- CRC-checked binary records (torn writes are detected and skipped)
+- Atomic snapshots with memory-mapped encodings
+- Startup replay of the log segments written after a snapshot
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from pathlib import Path
+import json
+import os
+import struct
+import zlib
+import logging
+
+import numpy as np
+
+from .embedding_store import EmbeddingStore
+
+logger = logging.getLogger(__name__)
+
+# payload size, CRC32 of the payload, header size; payload = header + body
+_RECORD = struct.Struct('<III')
+
+
+class WriteAheadLog:
+    """
+    Segmented append-only operation log.
+
+    Each record carries a JSON header and an optional float32 vector. A
+    new segment is started on every open and every ``rotate``; a snapshot
+    remembers the first segment it does not cover, so older segments can
+    be deleted once the snapshot is on disk. Nothing is created on disk
+    until the first record is appended.
+    """
+
+    def __init__(self, directory: Path, sync: bool = True):
+        """
+        Args:
+            directory: Directory holding the segment files
+            sync: fsync after every record (survives power loss, not just
+                process crashes)
+        """
+        self._directory = Path(directory)
+        self._sync = sync
+        self._file = None
+        self._segment = 0
+
+    @property
+    def segment(self) -> int:
+        """Number of the segment currently written"""
+        return self._segment
+
+    def _path(self, segment: int) -> Path:
+        return self._directory / f"{segment:010d}.log"
+
+    def segments(self) -> List[int]:
+        """Numbers of all segments on disk, oldest first"""
+        return sorted(int(path.stem) for path in self._directory.glob('*.log'))
+
+    def replay(self, from_segment: int = 0) -> Iterator[Tuple[Dict[str, Any], Optional[np.ndarray]]]:
+        """
+        Read back all records from ``from_segment`` on.
+
+        Reading a segment stops at the first incomplete or corrupt record,
+        which is what a crash in the middle of an append leaves behind.
+
+        Args:
+            from_segment: First segment to read
+
+        Yields:
+            (header, vector) tuples in write order
+        """
+        for segment in self.segments():
+            if segment < from_segment:
+                continue
+            with open(self._path(segment), 'rb') as f:
+                data = f.read()
+
+            offset = 0
+            while offset + _RECORD.size <= len(data):
+                size, crc, header_size = _RECORD.unpack_from(data, offset)
+                start = offset + _RECORD.size
+                payload = data[start:start + size]
+                if len(payload) < size or zlib.crc32(payload) != crc or header_size > size:
+                    break
+                header = json.loads(payload[:header_size])
+                body = payload[header_size:]
+                vector = np.frombuffer(body, dtype=np.float32).copy() if body else None
+                yield header, vector
+                offset = start + size
+
+            if offset < len(data):
+                logger.warning(
+                    f"Ignoring {len(data) - offset} trailing bytes in log segment {segment}"
+                )
+
+    def open(self, min_segment: int = 1) -> None:
+        """
+        Start a new segment after the newest one on disk.
+
+        Args:
+            min_segment: Lowest segment number to use (the first segment a
+                snapshot does not cover, which may not exist on disk yet)
+        """
+        segments = self.segments()
+        self._start_segment(max((segments[-1] if segments else 0) + 1, min_segment))
+
+    def _start_segment(self, segment: int) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._segment = segment
+
+    def _writer(self):
+        """File of the current segment, created on first use"""
+        if self._file is None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            self._file = open(self._path(self._segment), 'ab')
+        return self._file
+
+    def append(self, header: Dict[str, Any], vector: Optional[np.ndarray] = None) -> None:
+        """
+        Durably append one record.
+
+        Args:
+            header: JSON-serializable record header
+            vector: Optional vector stored as float32
+        """
+        self.append_many([(header, vector)])
+
+    def append_many(self, records: List[Tuple[Dict[str, Any], Optional[np.ndarray]]]) -> None:
+        """
+        Durably append several records with a single sync (group commit).
+
+        Args:
+            records: (header, vector) pairs as taken by ``append``
+        """
+        file = self._writer()
+        for header, vector in records:
+            header_bytes = json.dumps(header, default=str).encode()
+            body = b'' if vector is None else np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+            payload = header_bytes + body
+            file.write(_RECORD.pack(len(payload), zlib.crc32(payload), len(header_bytes)))
+            file.write(payload)
+        file.flush()
+        if self._sync:
+            os.fsync(file.fileno())
+
+    def rotate(self) -> int:
+        """
+        Continue in a new segment.
+
+        Returns:
+            int: The new segment number; everything before it is closed
+        """
+        self._start_segment(self._segment + 1)
+        return self._segment
+
+    def remove_segments_before(self, segment: int) -> None:
+        """Delete closed segments older than ``segment``"""
+        for old in self.segments():
+            if old >= segment:
+                break
+            self._path(old).unlink(missing_ok=True)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def write_snapshot(path: Path,
+                   state: Dict[str, Any],
+                   encodings: Union[np.ndarray, Iterable[np.ndarray]],
+                   dimension: Optional[int] = None,
+                   dtype: str = 'float32') -> None:
+    """
+    Atomically write a snapshot.
+
+    Encodings go to a memory-mappable embedding store next to ``path``,
+    named after the snapshot generation (``state['wal_segment']``); the
+    JSON state, which references it, is renamed into place last. Readers
+    therefore see either the old or the new snapshot, never a partial one.
+
+    Args:
+        path: Snapshot state file
+        state: JSON-serializable state; ``face_ids`` become the store's IDs
+        encodings: Encoding matrix, or blocks of rows in ``face_ids`` order
+        dimension: Encoding dimension (for empty galleries)
+        dtype: Stored dtype, float32 or float16
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    state = dict(state)
+    face_ids = state.pop('face_ids', [])
+    store_file = path.with_name(f"{path.stem}-{state.get('wal_segment', 0):010d}.emb")
+    EmbeddingStore.write(store_file, face_ids, encodings, dimension=dimension, dtype=dtype)
+    state['embeddings'] = store_file.name
+
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(state, f, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+    # Stores of older snapshots (already mapped ones stay readable until unmapped)
+    for old in path.parent.glob(f"{path.stem}-*.emb"):
+        if old != store_file:
+            old.unlink(missing_ok=True)
+
+
+def read_snapshot(path: Path) -> Tuple[Dict[str, Any], np.ndarray]:
+    """
+    Read a snapshot written by ``write_snapshot``.
+
+    Returns:
+        (state, encodings) tuple; encodings are a read-only memory map and
+        ``state['face_ids']`` holds the row IDs
+    """
+    path = Path(path)
+    with open(path, 'r') as f:
+        state = json.load(f)
+    store = EmbeddingStore.open(path.with_name(state['embeddings']))
+    state['face_ids'] = store.ids
+    return state, store.embeddings
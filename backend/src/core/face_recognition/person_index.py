@@ -0,0 +1,172 @@
+"""
+Person-level centroid index for two-stage face matching.
+
+This module provides:
+- One centroid per person, maintained incrementally on add/remove
+- Vectorized top-k person search (cosine similarity to the centroids)
+- Member slots per person for exact second-stage scoring
+- Bulk construction from a gallery (sorted segment sums, no Python loop)
+"""
+
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+
+
+class PersonIndex:
+    """
+    Candidate generator over person centroids.
+
+    Each person is represented by the sum of its normalized embeddings;
+    scoring a query against ``sum / |sum|`` is the cosine similarity to the
+    person's mean embedding, so only the sums and their norms are stored.
+    Persons are addressed by dense integer codes (the matcher's person codes).
+    """
+
+    def __init__(self, dimension: Optional[int] = None, initial_capacity: int = 256):
+        self._dimension = dimension
+        self._capacity = max(1, int(initial_capacity))
+        self._sums: Optional[np.ndarray] = None
+        self._norms = np.zeros(self._capacity, dtype=np.float32)
+        self._counts = np.zeros(self._capacity, dtype=np.int64)
+        self._members: Dict[int, Set[int]] = {}
+        self._size = 0  # Highest code + 1
+
+        if dimension is not None:
+            self._allocate(dimension, self._capacity)
+
+    def __len__(self) -> int:
+        """Number of persons with at least one embedding"""
+        return len(self._members)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the centroid arrays"""
+        if self._sums is None:
+            return 0
+        return int(self._sums.nbytes + self._norms.nbytes + self._counts.nbytes)
+
+    def _allocate(self, dimension: int, capacity: int) -> None:
+        """Allocate (or grow) the centroid arrays, copying existing rows"""
+        sums = np.zeros((capacity, dimension), dtype=np.float32)
+        norms = np.zeros(capacity, dtype=np.float32)
+        counts = np.zeros(capacity, dtype=np.int64)
+        if self._sums is not None and self._size:
+            sums[:self._size] = self._sums[:self._size]
+            norms[:self._size] = self._norms[:self._size]
+            counts[:self._size] = self._counts[:self._size]
+
+        self._dimension = dimension
+        self._capacity = capacity
+        self._sums = sums
+        self._norms = norms
+        self._counts = counts
+
+    def _ensure_capacity(self, dimension: int, required: int) -> None:
+        """Grow geometrically so inserts stay amortized O(1)"""
+        if self._sums is None:
+            self._allocate(dimension, self._capacity)
+        elif dimension != self._dimension:
+            raise ValueError(f"Expected dimension {self._dimension}, got {dimension}")
+        if required <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < required:
+            capacity *= 2
+        self._allocate(self._dimension, capacity)
+
+    def add(self, code: int, slot: int, encoding: np.ndarray) -> None:
+        """
+        Add one normalized embedding to a person.
+
+        Args:
+            code: Person code
+            slot: Gallery slot of the embedding
+            encoding: Normalized embedding
+        """
+        encoding = np.asarray(encoding, dtype=np.float32).reshape(-1)
+        self._ensure_capacity(encoding.shape[0], code + 1)
+        self._size = max(self._size, code + 1)
+        self._sums[code] += encoding
+        self._counts[code] += 1
+        self._norms[code] = np.linalg.norm(self._sums[code])
+        self._members.setdefault(code, set()).add(slot)
+
+    def add_batch(self, codes: np.ndarray, slots: np.ndarray, encodings: np.ndarray) -> None:
+        """
+        Add many embeddings at once (gallery load or rebuild).
+
+        Args:
+            codes: Person code per embedding
+            slots: Gallery slot per embedding
+            encodings: Normalized embeddings of shape (n, dimension)
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        if not len(codes):
+            return
+        encodings = np.asarray(encodings, dtype=np.float32)
+        self._ensure_capacity(encodings.shape[1], int(codes.max()) + 1)
+        self._size = max(self._size, int(codes.max()) + 1)
+
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        unique = sorted_codes[starts]
+        self._sums[unique] += np.add.reduceat(encodings[order], starts, axis=0)
+        self._counts[unique] += np.diff(np.r_[starts, len(codes)])
+        self._norms[unique] = np.linalg.norm(self._sums[unique], axis=1)
+
+        for code, slot in zip(sorted_codes.tolist(), np.asarray(slots)[order].tolist()):
+            self._members.setdefault(code, set()).add(slot)
+
+    def remove(self, code: int, slot: int, encoding: np.ndarray) -> None:
+        """Remove one embedding (the one added under ``slot``) from a person"""
+        members = self._members.get(code)
+        if members is None or slot not in members:
+            return
+        members.discard(slot)
+        self._counts[code] -= 1
+        if members:
+            self._sums[code] -= np.asarray(encoding, dtype=np.float32).reshape(-1)
+            self._norms[code] = np.linalg.norm(self._sums[code])
+        else:
+            # Reset exactly instead of leaving rounding residue behind
+            del self._members[code]
+            self._sums[code] = 0
+            self._norms[code] = 0
+
+    def members(self, code: int) -> np.ndarray:
+        """Sorted gallery slots of a person"""
+        return np.fromiter(sorted(self._members.get(code, ())), dtype=np.int64)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Persons whose centroids are most similar to each query.
+
+        Args:
+            queries: Normalized queries of shape (n, dimension)
+            k: Persons per query
+
+        Returns:
+            (scores, codes), both of shape (n, k), best-first; missing
+            entries have code -1
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self._dimension or 1)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        codes = np.full((len(queries), k), -1, dtype=np.int64)
+        if not self._members or k <= 0:
+            return scores, codes
+
+        norms = self._norms[:self._size]
+        live = norms > 0
+        similarity = queries @ self._sums[:self._size].T
+        similarity = np.where(live, similarity / np.where(live, norms, 1), -np.inf)
+
+        n = min(k, int(live.sum()))
+        top = np.argpartition(-similarity, n - 1, axis=1)[:, :n] if n < self._size else \
+            np.broadcast_to(np.arange(self._size), (len(queries), self._size))
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)[:, :n]
+        scores[:, :n] = np.take_along_axis(top_scores, order, axis=1)
+        codes[:, :n] = np.take_along_axis(top, order, axis=1)
+        return scores, codes
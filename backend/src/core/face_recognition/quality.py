@@ -4,7 +4,6 @@ Advanced face quality assessment system for face recognition.
 
 from typing import Dict, List, Optional, Tuple
 import numpy as np
-import cv2
 import torch
 import torch.nn as nn
 from torchvision import transforms
@@ -15,6 +14,7 @@ import asyncio
 from ..base import BaseComponent
 from ..utils.errors import QualityError
 from ..monitoring.decorators import measure_performance
+from ..pool.frame_workers import get_frame_worker_pool, preprocess_face_array, image_quality_metrics
 
 @dataclass
 class QualityMetrics:
@@ -60,6 +60,9 @@ class QualityAssessor(BaseComponent):
             std=[0.229, 0.224, 0.225]
         )
         
+        # OpenCV stages run in worker processes, off the event loop
+        self._frame_pool = get_frame_worker_pool()
+        
         # GPU support
         self.device = torch.device('cuda' if torch.cuda.is_available() and 
                                  config.get('gpu_enabled', True) else 'cpu')
@@ -117,20 +120,23 @@ class QualityAssessor(BaseComponent):
                 self._stats['rejection_reasons']['resolution'] += 1
                 raise QualityError("Face resolution too low")
             
-            # Preprocess image
-            face_tensor = self._preprocess_face(face_img)
+            # Preprocess image and compute image statistics in parallel
+            face_tensor, image_metrics = await asyncio.gather(
+                self._preprocess_face(face_img),
+                self._analyze_image(face_img)
+            )
             if face_tensor is None:
                 raise QualityError("Face preprocessing failed")
             
             # Get quality metrics
-            sharpness = await self._analyze_sharpness(face_img)
-            brightness = await self._analyze_brightness(face_img)
-            contrast = await self._analyze_contrast(face_img)
+            sharpness = image_metrics['sharpness']
+            brightness = image_metrics['brightness']
+            contrast = image_metrics['contrast']
+            symmetry = image_metrics['symmetry']
+            noise_level = image_metrics['noise_level']
             pose = await self._estimate_pose(face_tensor)
             occlusion = await self._detect_occlusion(face_tensor)
             expression = await self._analyze_expression(face_tensor)
-            symmetry = await self._analyze_symmetry(face_img)
-            noise_level = await self._estimate_noise(face_img)
             
             # Check quality thresholds
             if sharpness < self._min_sharpness:
@@ -202,27 +208,21 @@ class QualityAssessor(BaseComponent):
         except Exception as e:
             raise QualityError(f"Quality assessment failed: {str(e)}")
 
-    def _preprocess_face(self, face_img: np.ndarray) -> Optional[torch.Tensor]:
+    async def _preprocess_face(self, face_img: np.ndarray) -> Optional[torch.Tensor]:
         """Preprocess face image"""
         try:
-            # Resize image
-            face_img = cv2.resize(face_img, (self._face_size, self._face_size))
-            
-            # Convert to RGB
-            if len(face_img.shape) == 2:
-                face_img = cv2.cvtColor(face_img, cv2.COLOR_GRAY2RGB)
-            elif face_img.shape[2] == 4:
-                face_img = cv2.cvtColor(face_img, cv2.COLOR_BGRA2RGB)
-            elif face_img.shape[2] == 3:
-                face_img = cv2.cvtColor(face_img, cv2.COLOR_BGR2RGB)
+            # Resize, convert to RGB and normalize in a worker process
+            face_array = await self._frame_pool.run(
+                'quality_preprocess',
+                preprocess_face_array,
+                face_img,
+                self._face_size,
+                self._normalize.mean,
+                self._normalize.std
+            )
             
             # Convert to tensor
-            face_tensor = torch.from_numpy(face_img).float()
-            face_tensor = face_tensor.permute(2, 0, 1)
-            face_tensor = face_tensor.unsqueeze(0)
-            
-            # Normalize
-            face_tensor = self._normalize(face_tensor)
+            face_tensor = torch.from_numpy(face_array)
             face_tensor = face_tensor.to(self.device)
             
             return face_tensor
@@ -232,55 +232,22 @@ class QualityAssessor(BaseComponent):
             return None
 
     @measure_performance()
-    async def _analyze_sharpness(self, face_img: np.ndarray) -> float:
-        """Analyze image sharpness"""
+    async def _analyze_image(self, face_img: np.ndarray) -> Dict[str, float]:
+        """Analyze sharpness, brightness, contrast, symmetry and noise"""
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
-            
-            # Calculate Laplacian variance
-            laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-            sharpness = np.var(laplacian)
-            
-            # Normalize sharpness score
-            sharpness = np.clip(sharpness / 1000, 0.0, 1.0)
-            
-            return float(sharpness)
-            
-        except Exception as e:
-            self.logger.error(f"Sharpness analysis failed: {str(e)}")
-            return 0.0
-
-    async def _analyze_brightness(self, face_img: np.ndarray) -> float:
-        """Analyze image brightness"""
-        try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
-            
-            # Calculate average brightness
-            brightness = np.mean(gray) / 255.0
-            
-            return float(brightness)
-            
-        except Exception as e:
-            self.logger.error(f"Brightness analysis failed: {str(e)}")
-            return 0.0
-
-    async def _analyze_contrast(self, face_img: np.ndarray) -> float:
-        """Analyze image contrast"""
-        try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
-            
-            # Calculate contrast using standard deviation
-            contrast = np.std(gray) / 128.0
-            contrast = np.clip(contrast, 0.0, 1.0)
-            
-            return float(contrast)
+            return await self._frame_pool.run(
+                'quality_metrics', image_quality_metrics, face_img
+            )
             
         except Exception as e:
-            self.logger.error(f"Contrast analysis failed: {str(e)}")
-            return 0.0
+            self.logger.error(f"Image analysis failed: {str(e)}")
+            return {
+                'sharpness': 0.0,
+                'brightness': 0.0,
+                'contrast': 0.0,
+                'symmetry': 0.0,
+                'noise_level': 0.0
+            }
 
     @measure_performance()
     async def _estimate_pose(self, face_tensor: torch.Tensor) -> Tuple[float, float, float]:
@@ -316,46 +283,6 @@ class QualityAssessor(BaseComponent):
             self.logger.error(f"Expression analysis failed: {str(e)}")
             return 0.0
 
-    async def _analyze_symmetry(self, face_img: np.ndarray) -> float:
-        """Analyze face symmetry"""
-        try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
-            
-            # Get left and right halves
-            height, width = gray.shape
-            mid = width // 2
-            left = gray[:, :mid]
-            right = cv2.flip(gray[:, mid:], 1)
-            
-            # Calculate symmetry score
-            diff = np.abs(left - right).mean()
-            symmetry = 1.0 - (diff / 255.0)
-            
-            return float(symmetry)
-            
-        except Exception as e:
-            self.logger.error(f"Symmetry analysis failed: {str(e)}")
-            return 0.0
-
-    async def _estimate_noise(self, face_img: np.ndarray) -> float:
-        """Estimate image noise level"""
-        try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
-            
-            # Apply median filter
-            denoised = cv2.medianBlur(gray, 3)
-            
-            # Calculate noise level
-            noise = np.abs(gray - denoised).mean() / 255.0
-            
-            return float(noise)
-            
-        except Exception as e:
-            self.logger.error(f"Noise estimation failed: {str(e)}")
-            return 0.0
-
     def _update_stats(self, metrics: QualityMetrics) -> None:
         """Update quality assessment statistics"""
         self._stats['faces_assessed'] += 1
@@ -0,0 +1,124 @@
+"""
+Compressed embedding representations for the matching indexes.
+
+This module provides:
+- FAISS index descriptions for float16, int8 and product-quantized storage
+- Per-vector memory estimates for each representation
+- Minimum training set sizes for trainable quantizers
+- Exact re-ranking of compressed-index candidates
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+COMPRESSIONS = ('none', 'fp16', 'int8', 'pq')
+
+# FAISS storage codes per compression
+_STORAGE = {
+    'none': 'Flat',
+    'fp16': 'SQfp16',
+    'int8': 'SQ8'
+}
+
+
+def index_description(index_type: str,
+                      compression: str,
+                      dimension: int,
+                      nlist: int = 100,
+                      hnsw_m: int = 32,
+                      pq_m: int = 64,
+                      pq_bits: int = 8) -> str:
+    """
+    FAISS ``index_factory`` description for an index type and compression.
+
+    Args:
+        index_type: 'flat', 'ivf' or 'hnsw'
+        compression: One of ``COMPRESSIONS``
+        dimension: Embedding dimension (must be divisible by ``pq_m`` for PQ)
+        nlist: Inverted lists for IVF
+        hnsw_m: Graph degree for HNSW
+        pq_m: PQ sub-quantizers (bytes per vector at 8 bits)
+        pq_bits: Bits per PQ code
+
+    Returns:
+        str: Description such as ``'IVF1024,SQ8'`` or ``'HNSW32_PQ64'``
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+    if compression == 'pq':
+        if dimension % pq_m:
+            raise ValueError(f"PQ sub-quantizers ({pq_m}) must divide dimension {dimension}")
+        storage = f"PQ{pq_m}x{pq_bits}"
+    else:
+        storage = _STORAGE[compression]
+
+    if index_type == 'flat':
+        return storage
+    if index_type == 'ivf':
+        return f"IVF{nlist},{storage}"
+    if index_type == 'hnsw':
+        return f"HNSW{hnsw_m}" if storage == 'Flat' else f"HNSW{hnsw_m}_{storage}"
+    raise ValueError(f"Unknown index type: {index_type}")
+
+
+def bytes_per_vector(compression: str,
+                     dimension: int,
+                     pq_m: int = 64,
+                     pq_bits: int = 8) -> float:
+    """Stored bytes per embedding (excluding index structure overhead)"""
+    if compression == 'none':
+        return dimension * 4
+    if compression == 'fp16':
+        return dimension * 2
+    if compression == 'int8':
+        return dimension
+    if compression == 'pq':
+        return pq_m * pq_bits / 8
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def min_training_points(index_type: str,
+                        compression: str,
+                        nlist: int = 100,
+                        pq_bits: int = 8) -> int:
+    """
+    Fewest vectors a quantizer can be trained on.
+
+    Returns:
+        int: 0 when the index needs no training
+    """
+    required = nlist if index_type == 'ivf' else 0
+    if compression == 'int8':
+        required = max(required, 1)
+    elif compression == 'pq':
+        required = max(required, 2 ** pq_bits)
+    return required
+
+
+def rerank_inner_product(queries: np.ndarray,
+                         rows: np.ndarray,
+                         vectors: np.ndarray,
+                         k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Re-score compressed-index candidates with exact inner products.
+
+    Args:
+        queries: Query matrix of shape (n, dimension)
+        rows: Candidate IDs of shape (n, c); -1 marks missing candidates
+        vectors: Exact candidate vectors of shape (n, c, dimension)
+        k: Candidates kept per query
+
+    Returns:
+        Tuple of (scores, rows), both of shape (n, min(k, c)), best-first
+    """
+    scores = np.einsum('nd,ncd->nc', queries.astype(np.float32), vectors)
+    scores[rows < 0] = -np.inf
+
+    k = min(k, rows.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if 0 < k < rows.shape[1] else \
+        np.broadcast_to(np.arange(rows.shape[1]), rows.shape)
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    return np.take_along_axis(scores, top, axis=1), np.take_along_axis(rows, top, axis=1)
@@ -2,7 +2,7 @@
 Advanced face search system with GPU-accelerated similarity search and clustering.
 """
 
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 import numpy as np
 import faiss
 import torch
@@ -11,13 +11,20 @@ from dataclasses import dataclass
 import asyncio
 import json
 from pathlib import Path
-import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import heapq
+import threading
 
 from ..base import BaseComponent
 from ..utils.errors import SearchError
 from ..monitoring.decorators import measure_performance
+from .index import BatchMatches, first_unique_per_query
+from .embedding_store import EmbeddingStore
+from .quantization import index_description
+from .cache import BoundedCache
+from .filters import DEFAULT_FILTER_FIELDS, AttributeIndex, filter_key, subset_top_k
+from .locks import AsyncReadWriteLock
 
 @dataclass
 class SearchResult:
@@ -44,18 +51,68 @@ class FaceSearch(BaseComponent):
         self._dimension = config.get('search.dimension', 512)
         self._nlist = config.get('search.nlist', 100)
         self._nprobe = config.get('search.nprobe', 10)
+        self._train_sample = config.get('search.train_sample', 256)  # points per list
+        self._compression = config.get('search.compression', 'none')  # none, fp16, int8, pq
+        self._pq_m = config.get('search.pq_m', 64)
         
-        # Feature storage
+        # Feature storage: saved features are memory-mapped from the
+        # embedding store, faces added since the last save live in the dict
+        self._feature_dir = Path(config.get('search.storage_path', 'data/features'))
+        self._store_dtype = config.get('search.store_dtype', 'float32')  # float32, float16
+        self._store: Optional[EmbeddingStore] = None
         self._features: Dict[str, np.ndarray] = {}
         self._metadata: Dict[str, Dict] = {}
         self._clusters: Dict[str, int] = {}
         self._reverse_index: Dict[int, List[str]] = defaultdict(list)
         
-        # Index lock
-        self._index_lock = threading.Lock()
+        # Metadata filters: matching rows of each filter are cached; small
+        # partitions are scanned exactly, large ones searched with an ID selector
+        self._attributes = AttributeIndex(
+            config.get('search.filter_fields', DEFAULT_FILTER_FIELDS)
+        )
+        self._filter_exact_max = config.get('search.filter_exact_max', 50000)
+        self._partitions = BoundedCache(
+            max_items=config.get('search.partition_cache_size', 32),
+            max_bytes=config.get('search.partition_cache_bytes', 256 * 1024 * 1024),
+            name='search_partitions'
+        )
         
-        # Initialize search
-        self._initialize_search()
+        # Index row -> face ID, and per-row person codes for batch dedup
+        self._face_ids: List[str] = []
+        self._face_rows: Dict[str, int] = {}
+        self._person_codes: Dict[str, int] = {}
+        self._row_codes: List[int] = []
+        self._row_codes_array: Optional[np.ndarray] = None
+        
+        # Removed faces: index rows stay (flat/IVF row numbers must not
+        # shift) and are excluded by an ID selector over a bitmap of removed
+        # rows (set in place, so removals stay O(1)) until compaction; GPU
+        # indexes take no selector and over-fetch instead. Stored features
+        # are dropped on the next save
+        self._removed_rows: Set[int] = set()
+        self._removed_bitmap = np.zeros(0, dtype=np.uint8)
+        self._removed_selector = None
+        self._on_gpu = False
+        self._gpu_max_k = config.get('search.gpu_max_k', 2048)
+        self._removed_ids: Set[str] = set()
+        self._compaction_ratio = config.get('search.compaction_ratio', 0.25)
+        self._compaction_task: Optional[asyncio.Task] = None
+        
+        # Index lock: searches share it and run in worker threads, adds/removes/saves
+        # take it exclusively; compaction holds the write lock while it rebuilds
+        # without blocking searches. Partition builds and stats updates made by
+        # concurrent searches take their own locks.
+        self._index_lock = AsyncReadWriteLock()
+        self._write_lock = asyncio.Lock()
+        # Saves run one at a time: each swaps in the store it wrote and
+        # drops the features it captured, so an older save must not finish last
+        self._save_lock = asyncio.Lock()
+        self._search_executor = ThreadPoolExecutor(
+            max_workers=config.get('search.search_threads', 4),
+            thread_name_prefix='face-search'
+        )
+        self._partition_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
         
         # Statistics
         self._stats = {
@@ -64,8 +121,13 @@ class FaceSearch(BaseComponent):
             'average_search_time': 0.0,
             'cache_hits': 0,
             'index_updates': 0,
+            'filtered_searches': 0,
+            'compactions': 0,
             'gpu_utilization': 0.0 if self._use_gpu else None
         }
+        
+        # Initialize search
+        self._initialize_search()
 
     def _initialize_search(self) -> None:
         """Initialize search system"""
@@ -88,11 +150,23 @@ class FaceSearch(BaseComponent):
 
     def _create_index(self) -> None:
         """Create FAISS index with GPU support"""
+        self._index = self._new_index()
+
+    def _new_index(self):
+        """Empty FAISS index of the configured type, on GPU if enabled"""
         try:
-            if self._index_type == 'ivf':
+            if self._compression != 'none':
+                # Compressed vector storage (trained in _build_index)
+                index = faiss.index_factory(
+                    self._dimension,
+                    index_description(self._index_type, self._compression, self._dimension,
+                                      nlist=self._nlist, pq_m=self._pq_m),
+                    faiss.METRIC_L2
+                )
+            elif self._index_type == 'ivf':
                 # IVF index with L2 distance
                 quantizer = faiss.IndexFlatL2(self._dimension)
-                self._index = faiss.IndexIVFFlat(
+                index = faiss.IndexIVFFlat(
                     quantizer,
                     self._dimension,
                     self._nlist,
@@ -100,26 +174,31 @@ class FaceSearch(BaseComponent):
                 )
             elif self._index_type == 'hnsw':
                 # HNSW index for approximate search
-                self._index = faiss.IndexHNSWFlat(
+                index = faiss.IndexHNSWFlat(
                     self._dimension,
                     32  # M parameter
                 )
             else:
                 # Simple flat index
-                self._index = faiss.IndexFlatL2(self._dimension)
+                index = faiss.IndexFlatL2(self._dimension)
             
             # Move to GPU if enabled
             if self._use_gpu and faiss.get_num_gpus() > 0:
                 self.logger.info("Moving index to GPU")
-                self._index = faiss.index_cpu_to_gpu(
+                index = faiss.index_cpu_to_gpu(
                     faiss.StandardGpuResources(),
                     0,
-                    self._index
+                    index
                 )
+                self._on_gpu = True
             
             # Set search parameters
-            if hasattr(self._index, 'nprobe'):
-                self._index.nprobe = self._nprobe
+            if self._compression != 'none' and self._index_type == 'ivf':
+                faiss.extract_index_ivf(index).nprobe = self._nprobe
+            elif hasattr(index, 'nprobe'):
+                index.nprobe = self._nprobe
+            
+            return index
             
         except Exception as e:
             raise SearchError(f"Index creation failed: {str(e)}")
@@ -127,54 +206,74 @@ class FaceSearch(BaseComponent):
     def _load_features(self) -> None:
         """Load existing features from disk"""
         try:
-            feature_file = Path('data/features/features.npz')
-            metadata_file = Path('data/features/metadata.json')
+            store_file = self._feature_dir / 'features.emb'
+            feature_file = self._feature_dir / 'features.npz'
+            metadata_file = self._feature_dir / 'metadata.json'
             
-            if feature_file.exists() and metadata_file.exists():
-                # Load features
+            if metadata_file.exists() and store_file.exists():
+                # Map saved features (shared page cache, nothing parsed)
+                self._store = EmbeddingStore.open(store_file)
+            elif metadata_file.exists() and feature_file.exists():
+                # Features saved before the embedding store
                 data = np.load(feature_file)
                 for face_id, features in data.items():
                     self._features[face_id] = features
-                
-                # Load metadata
-                with open(metadata_file, 'r') as f:
-                    data = json.load(f)
-                    self._metadata = data.get('metadata', {})
-                    self._clusters = data.get('clusters', {})
-                
-                # Update reverse index
-                for face_id, cluster_id in self._clusters.items():
-                    self._reverse_index[cluster_id].append(face_id)
-                
-                self._stats['total_faces'] = len(self._features)
-                self.logger.info(f"Loaded {len(self._features)} face features")
+            else:
+                return
+            
+            # Load metadata
+            with open(metadata_file, 'r') as f:
+                data = json.load(f)
+                self._metadata = data.get('metadata', {})
+                self._clusters = data.get('clusters', {})
+            
+            # Update reverse index
+            for face_id, cluster_id in self._clusters.items():
+                self._reverse_index[cluster_id].append(face_id)
+            
+            self._stats['total_faces'] = self._feature_count()
+            self.logger.info(f"Loaded {self._stats['total_faces']} face features")
             
         except Exception as e:
             self.logger.error(f"Feature loading failed: {str(e)}")
 
+    def _feature_count(self) -> int:
+        """Number of stored faces (mapped plus unsaved)"""
+        return (len(self._store) if self._store is not None else 0) + len(self._features)
+
     def _build_index(self) -> None:
         """Build search index"""
         try:
-            with self._index_lock:
-                if not self._features:
-                    return
-                
-                # Stack features
-                features = np.stack(list(self._features.values()))
-                
-                # Train index if needed
-                if hasattr(self._index, 'train'):
-                    self._index.train(features)
-                
-                # Add features
-                self._index.add(features)
-                
-                self._stats['index_updates'] += 1
-                self.logger.info(f"Built index with {len(features)} features")
+            # Runs from __init__, before the index is shared
+            face_ids: List[str] = []
+            blocks = []
+            if self._store is not None and len(self._store):
+                face_ids.extend(self._store.ids)
+                blocks.append(self._store.vectors())
+            if self._features:
+                face_ids.extend(self._features)
+                blocks.append(np.stack(list(self._features.values())).astype(np.float32))
+            if not blocks:
+                return
+            features = np.vstack(blocks)
+            self._fill_index(self._index, features)
             
+            for face_id in face_ids:
+                self._append_row(face_id)
+            
+            self._stats['index_updates'] += 1
+            self.logger.info(f"Built index with {len(features)} features")
+        
         except Exception as e:
             raise SearchError(f"Index building failed: {str(e)}")
 
+    def _fill_index(self, index, features: np.ndarray) -> None:
+        """Train an empty index if needed, on a strided sample for large galleries, and add features"""
+        if hasattr(index, 'train'):
+            step = max(1, len(features) // (self._nlist * self._train_sample))
+            index.train(features[::step])
+        index.add(features)
+
     @measure_performance()
     async def add_face(self,
                       face_id: str,
@@ -190,38 +289,111 @@ class FaceSearch(BaseComponent):
             metadata: Additional face information
             cluster_id: Optional cluster assignment
         """
+        await self.add_faces([(face_id, features, metadata, cluster_id)])
+        self.logger.debug(f"Added face {face_id} to index")
+
+    @measure_performance()
+    async def add_faces(self,
+                        faces: List[Tuple[str, np.ndarray, Optional[Dict], Optional[int]]]) -> None:
+        """
+        Add several faces in one index update
+        
+        The batch is normalized before taking the lock and published with a
+        single index add, so searches wait for one short write instead of
+        one per face (e.g. bulk enrollment).
+        
+        Args:
+            faces: (face_id, features, metadata, cluster_id) tuples
+        """
         try:
+            if not faces:
+                return
+            
             # Normalize features
-            features = features / np.linalg.norm(features)
+            faces = [(face_id, features / np.linalg.norm(features), metadata, cluster_id)
+                     for face_id, features, metadata, cluster_id in faces]
+            matrix = np.vstack([features.reshape(1, -1) for _, features, _, _ in faces])
             
-            with self._index_lock:
-                # Store face data
-                self._features[face_id] = features
-                if metadata:
-                    self._metadata[face_id] = metadata
-                if cluster_id is not None:
-                    self._clusters[face_id] = cluster_id
-                    self._reverse_index[cluster_id].append(face_id)
-                
-                # Update index
-                self._index.add(features.reshape(1, -1))
-                
-                self._stats['total_faces'] += 1
+            async with self._write_lock:
+                async with self._index_lock.write():
+                    # Update index
+                    self._index.add(matrix)
+                    
+                    added = 0
+                    for face_id, features, metadata, cluster_id in faces:
+                        # Re-adding a face replaces its previous row
+                        if face_id in self._face_rows:
+                            self._remove_row(self._face_rows[face_id])
+                        else:
+                            added += 1
+                        self._removed_ids.discard(face_id)
+                    
+                        # Store face data
+                        self._features[face_id] = features
+                        if metadata:
+                            self._metadata[face_id] = metadata
+                        if cluster_id is not None:
+                            previous_cluster = self._clusters.pop(face_id, None)
+                            if previous_cluster is not None:
+                                self._reverse_index[previous_cluster].remove(face_id)
+                            self._clusters[face_id] = cluster_id
+                            self._reverse_index[cluster_id].append(face_id)
+                        self._append_row(face_id)
+                    
+                    with self._stats_lock:
+                        previous = self._stats['total_faces']
+                        self._stats['total_faces'] += added
             
             # Save periodically
-            if self._stats['total_faces'] % 100 == 0:
+            if self._stats['total_faces'] // 100 > previous // 100:
                 await self._save_features()
+            self._schedule_compaction()
             
-            self.logger.debug(f"Added face {face_id} to index")
+        except Exception as e:
+            raise SearchError(f"Failed to add faces: {str(e)}")
+
+    async def remove_face(self, face_id: str) -> bool:
+        """
+        Remove face from search
+        
+        Args:
+            face_id: Face identifier
+            
+        Returns:
+            True if the face was present
+        """
+        try:
+            async with self._write_lock:
+                async with self._index_lock.write():
+                    row = self._face_rows.pop(face_id, None)
+                    if row is None:
+                        return False
+                    
+                    self._remove_row(row)
+                    self._removed_ids.add(face_id)
+                    self._features.pop(face_id, None)
+                    self._metadata.pop(face_id, None)
+                    cluster_id = self._clusters.pop(face_id, None)
+                    if cluster_id is not None:
+                        self._reverse_index[cluster_id].remove(face_id)
+                    self._partitions.clear()
+                    
+                    with self._stats_lock:
+                        self._stats['total_faces'] -= 1
+            
+            self.logger.debug(f"Removed face {face_id} from index")
+            self._schedule_compaction()
+            return True
             
         except Exception as e:
-            raise SearchError(f"Failed to add face: {str(e)}")
+            raise SearchError(f"Failed to remove face: {str(e)}")
 
     @measure_performance()
     async def search(self,
                     features: np.ndarray,
                     k: int = 10,
-                    min_similarity: Optional[float] = None) -> List[SearchResult]:
+                    min_similarity: Optional[float] = None,
+                    filters: Optional[Dict[str, Any]] = None) -> List[SearchResult]:
         """
         Search for similar faces
         
@@ -229,6 +401,8 @@ class FaceSearch(BaseComponent):
             features: Query face features
             k: Number of results to return
             min_similarity: Minimum similarity threshold
+            filters: Metadata restriction, e.g. ``{'site': 'hq', 'zone': ['B', 'C']}``
+                (only matching faces are searched)
             
         Returns:
             List of search results sorted by similarity
@@ -242,16 +416,19 @@ class FaceSearch(BaseComponent):
             # Set similarity threshold
             min_similarity = min_similarity or self._min_similarity
             
-            with self._index_lock:
+            async with self._index_lock.read():
                 # Search index
-                distances, indices = self._index.search(
+                distances, indices = await asyncio.get_running_loop().run_in_executor(
+                    self._search_executor,
+                    self._search_index,
                     features.reshape(1, -1),
-                    k
+                    k,
+                    filters
                 )
                 
                 # Process results
                 results = []
-                face_ids = list(self._features.keys())
+                face_ids = self._face_ids
                 
                 for dist, idx in zip(distances[0], indices[0]):
                     if idx == -1:
@@ -278,12 +455,13 @@ class FaceSearch(BaseComponent):
                     results.append(result)
             
             # Update stats
-            self._stats['total_searches'] += 1
             search_time = (datetime.utcnow() - start_time).total_seconds()
-            n = self._stats['total_searches']
-            self._stats['average_search_time'] = (
-                (self._stats['average_search_time'] * (n - 1) + search_time) / n
-            )
+            with self._stats_lock:
+                self._stats['total_searches'] += 1
+                n = self._stats['total_searches']
+                self._stats['average_search_time'] = (
+                    (self._stats['average_search_time'] * (n - 1) + search_time) / n
+                )
             
             # Update GPU stats if enabled
             if self._use_gpu:
@@ -304,71 +482,312 @@ class FaceSearch(BaseComponent):
     @measure_performance()
     async def batch_search(self,
                          features_list: List[np.ndarray],
-                         k: int = 10) -> List[List[SearchResult]]:
+                         k: int = 10,
+                         filters: Optional[Dict[str, Any]] = None) -> List[List[SearchResult]]:
         """
         Search for multiple faces in batch
         
         Args:
             features_list: List of query face features
             k: Number of results per query
+            filters: Metadata restriction applied to every query
             
         Returns:
             List of search results for each query
         """
         try:
-            # Normalize features
-            features_list = [
-                features / np.linalg.norm(features)
-                for features in features_list
-            ]
-            
-            # Stack features
-            features = np.stack(features_list)
+            # Normalize and stack features
+            features = self._normalize_batch(np.stack(features_list))
             
-            with self._index_lock:
+            async with self._index_lock.read():
                 # Batch search
-                distances, indices = self._index.search(features, k)
-                
-                # Process results
-                all_results = []
-                face_ids = list(self._features.keys())
-                
-                for query_distances, query_indices in zip(distances, indices):
-                    query_results = []
-                    
-                    for dist, idx in zip(query_distances, query_indices):
-                        if idx == -1:
-                            continue
-                        
-                        # Calculate similarity
-                        similarity = 1.0 - dist
-                        if similarity < self._min_similarity:
-                            continue
-                        
-                        # Get face data
-                        face_id = face_ids[idx]
-                        metadata = self._metadata.get(face_id)
-                        cluster_id = self._clusters.get(face_id)
-                        
-                        # Create result
-                        result = SearchResult(
-                            face_id=face_id,
-                            similarity=float(similarity),
-                            metadata=metadata,
-                            cluster_id=cluster_id,
-                            timestamp=datetime.utcnow()
-                        )
-                        query_results.append(result)
-                    
-                    all_results.append(
-                        sorted(query_results, key=lambda x: x.similarity, reverse=True)
-                    )
+                distances, indices = await asyncio.get_running_loop().run_in_executor(
+                    self._search_executor, self._search_index, features, k, filters
+                )
+                face_ids = self._face_ids
+            
+            # Threshold all queries at once; index results are already ranked
+            similarities = 1.0 - distances
+            valid = (indices >= 0) & (similarities >= self._min_similarity)
+            timestamp = datetime.utcnow()
+            
+            all_results = []
+            for query_similarities, query_indices, query_valid in zip(
+                similarities, indices, valid
+            ):
+                query_results = []
+                for similarity, idx in zip(
+                    query_similarities[query_valid], query_indices[query_valid]
+                ):
+                    face_id = face_ids[idx]
+                    query_results.append(SearchResult(
+                        face_id=face_id,
+                        similarity=float(similarity),
+                        metadata=self._metadata.get(face_id),
+                        cluster_id=self._clusters.get(face_id),
+                        timestamp=timestamp
+                    ))
+                all_results.append(query_results)
             
             return all_results
             
         except Exception as e:
             raise SearchError(f"Batch search failed: {str(e)}")
 
+    @measure_performance()
+    async def match_batch(self,
+                          features: np.ndarray,
+                          k: int = 10,
+                          filters: Optional[Dict[str, Any]] = None) -> BatchMatches:
+        """
+        Match a batch of faces, returning distinct persons per query
+        
+        Faces are grouped by ``metadata['person_id']`` when present (falling
+        back to the face ID) and deduplicated on arrays, so a frame with many
+        faces costs one index search and one lock acquisition.
+        
+        Args:
+            features: Query features of shape (n, dimension)
+            k: Maximum number of distinct persons per query
+            filters: Metadata restriction applied to every query
+            
+        Returns:
+            BatchMatches with person labels and similarities as scores
+        """
+        try:
+            features = np.asarray(features, dtype=np.float32)
+            if features.size == 0:
+                return BatchMatches.empty()
+            features = self._normalize_batch(features.reshape(-1, self._dimension))
+            
+            async with self._index_lock.read():
+                distances, indices = await asyncio.get_running_loop().run_in_executor(
+                    self._search_executor, self._search_index, features, k * 2, filters
+                )
+                row_codes = self._get_row_codes()
+                face_ids = self._face_ids
+            
+            similarities = 1.0 - distances
+            valid = (indices >= 0) & (indices < len(row_codes))
+            rows = np.where(valid, indices, 0)
+            valid &= similarities >= self._min_similarity
+            
+            keep = first_unique_per_query(row_codes[rows], valid, k)
+            query_index, column = np.nonzero(keep)
+            matched_rows = rows[query_index, column]
+            
+            labels = np.empty(len(matched_rows), dtype=object)
+            labels[:] = [self._person_label(face_ids[row]) for row in matched_rows]
+            
+            with self._stats_lock:
+                self._stats['total_searches'] += len(features)
+            
+            return BatchMatches(
+                query_index=query_index,
+                rows=matched_rows,
+                labels=labels,
+                scores=similarities[query_index, column].astype(np.float32)
+            )
+            
+        except Exception as e:
+            raise SearchError(f"Batch match failed: {str(e)}")
+
+    def _search_index(self,
+                      queries: np.ndarray,
+                      k: int,
+                      filters: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search the index, restricted to faces matching ``filters``
+        
+        Partitions of up to ``search.filter_exact_max`` faces are scanned
+        exactly (work proportional to the partition); larger ones are
+        searched in the index with an ID selector. Caller holds the lock.
+        
+        Returns:
+            (distances, rows) like ``index.search``
+        """
+        if not filters:
+            if not self._removed_rows:
+                return self._index.search(queries, k)
+            if self._on_gpu:
+                # GPU indexes take no ID selector: over-fetch and drop removed rows
+                fetch = min(k + len(self._removed_rows), self._gpu_max_k, self._index.ntotal)
+                return self._drop_removed(*self._index.search(queries, fetch), k)
+            return self._index.search(queries, k,
+                                      params=self._search_parameters(self._removed_selector[1]))
+        
+        with self._stats_lock:
+            self._stats['filtered_searches'] += len(queries)
+        key = filter_key(filters)
+        partition = self._partitions.get(key)
+        if partition is None:
+            # Concurrent searches build each partition once
+            with self._partition_lock:
+                partition = self._partitions.get(key)
+                if partition is None:
+                    partition = self._build_partition(filters)
+                    self._partitions.set(key, partition)
+        rows, vectors = partition
+        
+        if vectors is not None:
+            distances, positions = subset_top_k(queries, vectors, k, metric='l2')
+            return distances, np.where(positions >= 0, rows[np.maximum(positions, 0)], -1)
+        
+        selector = faiss.IDSelectorBatch(rows)
+        return self._index.search(queries, k, params=self._search_parameters(selector))
+
+    def _build_partition(self, filters: Dict[str, Any]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Live rows matching filters, with their vectors if small enough to scan exactly"""
+        rows = self._attributes.select(filters)
+        if self._removed_rows:
+            rows = rows[~self._is_removed(rows)]
+        # GPU indexes take no ID selector, so their partitions are always scanned
+        exact = len(rows) <= self._filter_exact_max or self._on_gpu
+        vectors = self._row_vectors(rows) if exact else None
+        return rows, vectors
+
+    def _remove_row(self, row: int) -> None:
+        """Exclude an index row from searches until compaction; caller holds the lock"""
+        self._removed_rows.add(row)
+        if row >> 3 >= len(self._removed_bitmap):
+            # Grow by doubling; the selector points into the bitmap, so
+            # it is only recreated when the bitmap is reallocated
+            bitmap = np.zeros(max((row >> 3) + 1, 2 * len(self._removed_bitmap)), dtype=np.uint8)
+            bitmap[:len(self._removed_bitmap)] = self._removed_bitmap
+            self._removed_bitmap = bitmap
+            removed = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+            # IDSelectorNot does not own the wrapped selector; keep both alive
+            self._removed_selector = (removed, faiss.IDSelectorNot(removed))
+        self._removed_bitmap[row >> 3] |= 1 << (row & 7)
+
+    def _is_removed(self, rows: np.ndarray) -> np.ndarray:
+        """Mask of removed index rows (-1 and rows added since are live)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        bitmap = self._removed_bitmap
+        inside = (rows >= 0) & ((rows >> 3) < len(bitmap))
+        if not inside.any():
+            return inside
+        bits = bitmap[np.where(inside, rows >> 3, 0)] >> (rows & 7).astype(np.uint8)
+        return inside & (bits & 1).astype(bool)
+
+    def _drop_removed(self,
+                      distances: np.ndarray,
+                      rows: np.ndarray,
+                      k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """First k results per query of an over-fetched search, skipping removed rows"""
+        removed = self._is_removed(rows)
+        order = np.argsort(removed, axis=1, kind='stable')[:, :k]
+        dropped = np.take_along_axis(removed, order, axis=1)
+        distances = np.where(dropped, np.inf, np.take_along_axis(distances, order, axis=1))
+        rows = np.where(dropped, -1, np.take_along_axis(rows, order, axis=1))
+        return distances.astype(np.float32), rows
+
+    def _schedule_compaction(self) -> None:
+        """Start background compaction once enough rows are removed"""
+        limit = self._compaction_ratio * len(self._face_ids)
+        if self._on_gpu:
+            # Keep the over-fetch of GPU searches within the GPU's k limit
+            limit = min(limit, self._gpu_max_k // 2)
+        if not self._face_ids or len(self._removed_rows) < limit:
+            return
+        if self._compaction_task is None or self._compaction_task.done():
+            self._compaction_task = asyncio.get_running_loop().create_task(self.compact())
+
+    async def compact(self) -> None:
+        """
+        Drop removed rows, renumber the remaining ones and rebuild the index
+        
+        The new index is built in a worker thread while searches keep
+        using the current one; adds and removes wait until it is swapped in.
+        """
+        try:
+            async with self._write_lock:
+                if not self._removed_rows:
+                    return
+                
+                loop = asyncio.get_running_loop()
+                async with self._index_lock.read():
+                    rows = np.asarray(sorted(self._face_rows.values()), dtype=np.int64)
+                    vectors = await loop.run_in_executor(self._search_executor, self._row_vectors, rows)
+                index = await loop.run_in_executor(None, self._compacted_index, vectors)
+                
+                async with self._index_lock.write():
+                    mapping = np.full(len(self._face_ids), -1, dtype=np.int64)
+                    mapping[rows] = np.arange(len(rows))
+                    self._attributes.remap(mapping)
+                    self._partitions.clear()
+                    self._index = index
+                    self._face_ids = [self._face_ids[row] for row in rows]
+                    self._face_rows = {face_id: row for row, face_id in enumerate(self._face_ids)}
+                    self._row_codes = [self._row_codes[row] for row in rows]
+                    self._row_codes_array = None
+                    self._removed_rows = set()
+                    self._removed_bitmap = np.zeros(0, dtype=np.uint8)
+                    self._removed_selector = None
+                    with self._stats_lock:
+                        self._stats['compactions'] += 1
+                    
+        except Exception as e:
+            self.logger.error(f"Compaction failed: {str(e)}")
+
+    def _compacted_index(self, vectors: np.ndarray):
+        """New index holding only the given (live) rows"""
+        index = self._new_index()
+        if len(vectors):
+            self._fill_index(index, vectors)
+        return index
+
+    def _search_parameters(self, selector) -> 'faiss.SearchParameters':
+        """Search parameters of the index type carrying an ID selector"""
+        if self._index_type == 'ivf':
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self._nprobe)
+        if self._index_type == 'hnsw':
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self._index.hnsw.efSearch)
+        return faiss.SearchParameters(sel=selector)
+
+    def _row_vectors(self, rows: np.ndarray) -> np.ndarray:
+        """Stored features of index rows (unsaved ones first, then the store)"""
+        vectors = np.empty((len(rows), self._dimension), dtype=np.float32)
+        positions, store_rows = [], []
+        for position, row in enumerate(rows):
+            face_id = self._face_ids[row]
+            features = self._features.get(face_id)
+            if features is not None:
+                vectors[position] = features
+            else:
+                positions.append(position)
+                store_rows.append(self._store.row(face_id))
+        if positions:
+            vectors[positions] = self._store.vectors(np.asarray(store_rows, dtype=np.int64))
+        return vectors
+
+    def _normalize_batch(self, features: np.ndarray) -> np.ndarray:
+        """L2-normalize a matrix of features row by row"""
+        features = np.asarray(features, dtype=np.float32)
+        return features / np.linalg.norm(features, axis=1, keepdims=True)
+
+    def _person_label(self, face_id: str) -> str:
+        """Person a face belongs to, falling back to the face itself"""
+        metadata = self._metadata.get(face_id) or {}
+        return metadata.get('person_id', face_id)
+
+    def _append_row(self, face_id: str) -> None:
+        """Record the face ID and person code of a newly indexed row"""
+        label = self._person_label(face_id)
+        code = self._person_codes.setdefault(label, len(self._person_codes))
+        self._attributes.add(len(self._face_ids), self._metadata.get(face_id))
+        self._partitions.clear()
+        self._face_rows[face_id] = len(self._face_ids)
+        self._face_ids.append(face_id)
+        self._row_codes.append(code)
+        self._row_codes_array = None
+
+    def _get_row_codes(self) -> np.ndarray:
+        """Per-row person codes as an array, rebuilt after index changes"""
+        if self._row_codes_array is None:
+            self._row_codes_array = np.asarray(self._row_codes, dtype=np.int64)
+        return self._row_codes_array
+
     @measure_performance()
     async def search_by_cluster(self,
                               cluster_id: int,
@@ -384,7 +803,7 @@ class FaceSearch(BaseComponent):
             List of faces in the cluster
         """
         try:
-            with self._index_lock:
+            async with self._index_lock.read():
                 # Get faces in cluster
                 face_ids = self._reverse_index.get(cluster_id, [])
                 if not face_ids:
@@ -413,35 +832,71 @@ class FaceSearch(BaseComponent):
         """Save features and metadata to disk"""
         try:
             # Create directory
-            save_dir = Path('data/features')
-            save_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Save features
-            feature_file = save_dir / 'features.npz'
-            np.savez(
-                feature_file,
-                **self._features
-            )
+            self._feature_dir.mkdir(parents=True, exist_ok=True)
             
-            # Save metadata
-            metadata_file = save_dir / 'metadata.json'
-            with open(metadata_file, 'w') as f:
-                json.dump({
-                    'metadata': self._metadata,
-                    'clusters': self._clusters
-                }, f, indent=2)
+            async with self._save_lock:
+                async with self._index_lock.read():
+                    store = self._store
+                    pending = dict(self._features)
+                    removed = set(self._removed_ids)
+                
+                # Rewrite the embedding store off the event loop
+                store_file = self._feature_dir / 'features.emb'
+                new_store = await asyncio.get_running_loop().run_in_executor(
+                    None, self._write_store, store_file, store, pending, removed
+                )
                 
-            self.logger.info(f"Saved {len(self._features)} features to disk")
+                async with self._index_lock.write():
+                    self._store = new_store
+                    self._removed_ids -= removed
+                    for face_id, features in pending.items():
+                        if self._features.get(face_id) is features:
+                            del self._features[face_id]
+                
+                # Save metadata
+                metadata_file = self._feature_dir / 'metadata.json'
+                with open(metadata_file, 'w') as f:
+                    json.dump({
+                        'metadata': self._metadata,
+                        'clusters': self._clusters
+                    }, f, indent=2)
+                
+            self.logger.info(f"Saved {len(new_store)} features to disk")
             
         except Exception as e:
             self.logger.error(f"Feature saving failed: {str(e)}")
 
+    def _write_store(self,
+                     store_file: Path,
+                     store: Optional[EmbeddingStore],
+                     pending: Dict[str, np.ndarray],
+                     removed: Set[str]) -> EmbeddingStore:
+        """Write mapped plus pending features (minus removed faces) to a new store and map it"""
+        face_ids: List[str] = []
+        blocks = []
+        if store is not None and len(store):
+            rows = [row for row, face_id in enumerate(store.ids)
+                    if face_id not in pending and face_id not in removed]
+            face_ids.extend(store.ids[row] for row in rows)
+            blocks.append(store.embeddings[rows])
+        if pending:
+            face_ids.extend(pending)
+            blocks.append(np.stack(list(pending.values())))
+        
+        # Replacing the file keeps existing maps of the old one valid
+        EmbeddingStore.write(store_file, face_ids, blocks,
+                             dimension=self._dimension, dtype=self._store_dtype)
+        return EmbeddingStore.open(store_file)
+
     async def get_stats(self) -> Dict:
         """Get search statistics"""
-        stats = self._stats.copy()
+        with self._stats_lock:
+            stats = self._stats.copy()
         
         # Add index info
         if hasattr(self._index, 'ntotal'):
             stats['index_size'] = self._index.ntotal
+        stats['filter_values'] = self._attributes.get_stats()
+        stats['partitions'] = self._partitions.get_stats()
         
         return stats 
\ No newline at end of file
@@ -0,0 +1,289 @@
+"""
+Sharded face search across local worker processes.
+
+This module provides:
+- Stable hash partitioning of the gallery by face ID
+- One FaceSearch per worker process, each with its own index and storage
+- Scatter-gather queries with parallel fan-out to every shard
+- Heap-based top-k merging of per-shard results
+- Adds and removes routed to the owning shard
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from pathlib import Path
+import asyncio
+import heapq
+import multiprocessing
+import threading
+import zlib
+
+import numpy as np
+
+from ..utils.errors import SearchError
+from .index import BatchMatches
+
+# Methods a shard worker executes on its FaceSearch
+_SHARD_METHODS = frozenset({
+    'add_face', 'add_faces', 'remove_face', 'search', 'batch_search', 'match_batch',
+    'get_stats', '_save_features'
+})
+
+
+def shard_for(face_id: str, shards: int) -> int:
+    """Shard owning a face (stable across processes and restarts)"""
+    return zlib.crc32(face_id.encode()) % shards
+
+
+def _serve_shard(config: Dict[str, Any], conn) -> None:
+    """
+    Worker process main loop.
+
+    Builds a FaceSearch over the shard's storage, reports readiness, then
+    answers ``(method, args, kwargs)`` requests with ``(ok, result)`` until
+    asked to stop or the parent goes away.
+    """
+    from .search import FaceSearch
+
+    try:
+        search = FaceSearch(config)
+    except Exception as e:
+        conn.send((False, f"{type(e).__name__}: {e}"))
+        return
+    conn.send((True, None))
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        while True:
+            try:
+                method, args, kwargs = conn.recv()
+            except (EOFError, OSError):
+                break
+            if method == 'stop':
+                loop.run_until_complete(search._save_features())
+                conn.send((True, None))
+                break
+            try:
+                if method not in _SHARD_METHODS:
+                    raise ValueError(f"Unknown shard method: {method}")
+                result = getattr(search, method)(*args, **kwargs)
+                if asyncio.iscoroutine(result):
+                    result = loop.run_until_complete(result)
+                conn.send((True, result))
+            except Exception as e:
+                conn.send((False, f"{type(e).__name__}: {e}"))
+    finally:
+        loop.close()
+        conn.close()
+
+
+def merge_search_results(results: List[List[Any]], k: int) -> List[Any]:
+    """
+    Merge per-shard result lists (each best-first) into the global top k.
+
+    Args:
+        results: One list of SearchResult per shard, sorted by similarity
+        k: Results to keep
+
+    Returns:
+        Best k results across shards, best-first
+    """
+    return list(islice(heapq.merge(*results, key=lambda result: -result.similarity), k))
+
+
+def merge_batch_matches(parts: List[BatchMatches], k: int) -> BatchMatches:
+    """
+    Merge per-shard batch matches into the top k distinct labels per query.
+
+    Each shard returns its own top-k distinct persons, so a person in the
+    global top k is always present in the shard holding its best face.
+    Rows are made unique across shards as ``row * shards + shard``.
+
+    Args:
+        parts: BatchMatches of every shard, in shard order
+        k: Distinct labels per query
+
+    Returns:
+        BatchMatches ordered by query, then best-first
+    """
+    shards = len(parts)
+    parts_with_rows = [(shard, part) for shard, part in enumerate(parts) if len(part)]
+    if not parts_with_rows:
+        return BatchMatches.empty()
+
+    query_index = np.concatenate([part.query_index for _, part in parts_with_rows])
+    rows = np.concatenate([part.rows * shards + shard for shard, part in parts_with_rows])
+    labels = np.concatenate([part.labels for _, part in parts_with_rows])
+    scores = np.concatenate([part.scores for _, part in parts_with_rows])
+
+    _, codes = np.unique(labels.astype(str), return_inverse=True)
+    order = np.lexsort((-scores, query_index))
+    query_sorted = query_index[order]
+
+    # Best entry of every (query, label) pair, then the first k per query
+    _, first = np.unique(query_sorted * (codes.max() + 1) + codes[order], return_index=True)
+    kept = np.sort(first)
+    kept_queries = query_sorted[kept]
+    rank = np.arange(len(kept)) - np.searchsorted(kept_queries, kept_queries)
+    selected = order[kept[rank < k]]
+
+    return BatchMatches(
+        query_index=query_index[selected],
+        rows=rows[selected],
+        labels=labels[selected],
+        scores=scores[selected]
+    )
+
+
+class ShardedFaceSearch:
+    """
+    FaceSearch partitioned across local worker processes.
+
+    Every worker owns the faces hashing to its shard, with its own index
+    under ``<search.storage_path>/shard-<n>``. Searches fan out to all
+    shards in parallel and are merged with a heap; each worker searches its
+    part of the gallery without contending for a lock with the others.
+    """
+
+    def __init__(self, config: Dict[str, Any], shards: Optional[int] = None):
+        """
+        Args:
+            config: FaceSearch configuration shared by all shards
+            shards: Number of worker processes (default ``search.shards``)
+        """
+        self._shards = shards or config.get('search.shards', 4)
+        storage = Path(config.get('search.storage_path', 'data/features'))
+        context = multiprocessing.get_context(config.get('search.shard_start_method', 'spawn'))
+
+        self._conns = []
+        self._processes = []
+        for shard in range(self._shards):
+            parent, child = context.Pipe()
+            shard_config = {**config, 'search.storage_path': str(storage / f"shard-{shard}")}
+            process = context.Process(target=_serve_shard, args=(shard_config, child),
+                                      name=f"face-search-shard-{shard}", daemon=True)
+            process.start()
+            child.close()
+            self._conns.append(parent)
+            self._processes.append(process)
+
+        # One request in flight per worker pipe
+        self._locks = [threading.Lock() for _ in range(self._shards)]
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._shards * config.get('search.shard_threads', 4),
+            thread_name_prefix='face-search-shard'
+        )
+
+        for shard, conn in enumerate(self._conns):
+            try:
+                ok, error = conn.recv()
+            except (EOFError, OSError) as e:
+                # The worker died before its handshake (e.g. an import error)
+                ok, error = False, f"worker exited before the handshake: {e!r}"
+            if not ok:
+                self.close()
+                raise SearchError(f"Shard {shard} failed to start: {error}")
+
+    @property
+    def shards(self) -> int:
+        return self._shards
+
+    def _call(self, shard: int, method: str, *args, **kwargs) -> Any:
+        """Run a FaceSearch method in a shard worker (blocking)"""
+        with self._locks[shard]:
+            self._conns[shard].send((method, args, kwargs))
+            ok, result = self._conns[shard].recv()
+        if not ok:
+            raise SearchError(f"Shard {shard} {method} failed: {result}")
+        return result
+
+    async def _call_async(self, shard: int, method: str, *args, **kwargs) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, partial(self._call, shard, method, *args, **kwargs)
+        )
+
+    async def _scatter(self, method: str, *args, **kwargs) -> List[Any]:
+        """Run a method on every shard in parallel"""
+        return await asyncio.gather(*(
+            self._call_async(shard, method, *args, **kwargs) for shard in range(self._shards)
+        ))
+
+    async def add_face(self,
+                       face_id: str,
+                       features: np.ndarray,
+                       metadata: Optional[Dict] = None,
+                       cluster_id: Optional[int] = None) -> None:
+        """Add a face to its owning shard"""
+        await self._call_async(shard_for(face_id, self._shards), 'add_face',
+                               face_id, features, metadata, cluster_id)
+
+    async def add_faces(self, faces: List[Tuple[str, np.ndarray, Optional[Dict], Optional[int]]]) -> None:
+        """Add a batch, one index update per owning shard"""
+        batches: Dict[int, List] = {}
+        for face in faces:
+            batches.setdefault(shard_for(face[0], self._shards), []).append(face)
+        await asyncio.gather(*(
+            self._call_async(shard, 'add_faces', batch) for shard, batch in batches.items()
+        ))
+
+    async def remove_face(self, face_id: str) -> bool:
+        """Remove a face from its owning shard"""
+        return await self._call_async(shard_for(face_id, self._shards), 'remove_face', face_id)
+
+    async def search(self,
+                     features: np.ndarray,
+                     k: int = 10,
+                     min_similarity: Optional[float] = None,
+                     filters: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """Search all shards and merge the top k (see FaceSearch.search)"""
+        results = await self._scatter('search', features, k, min_similarity, filters)
+        return merge_search_results(results, k)
+
+    async def batch_search(self,
+                           features_list: List[np.ndarray],
+                           k: int = 10,
+                           filters: Optional[Dict[str, Any]] = None) -> List[List[Any]]:
+        """Search a batch on all shards and merge per query (see FaceSearch.batch_search)"""
+        results = await self._scatter('batch_search', features_list, k, filters)
+        return [merge_search_results(list(per_query), k) for per_query in zip(*results)]
+
+    async def match_batch(self,
+                          features: np.ndarray,
+                          k: int = 10,
+                          filters: Optional[Dict[str, Any]] = None) -> BatchMatches:
+        """Match a batch on all shards, keeping k distinct persons per query"""
+        parts = await self._scatter('match_batch', features, k, filters)
+        return merge_batch_matches(parts, k)
+
+    async def save(self) -> None:
+        """Save every shard's features"""
+        await self._scatter('_save_features')
+
+    async def get_stats(self) -> Dict:
+        """Summed counters plus per-shard statistics"""
+        shard_stats = await self._scatter('get_stats')
+        return {
+            'shards': self._shards,
+            'total_faces': sum(stats.get('total_faces', 0) for stats in shard_stats),
+            'total_searches': max((stats.get('total_searches', 0) for stats in shard_stats), default=0),
+            'per_shard': shard_stats
+        }
+
+    def close(self) -> None:
+        """Save and stop the workers"""
+        for shard, conn in enumerate(self._conns):
+            try:
+                with self._locks[shard]:
+                    conn.send(('stop', (), {}))
+                    conn.recv()
+            except (EOFError, OSError):
+                pass
+            conn.close()
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self._executor.shutdown(wait=False)
@@ -2,6 +2,7 @@ from typing import Dict, List
 import cv2
 import numpy as np
 from core.camera.manager import CameraManager
+from core.camera.motion import DetectionGate
 from core.recognition.processor import FaceProcessor
 from core.alerts.alert_manager import AlertManager
 from core.error_handling import handle_exceptions
@@ -13,6 +14,7 @@ class EnhancedCameraMonitor:
         self.alert_manager = AlertManager()
         self.active_monitors: Dict[int, bool] = {}
         self.frame_buffers: Dict[int, List[np.ndarray]] = {}
+        self.detection_gate = DetectionGate()
         
     @handle_exceptions(logger=camera_logger.error)
     async def start_monitoring(self, camera_id: int):
@@ -34,8 +36,11 @@ class EnhancedCameraMonitor:
                 if len(self.frame_buffers[camera_id]) > 10:
                     self.frame_buffers[camera_id].pop(0)
 
-                # Process frame for faces
-                faces = await self.face_processor.process_frame(frame)
+                # Process frame for faces, skipping most frames on idle cameras
+                faces = []
+                if self.detection_gate.should_detect(camera_id, frame):
+                    faces = await self.face_processor.process_frame(frame)
+                    self.detection_gate.report_tracks(camera_id, len(faces))
                 
                 # Check for motion and suspicious activity
                 if len(self.frame_buffers[camera_id]) >= 2:
@@ -0,0 +1,400 @@
+"""
+Process pool for CPU-bound vision stages.
+
+This module provides:
+- A worker-process pool that runs OpenCV stages off the asyncio event loop
+- Shared-memory frame handoff (frames are copied once, never pickled)
+- Bounded in-flight work with back-pressure on submitters
+- Per-stage queue depth, in-flight and latency metrics
+- Picklable stage functions for detection, preprocessing, quality and motion
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Per-process state inside pool workers (shared-memory handles, models)
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to an existing shared-memory block without taking ownership.
+
+    Blocks are created and unlinked by their owner. Attaching processes are
+    the owner itself or processes it spawned, which share its resource
+    tracker: on Python < 3.13, where attaching always registers the block,
+    that registration is a no-op and must not be undone (unregistering
+    would drop the owner's record and leave its ``unlink`` unmatched).
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no ``track`` argument
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_initializer() -> None:
+    """Initialize per-process state in a pool worker"""
+    _WORKER_STATE.clear()
+    _WORKER_STATE['shm'] = {}
+    # Each worker is single-threaded; avoid oversubscribing cores
+    cv2.setNumThreads(1)
+
+
+def _run_stage(fn: Callable[..., Any],
+               frame_ref: Any,
+               args: Tuple[Any, ...],
+               kwargs: Dict[str, Any]) -> Any:
+    """
+    Execute a stage function inside a worker.
+
+    ``frame_ref`` is either an ndarray (small inputs, pickled) or a
+    ``(shm_name, shape, dtype)`` tuple describing a shared-memory slot.
+    """
+    if isinstance(frame_ref, np.ndarray):
+        frame = frame_ref
+    else:
+        name, shape, dtype = frame_ref
+        handles = _WORKER_STATE.setdefault('shm', {})
+        shm = handles.get(name)
+        if shm is None:
+            shm = handles[name] = attach_shared_memory(name)
+        frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return fn(frame, *args, **kwargs)
+
+
+class FrameWorkerPool:
+    """
+    Worker-process pool for frame-level vision work.
+
+    Frames larger than ``inline_bytes`` are copied into one of a fixed set of
+    preallocated shared-memory slots and only the slot name travels to the
+    worker. The number of slots bounds the work in flight; submitters beyond
+    that wait (back-pressure) and are reported as the stage's queue depth.
+
+    With ``max_workers == 0`` stages run synchronously in the caller, which
+    keeps tests and single-core deployments free of process overhead.
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None,
+                 slot_bytes: int = 1920 * 1080 * 3,
+                 inline_bytes: int = 64 * 1024):
+        """
+        Args:
+            max_workers: Worker processes (default: CPU count, 0 = inline)
+            max_in_flight: Frames handed to workers at once (default: 2 per worker)
+            slot_bytes: Size of each shared-memory frame slot
+            inline_bytes: Inputs up to this size are pickled instead
+        """
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self._max_workers = max(0, int(max_workers))
+        self._max_in_flight = max_in_flight or max(1, 2 * self._max_workers)
+        self._slot_bytes = slot_bytes
+        self._inline_bytes = inline_bytes
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: List[shared_memory.SharedMemory] = []
+        self._free_slots: Optional[asyncio.Queue] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+
+        self._stage_stats: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
+            'queued': 0,
+            'in_flight': 0,
+            'completed': 0,
+            'errors': 0,
+            'max_queue_depth': 0,
+            'average_latency': 0.0,
+            'average_wait_time': 0.0
+        })
+        self._stats = {
+            'shared_memory_frames': 0,
+            'pickled_frames': 0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        """Whether stages are dispatched to worker processes"""
+        return self._max_workers > 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._executor is not None
+
+    async def start(self) -> None:
+        """Start worker processes and allocate shared-memory slots"""
+        if self.is_running or not self.enabled:
+            return
+
+        # Spawned workers start clean: no copied event loop, locks, CUDA
+        # context or open camera handles from the parent
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_worker_initializer
+        )
+        self._slots = [
+            shared_memory.SharedMemory(create=True, size=self._slot_bytes)
+            for _ in range(self._max_in_flight)
+        ]
+        self._free_slots = asyncio.Queue()
+        for slot in self._slots:
+            self._free_slots.put_nowait(slot)
+        self._in_flight = asyncio.Semaphore(self._max_in_flight)
+
+        logger.info(
+            f"Frame worker pool started with {self._max_workers} processes, "
+            f"{self._max_in_flight} slots of {self._slot_bytes} bytes"
+        )
+
+    async def stop(self) -> None:
+        """Stop worker processes and release shared memory"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+        for slot in self._slots:
+            try:
+                slot.close()
+                slot.unlink()
+            except FileNotFoundError:
+                pass
+        self._slots = []
+        self._free_slots = None
+        self._in_flight = None
+
+    async def run(self,
+                  stage: str,
+                  fn: Callable[..., Any],
+                  frame: np.ndarray,
+                  *args: Any,
+                  **kwargs: Any) -> Any:
+        """
+        Run ``fn(frame, *args, **kwargs)`` in a worker process.
+
+        Args:
+            stage: Stage name used for metrics (e.g. 'detect', 'quality')
+            fn: Module-level (picklable) stage function
+            frame: Input image; copied into shared memory when large
+
+        Returns:
+            The stage function's result
+        """
+        stats = self._stage_stats[stage]
+        if not self.enabled:
+            return fn(frame, *args, **kwargs)
+        if not self.is_running:
+            await self.start()
+
+        frame = np.ascontiguousarray(frame)
+        queued_at = time.perf_counter()
+
+        stats['queued'] += 1
+        stats['max_queue_depth'] = max(stats['max_queue_depth'], stats['queued'])
+        try:
+            await self._in_flight.acquire()
+        finally:
+            stats['queued'] -= 1
+
+        loop = asyncio.get_running_loop()
+        release = functools.partial(self._release, stats, self._free_slots, self._in_flight)
+        started = time.perf_counter()
+        stats['in_flight'] += 1
+        submitted = False
+        try:
+            if frame.nbytes <= self._inline_bytes or frame.nbytes > self._slot_bytes:
+                frame_ref: Any = frame
+                self._stats['pickled_frames'] += 1
+            else:
+                slot = await self._free_slots.get()
+                release = functools.partial(release, slot)
+                view = np.ndarray(frame.shape, dtype=frame.dtype, buffer=slot.buf)
+                view[...] = frame
+                frame_ref = (slot.name, frame.shape, frame.dtype.str)
+                self._stats['shared_memory_frames'] += 1
+
+            future = self._executor.submit(_run_stage, fn, frame_ref, args, kwargs)
+            submitted = True
+        except Exception:
+            stats['errors'] += 1
+            raise
+        finally:
+            if not submitted:
+                release()
+
+        # A cancelled caller stops waiting, but a running worker may still
+        # read the slot: hand it (and the in-flight permit) back only once
+        # the worker is done with it
+        future.add_done_callback(lambda _: self._call_soon(loop, release))
+        try:
+            result = await asyncio.wrap_future(future)
+        except Exception:
+            stats['errors'] += 1
+            raise
+
+        stats['completed'] += 1
+        n = stats['completed']
+        stats['average_latency'] = (
+            (stats['average_latency'] * (n - 1) + time.perf_counter() - started) / n
+        )
+        stats['average_wait_time'] = (
+            (stats['average_wait_time'] * (n - 1) + started - queued_at) / n
+        )
+        return result
+
+    @staticmethod
+    def _release(stats: Dict[str, Any],
+                 free_slots: asyncio.Queue,
+                 in_flight: asyncio.Semaphore,
+                 slot: Optional[shared_memory.SharedMemory] = None) -> None:
+        """Return a finished frame's slot and in-flight permit (event loop)"""
+        if slot is not None:
+            free_slots.put_nowait(slot)
+        stats['in_flight'] -= 1
+        in_flight.release()
+
+    @staticmethod
+    def _call_soon(loop: asyncio.AbstractEventLoop, callback: Callable[[], None]) -> None:
+        """Schedule ``callback`` on ``loop`` from an executor thread"""
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            pass  # Loop already closed; its queue and semaphore went with it
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool and per-stage statistics"""
+        return {
+            **self._stats,
+            'workers': self._max_workers,
+            'max_in_flight': self._max_in_flight,
+            'free_slots': self._free_slots.qsize() if self._free_slots is not None else 0,
+            'stages': {name: stats.copy() for name, stats in self._stage_stats.items()}
+        }
+
+
+_frame_worker_pool: Optional[FrameWorkerPool] = None
+
+
+def get_frame_worker_pool() -> FrameWorkerPool:
+    """Get or create the process-wide frame worker pool"""
+    global _frame_worker_pool
+    if _frame_worker_pool is None:
+        from ..config.settings import get_settings
+        settings = get_settings()
+        _frame_worker_pool = FrameWorkerPool(
+            max_workers=0 if settings.TESTING else settings.RECOGNITION_WORKER_PROCESSES,
+            max_in_flight=settings.RECOGNITION_WORKER_MAX_IN_FLIGHT,
+            slot_bytes=settings.RECOGNITION_WORKER_SLOT_BYTES
+        )
+    return _frame_worker_pool
+
+
+# ---------------------------------------------------------------------------
+# Stage functions. These run inside worker processes: they must be defined at
+# module level and must not return views of their (shared-memory) input.
+# ---------------------------------------------------------------------------
+
+def detect_faces_cascade(frame: np.ndarray,
+                         cascade_path: str,
+                         scale_factor: float = 1.1,
+                         min_neighbors: int = 5,
+                         min_size: Tuple[int, int] = (30, 30)) -> List[Tuple[int, int, int, int]]:
+    """Haar-cascade face detection returning (x, y, w, h) boxes"""
+    cascades = _WORKER_STATE.setdefault('cascades', {})
+    detector = cascades.get(cascade_path)
+    if detector is None:
+        detector = cascades[cascade_path] = cv2.CascadeClassifier(cascade_path)
+
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    faces = detector.detectMultiScale(
+        gray,
+        scaleFactor=scale_factor,
+        minNeighbors=min_neighbors,
+        minSize=min_size
+    )
+    return [tuple(int(v) for v in face) for face in faces]
+
+
+def preprocess_face_array(face_img: np.ndarray,
+                          size: int,
+                          mean: Optional[Sequence[float]] = None,
+                          std: Optional[Sequence[float]] = None,
+                          scale: float = 1.0,
+                          interpolation: int = cv2.INTER_LINEAR) -> np.ndarray:
+    """
+    Resize, convert to RGB and normalize a face crop.
+
+    Returns:
+        float32 array of shape (1, 3, size, size) ready for ``torch.from_numpy``
+    """
+    face_img = cv2.resize(face_img, (size, size), interpolation=interpolation)
+
+    if face_img.ndim == 2 or face_img.shape[2] == 1:
+        face_img = cv2.cvtColor(face_img, cv2.COLOR_GRAY2RGB)
+    elif face_img.shape[2] == 4:
+        face_img = cv2.cvtColor(face_img, cv2.COLOR_BGRA2RGB)
+    else:
+        face_img = cv2.cvtColor(face_img, cv2.COLOR_BGR2RGB)
+
+    array = face_img.astype(np.float32) * scale
+    if mean is not None and std is not None:
+        array = (array - np.asarray(mean, dtype=np.float32)) / np.asarray(std, dtype=np.float32)
+
+    return np.ascontiguousarray(array.transpose(2, 0, 1)[None])
+
+
+def image_quality_metrics(face_img: np.ndarray) -> Dict[str, float]:
+    """Image-statistics part of face quality assessment"""
+    gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
+
+    sharpness = np.clip(np.var(cv2.Laplacian(gray, cv2.CV_64F)) / 1000, 0.0, 1.0)
+    brightness = np.mean(gray) / 255.0
+    contrast = np.clip(np.std(gray) / 128.0, 0.0, 1.0)
+
+    # Signed differences (uint8 would wrap); the centre column of an odd
+    # width belongs to neither half
+    mid = gray.shape[1] // 2
+    left = gray[:, :mid].astype(np.int16)
+    right = cv2.flip(gray[:, gray.shape[1] - mid:], 1).astype(np.int16)
+    symmetry = 1.0 - (np.abs(left - right).mean() / 255.0)
+
+    denoised = cv2.medianBlur(gray, 3)
+    noise_level = np.abs(gray.astype(np.int16) - denoised).mean() / 255.0
+
+    return {
+        'sharpness': float(sharpness),
+        'brightness': float(brightness),
+        'contrast': float(contrast),
+        'symmetry': float(symmetry),
+        'noise_level': float(noise_level)
+    }
+
+
+def optical_flow_magnitude(face_img: np.ndarray,
+                           previous_img: np.ndarray) -> np.ndarray:
+    """Dense optical-flow magnitude between two face crops"""
+    prev_gray = cv2.cvtColor(previous_img, cv2.COLOR_BGR2GRAY)
+    curr_gray = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
+    flow = cv2.calcOpticalFlowFarneback(
+        prev_gray,
+        curr_gray,
+        None,
+        0.5, 3, 15, 3, 5, 1.2, 0
+    )
+    magnitude, _ = cv2.cartToPolar(flow[..., 0], flow[..., 1])
+    return magnitude
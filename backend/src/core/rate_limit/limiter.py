@@ -9,8 +9,11 @@ from collections import defaultdict
 from ..base import BaseComponent
 from ..connections.redis import RedisPool
 from ..utils.decorators import handle_errors
+from ..utils.expiry import ExpiryQueue
 import hashlib
 from fastapi import Request, Response
+from .local import LocalTier
+from .scripts import FIXED_WINDOW, LIMIT_SCRIPTS, SLIDING_WINDOW, TOKEN_BUCKET, LimitScript
 
 @dataclass
 class RateLimit:
@@ -25,11 +28,24 @@ class RateLimit:
 class RateLimiter(BaseComponent):
     """Advanced rate limiting system"""
     
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, store: Optional[Any] = None):
+        """
+        Args:
+            config: Rate limit configuration
+            store: Shared store with the RedisPool interface (default: a
+                RedisPool created on initialize; MemoryLimitStore in tests)
+        """
         super().__init__(config)
-        self._redis: Optional[RedisPool] = None
+        self._redis: Optional[RedisPool] = store
         self._local_limits: Dict[str, Dict] = {}
         self._storage: Dict[str, List[float]] = {}
+        # Deadlines of the entries above, so cleanup only visits due keys
+        self._local_expiry = ExpiryQueue()
+        self._storage_expiry = ExpiryQueue()
+        self._limits: Dict[str, Dict] = {}
+        self._enable_redis = self.config.get('rate_limit.redis', True)
+        self._enable_local = self.config.get('rate_limit.local', True)
+        self._namespace = self.config.get('rate_limit.namespace', 'ratelimit')
         self._default_limit = self.config.get('rate_limit.default', 60)
         self._default_window = self.config.get('rate_limit.window', 60)
         self._cleanup_interval = self.config.get(
@@ -37,15 +53,33 @@ class RateLimiter(BaseComponent):
             300
         )
         
+        # Optional in-process tier: permits leased from the store in
+        # batches, so only requests near a limit reach the store
+        self._local_tier: Optional[LocalTier] = None
+        if self.config.get('rate_limit.local_tier', False):
+            self._local_tier = LocalTier(
+                lease_size=self.config.get('rate_limit.lease_size', 50),
+                lease_fraction=self.config.get('rate_limit.lease_fraction', 0.1),
+                lease_ttl=self.config.get('rate_limit.lease_ttl', 1.0)
+            )
+        
         # Initialize default limits
         self._setup_default_limits()
 
     async def initialize(self) -> None:
         """Initialize rate limiter"""
-        if self._enable_redis:
+        if self._redis is None and self._enable_redis:
             self._redis = RedisPool(self.config)
+        if self._redis is not None:
             await self._redis.initialize()
             
+            # Cache the limit scripts so checks go straight to EVALSHA
+            for script in LIMIT_SCRIPTS.values():
+                try:
+                    await script.load(self._redis)
+                except Exception as e:
+                    self.logger.warning(f"Failed to preload {script.name} limit script: {str(e)}")
+            
         # Start cleanup task
         self.add_cleanup_task(
             asyncio.create_task(self._cleanup_local_limits())
@@ -60,6 +94,10 @@ class RateLimiter(BaseComponent):
             await self._redis.cleanup()
         self._local_limits.clear()
         self._storage.clear()
+        self._local_expiry.clear()
+        self._storage_expiry.clear()
+        if self._local_tier is not None:
+            self._local_tier.clear()
 
     @handle_errors(logger=None)
     async def check_limit(self,
@@ -95,6 +133,12 @@ class RateLimiter(BaseComponent):
         # Add request timestamp if allowed
         if is_allowed:
             self._storage[key].append(now)
+        if self._storage[key]:
+            deadline = self._storage[key][-1] + limit_rule['window']
+            if deadline > (self._storage_expiry.deadline(key) or 0):
+                self._storage_expiry.schedule(key, deadline)
+        else:
+            del self._storage[key]
             
         # Calculate reset time
         if current_count > 0:
@@ -151,16 +195,19 @@ class RateLimiter(BaseComponent):
         while True:
             try:
                 await asyncio.sleep(self._cleanup_interval)
-                now = datetime.utcnow()
-                
-                # Remove expired entries
-                expired = [
-                    key for key, entry in self._local_limits.items()
-                    if entry['expires'] < now
-                ]
+                now = datetime.utcnow().timestamp()
                 
-                for key in expired:
-                    del self._local_limits[key]
+                # Remove due entries in batches, yielding in between
+                while True:
+                    expired = self._local_expiry.pop_expired(now, limit=10000)
+                    for key in expired:
+                        self._local_limits.pop(key, None)
+                    if len(expired) < 10000:
+                        break
+                    await asyncio.sleep(0)
+                    
+                if self._local_tier is not None:
+                    self._local_tier.purge_expired()
                     
             except asyncio.CancelledError:
                 break
@@ -179,22 +226,29 @@ class RateLimiter(BaseComponent):
                     for rule in self._limits.values()
                 )
                 
-                # Remove expired entries
-                expired = []
-                for key, timestamps in self._storage.items():
-                    valid_timestamps = [
-                        ts for ts in timestamps
-                        if ts > now - max_window
-                    ]
-                    
-                    if valid_timestamps:
-                        self._storage[key] = valid_timestamps
-                    else:
-                        expired.append(key)
-                        
-                # Remove empty keys
-                for key in expired:
-                    del self._storage[key]
+                # Only keys whose newest request has left its window are due
+                while True:
+                    expired = self._storage_expiry.pop_expired(now, limit=10000)
+                    for key in expired:
+                        timestamps = self._storage.get(key)
+                        if timestamps is None:
+                            continue
+                        valid_timestamps = [
+                            ts for ts in timestamps
+                            if ts > now - max_window
+                        ]
+                        if valid_timestamps:
+                            # Still inside a longer rule's window
+                            self._storage[key] = valid_timestamps
+                            self._storage_expiry.schedule(
+                                key,
+                                valid_timestamps[-1] + max_window
+                            )
+                        else:
+                            del self._storage[key]
+                    if len(expired) < 10000:
+                        break
+                    await asyncio.sleep(0)
                     
             except asyncio.CancelledError:
                 break
@@ -250,6 +304,7 @@ class RateLimiter(BaseComponent):
         entry = self._local_limits[key]
         if entry['expires'] < now:
             del self._local_limits[key]
+            self._local_expiry.cancel(key)
             return False, {
                 'remaining': limit,
                 'reset': int(time.time()) + window
@@ -267,10 +322,13 @@ class RateLimiter(BaseComponent):
                                 window: int) -> Tuple[bool, Dict]:
         """Check Redis rate limit"""
         redis_key = self._make_key(key)
-        count = await self._redis.execute('get', redis_key) or 0
-        count = int(count)
         
-        ttl = await self._redis.execute('ttl', redis_key)
+        # Count and TTL in one round-trip
+        count, ttl = await self._redis.pipeline([
+            ('get', redis_key),
+            ('ttl', redis_key)
+        ])
+        count = int(count or 0)
         if ttl < 0:
             return False, {
                 'remaining': limit,
@@ -294,11 +352,16 @@ class RateLimiter(BaseComponent):
                 'count': 1,
                 'expires': now + timedelta(seconds=window)
             }
+            self._local_expiry.schedule(
+                key,
+                self._local_limits[key]['expires'].timestamp()
+            )
         else:
             entry = self._local_limits[key]
             if entry['expires'] < now:
                 entry['count'] = 1
                 entry['expires'] = now + timedelta(seconds=window)
+                self._local_expiry.schedule(key, entry['expires'].timestamp())
             else:
                 entry['count'] += 1
 
@@ -308,13 +371,12 @@ class RateLimiter(BaseComponent):
                              window: int) -> Dict:
         """Increment Redis rate limit counter"""
         redis_key = self._make_key(key)
-        pipe = self._redis.pipeline()
         
         # Increment counter
-        pipe.incr(redis_key)
-        pipe.expire(redis_key, window)
-        
-        count, _ = await pipe.execute()
+        count, _ = await self._redis.pipeline([
+            ('incr', redis_key),
+            ('expire', redis_key, window)
+        ])
         
         remaining = limit - count
         return {
@@ -333,6 +395,17 @@ class RateLimiter(BaseComponent):
         try:
             limit_key = self._build_key(rate_limit, key)
             
+            # Spend a leased permit or repeat a recent denial without a round-trip
+            if self._local_tier is not None:
+                decision = self._local_tier.acquire(limit_key)
+                if decision is not None:
+                    is_allowed, info = decision
+                    return is_allowed, {
+                        "limit": rate_limit.limit,
+                        "window": rate_limit.window,
+                        **info
+                    }
+            
             if rate_limit.strategy == "token":
                 return await self._check_token_bucket(rate_limit, limit_key)
             elif rate_limit.strategy == "sliding":
@@ -357,6 +430,9 @@ class RateLimiter(BaseComponent):
             # Clear local cache
             if limit_key in self._local_limits:
                 del self._local_limits[limit_key]
+                self._local_expiry.cancel(limit_key)
+            if self._local_tier is not None:
+                self._local_tier.clear(limit_key)
                 
             self.logger.info(f"Reset rate limit for {limit_key}")
             
@@ -368,31 +444,7 @@ class RateLimiter(BaseComponent):
                                 key: str) -> Tuple[bool, Dict]:
         """Check fixed window rate limit"""
         try:
-            now = int(time.time())
-            window_start = now - (now % rate_limit.window)
-            
-            # Get current count
-            count = await self._redis.execute('get', f"{key}:{window_start}")
-            count = int(count) if count else 0
-            
-            if count >= rate_limit.limit:
-                return False, {
-                    "limit": rate_limit.limit,
-                    "remaining": 0,
-                    "reset": window_start + rate_limit.window,
-                    "window": rate_limit.window
-                }
-                
-            # Increment counter
-            await self._redis.execute('incrby', f"{key}:{window_start}", 1)
-            await self._redis.execute('expire', f"{key}:{window_start}", rate_limit.window)
-            
-            return True, {
-                "limit": rate_limit.limit,
-                "remaining": rate_limit.limit - (count + 1),
-                "reset": window_start + rate_limit.window,
-                "window": rate_limit.window
-            }
+            return await self._run_limit_script(FIXED_WINDOW, rate_limit, key)
             
         except Exception as e:
             self.logger.error(f"Fixed window check failed: {str(e)}")
@@ -403,39 +455,7 @@ class RateLimiter(BaseComponent):
                                   key: str) -> Tuple[bool, Dict]:
         """Check sliding window rate limit"""
         try:
-            now = time.time()
-            window_start = now - rate_limit.window
-            
-            # Remove old entries
-            await self._redis.execute('zremrangebyscore', key, '-inf', window_start)
-            
-            # Get current count
-            count = await self._redis.execute('zcard', key)
-            
-            if count >= rate_limit.limit:
-                oldest = await self._redis.execute('zrange', key, 0, 0, withscores=True)
-                if oldest:
-                    reset_time = oldest[0][1] + rate_limit.window
-                else:
-                    reset_time = now + rate_limit.window
-                    
-                return False, {
-                    "limit": rate_limit.limit,
-                    "remaining": 0,
-                    "reset": reset_time,
-                    "window": rate_limit.window
-                }
-                
-            # Add new request
-            await self._redis.execute('zadd', key, now, f"{now}:{count}")
-            await self._redis.execute('expire', key, rate_limit.window * 2)
-            
-            return True, {
-                "limit": rate_limit.limit,
-                "remaining": rate_limit.limit - (count + 1),
-                "reset": now + rate_limit.window,
-                "window": rate_limit.window
-            }
+            return await self._run_limit_script(SLIDING_WINDOW, rate_limit, key)
             
         except Exception as e:
             self.logger.error(f"Sliding window check failed: {str(e)}")
@@ -444,52 +464,43 @@ class RateLimiter(BaseComponent):
     async def _check_token_bucket(self,
                                 rate_limit: RateLimit,
                                 key: str) -> Tuple[bool, Dict]:
-        """Check token bucket rate limit"""
+        """Check token bucket rate limit (bucket size: burst, else limit)"""
         try:
-            now = time.time()
-            bucket = self._local_limits.get(key)
-            
-            if not bucket:
-                # Initialize bucket
-                bucket = {
-                    "tokens": rate_limit.limit,
-                    "last_update": now,
-                    "rate": rate_limit.limit / rate_limit.window
-                }
-                self._local_limits[key] = bucket
-            else:
-                # Refill tokens
-                time_passed = now - bucket["last_update"]
-                new_tokens = time_passed * bucket["rate"]
-                bucket["tokens"] = min(
-                    rate_limit.limit,
-                    bucket["tokens"] + new_tokens
-                )
-                bucket["last_update"] = now
-                
-            if bucket["tokens"] < 1:
-                time_to_next = (1 - bucket["tokens"]) / bucket["rate"]
-                return False, {
-                    "limit": rate_limit.limit,
-                    "remaining": 0,
-                    "reset": now + time_to_next,
-                    "window": rate_limit.window
-                }
-                
-            # Consume token
-            bucket["tokens"] -= 1
-            
-            return True, {
-                "limit": rate_limit.limit,
-                "remaining": int(bucket["tokens"]),
-                "reset": now + (1 / bucket["rate"]),
-                "window": rate_limit.window
-            }
+            return await self._run_limit_script(TOKEN_BUCKET, rate_limit, key)
             
         except Exception as e:
             self.logger.error(f"Token bucket check failed: {str(e)}")
             return True, {}
 
+    async def _run_limit_script(self,
+                              script: LimitScript,
+                              rate_limit: RateLimit,
+                              key: str) -> Tuple[bool, Dict]:
+        """
+        Check and update a limit with one atomic script call
+        
+        With the local tier enabled, a batch of permits is requested; the
+        ones not used by this request are spent locally.
+        """
+        cost = self._local_tier.lease_size(key) if self._local_tier is not None else 1
+        granted, remaining, reset = await script.run(
+            self._redis,
+            [key],
+            [rate_limit.limit, rate_limit.window * 1000, cost, rate_limit.burst or rate_limit.limit]
+        )
+        granted, remaining, reset = int(granted), int(remaining), int(reset) / 1000
+        if self._local_tier is not None:
+            # A fixed window's permits are only valid until it resets
+            lease_until = reset if script is FIXED_WINDOW else None
+            self._local_tier.record(key, granted, remaining, reset, lease_until)
+            
+        return granted > 0, {
+            "limit": rate_limit.limit,
+            "remaining": max(0, remaining + max(granted - 1, 0)),
+            "reset": reset,
+            "window": rate_limit.window
+        }
+
     def _build_key(self, rate_limit: RateLimit, key: str) -> str:
         """Build rate limit key"""
         if rate_limit.namespace:
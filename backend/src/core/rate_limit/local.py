@@ -0,0 +1,118 @@
+"""
+Per-process pre-check tier in front of the shared rate limit store.
+
+Permits are leased from the store in batches (one script call grants
+several) and spent locally without a round-trip; a denial is remembered
+until the reset time the store reported. Leases shrink as the shared
+remaining count falls, down to one permit per call near the limit, so the
+decisions that matter are always made by the store.
+
+The tier is conservative: leased permits that are not spent before the
+lease lapses are lost, so all processes together never exceed a limit,
+but may admit slightly fewer requests than it allows.
+"""
+from typing import Callable, Dict, Optional, Tuple
+import time
+
+from ..utils.expiry import ExpiryQueue
+
+class LocalTier:
+    """Leased permits and cached denials per limit key"""
+
+    def __init__(self,
+                 lease_size: int = 50,
+                 lease_fraction: float = 0.1,
+                 lease_ttl: float = 1.0,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            lease_size: Most permits leased by one store call
+            lease_fraction: Share of the store's remaining permits one lease may take
+            lease_ttl: Seconds a lease stays usable
+            clock: Time source (seconds)
+        """
+        self._lease_size = lease_size
+        self._lease_fraction = lease_fraction
+        self._lease_ttl = lease_ttl
+        self._clock = clock
+        self._entries: Dict[str, Dict[str, float]] = {}
+        self._expiry = ExpiryQueue()  # key -> when the entry stops mattering
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def acquire(self, key: str) -> Optional[Tuple[bool, Dict]]:
+        """
+        Decide locally if possible
+
+        Returns:
+            (allowed, info) from a leased permit or a cached denial, or None
+            if the store has to be asked
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        now = self._clock()
+        if entry['blocked_until'] > now:
+            return False, {'remaining': 0, 'reset': entry['reset']}
+        if entry['permits'] >= 1 and entry['expires'] > now:
+            entry['permits'] -= 1
+            return True, {
+                'remaining': int(entry['remaining'] + entry['permits']),
+                'reset': entry['reset']
+            }
+        return None
+
+    def lease_size(self, key: str) -> int:
+        """Permits to request from the store for a key"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return 1  # Remaining count unknown
+        return max(1, min(self._lease_size, int(entry['remaining'] * self._lease_fraction)))
+
+    def record(self,
+               key: str,
+               granted: int,
+               remaining: int,
+               reset: float,
+               lease_until: Optional[float] = None) -> None:
+        """
+        Remember a store decision
+
+        Args:
+            key: Limit key
+            granted: Permits granted; one is spent by the current request
+            remaining: Permits left in the store
+            reset: When the limit resets or frees a permit (seconds)
+            lease_until: Latest time leased permits may be spent, e.g. the end
+                of a fixed window, whose permits must not count in the next one
+        """
+        now = self._clock()
+        expires = now + self._lease_ttl
+        if lease_until is not None:
+            expires = min(expires, lease_until)
+        self._entries[key] = {
+            'permits': max(granted - 1, 0),
+            'expires': expires,
+            'remaining': max(remaining, 0),
+            'reset': reset,
+            'blocked_until': reset if granted <= 0 else 0.0
+        }
+        entry = self._entries[key]
+        self._expiry.schedule(key, max(entry['expires'], entry['blocked_until']))
+
+    def clear(self, key: Optional[str] = None) -> None:
+        """Forget one key, or every key"""
+        if key is None:
+            self._entries.clear()
+            self._expiry.clear()
+        else:
+            self._entries.pop(key, None)
+            self._expiry.cancel(key)
+
+    def purge_expired(self) -> int:
+        """Drop entries with neither a usable lease nor an active denial"""
+        expired = self._expiry.pop_expired(self._clock())
+        for key in expired:
+            del self._entries[key]
+        return len(expired)
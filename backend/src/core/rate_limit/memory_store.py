@@ -0,0 +1,211 @@
+"""
+In-process stand-in for the shared rate limit store.
+
+Implements the part of the RedisPool interface RateLimiter uses
+(``execute``, ``pipeline`` and ``acquire``) over plain dictionaries. The limit scripts
+are run as Python equivalents of their Lua source, looked up by SHA1, so
+tests and single-process deployments exercise the same call pattern as
+Redis, including the EVALSHA/EVAL fallback. ``calls`` counts round-trips.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from contextlib import asynccontextmanager
+import bisect
+import math
+import time
+
+from .scripts import FIXED_WINDOW, SLIDING_WINDOW, TOKEN_BUCKET
+
+class MemoryConnection:
+    """Client view of a MemoryLimitStore: ``connection.get(key)`` runs GET"""
+
+    def __init__(self, store: 'MemoryLimitStore'):
+        self._store = store
+
+    def __getattr__(self, command: str) -> Callable:
+        async def call(*args):
+            return await self._store.execute(command, *args)
+        return call
+
+class MemoryLimitStore:
+    """Dictionary-backed store answering the commands RateLimiter issues"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, int] = {}  # key -> deadline (ms)
+        self._scripts = {
+            FIXED_WINDOW.sha: self._fixed_window,
+            SLIDING_WINDOW.sha: self._sliding_window,
+            TOKEN_BUCKET.sha: self._token_bucket
+        }
+        self._sources = {
+            FIXED_WINDOW.source: FIXED_WINDOW.sha,
+            SLIDING_WINDOW.source: SLIDING_WINDOW.sha,
+            TOKEN_BUCKET.source: TOKEN_BUCKET.sha
+        }
+        self._loaded = set()
+        self.calls = 0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def cleanup(self) -> None:
+        self._data.clear()
+        self._expires.clear()
+
+    async def execute(self, command: str, *args, **kwargs) -> Any:
+        """Run one command (one round-trip)"""
+        self.calls += 1
+        return self._run(command, *args)
+
+    async def pipeline(self, commands: list) -> list:
+        """Run several commands (one round-trip)"""
+        self.calls += 1
+        return [self._run(command, *args) for command, *args in commands]
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Connection issuing commands directly (one round-trip each)"""
+        yield MemoryConnection(self)
+
+    def _run(self, command: str, *args) -> Any:
+        handler = getattr(self, f"_cmd_{command.lower()}", None)
+        if handler is None:
+            raise ValueError(f"Unsupported command: {command}")
+        return handler(*args)
+
+    def _now(self) -> int:
+        return int(self._clock() * 1000)
+
+    def _get(self, key: str) -> Any:
+        """Value of a live key (expired keys are dropped)"""
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= self._now():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return self._data.get(key)
+
+    def _set(self, key: str, value: Any) -> None:
+        self._data[key] = value
+        self._expires.pop(key, None)
+
+    # Commands
+
+    def _cmd_get(self, key: str) -> Optional[str]:
+        value = self._get(key)
+        return None if value is None else str(value)
+
+    def _cmd_set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        self._set(key, value)
+        if ex is not None:
+            self._cmd_expire(key, ex)
+        return True
+
+    def _cmd_delete(self, *keys: str) -> int:
+        removed = 0
+        for key in keys:
+            if self._get(key) is not None:
+                removed += 1
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return removed
+
+    def _cmd_incrby(self, key: str, amount: int) -> int:
+        value = int(self._get(key) or 0) + int(amount)
+        deadline = self._expires.get(key)
+        self._data[key] = value
+        if deadline is not None:
+            self._expires[key] = deadline
+        return value
+
+    def _cmd_incr(self, key: str) -> int:
+        return self._cmd_incrby(key, 1)
+
+    def _cmd_pexpire(self, key: str, milliseconds: int) -> bool:
+        if self._get(key) is None:
+            return False
+        self._expires[key] = self._now() + int(milliseconds)
+        return True
+
+    def _cmd_expire(self, key: str, seconds: int) -> bool:
+        return self._cmd_pexpire(key, int(seconds) * 1000)
+
+    def _cmd_pttl(self, key: str) -> int:
+        if self._get(key) is None:
+            return -2
+        deadline = self._expires.get(key)
+        return -1 if deadline is None else deadline - self._now()
+
+    def _cmd_ttl(self, key: str) -> int:
+        ttl = self._cmd_pttl(key)
+        return ttl if ttl < 0 else math.ceil(ttl / 1000)
+
+    def _cmd_script_load(self, source: str) -> str:
+        sha = self._sources.get(source)
+        if sha is None:
+            raise ValueError("Unknown script")
+        self._loaded.add(sha)
+        return sha
+
+    def _cmd_evalsha(self, sha: str, numkeys: int, *keys_and_args) -> List[int]:
+        if sha not in self._loaded:
+            raise ValueError("NOSCRIPT No matching script")
+        numkeys = int(numkeys)
+        return self._scripts[sha](keys_and_args[:numkeys], keys_and_args[numkeys:])
+
+    def _cmd_eval(self, source: str, numkeys: int, *keys_and_args) -> List[int]:
+        return self._cmd_evalsha(self._cmd_script_load(source), numkeys, *keys_and_args)
+
+    # Python equivalents of the limit scripts (see scripts.py)
+
+    @staticmethod
+    def _limit_args(args: Sequence[Any]) -> Tuple[int, int, int, int]:
+        limit, window, cost, burst = (int(float(arg)) for arg in args[:4])
+        return limit, window, cost, burst
+
+    def _fixed_window(self, keys: Sequence[str], args: Sequence[Any]) -> List[int]:
+        limit, window, cost, _ = self._limit_args(args)
+        now = self._now()
+        window_start = now - now % window
+        current = self._get(keys[0]) or {}
+        count = current.get('count', 0) if current.get('start') == window_start else 0
+        granted = min(cost, max(limit - count, 0))
+        if granted > 0:
+            count += granted
+            self._set(keys[0], {'start': window_start, 'count': count})
+            self._cmd_pexpire(keys[0], window_start + window - now)
+        return [granted, limit - count, window_start + window]
+
+    def _sliding_window(self, keys: Sequence[str], args: Sequence[Any]) -> List[int]:
+        limit, window, cost, _ = self._limit_args(args)
+        now = self._now()
+        log = self._get(keys[0]) or []
+        del log[:bisect.bisect_right(log, now - window)]
+        count = len(log)
+        granted = min(cost, max(limit - count, 0))
+        log.extend([now] * granted)
+        count += granted
+        if granted > 0:
+            self._set(keys[0], log)
+            self._cmd_pexpire(keys[0], window)
+        reset = now + window
+        if count >= limit and log:
+            reset = log[0] + window
+        return [granted, limit - count, reset]
+
+    def _token_bucket(self, keys: Sequence[str], args: Sequence[Any]) -> List[int]:
+        limit, window, cost, capacity = self._limit_args(args)
+        rate = limit / window
+        now = self._now()
+        bucket = self._get(keys[0]) or {}
+        tokens = bucket.get('tokens', capacity)
+        last = bucket.get('ts', now)
+        tokens = min(capacity, tokens + max(now - last, 0) * rate)
+        granted = min(cost, math.floor(tokens))
+        tokens -= granted
+        self._set(keys[0], {'tokens': tokens, 'ts': now})
+        self._cmd_pexpire(keys[0], math.ceil(capacity / rate))
+        reset = now
+        if tokens < 1:
+            reset = now + math.ceil((1 - tokens) / rate)
+        return [granted, math.floor(tokens), reset]
@@ -0,0 +1,129 @@
+"""
+Atomic rate limit algorithms run inside the shared store.
+
+Each algorithm is a single Lua script, so a check costs one round-trip
+and concurrent requests cannot interleave between reading and updating a
+counter. Scripts take the same arguments and return the same reply:
+
+    KEYS[1]  limit key
+    ARGV     limit, window (ms), cost (permits wanted), burst (bucket size)
+    reply    {granted, remaining, reset (ms since epoch)}
+
+``granted`` may be lower than ``cost`` (down to 0) when fewer permits are
+left; callers asking for one permit are allowed when it is 1. Time comes
+from the store's clock so all processes share one timeline (scripts that
+read TIME before writing need Redis 5+, which replicates their effects).
+"""
+from typing import Any, List, Sequence
+import hashlib
+
+def is_noscript_error(error: Exception) -> bool:
+    """Whether the store rejected EVALSHA because the script is not cached"""
+    return type(error).__name__ == 'NoScriptError' or str(error).startswith('NOSCRIPT')
+
+_NOW = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+"""
+
+# Counter per aligned window, kept in a hash so the key is fixed
+FIXED_WINDOW_SOURCE = _NOW + """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local window_start = now - (now % window)
+local current = redis.call('HMGET', KEYS[1], 'start', 'count')
+local count = 0
+if tonumber(current[1]) == window_start then
+    count = tonumber(current[2])
+end
+local granted = math.min(cost, math.max(limit - count, 0))
+if granted > 0 then
+    count = count + granted
+    redis.call('HSET', KEYS[1], 'start', window_start, 'count', count)
+    redis.call('PEXPIRE', KEYS[1], window_start + window - now)
+end
+return {granted, limit - count, window_start + window}
+"""
+
+# Log of request times in a sorted set
+SLIDING_WINDOW_SOURCE = _NOW + """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+local granted = math.min(cost, math.max(limit - count, 0))
+for i = 1, granted do
+    redis.call('ZADD', KEYS[1], now, now .. ':' .. (count + i))
+end
+count = count + granted
+if granted > 0 then
+    redis.call('PEXPIRE', KEYS[1], window)
+end
+local reset = now + window
+if count >= limit then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    if oldest[2] then
+        reset = tonumber(oldest[2]) + window
+    end
+end
+return {granted, limit - count, reset}
+"""
+
+# Bucket of ``burst`` tokens refilled at limit / window
+TOKEN_BUCKET_SOURCE = _NOW + """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local capacity = tonumber(ARGV[4])
+local rate = limit / window
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local last = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - last, 0) * rate)
+local granted = math.min(cost, math.floor(tokens))
+tokens = tokens - granted
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+local reset = now
+if tokens < 1 then
+    reset = now + math.ceil((1 - tokens) / rate)
+end
+return {granted, math.floor(tokens), reset}
+"""
+
+class LimitScript:
+    """A Lua script executed by the store, addressed by its SHA1"""
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        self.sha = hashlib.sha1(source.encode()).hexdigest()
+
+    async def load(self, store: Any) -> None:
+        """Cache the script in the store ahead of the first request"""
+        await store.execute('script_load', self.source)
+
+    async def run(self, store: Any, keys: Sequence[str], args: Sequence[Any]) -> List[int]:
+        """
+        Run the script; one round-trip once the store has it cached
+        
+        Commands go to a connection of the store rather than through
+        ``execute``, so a missing script surfaces as NOSCRIPT instead of a
+        logged internal error. Other errors propagate.
+        """
+        async with store.acquire() as connection:
+            try:
+                return await connection.evalsha(self.sha, len(keys), *keys, *args)
+            except Exception as e:
+                if not is_noscript_error(e):
+                    raise
+            # Not cached (first use, restart or SCRIPT FLUSH); EVAL caches it
+            return await connection.eval(self.source, len(keys), *keys, *args)
+
+FIXED_WINDOW = LimitScript('fixed', FIXED_WINDOW_SOURCE)
+SLIDING_WINDOW = LimitScript('sliding', SLIDING_WINDOW_SOURCE)
+TOKEN_BUCKET = LimitScript('token', TOKEN_BUCKET_SOURCE)
+
+LIMIT_SCRIPTS = {script.name: script for script in (FIXED_WINDOW, SLIDING_WINDOW, TOKEN_BUCKET)}
@@ -17,6 +17,7 @@ from pydantic import BaseModel, ValidationError
 
 from ..base import BaseComponent
 from ..utils.errors import SpoofingError
+from ..pool.frame_workers import get_frame_worker_pool, preprocess_face_array, optical_flow_magnitude
 
 @dataclass
 class SpoofingResult:
@@ -84,6 +85,9 @@ class AntiSpoofing(BaseComponent):
             std=[0.229, 0.224, 0.225]
         )
         
+        # OpenCV stages run in worker processes, off the event loop
+        self._frame_pool = get_frame_worker_pool()
+        
         # Statistics
         self._stats = {
             'total_checks': 0,
@@ -127,7 +131,7 @@ class AntiSpoofing(BaseComponent):
 
     async def check_spoofing(self, face_img: np.ndarray, face_id: Optional[str] = None) -> SpoofingResult:
         try:
-            face_tensor = self._preprocess_face(face_img)
+            face_tensor = await self._preprocess_face(face_img)
             if face_tensor is None:
                 raise SpoofingError("Face preprocessing failed")
 
@@ -169,18 +173,20 @@ class AntiSpoofing(BaseComponent):
             self.logger.error(f"Spoofing check failed: {str(e)}")
             raise SpoofingError(f"Spoofing check failed: {str(e)}")
 
-    def _preprocess_face(self, face_img: np.ndarray) -> Optional[torch.Tensor]:
+    async def _preprocess_face(self, face_img: np.ndarray) -> Optional[torch.Tensor]:
         """Preprocess face image"""
         try:
-            face_img = cv2.resize(face_img, (self._face_size, self._face_size), interpolation=cv2.INTER_AREA)
-            if face_img.ndim == 2 or face_img.shape[2] == 1:
-                face_img = cv2.cvtColor(face_img, cv2.COLOR_GRAY2RGB)
-            elif face_img.shape[2] == 4:
-                face_img = cv2.cvtColor(face_img, cv2.COLOR_BGRA2RGB)
-            else:
-                face_img = cv2.cvtColor(face_img, cv2.COLOR_BGR2RGB)
-            face_tensor = torch.from_numpy(face_img).float().permute(2, 0, 1).unsqueeze(0)
-            face_tensor = self._normalize(face_tensor / 255.0)
+            face_array = await self._frame_pool.run(
+                'spoof_preprocess',
+                preprocess_face_array,
+                face_img,
+                self._face_size,
+                self._normalize.mean,
+                self._normalize.std,
+                1.0 / 255.0,
+                cv2.INTER_AREA
+            )
+            face_tensor = torch.from_numpy(face_array)
             return face_tensor.cuda() if torch.cuda.is_available() else face_tensor
         except Exception as e:
             self.logger.error(f"Face preprocessing failed: {str(e)}")
@@ -238,22 +244,15 @@ class AntiSpoofing(BaseComponent):
             if len(self._frame_history[face_id]) < 2:
                 return 0.0
             
-            # Calculate optical flow
-            prev_frame = cv2.cvtColor(
-                self._frame_history[face_id][-2],
-                cv2.COLOR_BGR2GRAY
-            )
-            curr_frame = cv2.cvtColor(face_img, cv2.COLOR_BGR2GRAY)
-            
-            flow = cv2.calcOpticalFlowFarneback(
-                prev_frame,
-                curr_frame,
-                None,
-                0.5, 3, 15, 3, 5, 1.2, 0
+            # Calculate optical flow in a worker process
+            magnitude = await self._frame_pool.run(
+                'spoof_motion',
+                optical_flow_magnitude,
+                face_img,
+                self._frame_history[face_id][-2]
             )
             
             # Analyze flow patterns
-            magnitude, _ = cv2.cartToPolar(flow[..., 0], flow[..., 1])
             motion_score = self._evaluate_motion_patterns(magnitude)
             
             return float(motion_score)
@@ -8,6 +8,7 @@ import aioredis
 import secrets
 from fastapi import Request, Response
 from user_agents import parse
+from ..utils.expiry import ExpiryQueue
 
 @dataclass
 class SessionConfig:
@@ -32,6 +33,10 @@ class SessionHandler:
         self._cleanup_task: Optional[asyncio.Task] = None
         self._session_config = SessionConfig(**config.get('session', {}))
         self._active_sessions: Dict[str, Dict] = {}
+        # Sessions created or refreshed here, by expiry, so cleanup
+        # only visits the ones that are due
+        self._session_expiry = ExpiryQueue()
+        self._session_users: Dict[str, str] = {}
 
     async def initialize(self) -> None:
         """Initialize session handler"""
@@ -90,6 +95,7 @@ class SessionHandler:
             
             # Update user's active sessions
             await self._update_user_sessions(user_id, session_id)
+            self._track_session(session_data)
             
             return session_id
             
@@ -157,6 +163,8 @@ class SessionHandler:
                 
             # Remove from Redis
             await self._redis.delete(f"session:{session_id}")
+            self._session_expiry.cancel(session_id)
+            self._session_users.pop(session_id, None)
             
             # Update user's active sessions
             await self._remove_user_session(
@@ -220,6 +228,17 @@ class SessionHandler:
         user_sessions = await self._redis.get(f"user_sessions:{user_id}")
         sessions = json.loads(user_sessions) if user_sessions else []
         
+        # Drop sessions that expired without being destroyed (e.g. while
+        # another process owned them)
+        if sessions:
+            alive = await self._redis.mget(
+                *[f"session:{sid}" for sid in sessions]
+            )
+            sessions = [
+                sid for sid, data in zip(sessions, alive)
+                if data is not None
+            ]
+        
         # Add new session
         sessions.append(session_id)
         
@@ -240,6 +259,8 @@ class SessionHandler:
         user_sessions = await self._redis.get(f"user_sessions:{user_id}")
         if user_sessions:
             sessions = json.loads(user_sessions)
+            if session_id not in sessions:
+                return
             sessions.remove(session_id)
             await self._redis.set(
                 f"user_sessions:{user_id}",
@@ -261,6 +282,16 @@ class SessionHandler:
             self._session_config.session_timeout,
             json.dumps(session)
         )
+        self._track_session(session)
+
+    def _track_session(self, session: Dict) -> None:
+        """Schedule a session for cleanup at its expiry"""
+        session_id = session["session_id"]
+        self._session_users[session_id] = session["user_id"]
+        self._session_expiry.schedule(
+            session_id,
+            datetime.fromisoformat(session["expires_at"]).timestamp()
+        )
 
     async def _cleanup_expired_sessions(self) -> None:
         """Cleanup expired sessions periodically"""
@@ -268,18 +299,20 @@ class SessionHandler:
             try:
                 await asyncio.sleep(300)  # Run every 5 minutes
                 
-                # Get all session keys
-                keys = await self._redis.keys("session:*")
-                
-                for key in keys:
-                    session_data = await self._redis.get(key)
+                # Only sessions due by their last known expiry are checked
+                now = datetime.utcnow()
+                for session_id in self._session_expiry.pop_expired(now.timestamp()):
+                    user_id = self._session_users.pop(session_id, None)
+                    session_data = await self._redis.get(f"session:{session_id}")
                     if session_data:
                         session = json.loads(session_data)
-                        if datetime.fromisoformat(session["expires_at"]) < \
-                           datetime.utcnow():
-                            await self.destroy_session(
-                                session["session_id"]
-                            )
+                        if datetime.fromisoformat(session["expires_at"]) >= now:
+                            # Refreshed by another process
+                            self._track_session(session)
+                            continue
+                        await self._redis.delete(f"session:{session_id}")
+                    if user_id is not None:
+                        await self._remove_user_session(user_id, session_id)
                             
             except asyncio.CancelledError:
                 break
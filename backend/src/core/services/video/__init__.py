@@ -4,5 +4,6 @@ Contains video storage and processing functionality.
 """
 
 from .storage import VideoStorage
+from .segments import Segment, SegmentIndex
 
-__all__ = ['VideoStorage'] 
\ No newline at end of file
+__all__ = ['VideoStorage', 'Segment', 'SegmentIndex'] 
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+Segment index for recorded video.
+
+Recordings are split into short, independently decodable segments (each
+file starts with a keyframe). Every camera keeps a time index of its
+finished segments, so a clip is cut by looking up the few segments it
+spans and stream-copying them from the nearest keyframe, without
+decoding or re-encoding.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+import bisect
+import json
+import os
+import shutil
+import subprocess
+
+FFMPEG = shutil.which('ffmpeg')
+FFPROBE = shutil.which('ffprobe')
+
+@dataclass
+class Segment:
+    """A finished recording segment"""
+    start: float  # Wall-clock time of the first frame
+    end: float  # Wall-clock time just after the last frame
+    path: str  # Relative to the storage root
+    frames: int
+    fps: float
+    size: int = 0  # Bytes
+    # (media seconds, byte position) of every keyframe; the first frame
+    # is always one, positions are -1 when not probed
+    keyframes: List[Tuple[float, int]] = field(default_factory=lambda: [(0.0, -1)])
+
+    @property
+    def duration(self) -> float:
+        """Media duration in seconds"""
+        return self.frames / self.fps if self.fps else 0.0
+
+    def media_offset(self, timestamp: float) -> float:
+        """Position in the file (seconds) of a wall-clock time"""
+        span = self.end - self.start
+        if span <= 0:
+            return 0.0
+        offset = (timestamp - self.start) * self.duration / span
+        return min(max(offset, 0.0), self.duration)
+
+    def keyframe_before(self, offset: float) -> float:
+        """Latest keyframe at or before a media offset"""
+        times = [time for time, _ in self.keyframes]
+        return times[max(bisect.bisect_right(times, offset) - 1, 0)]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Segment':
+        data = dict(data)
+        data['keyframes'] = [tuple(keyframe) for keyframe in data.get('keyframes', [(0.0, -1)])]
+        return cls(**data)
+
+class SegmentIndex:
+    """
+    Time index of one camera's finished segments.
+
+    Entries are appended to a JSON lines file as segments are closed and
+    kept in memory sorted by time; segments never overlap, so the segments
+    of a time range are found with two binary searches.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._segments: List[Segment] = []
+        self._starts: List[float] = []
+        self._ends: List[float] = []
+        self._load()
+
+    def _load(self) -> None:
+        """Read the index file, dropping a torn last line"""
+        if not self.path.exists():
+            return
+        segments = []
+        complete = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Interrupted append
+                complete += len(line)
+                try:
+                    segments.append(Segment.from_dict(json.loads(line)))
+                except (ValueError, TypeError):
+                    continue
+        if complete < self.path.stat().st_size:
+            os.truncate(self.path, complete)
+        self._set(sorted(segments, key=lambda segment: segment.start))
+
+    def _set(self, segments: List[Segment]) -> None:
+        self._segments = segments
+        self._starts = [segment.start for segment in segments]
+        self._ends = [segment.end for segment in segments]
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def append(self, segment: Segment) -> None:
+        """Record a finished segment"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(asdict(segment)) + '\n')
+
+        position = bisect.bisect_right(self._starts, segment.start)
+        self._segments.insert(position, segment)
+        self._starts.insert(position, segment.start)
+        self._ends.insert(position, segment.end)
+
+    def find(self, start_time: float, end_time: float) -> List[Segment]:
+        """Segments overlapping a time range, in time order"""
+        first = bisect.bisect_right(self._ends, start_time)
+        last = bisect.bisect_left(self._starts, end_time)
+        return self._segments[first:last]
+
+    def expire(self, cutoff: float) -> List[Segment]:
+        """
+        Drop segments that ended before a cutoff time
+
+        Returns:
+            The dropped segments (their files are left to the caller)
+        """
+        count = bisect.bisect_left(self._ends, cutoff)
+        if not count:
+            return []
+        expired = self._segments[:count]
+        self._set(self._segments[count:])
+
+        temp_path = self.path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for segment in self._segments:
+                f.write(json.dumps(asdict(segment)) + '\n')
+        os.replace(temp_path, self.path)
+        return expired
+
+def clip_points(segments: List[Segment],
+                start_time: float,
+                end_time: float) -> List[Tuple[Segment, float, Optional[float]]]:
+    """
+    Cut points of a clip across its segments
+
+    The clip starts at the keyframe before ``start_time``, so it can be
+    stream-copied; it may therefore begin slightly early.
+
+    Returns:
+        (segment, inpoint, outpoint) per segment in media seconds; the
+        outpoint is None where the whole rest of the segment is used
+    """
+    points = []
+    for number, segment in enumerate(segments):
+        inpoint = 0.0
+        outpoint = None
+        if number == 0 and start_time > segment.start:
+            inpoint = segment.keyframe_before(segment.media_offset(start_time))
+        if number == len(segments) - 1 and end_time < segment.end:
+            outpoint = segment.media_offset(end_time)
+        points.append((segment, inpoint, outpoint))
+    return points
+
+def probe_keyframes(path: Path) -> Optional[List[Tuple[float, int]]]:
+    """
+    Keyframe table of a video file from ffprobe
+
+    Returns:
+        (media seconds, byte position) per keyframe, or None if ffprobe
+        is not available or fails
+    """
+    if FFPROBE is None:
+        return None
+    result = subprocess.run(
+        [FFPROBE, '-v', 'error', '-select_streams', 'v:0',
+         '-show_entries', 'packet=pts_time,pos,flags', '-of', 'csv=p=0', str(path)],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        fields = line.strip().split(',')
+        if len(fields) < 3 or 'K' not in fields[2]:
+            continue
+        try:
+            keyframes.append((float(fields[0]), int(fields[1]) if fields[1].isdigit() else -1))
+        except ValueError:
+            continue
+    return sorted(keyframes) or None
+
+def concat_copy(parts: List[Tuple[Path, float, Optional[float]]], output_path: Path) -> None:
+    """
+    Join segment ranges into one file without re-encoding (ffmpeg concat demuxer)
+
+    Args:
+        parts: (file, inpoint, outpoint) per segment, as from clip_points
+        output_path: Clip to write
+
+    Raises:
+        RuntimeError: If ffmpeg is not available or fails
+    """
+    if FFMPEG is None:
+        raise RuntimeError("ffmpeg is not available")
+
+    list_path = output_path.with_suffix('.txt')
+    lines = []
+    for path, inpoint, outpoint in parts:
+        lines.append("file '{}'".format(str(Path(path).resolve()).replace("'", "'\\''")))
+        if inpoint:
+            lines.append(f"inpoint {inpoint:.6f}")
+        if outpoint is not None:
+            lines.append(f"outpoint {outpoint:.6f}")
+    list_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+    try:
+        result = subprocess.run(
+            [FFMPEG, '-v', 'error', '-y', '-f', 'concat', '-safe', '0', '-i', str(list_path),
+             '-c', 'copy', '-movflags', '+faststart', str(output_path)],
+            capture_output=True, text=True
+        )
+    finally:
+        list_path.unlink(missing_ok=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()}")
@@ -1,7 +1,10 @@
 """
 Advanced video storage system with cloud integration and optimization.
+
+Frames are recorded into short segments with a per-camera time index, so
+clips are exported by stream-copying just the segments they span.
 """
-from typing import Optional, Dict, List, Any, Tuple
+from typing import Optional, Dict, List, Any, Set, Tuple
 import cv2
 import numpy as np
 from pathlib import Path
@@ -9,18 +12,24 @@ import time
 import asyncio
 from datetime import datetime, timedelta
 import json
+import uuid
 import h5py
 from concurrent.futures import ThreadPoolExecutor
 import boto3
 from botocore.exceptions import ClientError
 from ...utils.config import get_settings
 from ...utils.logging import get_logger
+from .segments import Segment, SegmentIndex, clip_points, concat_copy, probe_keyframes
 
 class VideoStorage:
     """
     Advanced video storage with multiple storage backends and optimization
     """
     
+    # Directories under the storage root that hold no camera recordings:
+    # segments downloaded from S3 and exported clips
+    CACHE_DIRS = ("temp", "segments")
+    
     def __init__(self):
         self.settings = get_settings()
         self.logger = get_logger(__name__)
@@ -37,8 +46,19 @@ class VideoStorage:
             max_workers=self.settings.storage_threads
         )
         
-        # Initialize video writer pool
+        # Initialize video writer pool (one open segment per camera)
         self.writers = {}
+        self._open_segments: Dict[str, Dict[str, Any]] = {}
+        # Closed segments still being released, indexed and uploaded
+        self._finalizing: Set[asyncio.Task] = set()
+        
+        # Segment length and per-camera time indexes
+        self.segment_seconds = getattr(self.settings, 'video_segment_seconds', 10)
+        self.segment_grace = getattr(self.settings, 'video_segment_grace', 2.0)
+        self._indexes: Dict[str, SegmentIndex] = {}
+        
+        # Downloads and exported clips are deleted once unused for this long
+        self.cache_retention = getattr(self.settings, 'video_cache_retention_hours', 24) * 3600
         
         # Initialize metadata storage
         self.metadata_file = self.storage_path / "metadata.h5"
@@ -85,6 +105,9 @@ class VideoStorage:
             
             # Write frame
             writer.write(frame)
+            segment = self._open_segments[camera_id]
+            segment['frames'] += 1
+            segment['last'] = timestamp
             
             # Store metadata
             if metadata:
@@ -99,16 +122,29 @@ class VideoStorage:
     async def _get_writer(self,
                          camera_id: str,
                          timestamp: float) -> cv2.VideoWriter:
-        """Get or create video writer for timestamp"""
-        # Generate file path
-        date_str = datetime.fromtimestamp(timestamp).strftime("%Y%m%d_%H")
-        file_path = self.storage_path / camera_id / f"{date_str}.mp4"
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+        """
+        Get the camera's segment writer, starting a new segment when due
         
-        # Check if writer exists
-        writer_key = f"{camera_id}_{date_str}"
-        if writer_key not in self.writers:
-            # Create new writer
+        A finished segment is closed, indexed and uploaded in the
+        background; recording continues in the new segment right away.
+        """
+        segment = self._open_segments.get(camera_id)
+        if segment is not None and timestamp >= segment['boundary']:
+            if self._close_segment(camera_id, segment):
+                task = asyncio.create_task(self._finalize_segment(camera_id, segment))
+                self._finalizing.add(task)
+                task.add_done_callback(self._finalizing.discard)
+            segment = None
+            
+        if segment is None:
+            # Generate file path
+            start = datetime.fromtimestamp(timestamp)
+            relative_path = (Path(camera_id) / start.strftime("%Y%m%d") /
+                             f"{start:%H%M%S}_{start.microsecond // 1000:03d}.mp4")
+            file_path = self.storage_path / relative_path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Create new writer; every segment starts with a keyframe
             fourcc = cv2.VideoWriter_fourcc(*'mp4v')
             writer = cv2.VideoWriter(
                 str(file_path),
@@ -117,34 +153,93 @@ class VideoStorage:
                 self.settings.video_resolution,
                 True
             )
-            self.writers[writer_key] = writer
+            self.writers[camera_id] = writer
+            self._open_segments[camera_id] = {
+                'writer': writer,
+                'path': relative_path.as_posix(),
+                'first': timestamp,
+                'last': timestamp,
+                'frames': 0,
+                'boundary': (timestamp // self.segment_seconds + 1) * self.segment_seconds
+            }
             
             # Schedule writer cleanup
             asyncio.create_task(
-                self._cleanup_writer(writer_key, timestamp)
+                self._cleanup_writer(camera_id, relative_path.as_posix())
             )
             
-        return self.writers[writer_key]
+        return self.writers[camera_id]
         
     async def _cleanup_writer(self,
-                            writer_key: str,
-                            timestamp: float):
-        """Cleanup video writer after timeout"""
+                            camera_id: str,
+                            path: str):
+        """Close a segment whose camera stopped sending frames"""
+        try:
+            # Wait until the segment is due
+            await asyncio.sleep(self.segment_seconds + self.segment_grace)
+            
+            segment = self._open_segments.get(camera_id)
+            if segment is not None and segment['path'] == path:
+                if self._close_segment(camera_id, segment):
+                    await self._finalize_segment(camera_id, segment)
+                
+        except Exception as e:
+            self.logger.error(f"Writer cleanup failed: {str(e)}")
+            
+    def _close_segment(self,
+                       camera_id: str,
+                       segment: Dict[str, Any]) -> bool:
+        """
+        Stop writing to a segment; later frames start a new one
+        
+        Returns:
+            False if the segment was already closed
+        """
+        if self._open_segments.get(camera_id) is not segment:
+            return False
+        del self._open_segments[camera_id]
+        self.writers.pop(camera_id, None)
+        return True
+            
+    async def _finalize_segment(self,
+                              camera_id: str,
+                              segment: Dict[str, Any]):
+        """Release a closed segment's writer, add it to the camera's index and upload it"""
         try:
-            # Wait for timeout
-            await asyncio.sleep(self.settings.writer_timeout)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.thread_pool, segment['writer'].release)
             
-            # Close writer
-            if writer_key in self.writers:
-                self.writers[writer_key].release()
-                del self.writers[writer_key]
+            file_path = self.storage_path / segment['path']
+            if not segment['frames']:
+                file_path.unlink(missing_ok=True)
+                return
                 
+            # Keyframe table for seeking (the first frame only without ffprobe)
+            keyframes = await loop.run_in_executor(self.thread_pool, probe_keyframes, file_path)
+            fps = self.settings.video_fps
+            indexed = Segment(
+                start=segment['first'],
+                end=segment['last'] + 1.0 / fps,
+                path=segment['path'],
+                frames=segment['frames'],
+                fps=fps,
+                size=file_path.stat().st_size,
+                keyframes=keyframes or [(0.0, -1)]
+            )
+            self._get_index(camera_id).append(indexed)
+            
             # Upload to cloud if enabled
             if self.s3_client is not None:
-                await self._upload_to_cloud(writer_key, timestamp)
+                await self._upload_to_cloud(indexed)
                 
         except Exception as e:
-            self.logger.error(f"Writer cleanup failed: {str(e)}")
+            self.logger.error(f"Segment finalization failed: {str(e)}")
+            
+    def _get_index(self, camera_id: str) -> SegmentIndex:
+        """Segment index of a camera (loaded on first use)"""
+        if camera_id not in self._indexes:
+            self._indexes[camera_id] = SegmentIndex(self.storage_path / camera_id / "index.jsonl")
+        return self._indexes[camera_id]
             
     async def _store_metadata(self,
                             camera_id: str,
@@ -168,19 +263,16 @@ class VideoStorage:
         except Exception as e:
             self.logger.error(f"Metadata storage failed: {str(e)}")
             
-    async def _upload_to_cloud(self,
-                             writer_key: str,
-                             timestamp: float):
-        """Upload video file to cloud storage"""
+    async def _upload_to_cloud(self, segment: Segment):
+        """Upload a segment to cloud storage"""
         try:
-            camera_id, date_str = writer_key.split('_')
-            file_path = self.storage_path / camera_id / f"{date_str}.mp4"
+            file_path = self.storage_path / segment.path
             
             if not file_path.exists():
                 return
                 
-            # Generate S3 key
-            s3_key = f"{camera_id}/{date_str}.mp4"
+            # S3 key mirrors the local layout
+            s3_key = segment.path
             
             # Upload file
             await asyncio.to_thread(
@@ -206,6 +298,11 @@ class VideoStorage:
         """
         Get video segment for time range
         
+        Only the indexed segments overlapping the range are read; they are
+        joined by stream copy from the keyframe before ``start_time``
+        (re-encoded only when ffmpeg is not installed). Frames of the
+        segment still being recorded are not included.
+        
         Args:
             camera_id: Camera identifier
             start_time: Start timestamp
@@ -214,6 +311,101 @@ class VideoStorage:
         Returns:
             Path to video segment
         """
+        try:
+            segments = self._get_index(camera_id).find(start_time, end_time)
+            if not segments:
+                # Recordings from before segmented storage
+                return await self._get_legacy_segment(camera_id, start_time, end_time)
+                
+            # Generate output path
+            output_path = (self.storage_path / "segments" /
+                           f"{camera_id}_{int(start_time)}_{uuid.uuid4().hex[:8]}.mp4")
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            parts = []
+            for segment, inpoint, outpoint in clip_points(segments, start_time, end_time):
+                file_path = await self._local_segment_path(segment)
+                if file_path is not None:
+                    parts.append((file_path, inpoint, outpoint))
+            if not parts:
+                return None
+                
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(self.thread_pool, concat_copy, parts, output_path)
+            except RuntimeError as e:
+                self.logger.warning(f"Stream copy failed, re-encoding clip: {str(e)}")
+                await loop.run_in_executor(self.thread_pool, self._reencode_parts, parts, output_path)
+                
+            return str(output_path)
+            
+        except Exception as e:
+            self.logger.error(f"Failed to get video segment: {str(e)}")
+            return None
+            
+    async def _local_segment_path(self, segment: Segment) -> Optional[Path]:
+        """Local file of a segment, downloaded from S3 if only stored there"""
+        file_path = self.storage_path / segment.path
+        if file_path.exists():
+            return file_path
+        if self.s3_client is None:
+            return None
+            
+        download_path = self.storage_path / "temp" / segment.path
+        if download_path.exists():
+            download_path.touch()  # Keep it past the next cache cleanup
+            return download_path
+        download_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            await asyncio.to_thread(
+                self.s3_client.download_file,
+                self.settings.s3_bucket,
+                segment.path,
+                str(download_path)
+            )
+            return download_path
+        except ClientError:
+            return None
+            
+    def _reencode_parts(self,
+                        parts: List[Tuple[Path, float, Optional[float]]],
+                        output_file: Path):
+        """Decode segment ranges into one file (fallback without ffmpeg)"""
+        writer = None
+        for file_path, inpoint, outpoint in parts:
+            cap = cv2.VideoCapture(str(file_path))
+            fps = cap.get(cv2.CAP_PROP_FPS) or self.settings.video_fps
+            if writer is None:
+                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                writer = cv2.VideoWriter(
+                    str(output_file),
+                    fourcc,
+                    fps,
+                    (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))),
+                    True
+                )
+                
+            # Seek to the first frame of the range
+            frame_number = int(round(inpoint * fps))
+            last_frame = None if outpoint is None else int(round(outpoint * fps))
+            if frame_number:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            while last_frame is None or frame_number < last_frame:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                writer.write(frame)
+                frame_number += 1
+            cap.release()
+            
+        if writer is not None:
+            writer.release()
+            
+    async def _get_legacy_segment(self,
+                                camera_id: str,
+                                start_time: float,
+                                end_time: float) -> Optional[str]:
+        """Get a time range from hourly files written before segmented storage"""
         try:
             # Generate output path
             output_path = self.storage_path / "segments" / f"{int(time.time())}.mp4"
@@ -322,6 +514,7 @@ class VideoStorage:
                 
                 # Cleanup local files
                 await self._cleanup_local_files(cutoff_time)
+                await self._cleanup_cache_files(time.time() - self.cache_retention)
                 
                 # Cleanup cloud files if enabled
                 if self.s3_client is not None:
@@ -338,9 +531,21 @@ class VideoStorage:
         """Cleanup old local files"""
         try:
             for camera_dir in self.storage_path.iterdir():
-                if not camera_dir.is_dir():
+                if not camera_dir.is_dir() or camera_dir.name in self.CACHE_DIRS:
                     continue
                     
+                # Indexed segments
+                if (camera_dir / "index.jsonl").exists():
+                    expired = self._get_index(camera_dir.name).expire(cutoff_time)
+                    for segment in expired:
+                        (self.storage_path / segment.path).unlink(missing_ok=True)
+                    for date_dir in camera_dir.iterdir():
+                        if date_dir.is_dir() and not any(date_dir.iterdir()):
+                            date_dir.rmdir()
+                    if expired:
+                        self.logger.info(f"Deleted {len(expired)} old segments of {camera_dir.name}")
+                        
+                # Hourly files from before segmented storage
                 for file_path in camera_dir.glob("*.mp4"):
                     # Get file timestamp from name
                     try:
@@ -357,6 +562,33 @@ class VideoStorage:
         except Exception as e:
             self.logger.error(f"Local cleanup failed: {str(e)}")
             
+    async def _cleanup_cache_files(self, cutoff_time: float):
+        """Delete S3 downloads and exported clips last used before a cutoff"""
+        try:
+            for name in self.CACHE_DIRS:
+                cache_dir = self.storage_path / name
+                if not cache_dir.is_dir():
+                    continue
+                    
+                deleted = 0
+                for file_path in cache_dir.rglob("*"):
+                    if file_path.is_file() and file_path.stat().st_mtime < cutoff_time:
+                        file_path.unlink(missing_ok=True)
+                        deleted += 1
+                        
+                # Empty directories, deepest first
+                directories = sorted((path for path in cache_dir.rglob("*") if path.is_dir()),
+                                     key=lambda path: len(path.parts), reverse=True)
+                for directory in directories:
+                    if not any(directory.iterdir()):
+                        directory.rmdir()
+                        
+                if deleted:
+                    self.logger.info(f"Deleted {deleted} old files from {cache_dir}")
+                    
+        except Exception as e:
+            self.logger.error(f"Cache cleanup failed: {str(e)}")
+            
     async def _cleanup_cloud_files(self, cutoff_time: float):
         """Cleanup old cloud files"""
         try:
@@ -369,8 +601,7 @@ class VideoStorage:
                 for obj in page['Contents']:
                     # Get file timestamp from key
                     try:
-                        date_str = obj['Key'].split('/')[-1].split('.')[0]
-                        timestamp = datetime.strptime(date_str, "%Y%m%d_%H").timestamp()
+                        timestamp = self._key_timestamp(obj['Key'])
                         
                         if timestamp < cutoff_time:
                             self.s3_client.delete_object(
@@ -385,9 +616,26 @@ class VideoStorage:
         except Exception as e:
             self.logger.error(f"Cloud cleanup failed: {str(e)}")
             
+    @staticmethod
+    def _key_timestamp(key: str) -> float:
+        """Recording time in a storage key (segment or legacy hourly file)"""
+        parts = key.split('/')
+        name = parts[-1].split('.')[0]
+        if len(parts) >= 3:
+            # camera/YYYYMMDD/HHMMSS_mmm.mp4
+            return datetime.strptime(parts[-2] + name.split('_')[0], "%Y%m%d%H%M%S").timestamp()
+        return datetime.strptime(name, "%Y%m%d_%H").timestamp()
+            
     async def cleanup(self):
         """Cleanup resources"""
         try:
+            # Close open segments so they are indexed
+            for camera_id, segment in list(self._open_segments.items()):
+                if self._close_segment(camera_id, segment):
+                    await self._finalize_segment(camera_id, segment)
+            if self._finalizing:
+                await asyncio.gather(*self._finalizing)
+                
             # Close all video writers
             for writer in self.writers.values():
                 writer.release()
@@ -0,0 +1,183 @@
+"""
+Value codecs for caches and queues.
+
+Values are encoded by a named codec and tagged so a reader can decode
+them whatever codec it is configured with, which lets services switch
+codecs without flushing caches or draining queues:
+
+    json     UTF-8 JSON text (untagged, valid in text-mode stores)
+    pickle   pickle, only decoded where pickle is the configured codec
+    binary   MessagePack with numpy arrays as an extension type carrying
+             dtype, shape and the raw array buffer (no base64, no pickle)
+
+Tagged values start with 0xC1, a byte that JSON text, pickle and
+MessagePack never begin with, followed by the codec ID. Untagged values
+are JSON, or pickle (protocol 2+) when they start with 0x80.
+
+Arrays are decoded as read-only views of the received buffer. Stores
+holding binary values must return raw bytes; see store_config.
+"""
+
+from typing import Any, Callable, Dict, Union
+import json
+import pickle
+import struct
+
+import msgpack
+import numpy as np
+
+TAG = b'\xc1'
+NDARRAY_EXT = 1  # MessagePack extension type of numpy arrays
+
+class Codec:
+    """Named encoder/decoder pair"""
+
+    def __init__(self,
+                 name: str,
+                 codec_id: int,
+                 encode: Callable[[Any], bytes],
+                 decode: Callable[[memoryview], Any],
+                 tagged: bool = True):
+        self.name = name
+        self.codec_id = codec_id
+        self.encode = encode
+        self.decode = decode
+        self.tagged = tagged
+
+    @property
+    def text(self) -> bool:
+        """Whether encoded values are text (only JSON is untagged)"""
+        return not self.tagged
+
+# numpy arrays
+
+def _pack_ndarray(array: np.ndarray) -> bytes:
+    """Extension payload: dtype, shape, raw C-order buffer"""
+    if array.dtype.hasobject:
+        raise TypeError("Object arrays cannot be encoded")
+    array = np.ascontiguousarray(array)
+    dtype = array.dtype.str.encode()
+    header = struct.pack(f'>B{len(dtype)}sB{array.ndim}Q', len(dtype), dtype, array.ndim, *array.shape)
+    return b''.join((header, array.data))
+
+def _unpack_ndarray(data: Union[bytes, memoryview]) -> np.ndarray:
+    """Array viewing the extension payload (no copy)"""
+    data = memoryview(data)
+    dtype_len = data[0]
+    dtype = np.dtype(bytes(data[1:1 + dtype_len]).decode())
+    offset = 1 + dtype_len
+    ndim = data[offset]
+    shape = struct.unpack_from(f'>{ndim}Q', data, offset + 1)
+    offset += 1 + 8 * ndim
+    return np.frombuffer(data[offset:], dtype=dtype).reshape(shape)
+
+def _default(value: Any) -> Any:
+    """Map values MessagePack has no type for"""
+    if isinstance(value, np.ndarray):
+        return msgpack.ExtType(NDARRAY_EXT, _pack_ndarray(value))
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+def _ext_hook(code: int, data: Union[bytes, memoryview]) -> Any:
+    if code == NDARRAY_EXT:
+        return _unpack_ndarray(data)
+    raise ValueError(f"Unknown extension type: {code}")
+
+def _encode_binary(value: Any) -> bytes:
+    return msgpack.packb(value, default=_default, use_bin_type=True)
+
+def _decode_binary(data: memoryview) -> Any:
+    return msgpack.unpackb(data, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+# Registry
+
+CODECS: Dict[str, Codec] = {}
+_CODECS_BY_ID: Dict[int, Codec] = {}
+
+def register_codec(codec: Codec) -> None:
+    """Make a codec available by name and decodable by ID"""
+    CODECS[codec.name] = codec
+    _CODECS_BY_ID[codec.codec_id] = codec
+
+def get_codec(name: str) -> Codec:
+    """Codec registered under a name"""
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown codec: {name}") from None
+
+register_codec(Codec(
+    'json', 0,
+    lambda value: json.dumps(value),
+    lambda data: json.loads(bytes(data)),
+    tagged=False
+))
+register_codec(Codec(
+    'pickle', 1,
+    lambda value: pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+    lambda data: pickle.loads(data)
+))
+register_codec(Codec('binary', 2, _encode_binary, _decode_binary))
+
+def store_config(config: Dict[str, Any], codec: Union[str, Codec]) -> Dict[str, Any]:
+    """
+    Store settings for values encoded with a codec
+
+    Binary codecs need raw bytes back, so Redis replies are left undecoded
+    (redis.decode_responses) unless the codec writes text.
+
+    Raises:
+        ValueError: If redis.decode_responses is enabled for a binary codec
+    """
+    if isinstance(codec, str):
+        codec = get_codec(codec)
+    if codec.text:
+        return config
+    if config.get('redis.decode_responses', False):
+        raise ValueError(f"The {codec.name} codec needs redis.decode_responses disabled")
+    return {**config, 'redis.decode_responses': False}
+
+def dumps(value: Any, codec: Union[str, Codec] = 'json') -> Union[str, bytes]:
+    """Encode a value, tagged with its codec"""
+    if isinstance(codec, str):
+        codec = get_codec(codec)
+    data = codec.encode(value)
+    if not codec.tagged:
+        return data
+    return TAG + bytes((codec.codec_id,)) + data
+
+def loads(data: Union[str, bytes, bytearray, memoryview],
+          codec: Union[str, Codec] = 'json') -> Any:
+    """
+    Decode a value written by dumps (or an untagged JSON/pickle value)
+
+    Args:
+        data: Encoded value
+        codec: Configured codec; pickle is only decoded when it is pickle,
+            since unpickling runs code chosen by whoever wrote the data
+
+    Raises:
+        ValueError: Unknown codec ID or a pickle that is not allowed
+    """
+    if isinstance(codec, str):
+        codec = get_codec(codec)
+    if isinstance(data, str):
+        return json.loads(data)
+
+    view = memoryview(data)
+    if view[:1] == TAG:
+        found = _CODECS_BY_ID.get(view[1])
+        if found is None:
+            raise ValueError(f"Unknown codec ID: {view[1]}")
+        view = view[2:]
+    elif view[:1] == b'\x80':
+        found = CODECS['pickle']
+    else:
+        found = CODECS['json']
+
+    if found.name == 'pickle' and codec.name != 'pickle':
+        raise ValueError("Pickled value rejected; codec is not pickle")
+    return found.decode(view)
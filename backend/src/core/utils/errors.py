@@ -8,4 +8,19 @@ logger = logging.getLogger(__name__)
 
 class MatcherError(Exception):
     """Error raised by the face matcher component."""
-    pass 
\ No newline at end of file
+    pass 
+
+class ErasureError(MatcherError):
+    """Error raised when removed faces could not be purged from disk."""
+
+    def __init__(self, removed: int, message: str):
+        super().__init__(message)
+        self.removed = removed
+
+class SearchError(Exception):
+    """Error raised by the face search component."""
+    pass
+
+class TrackingError(Exception):
+    """Error raised by the face tracking component."""
+    pass
@@ -0,0 +1,107 @@
+"""
+Deadline tracking for in-memory entries that expire.
+
+Components register a deadline per key when they store an entry and ask
+for the keys that are due, instead of periodically scanning every entry.
+Keys are kept in a min-heap ordered by deadline, so scheduling is
+O(log n), finding due keys costs O(log n) per due key, and the entry with
+the earliest deadline (the natural eviction victim) is found directly.
+"""
+
+from typing import Dict, Hashable, List, Optional, Tuple
+import heapq
+import itertools
+
+class ExpiryQueue:
+    """
+    Keys ordered by deadline.
+
+    Rescheduling or cancelling a key leaves its old heap item in place;
+    stale items are skipped when popped and the heap is rebuilt once they
+    outnumber the live ones.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, Hashable]] = []
+        self._entries: Dict[Hashable, Tuple[float, int]] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """Set (or move) a key's deadline"""
+        item = (deadline, next(self._sequence))
+        self._entries[key] = item
+        heapq.heappush(self._heap, (item[0], item[1], key))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._rebuild()
+
+    def cancel(self, key: Hashable) -> None:
+        """Stop tracking a key"""
+        self._entries.pop(key, None)
+
+    def deadline(self, key: Hashable) -> Optional[float]:
+        """Deadline of a key, or None if not tracked"""
+        item = self._entries.get(key)
+        return item[0] if item is not None else None
+
+    def peek(self) -> Optional[Tuple[Hashable, float]]:
+        """Key with the earliest deadline and that deadline"""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        deadline, _, key = self._heap[0]
+        return key, deadline
+
+    def pop_earliest(self) -> Optional[Hashable]:
+        """Remove and return the key with the earliest deadline"""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        _, _, key = heapq.heappop(self._heap)
+        del self._entries[key]
+        return key
+
+    def pop_expired(self, now: float, limit: Optional[int] = None) -> List[Hashable]:
+        """
+        Remove and return keys whose deadline has passed
+
+        Args:
+            now: Current time, in the clock the deadlines use
+            limit: Most keys to return (callers draining a large backlog
+                can yield between batches)
+
+        Returns:
+            Due keys, earliest first
+        """
+        expired = []
+        while self._heap and (limit is None or len(expired) < limit):
+            deadline, sequence, key = self._heap[0]
+            if deadline > now:
+                break
+            heapq.heappop(self._heap)
+            if self._entries.get(key) == (deadline, sequence):
+                del self._entries[key]
+                expired.append(key)
+        return expired
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._entries.clear()
+
+    def _drop_stale(self) -> None:
+        """Pop stale items off the top of the heap"""
+        while self._heap:
+            deadline, sequence, key = self._heap[0]
+            if self._entries.get(key) == (deadline, sequence):
+                return
+            heapq.heappop(self._heap)
+
+    def _rebuild(self) -> None:
+        """Rebuild the heap from the live entries only"""
+        self._heap = [(deadline, sequence, key) for key, (deadline, sequence) in self._entries.items()]
+        heapq.heapify(self._heap)
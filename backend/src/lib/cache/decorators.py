@@ -2,7 +2,8 @@ from typing import Optional, Any, Callable, Union
 from functools import wraps
 import inspect
 import asyncio
-from ..base import BaseComponent
+import time
+from ...core.base import BaseComponent
 
 def cached(ttl: Optional[int] = None,
           key_prefix: Optional[str] = None,
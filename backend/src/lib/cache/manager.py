@@ -5,10 +5,14 @@ from datetime import datetime, timedelta
 import logging
 import json
 import hashlib
-import pickle
-from ..base import BaseComponent
-from ..connections.redis import RedisPool
-from ..utils.decorators import handle_errors
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from ...core.base import BaseComponent
+from ...core.connections.redis import RedisPool
+from ...core.utils.decorators import handle_errors
+from ...core.utils.codec import dumps, get_codec, loads, store_config
+from ...core.utils.expiry import ExpiryQueue
 
 @dataclass
 class CacheConfig:
@@ -22,7 +26,16 @@ class CacheConfig:
     serializer: str = "json"
 
 class CacheManager(BaseComponent):
-    """Advanced caching system"""
+    """
+    Advanced caching system
+
+    Values are kept in the shared backend (L2) and in a bounded in-process
+    LRU (L1) in front of it. Writes through this manager are published on
+    a Redis channel so other workers drop their L1 copies. Concurrent
+    get_or_set misses for a key share one load, and entries loaded with a
+    stale window are served stale while one background load refreshes them.
+    L1 hands out the cached objects themselves; treat them as read-only.
+    """
     
     def __init__(self, config: dict):
         super().__init__(config)
@@ -30,23 +43,43 @@ class CacheManager(BaseComponent):
         self._prefix = self.config.get('cache.prefix', 'cache:')
         self._default_ttl = self.config.get('cache.ttl', 3600)
         self._serializer = self.config.get('cache.serializer', 'json')
+        self._codec = get_codec(self._serializer)
+        # Backend and pool settings; binary codecs need undecoded Redis replies
+        self._store_config = store_config(self.config, self._codec)
         self._namespace = self.config.get('cache.namespace', '')
         self._tags: Dict[str, Set[str]] = {}
         self._stats = {
             'hits': 0,
             'misses': 0,
             'sets': 0,
-            'deletes': 0
+            'deletes': 0,
+            'local_hits': 0,
+            'stale_hits': 0,
+            'coalesced': 0,
+            'invalidations': 0
         }
         self._redis: Optional[RedisPool] = None
-        self._local_cache: Dict[str, Dict[str, Any]] = {}
-        self._locks: Dict[str, asyncio.Lock] = {}
+        self._local_cache: OrderedDict = OrderedDict()  # LRU order
+        self._local_expiry = ExpiryQueue()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Invalidation count of keys being read from the backend, so a read
+        # that started before an invalidation does not put its value in L1
+        self._fill_generations: Dict[str, int] = {}
+        self._fill_readers: Dict[str, int] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._instance_id = uuid.uuid4().hex
         
         # Cache configuration
         self._enable_local = self.config.get('cache.enable_local', True)
         self._enable_redis = self.config.get('cache.enable_redis', True)
         self._compression = self.config.get('cache.compression', False)
         self._max_size = self.config.get('cache.max_size', 1000)
+        self._local_ttl = self.config.get('cache.local_ttl', 60)
+        self._stale_ttl = self.config.get('cache.stale_ttl', 0)
+        self._invalidation_channel = self.config.get(
+            'cache.invalidation_channel',
+            f"{self._prefix}invalidate"
+        )
 
     async def initialize(self) -> None:
         """Initialize cache manager"""
@@ -55,33 +88,43 @@ class CacheManager(BaseComponent):
         
         if backend == 'redis':
             from .backends.redis import RedisBackend
-            self._backend = RedisBackend(self.config)
+            self._backend = RedisBackend(self._store_config)
         elif backend == 'memcached':
             from .backends.memcached import MemcachedBackend
-            self._backend = MemcachedBackend(self.config)
+            self._backend = MemcachedBackend(self._store_config)
         else:
-            from .backends.memory import MemoryBackend
-            self._backend = MemoryBackend(self.config)
+            from .memory import MemoryBackend
+            self._backend = MemoryBackend(self._store_config)
             
         await self._backend.initialize()
         
         if self._enable_redis:
-            self._redis = RedisPool(self.config)
+            self._redis = RedisPool(self._store_config)
             await self._redis.initialize()
             
         # Start cleanup task
         if backend == 'memory':
-            asyncio.create_task(self._cleanup_task())
+            self._tasks.append(asyncio.create_task(self._cleanup_task()))
+            
+        if self._enable_local:
+            self._tasks.append(asyncio.create_task(self._cleanup_local_cache()))
+            if self._redis:
+                self._tasks.append(
+                    asyncio.create_task(self._listen_invalidations())
+                )
 
     async def cleanup(self) -> None:
         """Cleanup cache resources"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks.clear()
         if self._backend:
             await self._backend.cleanup()
         if self._redis:
             await self._redis.cleanup()
         self._tags.clear()
-        self._local_cache.clear()
-        self._locks.clear()
+        self._drop_local()
+        self._inflight.clear()
 
     @handle_errors(logger=None)
     async def get(self,
@@ -90,21 +133,38 @@ class CacheManager(BaseComponent):
         """Get cached value"""
         full_key = self._get_key(key)
         
-        # Get from backend
-        value = await self._backend.get(full_key)
+        # Try L1
+        if self._enable_local:
+            entry = self._get_local(full_key)
+            if entry is not None and entry['expires'] > time.time():
+                self._stats['hits'] += 1
+                self._stats['local_hits'] += 1
+                return entry['value']
         
-        if value is None:
-            self._stats['misses'] += 1
-            return default
-            
-        # Deserialize value
+        # Get from backend
+        generation = self._begin_fill(full_key)
         try:
-            value = self._deserialize(value)
-            self._stats['hits'] += 1
+            value = await self._backend.get(full_key)
+            
+            if value is None:
+                self._stats['misses'] += 1
+                return default
+                
+            # Deserialize value
+            try:
+                value = self._deserialize(value)
+                self._stats['hits'] += 1
+            except Exception as e:
+                self.logger.error(f"Cache deserialization error: {str(e)}")
+                return default
+                
+            # Invalidated while reading: the value may already be outdated
+            if self._enable_local and self._fill_generations[full_key] == generation:
+                self._set_local(full_key, value, self._local_ttl)
             return value
-        except Exception as e:
-            self.logger.error(f"Cache deserialization error: {str(e)}")
-            return default
+            
+        finally:
+            self._end_fill(full_key)
 
     @handle_errors(logger=None)
     async def set(self,
@@ -128,6 +188,10 @@ class CacheManager(BaseComponent):
         
         if success:
             self._stats['sets'] += 1
+            self._invalidate_fills([full_key])
+            if self._enable_local:
+                self._set_local(full_key, value, ttl)
+            await self._publish_invalidation([full_key])
             
             # Update tags
             if tags:
@@ -142,10 +206,13 @@ class CacheManager(BaseComponent):
     async def delete(self, key: str) -> bool:
         """Delete cached value"""
         full_key = self._get_key(key)
+        self._drop_local([full_key])
         success = await self._backend.delete(full_key)
         
         if success:
             self._stats['deletes'] += 1
+            self._invalidate_fills([full_key])
+            await self._publish_invalidation([full_key])
             
             # Remove from tags
             for tag_keys in self._tags.values():
@@ -162,9 +229,11 @@ class CacheManager(BaseComponent):
     @handle_errors(logger=None)
     async def clear(self) -> bool:
         """Clear all cached values"""
+        self._drop_local()
         success = await self._backend.clear()
         if success:
             self._tags.clear()
+            await self._publish_invalidation(None)
         return success
 
     @handle_errors(logger=None)
@@ -210,6 +279,11 @@ class CacheManager(BaseComponent):
         
         if success:
             self._stats['sets'] += len(mapping)
+            self._invalidate_fills(list(data.keys()))
+            if self._enable_local:
+                for key, value in mapping.items():
+                    self._set_local(self._get_key(key), value, ttl)
+            await self._publish_invalidation(list(data.keys()))
             
             # Update tags
             if tags:
@@ -224,10 +298,13 @@ class CacheManager(BaseComponent):
     async def delete_many(self, keys: List[str]) -> bool:
         """Delete multiple cached values"""
         full_keys = [self._get_key(k) for k in keys]
+        self._drop_local(full_keys)
         success = await self._backend.delete_many(full_keys)
         
         if success:
             self._stats['deletes'] += len(keys)
+            self._invalidate_fills(full_keys)
+            await self._publish_invalidation(full_keys)
             
             # Remove from tags
             for tag_keys in self._tags.values():
@@ -273,24 +350,18 @@ class CacheManager(BaseComponent):
         return ':'.join(parts)
 
     def _serialize(self, value: Any) -> Union[str, bytes]:
-        """Serialize value"""
-        if self._serializer == 'pickle':
-            return pickle.dumps(value)
-        else:
-            return json.dumps(value)
+        """Serialize value with the configured codec (cache.serializer)"""
+        return dumps(value, self._codec)
 
     def _deserialize(self, value: Union[str, bytes]) -> Any:
-        """Deserialize value"""
-        if self._serializer == 'pickle':
-            return pickle.loads(value)
-        else:
-            return json.loads(value)
+        """Deserialize value written with any codec"""
+        return loads(value, self._codec)
 
     async def _cleanup_task(self) -> None:
         """Cleanup expired cache entries"""
         while True:
             try:
-                await self._backend.cleanup()
+                await self._backend.cleanup_expired()
                 await asyncio.sleep(60)
             except Exception as e:
                 self.logger.error(f"Cache cleanup error: {str(e)}")
@@ -317,36 +388,72 @@ class CacheManager(BaseComponent):
         """Create namespaced cache key"""
         return f"{self._namespace}:{key}"
 
-    def _get_local(self, key: str) -> Optional[Any]:
-        """Get value from local cache"""
-        if key not in self._local_cache:
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get L1 entry that is fresh or still inside its stale window"""
+        entry = self._local_cache.get(key)
+        if entry is None:
             return None
             
-        entry = self._local_cache[key]
-        if entry['expires'] < datetime.utcnow():
+        if entry['stale_until'] <= time.time():
             del self._local_cache[key]
+            self._local_expiry.cancel(key)
             return None
             
-        return entry['value']
+        self._local_cache.move_to_end(key)
+        return entry
 
-    async def _set_local(self,
-                        key: str,
-                        value: Any,
-                        ttl: int = None) -> None:
+    def _set_local(self,
+                  key: str,
+                  value: Any,
+                  ttl: Optional[int] = None,
+                  stale_ttl: float = 0) -> None:
         """Set value in local cache"""
         # Ensure cache size limit
-        if len(self._local_cache) >= self._max_size:
-            # Remove oldest entry
-            oldest = min(
-                self._local_cache.items(),
-                key=lambda x: x[1]['expires']
-            )
-            del self._local_cache[oldest[0]]
+        if key not in self._local_cache and len(self._local_cache) >= self._max_size:
+            # Remove least recently used entry
+            oldest, _ = self._local_cache.popitem(last=False)
+            self._local_expiry.cancel(oldest)
             
+        now = time.time()
+        expires = now + min(ttl or self._default_ttl, self._local_ttl)
         self._local_cache[key] = {
             'value': value,
-            'expires': datetime.utcnow() + timedelta(seconds=ttl or self._default_ttl)
+            'expires': expires,
+            'stale_until': expires + stale_ttl
         }
+        self._local_cache.move_to_end(key)
+        self._local_expiry.schedule(key, expires + stale_ttl)
+
+    def _drop_local(self, keys: Optional[List[str]] = None) -> None:
+        """Drop keys (default: everything) from the local cache"""
+        if keys is None:
+            self._local_cache.clear()
+            self._local_expiry.clear()
+            keys = list(self._fill_generations)
+        else:
+            for key in keys:
+                self._local_cache.pop(key, None)
+                self._local_expiry.cancel(key)
+                
+        self._invalidate_fills(keys)
+
+    def _begin_fill(self, key: str) -> int:
+        """Start a backend read of a key; returns its invalidation count"""
+        self._fill_readers[key] = self._fill_readers.get(key, 0) + 1
+        return self._fill_generations.setdefault(key, 0)
+
+    def _end_fill(self, key: str) -> None:
+        """Finish a backend read started with _begin_fill"""
+        self._fill_readers[key] -= 1
+        if not self._fill_readers[key]:
+            del self._fill_readers[key]
+            del self._fill_generations[key]
+
+    def _invalidate_fills(self, keys: List[str]) -> None:
+        """Keep backend reads of keys in progress from filling L1"""
+        for key in keys:
+            if key in self._fill_generations:
+                self._fill_generations[key] += 1
 
     async def _get_redis(self, key: str) -> Optional[Any]:
         """Get value from Redis cache"""
@@ -368,39 +475,158 @@ class CacheManager(BaseComponent):
     async def get_or_set(self,
                         key: str,
                         func: callable,
-                        ttl: Optional[int] = None) -> Any:
-        """Get cached value or compute and cache it"""
-        # Get lock for key
-        lock = self._locks.setdefault(key, asyncio.Lock())
+                        ttl: Optional[int] = None,
+                        stale_ttl: Optional[float] = None) -> Any:
+        """
+        Get cached value or compute and cache it
+
+        Concurrent misses for a key share one load, which checks the
+        backend before calling ``func``.
+
+        Args:
+            key: Cache key
+            func: Coroutine function computing the value
+            ttl: Seconds the value stays fresh
+            stale_ttl: Seconds an expired local copy is still returned
+                while it is refreshed in the background (default:
+                cache.stale_ttl)
+        """
+        full_key = self._get_key(key)
+        stale_ttl = self._stale_ttl if stale_ttl is None else stale_ttl
         
-        async with lock:
-            # Try to get from cache
-            value = await self.get(key)
-            if value is not None:
-                return value
+        if self._enable_local:
+            entry = self._get_local(full_key)
+            if entry is not None:
+                self._stats['hits'] += 1
+                self._stats['local_hits'] += 1
+                if entry['expires'] <= time.time():
+                    # Serve stale and revalidate once in the background
+                    self._stats['stale_hits'] += 1
+                    self._load(key, func, ttl, stale_ttl)
+                return entry['value']
                 
-            # Compute value
-            value = await func()
+        # Shielded so a cancelled caller does not cancel the shared load
+        return await asyncio.shield(self._load(key, func, ttl, stale_ttl))
+
+    def _load(self,
+             key: str,
+             func: callable,
+             ttl: Optional[int],
+             stale_ttl: float) -> asyncio.Task:
+        """Start the load of a key, or join the one in flight"""
+        task = self._inflight.get(key)
+        if task is not None:
+            self._stats['coalesced'] += 1
+            return task
             
-            # Cache value
-            await self.set(key, value, ttl)
+        task = asyncio.ensure_future(self._fill(key, func, ttl, stale_ttl))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._load_done(key, done))
+        return task
+
+    def _load_done(self, key: str, task: asyncio.Task) -> None:
+        """Forget a finished load"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieved here so background refreshes do not warn
+            self.logger.error(f"Cache load failed for {key}: {str(task.exception())}")
+
+    async def _fill(self,
+                   key: str,
+                   func: callable,
+                   ttl: Optional[int],
+                   stale_ttl: float) -> Any:
+        """
+        Read a key from the backend, computing and storing it on a miss
+        
+        The computed value is written to the backend directly: it is not
+        broadcast as an invalidation, and it is not stored at all if the
+        key was written or invalidated while ``func`` ran.
+        """
+        full_key = self._get_key(key)
+        ttl = ttl if ttl is not None else self._default_ttl
+        generation = self._begin_fill(full_key)
+        
+        try:
+            data = await self._backend.get(full_key)
+            if data is not None:
+                try:
+                    value = self._deserialize(data)
+                    self._stats['hits'] += 1
+                except Exception:
+                    data = None
+                    
+            if data is None:
+                self._stats['misses'] += 1
+                value = await func()
+                if self._fill_generations[full_key] != generation:
+                    return value  # Keep the newer value
+                if await self._backend.set(full_key, self._serialize(value), ttl):
+                    self._stats['sets'] += 1
+                
+            # Invalidated while loading: the value may already be outdated
+            if self._enable_local and self._fill_generations[full_key] == generation:
+                self._set_local(full_key, value, ttl, stale_ttl)
             return value
+            
+        finally:
+            self._end_fill(full_key)
+
+    async def _publish_invalidation(self, keys: Optional[List[str]]) -> None:
+        """Tell other workers to drop keys (None: everything) from L1"""
+        if not (self._enable_local and self._redis):
+            return
+            
+        message = json.dumps({'origin': self._instance_id, 'keys': keys})
+        try:
+            await self._redis.execute('publish', self._invalidation_channel, message)
+        except Exception as e:
+            self.logger.warning(f"Cache invalidation publish failed: {str(e)}")
+
+    def _apply_invalidation(self, data: Union[str, bytes]) -> None:
+        """Drop the L1 entries named in an invalidation message"""
+        message = json.loads(data)
+        if message.get('origin') == self._instance_id:
+            return
+            
+        self._stats['invalidations'] += 1
+        self._drop_local(message.get('keys'))
+
+    async def _listen_invalidations(self) -> None:
+        """Apply invalidations published by other workers"""
+        while True:
+            try:
+                async with self._redis.acquire() as redis:
+                    pubsub = redis.pubsub()
+                    await pubsub.subscribe(self._invalidation_channel)
+                    
+                    # Messages sent while unsubscribed are lost
+                    self._drop_local()
+                    
+                    try:
+                        async for message in pubsub.listen():
+                            if message.get('type') == 'message':
+                                self._apply_invalidation(message['data'])
+                    finally:
+                        await pubsub.unsubscribe(self._invalidation_channel)
+                        
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.logger.error(f"Cache invalidation listener failed: {str(e)}")
+                await asyncio.sleep(1)
 
     async def _cleanup_local_cache(self) -> None:
         """Cleanup expired local cache entries"""
         while True:
             try:
                 await asyncio.sleep(60)  # Run every minute
-                now = datetime.utcnow()
-                
-                # Remove expired entries
-                expired = [
-                    key for key, entry in self._local_cache.items()
-                    if entry['expires'] < now
-                ]
+                now = time.time()
                 
-                for key in expired:
-                    del self._local_cache[key]
+                # Remove due entries only
+                for key in self._local_expiry.pop_expired(now):
+                    self._local_cache.pop(key, None)
                     
             except asyncio.CancelledError:
                 break
@@ -416,6 +642,7 @@ class CacheManager(BaseComponent):
             redis_info = await self._redis.info()
             
             stats = {
+                **self._stats,
                 "local_cache_size": len(self._local_cache),
                 "redis_memory_used": redis_info["used_memory"],
                 "redis_hits": redis_info["keyspace_hits"],
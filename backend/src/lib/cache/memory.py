@@ -2,7 +2,8 @@ from typing import Dict, Optional, Any, List, Union
 import asyncio
 from datetime import datetime, timedelta
 from collections import OrderedDict
-from ...base import BaseComponent
+from ...core.base import BaseComponent
+from ...core.utils.expiry import ExpiryQueue
 
 class MemoryBackend(BaseComponent):
     """In-memory cache backend"""
@@ -11,6 +12,7 @@ class MemoryBackend(BaseComponent):
         super().__init__(config)
         self._data: OrderedDict = OrderedDict()
         self._expires: Dict[str, float] = {}
+        self._expiry = ExpiryQueue()
         self._max_size = self.config.get('cache.max_size', 1000)
         self._stats = {
             'size': 0,
@@ -25,6 +27,7 @@ class MemoryBackend(BaseComponent):
         """Cleanup backend resources"""
         self._data.clear()
         self._expires.clear()
+        self._expiry.clear()
 
     async def get(self, key: str) -> Optional[bytes]:
         """Get cached value"""
@@ -47,15 +50,27 @@ class MemoryBackend(BaseComponent):
                  ttl: int) -> bool:
         """Set cached value"""
         try:
+            now = datetime.utcnow().timestamp()
+            
             # Check size limit
-            if len(self._data) >= self._max_size:
-                # Remove oldest entry
-                self._data.popitem(last=False)
+            if key not in self._data and len(self._data) >= self._max_size:
+                # Prefer an entry that has already expired
+                earliest = self._expiry.peek()
+                if earliest is not None and earliest[1] < now:
+                    self._data.pop(earliest[0], None)
+                    self._expires.pop(earliest[0], None)
+                    self._expiry.cancel(earliest[0])
+                else:
+                    # Remove oldest entry
+                    oldest, _ = self._data.popitem(last=False)
+                    self._expires.pop(oldest, None)
+                    self._expiry.cancel(oldest)
                 self._stats['evictions'] += 1
                 
             # Store value
             self._data[key] = value
-            self._expires[key] = datetime.utcnow().timestamp() + ttl
+            self._expires[key] = now + ttl
+            self._expiry.schedule(key, self._expires[key])
             
             # Update stats
             self._stats['size'] = len(self._data)
@@ -71,6 +86,7 @@ class MemoryBackend(BaseComponent):
         try:
             self._data.pop(key, None)
             self._expires.pop(key, None)
+            self._expiry.cancel(key)
             
             # Update stats
             self._stats['size'] = len(self._data)
@@ -86,6 +102,7 @@ class MemoryBackend(BaseComponent):
         try:
             self._data.clear()
             self._expires.clear()
+            self._expiry.clear()
             
             # Update stats
             self._stats['size'] = 0
@@ -126,20 +143,16 @@ class MemoryBackend(BaseComponent):
             self.logger.error(f"Memory delete_many error: {str(e)}")
             return False
 
-    async def cleanup(self) -> None:
+    async def cleanup_expired(self) -> None:
         """Cleanup expired entries"""
         try:
             now = datetime.utcnow().timestamp()
             
-            # Find expired keys
-            expired = [
-                key for key, expires in self._expires.items()
-                if now > expires
-            ]
-            
-            # Delete expired entries
-            for key in expired:
-                await self.delete(key)
+            # Only keys whose deadline has passed are visited
+            for key in self._expiry.pop_expired(now):
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            self._stats['size'] = len(self._data)
                 
         except Exception as e:
             self.logger.error(f"Memory cleanup error: {str(e)}")
@@ -1,23 +1,40 @@
 from typing import Dict, Optional, Any, List, Union, Callable
 import asyncio
-import json
-import pickle
+import importlib
 from datetime import datetime, timedelta
-from ..base import BaseComponent
-from ..utils.decorators import handle_errors
+from ...core.base import BaseComponent
+from ...core.utils.decorators import handle_errors
+from ...core.utils.codec import dumps, get_codec, loads, store_config
 
 class QueueManager(BaseComponent):
-    """Advanced queue management system"""
+    """
+    Advanced queue management system
+
+    Messages are published to and consumed from the backend. Every queue
+    with registered handlers runs its consumer tasks, which dispatch each
+    message to the handler of its ``event``.
+    """
     
     def __init__(self, config: dict):
         super().__init__(config)
-        self._queues: Dict[str, 'Queue'] = {}
-        self._consumers: Dict[str, List['Consumer']] = {}
+        self._queues: Dict[str, Dict[str, int]] = {}  # name -> max_size, consumers
+        self._consumers: Dict[str, List[asyncio.Task]] = {}
         self._handlers: Dict[str, Dict[str, Callable]] = {}
         self._default_queue = self.config.get('queue.default', 'default')
         self._max_retries = self.config.get('queue.max_retries', 3)
         self._retry_delay = self.config.get('queue.retry_delay', 60)
         self._batch_size = self.config.get('queue.batch_size', 100)
+        self._codec = get_codec(self.config.get('queue.serializer', 'json'))
+        # Backend settings; binary codecs need undecoded Redis replies
+        self._store_config = store_config(self.config, self._codec)
+        self._backend = None
+        
+        # Batched consumption: wait up to max_wait for a batch, then run up
+        # to `concurrency` handlers at a time per queue
+        self._max_wait = self.config.get('queue.max_wait', 1.0)
+        self._concurrency = self.config.get('queue.concurrency', 1)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._unacked: Dict[str, Dict[str, Any]] = {}  # queue -> id -> raw message
         self._stats = {
             'published': 0,
             'consumed': 0,
@@ -27,67 +44,53 @@ class QueueManager(BaseComponent):
 
     async def initialize(self) -> None:
         """Initialize queue manager"""
+        # Initialize backend
+        if self._backend is None:
+            from .memory import MemoryBackend
+            self._backend = MemoryBackend(self._store_config)
+            await self._backend.initialize()
+            
         # Create default queue
         await self.create_queue(self._default_queue)
         
         # Load queue configurations
         queues = self.config.get('queue.queues', {})
         for name, config in queues.items():
+            if 'concurrency' in config:
+                self._semaphores[name] = asyncio.Semaphore(config['concurrency'])
             await self.create_queue(
                 name,
                 config.get('max_size'),
                 config.get('consumers', 1)
             )
-            
-        # Start cleanup task
-        asyncio.create_task(self._cleanup_task())
 
     async def cleanup(self) -> None:
         """Cleanup queue resources"""
-        # Stop all consumers
-        for consumers in self._consumers.values():
-            for consumer in consumers:
-                await consumer.stop()
+        # Stop all consumers; unacknowledged messages are dropped with them
+        for queue in list(self._consumers):
+            await self._stop_consumers(queue)
                 
         self._consumers.clear()
         self._queues.clear()
         self._handlers.clear()
+        self._unacked.clear()
+        
+        if self._backend:
+            await self._backend.cleanup()
 
     @handle_errors(logger=None)
     async def create_queue(self,
                          name: str,
                          max_size: Optional[int] = None,
-                         num_consumers: int = 1) -> 'Queue':
-        """Create message queue"""
-        try:
-            # Create queue
-            queue = Queue(
-                name,
-                max_size or self.config.get('queue.max_size', 0)
-            )
-            self._queues[name] = queue
-            
-            # Create consumers
-            consumers = []
-            for i in range(num_consumers):
-                consumer = Consumer(
-                    f"{name}-consumer-{i}",
-                    queue,
-                    self._handlers.get(name, {}),
-                    self._max_retries,
-                    self._retry_delay,
-                    self
-                )
-                consumers.append(consumer)
-                asyncio.create_task(consumer.run())
-                
-            self._consumers[name] = consumers
-            
-            return queue
-            
-        except Exception as e:
-            self.logger.error(f"Queue creation error: {str(e)}")
-            raise
+                         num_consumers: int = 1) -> Dict[str, int]:
+        """Create message queue, consumed once handlers are registered"""
+        self._queues[name] = {
+            'max_size': max_size or self.config.get('queue.max_size', 0),
+            'consumers': num_consumers
+        }
+        if self._handlers.get(name):
+            self._start_consumers(name)
+        return self._queues[name]
 
     @handle_errors(logger=None)
     async def publish(self,
@@ -101,6 +104,11 @@ class QueueManager(BaseComponent):
             if queue_name not in self._queues:
                 raise ValueError(f"Unknown queue: {queue_name}")
                 
+            max_size = self._queues[queue_name]['max_size']
+            if max_size and await self._backend.size(queue_name) >= max_size:
+                self.logger.warning(f"Queue {queue_name} is full")
+                return False
+                
             # Create message
             msg = {
                 'id': self._generate_id(),
@@ -111,18 +119,21 @@ class QueueManager(BaseComponent):
             }
             
             # Add to queue
-            await self._queues[queue_name].put(msg)
+            if not await self._backend.publish(queue_name, self._serialize(msg)):
+                return False
             
             self._stats['published'] += 1
             
             # Emit event
-            await self.app.events.emit(
-                'queue.published',
-                {
-                    'queue': queue_name,
-                    'message_id': msg['id']
-                }
-            )
+            app = getattr(self, 'app', None)
+            if app is not None:
+                await app.events.emit(
+                    'queue.published',
+                    {
+                        'queue': queue_name,
+                        'message_id': msg['id']
+                    }
+                )
             
             return True
             
@@ -134,7 +145,7 @@ class QueueManager(BaseComponent):
                         queue: str,
                         event: str,
                         handler: Union[Callable, str]) -> None:
-        """Register message handler"""
+        """Register message handler, starting the queue's consumers"""
         if queue not in self._handlers:
             self._handlers[queue] = {}
             
@@ -145,6 +156,8 @@ class QueueManager(BaseComponent):
             handler = getattr(module, func_name)
             
         self._handlers[queue][event] = handler
+        if queue in self._queues:
+            self._start_consumers(queue)
 
     def remove_handler(self,
                       queue: str,
@@ -152,6 +165,25 @@ class QueueManager(BaseComponent):
         """Remove message handler"""
         if queue in self._handlers:
             self._handlers[queue].pop(event, None)
+            if not self._handlers[queue] and queue in self._consumers:
+                # Nothing left to dispatch to; leave messages in the queue
+                asyncio.ensure_future(self._stop_consumers(queue))
+
+    def _start_consumers(self, queue: str) -> None:
+        """Start a queue's consumer tasks unless they are running"""
+        if queue in self._consumers:
+            return
+        self._consumers[queue] = [
+            asyncio.create_task(self._consumer_task(queue))
+            for _ in range(self._queues[queue]['consumers'])
+        ]
+
+    async def _stop_consumers(self, queue: str) -> None:
+        """Cancel a queue's consumer tasks and wait for them to finish"""
+        tasks = self._consumers.pop(queue, [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
     async def get_queue_size(self,
                            queue: Optional[str] = None) -> int:
@@ -160,7 +192,7 @@ class QueueManager(BaseComponent):
         if queue_name not in self._queues:
             raise ValueError(f"Unknown queue: {queue_name}")
             
-        return self._queues[queue_name].qsize()
+        return await self._backend.size(queue_name)
 
     async def get_queue_info(self,
                            queue: Optional[str] = None) -> Dict:
@@ -171,8 +203,8 @@ class QueueManager(BaseComponent):
             
         return {
             'name': queue_name,
-            'size': self._queues[queue_name].qsize(),
-            'consumers': len(self._consumers[queue_name]),
+            'size': await self._backend.size(queue_name),
+            'consumers': len(self._consumers.get(queue_name, [])),
             'handlers': list(self._handlers.get(queue_name, {}).keys())
         }
 
@@ -190,85 +222,83 @@ class QueueManager(BaseComponent):
         import uuid
         return str(uuid.uuid4())
 
-    async def _cleanup_task(self) -> None:
-        """Cleanup expired messages"""
-        while True:
+    async def get_many(self,
+                       queue: str,
+                       max_messages: Optional[int] = None,
+                       timeout: Optional[float] = None) -> List[Dict]:
+        """
+        Get a batch of messages
+
+        Waits up to timeout seconds (default queue.max_wait) for the first
+        message and returns up to max_messages (default queue.batch_size)
+        decoded messages. Messages that cannot be decoded are logged and
+        acknowledged. Acknowledge the rest with ack_many.
+        """
+        raw = await self._backend.get_many(
+            queue,
+            max_messages or self._batch_size,
+            self._max_wait if timeout is None else timeout
+        )
+        
+        unacked = self._unacked.setdefault(queue, {})
+        payloads = []
+        invalid = []
+        for message in raw:
             try:
-                # Cleanup queues
-                for queue in self._queues.values():
-                    await queue.cleanup()
-                    
-                await asyncio.sleep(60)  # Run every minute
-                
+                payload = self._deserialize(message)
+                unacked[payload['id']] = message
+                payloads.append(payload)
             except Exception as e:
-                self.logger.error(f"Queue cleanup error: {str(e)}")
-                await asyncio.sleep(60)
+                self.logger.error(f"Message deserialization error: {str(e)}")
+                invalid.append(message)
+                
+        if invalid:
+            await self._backend.ack_many(queue, invalid)
+            
+        return payloads
+
+    async def ack_many(self,
+                       queue: str,
+                       payloads: List[Dict]) -> bool:
+        """Acknowledge messages returned by get_many"""
+        unacked = self._unacked.get(queue, {})
+        messages = [
+            unacked.pop(payload['id'])
+            for payload in payloads
+            if payload['id'] in unacked
+        ]
+        if not messages:
+            return True
+        return await self._backend.ack_many(queue, messages)
+
+    def _get_semaphore(self, queue: str) -> asyncio.Semaphore:
+        """Handler concurrency limit shared by a queue's consumers"""
+        if queue not in self._semaphores:
+            self._semaphores[queue] = asyncio.Semaphore(self._concurrency)
+        return self._semaphores[queue]
 
-    async def _consumer_task(self,
-                           queue: str,
-                           handler: Callable) -> None:
-        """Consumer task"""
+    async def _consumer_task(self, queue: str) -> None:
+        """Consume a queue in batches, dispatching messages to their event handlers"""
+        semaphore = self._get_semaphore(queue)
         while True:
             try:
-                # Get message from queue
-                message = await self._backend.get(queue)
-                if not message:
-                    await asyncio.sleep(1)
+                # Blocks until messages arrive (or queue.max_wait passes)
+                payloads = await self.get_many(queue)
+                if not payloads:
                     continue
                     
-                # Deserialize message
-                try:
-                    payload = self._deserialize(message)
-                    data = self._deserialize(payload['data'])
-                except Exception as e:
-                    self.logger.error(
-                        f"Message deserialization error: {str(e)}"
-                    )
-                    continue
-                    
-                try:
-                    # Process message
-                    await handler(data)
-                    
-                    # Acknowledge message
-                    await self._backend.ack(queue, message)
-                    
-                    self._stats['consumed'] += 1
-                    
-                except Exception as e:
-                    self._stats['failed'] += 1
-                    
-                    # Handle retry
-                    retries = payload.get('retries', 0)
-                    if retries < self._max_retries:
-                        # Update retry count
-                        payload['retries'] = retries + 1
-                        
-                        # Republish with delay
-                        delay = self._retry_delay * (retries + 1)
-                        await self._backend.publish(
-                            queue,
-                            self._serialize(payload),
-                            delay
-                        )
-                        
-                        self._stats['retried'] += 1
+                results = await asyncio.gather(*[
+                    self._process(queue, payload, semaphore)
+                    for payload in payloads
+                ], return_exceptions=True)
+                for result in results:
+                    if isinstance(result, Exception):
+                        self.logger.error(f"Failed to requeue message: {str(result)}")
                         
-                    else:
-                        # Log error
-                        self.logger.error(
-                            f"Message processing failed: {str(e)}"
-                        )
-                        
-                        # Move to dead letter queue
-                        await self._backend.publish(
-                            f"{queue}_failed",
-                            message
-                        )
-                        
-                    # Acknowledge failed message
-                    await self._backend.ack(queue, message)
-                    
+                # Processed, retried or dead-lettered: acknowledge the batch,
+                # even if requeueing one message failed
+                await self.ack_many(queue, payloads)
+                
             except asyncio.CancelledError:
                 break
                 
@@ -276,16 +306,61 @@ class QueueManager(BaseComponent):
                 self.logger.error(f"Consumer error: {str(e)}")
                 await asyncio.sleep(1)
 
-    def _serialize(self, data: Any) -> Union[str, bytes]:
-        """Serialize data"""
-        if self._serializer == 'pickle':
-            return pickle.dumps(data)
+    async def _process(self,
+                      queue: str,
+                      payload: Dict,
+                      semaphore: asyncio.Semaphore) -> None:
+        """Run the handler for one message, retrying or dead-lettering it on failure"""
+        async with semaphore:
+            try:
+                event = payload.get('metadata', {}).get('event')
+                handler = self._handlers.get(queue, {}).get(event)
+                if handler is None:
+                    raise ValueError(f"No handler for event: {event}")
+                    
+                result = handler(payload['data'])
+                if asyncio.iscoroutine(result):
+                    await result
+                self._stats['consumed'] += 1
+                return
+                
+            except Exception as e:
+                error = e
+                
+        self._stats['failed'] += 1
+        
+        # Handle retry
+        retries = payload.get('retries', 0)
+        if retries < self._max_retries:
+            # Update retry count
+            payload = {**payload, 'retries': retries + 1}
+            
+            # Republish with delay
+            delay = self._retry_delay * (retries + 1)
+            await self._backend.publish(
+                queue,
+                self._serialize(payload),
+                delay
+            )
+            
+            self._stats['retried'] += 1
+            
         else:
-            return json.dumps(data)
+            # Log error
+            self.logger.error(
+                f"Message processing failed: {str(error)}"
+            )
+            
+            # Move to dead letter queue
+            await self._backend.publish(
+                f"{queue}_failed",
+                self._serialize(payload)
+            )
+
+    def _serialize(self, data: Any) -> Union[str, bytes]:
+        """Serialize data with the configured codec (queue.serializer)"""
+        return dumps(data, self._codec)
 
     def _deserialize(self, data: Union[str, bytes]) -> Any:
-        """Deserialize data"""
-        if self._serializer == 'pickle':
-            return pickle.loads(data)
-        else:
-            return json.loads(data) 
\ No newline at end of file
+        """Deserialize data written with any codec"""
+        return loads(data, self._codec) 
\ No newline at end of file
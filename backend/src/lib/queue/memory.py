@@ -2,7 +2,7 @@ from typing import Dict, Optional, Any, List, Deque
 import asyncio
 from collections import deque
 from datetime import datetime, timedelta
-from ...base import BaseComponent
+from ...core.base import BaseComponent
 
 class MemoryBackend(BaseComponent):
     """In-memory queue backend"""
@@ -11,6 +11,9 @@ class MemoryBackend(BaseComponent):
         super().__init__(config)
         self._queues: Dict[str, Deque] = {}
         self._delayed: Dict[str, List[Dict]] = {}
+        # Set while a queue has messages, so consumers wait instead of polling
+        self._ready: Dict[str, asyncio.Event] = {}
+        self._tasks: List[asyncio.Task] = []
         self._max_size = self.config.get('queue.max_size', 10000)
         self._cleanup_interval = self.config.get(
             'queue.cleanup_interval',
@@ -19,16 +22,22 @@ class MemoryBackend(BaseComponent):
 
     async def initialize(self) -> None:
         """Initialize memory backend"""
-        # Start delayed message processor
-        asyncio.create_task(self._process_delayed())
-        
-        # Start cleanup task
-        asyncio.create_task(self._cleanup_task())
+        # Start delayed message processor and cleanup task
+        self._tasks = [
+            asyncio.create_task(self._process_delayed()),
+            asyncio.create_task(self._cleanup_task())
+        ]
 
     async def cleanup(self) -> None:
         """Cleanup backend resources"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        
         self._queues.clear()
         self._delayed.clear()
+        self._ready.clear()
 
     async def publish(self,
                      queue: str,
@@ -58,6 +67,7 @@ class MemoryBackend(BaseComponent):
             
         # Add message
         self._queues[queue].append(message)
+        self._ready_event(queue).set()
         return True
 
     async def get(self, queue: str) -> Optional[Any]:
@@ -69,6 +79,48 @@ class MemoryBackend(BaseComponent):
             return self._queues[queue].popleft()
         except IndexError:
             return None
+        finally:
+            if not self._queues[queue]:
+                self._ready_event(queue).clear()
+
+    async def get_many(self,
+                       queue: str,
+                       max_messages: int,
+                       timeout: Optional[float] = None) -> List[Any]:
+        """
+        Get up to max_messages messages from queue
+
+        Waits up to timeout seconds (None: indefinitely) for the first
+        message, then returns what is available without waiting further.
+        """
+        ready = self._ready_event(queue)
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        
+        # Another consumer may empty the queue between wake-up and here
+        while not self._queues.get(queue):
+            ready.clear()
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return []
+            # asyncio.wait, unlike wait_for, never swallows a cancellation
+            # that arrives together with a publish
+            waiter = asyncio.ensure_future(ready.wait())
+            try:
+                done, _ = await asyncio.wait({waiter}, timeout=remaining)
+            finally:
+                waiter.cancel()
+            if not done:
+                return []
+                
+        messages = self._queues[queue]
+        batch = [
+            messages.popleft()
+            for _ in range(min(max_messages, len(messages)))
+        ]
+        if not messages:
+            ready.clear()
+        return batch
 
     async def ack(self,
                   queue: str,
@@ -77,6 +129,21 @@ class MemoryBackend(BaseComponent):
         # No need to ack in memory backend
         return True
 
+    async def ack_many(self,
+                       queue: str,
+                       messages: List[Any]) -> bool:
+        """Acknowledge messages"""
+        return True
+
+    async def size(self, queue: str) -> int:
+        """Number of messages ready in queue"""
+        return len(self._queues.get(queue, ()))
+
+    def _ready_event(self, queue: str) -> asyncio.Event:
+        if queue not in self._ready:
+            self._ready[queue] = asyncio.Event()
+        return self._ready[queue]
+
     async def get_stats(self) -> Dict[str, Any]:
         """Get backend statistics"""
         stats = {
@@ -0,0 +1,50 @@
+"""Tests for the bounded face recognition cache."""
+import numpy as np
+
+from src.core.face_recognition.cache import BoundedCache, image_cache_key
+
+def test_lru_eviction_by_count():
+    """Test that the least recently used entry is evicted first."""
+    cache = BoundedCache(max_items=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+
+    cache.set('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.get_stats()['evictions'] == 1
+
+def test_byte_budget_and_expiry():
+    """Test byte accounting, budget eviction and TTL expiry."""
+    cache = BoundedCache(max_items=100, max_bytes=10_000, ttl=0.0)
+    for key in range(5):
+        cache.set(key, np.zeros(512, dtype=np.float32))
+
+    stats = cache.get_stats()
+    assert stats['bytes'] <= 10_000
+    assert stats['evictions'] == 5 - stats['entries']
+
+    # Zero TTL: every entry is already expired
+    assert cache.get(4) is None
+    cache.purge_expired()
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+def test_image_key_covers_every_pixel():
+    """Test that sampled image keys still separate crops differing off the lattice."""
+    rng = np.random.default_rng(0)
+    face = rng.integers(0, 256, (112, 112, 3)).astype(np.uint8)
+
+    assert image_cache_key(face) == image_cache_key(face.copy())
+    # Non-contiguous views hash like their contiguous copies
+    frame = np.zeros((200, 200, 3), dtype=np.uint8)
+    frame[10:122, 20:132] = face
+    assert image_cache_key(frame[10:122, 20:132]) == image_cache_key(face)
+
+    # A single pixel change off any sampling lattice gives a new key
+    changed = face.copy()
+    changed[57, 91, 1] ^= 1
+    assert image_cache_key(face) != image_cache_key(changed)
+    assert image_cache_key(face) != image_cache_key(face.reshape(112, 336))
@@ -0,0 +1,251 @@
+"""Tests for request coalescing, stale-while-revalidate and L1 invalidation in CacheManager."""
+import asyncio
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pytest
+
+from src.lib.cache import manager as cache_manager
+from src.lib.cache.manager import CacheManager
+
+class FakePubSub:
+    """Subscription delivering published messages through a queue"""
+
+    def __init__(self, broker):
+        self._broker = broker
+        self._queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self._broker.subscribers.append(self._queue)
+
+    async def unsubscribe(self, channel):
+        self._broker.subscribers.remove(self._queue)
+
+    async def listen(self):
+        while True:
+            yield await self._queue.get()
+
+class FakeRedis:
+    """Publish/subscribe part of RedisPool, shared by every manager of a test"""
+
+    def __init__(self):
+        self.subscribers = []
+
+    async def initialize(self):
+        pass
+
+    async def cleanup(self):
+        pass
+
+    async def execute(self, command, channel, message):
+        assert command == 'publish'
+        for queue in self.subscribers:
+            queue.put_nowait({'type': 'message', 'data': message})
+        return len(self.subscribers)
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+@pytest.fixture
+async def make_manager(monkeypatch):
+    """Factory for managers over one memory backend and one pub/sub broker."""
+    broker = FakeRedis()
+    monkeypatch.setattr(cache_manager, 'RedisPool', lambda config: broker)
+    managers = []
+
+    async def make(**overrides):
+        manager = CacheManager({'cache.backend': 'memory', **overrides})
+        await manager.initialize()
+        if managers:
+            manager._backend = managers[0]._backend
+        managers.append(manager)
+        await settle()
+        return manager
+
+    yield make
+    for manager in managers:
+        await manager.cleanup()
+
+async def settle():
+    """Let subscribers and background loads run."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def expire_local(manager, key):
+    """Make the L1 copy of a key stale without waiting for its TTL."""
+    manager._local_cache[manager._get_key(key)]['expires'] = 0
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load(make_manager):
+    """Test that concurrent get_or_set misses call the loader once."""
+    manager = await make_manager()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {'value': calls}
+
+    values = await asyncio.gather(*(manager.get_or_set('key', load) for _ in range(10)))
+
+    assert calls == 1
+    assert values == [{'value': 1}] * 10
+    assert manager._stats['coalesced'] == 9
+    assert await manager.get('key') == {'value': 1}
+
+@pytest.mark.asyncio
+async def test_stale_value_served_while_refreshing(make_manager):
+    """Test that a stale L1 entry is returned while one background load refreshes it."""
+    manager = await make_manager()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await manager.get_or_set('key', load, stale_ttl=60) == 1
+
+    # Expired locally and gone from the backend, so the refresh calls the loader
+    expire_local(manager, 'key')
+    await manager._backend.delete(manager._get_key('key'))
+    assert await manager.get_or_set('key', load, stale_ttl=60) == 1
+    assert await manager.get_or_set('key', load, stale_ttl=60) == 1
+    await settle()
+
+    assert calls == 2
+    assert manager._stats['stale_hits'] == 2
+    assert manager._stats['coalesced'] == 1
+    assert await manager.get_or_set('key', load, stale_ttl=60) == 2
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_other_workers(make_manager):
+    """Test that a write drops the key from other managers' L1 but not the writer's."""
+    writer = await make_manager()
+    reader = await make_manager()
+
+    await writer.set('key', 'old')
+    await settle()
+    assert await reader.get('key') == 'old'
+    invalidations = reader._stats['invalidations']
+
+    await writer.set('key', 'new')
+    await settle()
+
+    assert reader._stats['invalidations'] == invalidations + 1
+    assert writer._stats['invalidations'] == 0
+    assert await reader.get('key') == 'new'
+
+    await writer.delete('key')
+    await settle()
+    assert await reader.get('key') is None
+
+@pytest.mark.asyncio
+async def test_invalidation_during_load_skips_l1(make_manager, monkeypatch):
+    """Test that a load overtaken by an invalidation does not cache its value locally."""
+    writer = await make_manager()
+    reader = await make_manager()
+    await writer.set('key', 'old')
+
+    backend_get = reader._backend.get
+    read_done = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_get(key):
+        value = await backend_get(key)
+        read_done.set()
+        await release.wait()
+        return value
+
+    monkeypatch.setattr(reader._backend, 'get', slow_get)
+    load = asyncio.create_task(reader.get_or_set('key', lambda: None))
+    await read_done.wait()
+
+    await writer.set('key', 'new')
+    await settle()
+    release.set()
+
+    assert await load == 'old'
+    assert reader._get_local(reader._get_key('key')) is None
+    assert not reader._fill_generations
+
+@pytest.mark.asyncio
+async def test_invalidation_during_get_skips_l1(make_manager, monkeypatch):
+    """Test that a plain get overtaken by an invalidation does not cache its value locally."""
+    writer = await make_manager()
+    reader = await make_manager()
+    await writer.set('key', 'old')
+
+    backend_get = reader._backend.get
+    read_done = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_get(key):
+        value = await backend_get(key)
+        read_done.set()
+        await release.wait()
+        return value
+
+    monkeypatch.setattr(reader._backend, 'get', slow_get)
+    gets = [asyncio.create_task(reader.get('key')) for _ in range(2)]
+    await read_done.wait()
+
+    await writer.set('key', 'new')
+    await settle()
+    release.set()
+
+    assert await asyncio.gather(*gets) == ['old', 'old']
+    assert reader._get_local(reader._get_key('key')) is None
+    assert not reader._fill_generations and not reader._fill_readers
+
+@pytest.mark.asyncio
+async def test_load_does_not_overwrite_concurrent_write(make_manager):
+    """Test that a loaded value yields to a write made while it was computed."""
+    loader = await make_manager()
+    other = await make_manager()
+    computing = asyncio.Event()
+    release = asyncio.Event()
+
+    async def load():
+        computing.set()
+        await release.wait()
+        return 'loaded'
+
+    task = asyncio.create_task(loader.get_or_set('key', load))
+    await computing.wait()
+    await loader.set('key', 'written')
+    await settle()
+    invalidations = other._stats['invalidations']
+    release.set()
+
+    assert await task == 'loaded'
+    assert await loader.get('key') == 'written'
+    loader._drop_local()
+    assert await loader.get('key') == 'written'
+
+    # An undisturbed load stores its value without broadcasting
+    assert await loader.get_or_set('other', lambda: asyncio.sleep(0, 'value')) == 'value'
+    await settle()
+    assert other._stats['invalidations'] == invalidations
+    assert await other.get('other') == 'value'
+
+@pytest.mark.asyncio
+async def test_binary_codec_uses_undecoded_replies(make_manager, monkeypatch):
+    """Test that a binary serializer gets a raw-bytes pool and rejects a decoding one."""
+    configs = []
+    broker = FakeRedis()
+    monkeypatch.setattr(cache_manager, 'RedisPool', lambda config: configs.append(config) or broker)
+    manager = await make_manager(**{'cache.serializer': 'binary'})
+
+    assert configs[-1]['redis.decode_responses'] is False
+    await manager.set('key', {'embedding': np.arange(4, dtype=np.float32)})
+    manager._drop_local()
+    assert np.array_equal((await manager.get('key'))['embedding'], np.arange(4, dtype=np.float32))
+
+    with pytest.raises(ValueError):
+        CacheManager({'cache.serializer': 'binary', 'redis.decode_responses': True})
@@ -0,0 +1,185 @@
+"""Tests for the threaded camera capture reader."""
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from src.core.camera.capture import CaptureReader
+from src.core.camera.ring_buffer import FrameRingBuffer
+
+SHAPE = (4, 6, 3)
+
+class FakeCapture:
+    """Capture releasing one frame per ``allow`` call."""
+
+    def __init__(self, fail_grabs=0):
+        self.allowed = threading.Semaphore(0)
+        self.fail_grabs = fail_grabs
+        self.grabs = 0
+        self.released = False
+
+    def allow(self, frames=1):
+        for _ in range(frames):
+            self.allowed.release()
+
+    def grab(self):
+        if not self.allowed.acquire(timeout=0.05):
+            return False
+        self.grabs += 1
+        return self.grabs > self.fail_grabs
+
+    def retrieve(self, image=None):
+        if image is None:
+            image = np.empty(SHAPE, dtype=np.uint8)
+        image[...] = self.grabs
+        return True, image
+
+    def release(self):
+        self.released = True
+
+@pytest.fixture
+def ring():
+    """Create a small ring buffer and release it afterwards."""
+    buffer = FrameRingBuffer(slots=4, shape=SHAPE)
+    yield buffer
+    buffer.close()
+
+async def wait_for_decoded(reader, count):
+    """Wait until the reader thread has decoded ``count`` frames."""
+    for _ in range(200):
+        if reader.get_stats()['frames_decoded'] >= count:
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("reader did not decode enough frames")
+
+@pytest.mark.asyncio
+async def test_next_frame_returns_newest_and_counts_drops(ring):
+    """Test latest-frame hand-off and dropped-frame accounting."""
+    capture = FakeCapture()
+    reader = CaptureReader(capture, ring, name='test', retry_delay=0.01)
+    reader.start()
+    try:
+        capture.allow()
+        sequence = await reader.next_frame(timeout=2)
+        assert sequence == 1
+        assert np.all(ring.get(sequence) == 1)
+
+        # Three frames arrive before the consumer asks again
+        capture.allow(3)
+        await wait_for_decoded(reader, 4)
+        sequence = await reader.next_frame(timeout=2)
+        assert sequence == 4
+        assert np.all(ring.get(sequence) == 4)
+
+        stats = reader.get_stats()
+        assert stats['frames_consumed'] == 2
+        assert stats['frames_dropped'] == 2
+        assert stats['running']
+    finally:
+        await reader.stop()
+
+    assert capture.released
+    assert not reader.is_running
+
+@pytest.mark.asyncio
+async def test_next_frame_times_out_without_frames(ring):
+    """Test that waiting consumers time out while the source is silent."""
+    capture = FakeCapture()
+    reader = CaptureReader(capture, ring, retry_delay=0.01)
+    reader.start()
+    try:
+        assert await reader.next_frame(timeout=0.05) is None
+        # The fake's grab waits as long as the consumer did; wait for it to fail
+        for _ in range(200):
+            if reader.get_stats()['grab_errors'] > 0:
+                break
+            await asyncio.sleep(0.005)
+        assert reader.get_stats()['grab_errors'] > 0
+        assert reader.error == "Failed to grab frame"
+    finally:
+        await reader.stop()
+
+@pytest.mark.asyncio
+async def test_error_clears_once_frames_flow(ring):
+    """Test that a failed grab is reported and cleared by the next good frame."""
+    capture = FakeCapture(fail_grabs=1)
+    reader = CaptureReader(capture, ring, retry_delay=0.01)
+    reader.start()
+    try:
+        capture.allow(2)
+        assert await reader.next_frame(timeout=2) == 1
+        assert reader.error is None
+    finally:
+        await reader.stop()
+
+@pytest.mark.asyncio
+async def test_stop_wakes_waiting_consumer(ring):
+    """Test that stopping the reader releases a consumer blocked on a frame."""
+    reader = CaptureReader(FakeCapture(), ring, retry_delay=0.01)
+    reader.start()
+    waiter = asyncio.create_task(reader.next_frame())
+    await asyncio.sleep(0.02)
+
+    await reader.stop()
+
+    assert await asyncio.wait_for(waiter, timeout=2) is None
+
+class BlockingCapture(FakeCapture):
+    """Capture whose grab blocks until ``unblock`` is called."""
+
+    def __init__(self):
+        super().__init__()
+        self.unblocked = threading.Event()
+        self.grabbing = threading.Event()
+
+    def grab(self):
+        self.grabbing.set()
+        self.unblocked.wait()
+        return False
+
+@pytest.mark.asyncio
+async def test_stop_does_not_release_under_blocked_grab(ring):
+    """Test that a capture stuck in grab() is released by the thread, not by stop()."""
+    capture = BlockingCapture()
+    reader = CaptureReader(capture, ring, retry_delay=0.01, stop_timeout=0.05)
+    reader.start()
+    assert await asyncio.get_running_loop().run_in_executor(None, capture.grabbing.wait, 2)
+
+    await reader.stop()
+    assert not capture.released
+
+    capture.unblocked.set()
+    for _ in range(200):
+        if capture.released:
+            break
+        await asyncio.sleep(0.005)
+    assert capture.released
+
+class SlowCapture(BlockingCapture):
+    """Capture whose blocked grab eventually succeeds."""
+
+    def grab(self):
+        super().grab()
+        return True
+
+@pytest.mark.asyncio
+async def test_buffer_closed_after_blocked_grab_returns(ring):
+    """Test that the ring is closed by the reader thread once a blocked grab returns."""
+    capture = SlowCapture()
+    reader = CaptureReader(capture, ring, retry_delay=0.01, stop_timeout=0.05)
+    reader.start()
+    assert await asyncio.get_running_loop().run_in_executor(None, capture.grabbing.wait, 2)
+
+    await reader.stop()
+    reader.close_buffer()
+    assert ring._frames is not None
+
+    capture.unblocked.set()
+    for _ in range(200):
+        if capture.released:
+            break
+        await asyncio.sleep(0.005)
+    assert capture.released
+    assert ring._frames is None
+    assert reader.get_stats()['frames_decoded'] == 0
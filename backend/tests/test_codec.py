@@ -0,0 +1,60 @@
+"""Tests for the cache/queue value codecs."""
+import json
+import pickle
+
+import msgpack
+import numpy as np
+import pytest
+
+from src.core.utils.codec import dumps, loads, store_config
+
+def test_binary_codec_round_trips_arrays_without_copies():
+    """Test that arrays keep dtype and shape and decode as buffer views."""
+    value = {
+        'embedding': np.arange(512, dtype=np.float32),
+        'image': np.zeros((4, 4, 3), dtype=np.uint8),
+        'detections': [{'bbox': [1.5, 2, 3, 4], 'track_id': -7, 'label': None}],
+        'blob': b'\x00\x01',
+        'count': np.int64(3)
+    }
+    data = dumps(value, 'binary')
+    assert data[:2] == b'\xc1\x02'
+
+    decoded = loads(data, 'binary')
+    assert decoded['embedding'].dtype == np.float32
+    assert np.array_equal(decoded['embedding'], value['embedding'])
+    assert decoded['image'].shape == (4, 4, 3)
+    assert not decoded['embedding'].flags.writeable  # Views the received bytes
+    assert decoded['detections'] == value['detections']
+    assert decoded['blob'] == b'\x00\x01' and decoded['count'] == 3
+
+@pytest.mark.parametrize('value', [0, -33, 2 ** 40, -2 ** 40, 1.25, 'x' * 300, [1] * 20, {str(i): i for i in range(20)}])
+def test_binary_codec_scalars_and_containers(value):
+    """Test the size classes of integers, strings, arrays and maps."""
+    assert loads(dumps(value, 'binary'), 'binary') == value
+
+def test_values_decode_whatever_codec_is_configured():
+    """Test codec negotiation, legacy values and the pickle guard."""
+    assert loads(dumps({'a': 1}, 'binary'), 'json') == {'a': 1}
+    assert loads(json.dumps({'a': 1}), 'binary') == {'a': 1}
+    assert loads(pickle.dumps({'a': 1}), 'pickle') == {'a': 1}
+
+    with pytest.raises(ValueError):
+        loads(dumps({'a': 1}, 'pickle'), 'json')
+    with pytest.raises(ValueError):
+        loads(b'\xc1\x7f', 'json')
+
+def test_binary_codec_writes_plain_messagepack():
+    """Test that values without arrays are readable by any MessagePack decoder."""
+    value = {'track_id': 7, 'bbox': [1.5, 2.0], 'label': 'person', 'blob': b'\x00'}
+    assert msgpack.unpackb(dumps(value, 'binary')[2:], raw=False) == value
+
+def test_store_config_matches_codec():
+    """Test that binary codecs get undecoded Redis replies and reject decoding ones."""
+    config = {'redis.url': 'redis://localhost'}
+    assert store_config(config, 'json') is config
+    assert store_config(config, 'binary') == {**config, 'redis.decode_responses': False}
+    assert store_config({'redis.decode_responses': False}, 'pickle')['redis.decode_responses'] is False
+
+    with pytest.raises(ValueError):
+        store_config({'redis.decode_responses': True}, 'binary')
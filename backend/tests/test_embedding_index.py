@@ -0,0 +1,120 @@
+"""Tests for the in-memory embedding index."""
+import numpy as np
+import pytest
+
+from src.core.face_recognition.index import EmbeddingIndex, first_unique_per_query
+
+@pytest.fixture
+def gallery():
+    """Create a random embedding gallery."""
+    rng = np.random.default_rng(1234)
+    return rng.normal(size=(200, 128)).astype(np.float32)
+
+def test_search_matches_brute_force(gallery):
+    """Test that top-k results agree with an exhaustive search."""
+    index = EmbeddingIndex(initial_capacity=8)
+    index.add_batch(range(len(gallery)), gallery)
+
+    distances, rows = index.search(gallery[[5, 17]], k=5)
+
+    for query, result_rows in zip(gallery[[5, 17]], rows):
+        expected = np.argsort(np.linalg.norm(gallery - query, axis=1))[:5]
+        assert list(result_rows) == list(expected)
+    assert np.all(np.diff(distances, axis=1) >= 0)
+
+def test_incremental_add_is_searchable(gallery):
+    """Test that single inserts are visible to the next search."""
+    index = EmbeddingIndex(dimension=128, initial_capacity=1)
+    for i, vector in enumerate(gallery[:10]):
+        index.add(f"user-{i}", vector, {"quality_score": 0.9})
+
+    _, rows = index.search(gallery[3], k=1)
+    assert index.label(rows[0][0]) == "user-3"
+    assert index.metadata(rows[0][0]) == {"quality_score": 0.9}
+
+def test_remove_and_empty_search(gallery):
+    """Test label removal and searching an empty index."""
+    index = EmbeddingIndex()
+    distances, rows = index.search(gallery[0], k=3)
+    assert rows.shape == (1, 0)
+
+    index.add_batch(["a", "b", "a"], gallery[:3])
+    assert index.remove("a") == 2
+    assert len(index) == 1
+
+    _, rows = index.search(gallery[0], k=3)
+    assert [index.label(r) for r in rows[0]] == ["b"]
+
+def test_dimension_mismatch(gallery):
+    """Test that vectors of the wrong dimension are rejected."""
+    index = EmbeddingIndex(dimension=128)
+    with pytest.raises(ValueError):
+        index.add("a", gallery[0][:64])
+
+def test_first_unique_per_query():
+    """Test vectorized per-query label deduplication."""
+    codes = np.array([[0, 0, 1, 2, 1],
+                      [3, 3, 3, 3, 3]])
+    valid = np.array([[True, True, True, False, True],
+                      [False, True, True, True, True]])
+
+    keep = first_unique_per_query(codes, valid, k=2)
+
+    assert keep.tolist() == [[True, False, True, False, False],
+                             [False, True, False, False, False]]
+
+def test_search_unique_returns_distinct_labels(gallery):
+    """Test that batch search returns each label once per query."""
+    index = EmbeddingIndex()
+    # Three samples per person
+    index.add_batch([i // 3 for i in range(60)], gallery[:60])
+
+    distances, rows, keep = index.search_unique(gallery[[0, 30]], k=4)
+
+    for query in range(2):
+        labels = index.labels(rows[query][keep[query]])
+        assert len(labels) == len(set(labels)) == 4
+    assert index.labels(rows[0][keep[0]])[0] == 0
+    assert index.labels(rows[1][keep[1]])[0] == 10
+
+def test_remove_publishes_consistent_snapshot(gallery):
+    """Test that a snapshot taken before a removal stays searchable."""
+    index = EmbeddingIndex()
+    index.add_batch(["a", "b", "c"], gallery[:3])
+
+    before = index.snapshot()
+    index.remove("b")
+    after = index.snapshot()
+
+    assert before.size == 3 and after.size == 2
+    _, rows = index.search(gallery[1], k=3, snapshot=before)
+    assert [index.label(r, before) for r in rows[0]][0] == "b"
+    _, rows = index.search(gallery[1], k=3, snapshot=after)
+    assert "b" not in [index.label(r, after) for r in rows[0]]
+
+def test_range_search_returns_all_within_distance(gallery):
+    """Test that range search returns every row under the threshold, nearest first."""
+    index = EmbeddingIndex()
+    index.add_batch(range(len(gallery)), gallery)
+
+    expected = np.linalg.norm(gallery - gallery[7], axis=1)
+    max_distance = float(np.sort(expected)[12])
+    distances, rows, snapshot = index.range_search(gallery[7], max_distance)
+
+    assert sorted(rows.tolist()) == sorted(np.flatnonzero(expected < max_distance).tolist())
+    assert np.all(np.diff(distances) >= 0)
+    assert snapshot.size == len(gallery)
+
+def test_replace_swaps_content(gallery):
+    """Test that replace swaps the whole index in one step."""
+    index = EmbeddingIndex()
+    index.add_batch(["old"] * 5, gallery[:5])
+    before = index.snapshot()
+
+    index.replace(["new-1", "new-2"], gallery[10:12], [{"q": 1}, {"q": 2}])
+
+    assert len(index) == 2
+    assert before.size == 5
+    _, rows = index.search(gallery[11], k=1)
+    assert index.label(rows[0][0]) == "new-2"
+    assert index.metadata(rows[0][0]) == {"q": 2}
@@ -0,0 +1,39 @@
+"""Tests for deadline tracking of expiring in-memory entries."""
+from src.core.utils.expiry import ExpiryQueue
+
+def test_pop_expired_returns_due_keys_in_order():
+    """Test that only keys past their deadline are returned, earliest first."""
+    queue = ExpiryQueue()
+    queue.schedule('b', 20.0)
+    queue.schedule('a', 10.0)
+    queue.schedule('c', 30.0)
+
+    assert queue.pop_expired(5.0) == []
+    assert queue.pop_expired(25.0) == ['a', 'b']
+    assert len(queue) == 1 and 'c' in queue
+
+def test_reschedule_and_cancel_leave_no_stale_entries():
+    """Test that moved and cancelled keys are not reported at old deadlines."""
+    queue = ExpiryQueue()
+    queue.schedule('a', 10.0)
+    queue.schedule('b', 15.0)
+    queue.schedule('a', 40.0)
+    queue.cancel('b')
+
+    assert queue.peek() == ('a', 40.0)
+    assert queue.pop_expired(30.0) == []
+    assert queue.deadline('a') == 40.0
+    assert queue.pop_earliest() == 'a'
+    assert queue.pop_earliest() is None
+
+def test_pop_expired_limit_and_heap_compaction():
+    """Test batched draining and that churn does not grow the heap unbounded."""
+    queue = ExpiryQueue()
+    for i in range(1000):
+        for attempt in range(5):
+            queue.schedule(i, float(i + attempt))
+
+    assert len(queue) == 1000
+    assert len(queue._heap) <= 2 * len(queue) + 64
+    assert queue.pop_expired(10_000.0, limit=100) == list(range(100))
+    assert len(queue.pop_expired(10_000.0)) == 900
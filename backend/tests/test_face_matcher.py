@@ -0,0 +1,217 @@
+"""Tests for face removal, compaction and erasure in FaceMatcher."""
+import threading
+
+import numpy as np
+import pytest
+
+from src.core.face_recognition import matcher as matcher_module
+from src.core.face_recognition.matcher import FaceMatcher
+from src.core.utils.errors import ErasureError, MatcherError
+
+DIMENSION = 64
+
+@pytest.fixture
+def gallery():
+    """Create random face encodings."""
+    rng = np.random.default_rng(11)
+    return rng.normal(size=(20, DIMENSION)).astype(np.float32)
+
+@pytest.fixture
+def make_matcher(tmp_path, monkeypatch):
+    """Factory for matchers persisting to a temporary directory."""
+    # Exercise the real index and persistence paths; the module skips the
+    # faiss import when loaded under TESTING, so provide it here
+    monkeypatch.delenv('TESTING', raising=False)
+    monkeypatch.setattr(matcher_module, 'faiss', pytest.importorskip('faiss'))
+    monkeypatch.setattr(FaceMatcher, '_run_cleanup', lambda self: None)
+    matchers = []
+
+    def make(**overrides):
+        config = {
+            'matching.storage_path': str(tmp_path),
+            'matching.min_confidence': 0.0,
+            'matching.use_quality_weighting': False,
+            'matching.person_prefilter': False,
+            'matching.index_type': 'flat',
+            'matching.wal_sync': False,
+            'matching.compaction_ratio': 1.0,
+            'gpu_enabled': False,
+            **overrides
+        }
+        matcher = FaceMatcher(config)
+        matchers.append(matcher)
+        return matcher
+
+    yield make
+    for matcher in matchers:
+        if matcher._wal is not None:
+            matcher._wal.close()
+
+async def add_gallery(matcher, gallery, start=0):
+    """Add one face per person for ``gallery[start:]``."""
+    for i in range(start, len(gallery)):
+        assert await matcher.add_face(f"face-{i}", gallery[i], {'person_id': f"person-{i}"})
+
+async def best_person(matcher, encoding):
+    """Person of the best match for one encoding."""
+    matches = await matcher.match_batch(encoding.reshape(1, -1), k=1)
+    return matches.labels[0] if len(matches) else None
+
+def assert_slots_consistent(matcher):
+    """Face IDs and slots must map onto each other."""
+    for face_id, slot in matcher._face_slots.items():
+        assert matcher._face_ids[slot] == face_id
+        assert matcher._row_live[slot]
+    live = [slot for slot, face_id in enumerate(matcher._face_ids) if face_id is not None]
+    assert sorted(live) == sorted(matcher._face_slots.values())
+
+@pytest.mark.asyncio
+async def test_remove_face_tombstones_slot(make_matcher, gallery):
+    """Test that removed faces stop matching and other slots are untouched."""
+    matcher = make_matcher()
+    await add_gallery(matcher, gallery)
+
+    assert await matcher.remove_face('face-3', erase=False)
+    assert await matcher.remove_faces(['face-7', 'face-7', 'missing'], erase=False) == 1
+    assert not await matcher.remove_face('face-3', erase=False)
+
+    assert_slots_consistent(matcher)
+    assert matcher._face_ids[3] is None and matcher._face_ids[7] is None
+    assert len(matcher._face_ids) == len(gallery)
+    assert await best_person(matcher, gallery[3]) != 'person-3'
+    assert await best_person(matcher, gallery[5]) == 'person-5'
+
+@pytest.mark.asyncio
+async def test_compact_renumbers_slots(make_matcher, gallery):
+    """Test that compaction drops tombstones and keeps every face matchable."""
+    matcher = make_matcher()
+    await add_gallery(matcher, gallery)
+    await matcher.remove_faces(['face-0', 'face-4', 'face-19'], erase=False)
+
+    await matcher.compact()
+
+    assert len(matcher._face_ids) == len(gallery) - 3
+    assert None not in matcher._face_ids
+    assert_slots_consistent(matcher)
+    assert matcher._face_slots['face-5'] == 3
+    for i in range(1, len(gallery) - 1):
+        if i != 4:
+            assert await best_person(matcher, gallery[i]) == f"person-{i}"
+    assert (await matcher.get_stats())['compactions'] == 1
+
+    # Adds after compaction continue at the end
+    await matcher.add_face('face-new', gallery[0], {'person_id': 'person-new'})
+    assert matcher._face_slots['face-new'] == len(gallery) - 3
+    assert await best_person(matcher, gallery[0]) == 'person-new'
+
+@pytest.mark.asyncio
+async def test_hnsw_removal_excludes_dead_ids(make_matcher, gallery):
+    """Test that rows HNSW cannot delete are skipped by ID, not by over-fetching."""
+    matcher = make_matcher(**{'matching.index_type': 'hnsw'})
+    await add_gallery(matcher, gallery)
+    assert await best_person(matcher, gallery[2]) == 'person-2'  # builds the index
+
+    await matcher.remove_face('face-2', erase=False)
+
+    assert matcher._index_dead == [2]
+    matches = await matcher.find_matches(gallery[2], max_matches=3)
+    assert len(matches) == 3
+    assert 'face-2' not in [match.encoding_id for match in matches]
+
+    await matcher.compact()
+    assert matcher._index_dead == [] and matcher._dead_selector is None
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('index_type', ['flat', 'hnsw'])
+async def test_large_partitions_search_with_selector(make_matcher, gallery, index_type):
+    """Test filtered searches through the index selector, after removals shifted its rows."""
+    matcher = make_matcher(**{'matching.index_type': index_type, 'matching.filter_exact_max': 0})
+    for i, encoding in enumerate(gallery):
+        metadata = {'person_id': f"person-{i}", 'zone': 'A' if i % 2 else 'B'}
+        assert await matcher.add_face(f"face-{i}", encoding, metadata)
+    assert await best_person(matcher, gallery[0]) == 'person-0'  # builds the index
+    await matcher.remove_faces(['face-1', 'face-4'])
+
+    matches = await matcher.match_batch(gallery[[3, 5, 6]], k=3, filters={'zone': 'A'})
+    labels = matches.labels.tolist()
+    assert all(int(label.split('-')[1]) % 2 for label in labels)
+    assert 'person-1' not in labels
+    best = {}
+    for query, label in zip(matches.query_index.tolist(), labels):
+        best.setdefault(query, label)
+    assert best[0] == 'person-3' and best[1] == 'person-5'
+
+
+@pytest.mark.asyncio
+async def test_erasure_removes_template_from_disk(make_matcher, gallery, tmp_path):
+    """Test that an erased template is in neither the snapshot nor the log."""
+    matcher = make_matcher()
+    await add_gallery(matcher, gallery[:10])
+    await matcher._save_state()  # face-1 now lives in the snapshot store
+    await add_gallery(matcher, gallery, start=10)  # face-12 only in the log
+
+    erased = {
+        face_id: matcher._encodings_at(
+            np.array([[matcher._face_slots[face_id]]])
+        )[0, 0].astype(np.float32).tobytes()
+        for face_id in ('face-1', 'face-12')
+    }
+    kept = matcher._encodings_at(np.array([[matcher._face_slots['face-5']]]))[0, 0]
+    on_disk = b''.join(path.read_bytes() for path in tmp_path.rglob('*') if path.is_file())
+    assert all(template in on_disk for template in erased.values())
+
+    assert await matcher.remove_faces(list(erased), erase=True) == 2
+
+    on_disk = b''.join(path.read_bytes() for path in tmp_path.rglob('*') if path.is_file())
+    for template in erased.values():
+        assert template not in on_disk
+    assert kept.astype(np.float32).tobytes() in on_disk
+
+    # The erased faces stay gone after a restart
+    matcher._wal.close()
+    restarted = make_matcher()
+    assert 'face-1' not in restarted._face_slots
+    assert 'face-12' not in restarted._face_slots
+    assert len(restarted._face_slots) == len(gallery) - 2
+    assert await best_person(restarted, gallery[5]) == 'person-5'
+
+
+@pytest.mark.asyncio
+async def test_failed_purge_reports_removal(make_matcher, gallery, monkeypatch):
+    """Test that a failed purge is reported apart from the removal it follows."""
+    matcher = make_matcher()
+    await add_gallery(matcher, gallery[:5])
+
+    async def failing_save():
+        raise MatcherError("disk full")
+    monkeypatch.setattr(matcher, '_save_state', failing_save)
+
+    with pytest.raises(ErasureError) as error:
+        await matcher.remove_faces(['face-1', 'face-2'], erase=True)
+    assert error.value.removed == 2
+    assert 'face-1' not in matcher._face_slots and 'face-2' not in matcher._face_slots
+
+    # Without erase no snapshot is written on the request path
+    assert await matcher.remove_face('face-3')
+
+
+@pytest.mark.asyncio
+async def test_lazy_index_is_built_off_the_event_loop(make_matcher, gallery):
+    """Test that the first search after a lazy start builds the index in a worker thread."""
+    matcher = make_matcher()
+    await add_gallery(matcher, gallery)
+    matcher._wal.close()
+
+    restarted = make_matcher()
+    assert restarted._index is None
+    build_index = restarted._build_index
+    threads = []
+
+    def recording_build(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return build_index(*args, **kwargs)
+
+    restarted._build_index = recording_build
+    assert await best_person(restarted, gallery[4]) == 'person-4'
+    assert await best_person(restarted, gallery[9]) == 'person-9'
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
@@ -0,0 +1,151 @@
+"""Tests for face removal, compaction and concurrent search in FaceSearch."""
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.core.face_recognition.search import FaceSearch
+
+DIMENSION = 32
+
+@pytest.fixture
+def gallery():
+    """Create random unit-norm face features."""
+    rng = np.random.default_rng(5)
+    features = rng.normal(size=(20, DIMENSION)).astype(np.float32)
+    return features / np.linalg.norm(features, axis=1, keepdims=True)
+
+@pytest.fixture
+def make_search(tmp_path):
+    """Factory for flat-index searches storing to a temporary directory."""
+    def make(**overrides):
+        config = {
+            'search.storage_path': str(tmp_path),
+            'search.index_type': 'flat',
+            'search.use_gpu': False,
+            'search.dimension': DIMENSION,
+            'search.compaction_ratio': 1.0,
+            **overrides
+        }
+        return FaceSearch(config)
+    return make
+
+async def add_gallery(search, gallery):
+    """Add one face per feature vector."""
+    await search.add_faces([(f"face-{i}", features, None, None) for i, features in enumerate(gallery)])
+
+async def result_ids(search, features, k):
+    """Face IDs of the top-k results, accepting any similarity."""
+    results = await search.search(features, k=k, min_similarity=-10.0)
+    return [result.face_id for result in results]
+
+@pytest.mark.asyncio
+async def test_removed_faces_are_excluded(make_search, gallery):
+    """Test that removed faces never match and k results are still returned."""
+    search = make_search()
+    await add_gallery(search, gallery)
+
+    removed = [f"face-{i}" for i in range(10)]
+    for face_id in removed:
+        assert await search.remove_face(face_id)
+
+    for i in range(10):
+        found = await result_ids(search, gallery[i], k=5)
+        assert len(found) == 5
+        assert not set(found) & set(removed)
+    assert (await result_ids(search, gallery[15], k=1)) == ["face-15"]
+
+@pytest.mark.asyncio
+async def test_compaction_renumbers_rows(make_search, gallery):
+    """Test that compaction drops removed rows and keeps search results."""
+    search = make_search()
+    await add_gallery(search, gallery)
+    for i in range(0, 20, 2):
+        await search.remove_face(f"face-{i}")
+    before = [await result_ids(search, features, k=3) for features in gallery]
+
+    await search.compact()
+
+    assert search._index.ntotal == 10
+    assert not search._removed_rows
+    assert search._removed_selector is None
+    assert search._face_ids == [f"face-{i}" for i in range(1, 20, 2)]
+    assert [await result_ids(search, features, k=3) for features in gallery] == before
+    assert (await search.get_stats())['compactions'] == 1
+
+@pytest.mark.asyncio
+async def test_removals_schedule_compaction(make_search, gallery):
+    """Test that removing enough faces compacts the index in the background."""
+    search = make_search(**{'search.compaction_ratio': 0.25})
+    await add_gallery(search, gallery)
+    for i in range(5):
+        await search.remove_face(f"face-{i}")
+    await search._compaction_task
+
+    assert search._index.ntotal == 15
+    assert search._stats['compactions'] == 1
+    assert (await result_ids(search, gallery[7], k=1)) == ["face-7"]
+
+@pytest.mark.asyncio
+async def test_concurrent_filtered_searches(make_search, gallery):
+    """Test that concurrent filtered searches share one partition and count every query."""
+    search = make_search()
+    await search.add_faces([
+        (f"face-{i}", features, {'zone': 'A' if i % 2 else 'B'}, None)
+        for i, features in enumerate(gallery)
+    ])
+
+    results = await asyncio.gather(*(
+        search.search(gallery[i], k=3, min_similarity=-10.0, filters={'zone': 'A'})
+        for i in range(20)
+    ))
+
+    for found in results:
+        assert len(found) == 3
+        assert all(int(result.face_id.split('-')[1]) % 2 for result in found)
+    assert len(search._partitions) == 1
+    stats = await search.get_stats()
+    assert stats['filtered_searches'] == 20
+    assert stats['total_searches'] == 20
+
+@pytest.mark.asyncio
+async def test_concurrent_saves_keep_every_face(make_search, gallery):
+    """Test that overlapping saves neither lose faces nor leave temporary files."""
+    search = make_search()
+    await search.add_faces([(f"face-{i}", features, None, None) for i, features in enumerate(gallery[:10])])
+    first = asyncio.ensure_future(search._save_features())
+    await search.add_faces([(f"face-{i}", gallery[i], None, None) for i in range(10, 20)])
+    await asyncio.gather(first, search._save_features())
+
+    stored = set(search._store.ids) | set(search._features)
+    assert stored == {f"face-{i}" for i in range(20)}
+    assert not list(search._feature_dir.glob('*.tmp'))
+    assert search._row_vectors(np.arange(20)).shape == (20, DIMENSION)
+
+@pytest.mark.asyncio
+async def test_readding_face_keeps_counts(make_search, gallery):
+    """Test that re-adding a face neither recounts it nor keeps its old cluster."""
+    search = make_search()
+    await search.add_faces([(f"face-{i}", features, None, i % 2) for i, features in enumerate(gallery)])
+    await search.add_faces([("face-0", gallery[0], None, 1), ("face-1", gallery[1], None, 1)])
+
+    assert search._stats['total_faces'] == 20
+    assert "face-0" not in search._reverse_index[0]
+    assert search._reverse_index[1].count("face-0") == 1
+    assert search._reverse_index[1].count("face-1") == 1
+    assert (await result_ids(search, gallery[0], k=1)) == ["face-0"]
+
+@pytest.mark.asyncio
+async def test_overfetch_skips_removed_rows(make_search, gallery):
+    """Test the selector-free search used for GPU indexes."""
+    search = make_search()
+    await add_gallery(search, gallery)
+    search._on_gpu = True
+    for i in range(0, 20, 3):
+        await search.remove_face(f"face-{i}")
+
+    for features in gallery:
+        found = await result_ids(search, features, k=5)
+        assert len(found) == 5
+        assert not any(int(face_id.split('-')[1]) % 3 == 0 for face_id in found)
+    assert (await result_ids(search, gallery[4], k=1)) == ["face-4"]
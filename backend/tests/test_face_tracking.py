@@ -0,0 +1,192 @@
+"""Tests for face tracking and track identity caching."""
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from src.core.face_recognition import face_tracking
+from src.core.face_recognition.core import FaceDetection
+from src.core.face_recognition.face_tracking import FaceTracker, iou_matrix, match_boxes
+from src.core.face_recognition.index import BatchMatches
+
+class FakeRecognizer:
+    """Recognizer matching every encoding to a configurable user."""
+
+    def __init__(self, label='user-1'):
+        self.label = label
+        self.encode_face = AsyncMock(side_effect=lambda face_image: np.ones(4, dtype=np.float32))
+        self.batches = []
+
+    async def match_batch(self, encodings, k=1):
+        self.batches.append(len(encodings))
+        n = len(encodings)
+        return BatchMatches(
+            query_index=np.arange(n),
+            rows=np.zeros(n, dtype=np.int64),
+            labels=np.array([self.label] * n, dtype=object),
+            scores=np.full(n, 0.9, dtype=np.float32)
+        )
+
+def make_detection(confidence=0.8, bbox=(10, 10, 50, 50)):
+    """Create a face detection without extracted features."""
+    return FaceDetection(
+        bbox=bbox,
+        confidence=confidence,
+        frame_index=0,
+        face_image=np.zeros((50, 50, 3), dtype=np.uint8)
+    )
+
+@pytest.fixture
+def tracker():
+    """Create a tracker with default settings and anti-spoofing passing."""
+    config = MagicMock()
+    config.get.side_effect = lambda key, default=None: default
+    with patch.object(face_tracking, 'ConfigManager', return_value=config):
+        tracker = FaceTracker()
+    tracker._check_anti_spoofing = AsyncMock(return_value=1.0)
+    return tracker
+
+@pytest.fixture
+def frame():
+    """Create an empty frame."""
+    return np.zeros((120, 160, 3), dtype=np.uint8)
+
+@pytest.mark.asyncio
+async def test_identity_is_cached_across_frames(tracker, frame):
+    """Test that a track is encoded once and reuses its identity afterwards."""
+    recognizer = FakeRecognizer()
+
+    tracks = await tracker.update([make_detection()], frame, recognizer)
+    assert tracks[0].face_id == 'user-1'
+    assert tracks[0].match_confidence == pytest.approx(0.9)
+
+    for _ in range(3):
+        tracks = await tracker.update([make_detection()], frame, recognizer)
+
+    assert recognizer.encode_face.await_count == 1
+    assert tracks[0].face_id == 'user-1'
+    stats = await tracker.get_stats()
+    assert stats['identifications'] == 1
+    assert stats['identity_cache_hits'] == 3
+
+@pytest.mark.asyncio
+async def test_better_quality_triggers_reidentification(tracker, frame):
+    """Test that a clearly better detection refreshes the identity."""
+    recognizer = FakeRecognizer()
+    await tracker.update([make_detection(confidence=0.6)], frame, recognizer)
+
+    # Within the quality gain: cached
+    await tracker.update([make_detection(confidence=0.65)], frame, recognizer)
+    assert recognizer.encode_face.await_count == 1
+
+    await tracker.update([make_detection(confidence=0.9)], frame, recognizer)
+    assert recognizer.encode_face.await_count == 2
+    track = next(iter(tracker._tracks.values()))
+    assert track.identity_quality == pytest.approx(0.9)
+
+@pytest.mark.asyncio
+async def test_stale_identity_is_refreshed(tracker, frame):
+    """Test that identities older than the re-identification interval are refreshed."""
+    recognizer = FakeRecognizer()
+    await tracker.update([make_detection()], frame, recognizer)
+    track = next(iter(tracker._tracks.values()))
+    track.identified_at -= timedelta(seconds=tracker._reid_interval + 1)
+
+    recognizer.label = 'user-2'
+    await tracker.update([make_detection()], frame, recognizer)
+
+    assert recognizer.encode_face.await_count == 2
+    assert track.face_id == 'user-2'
+    assert (await tracker.get_stats())['track_switches'] == 1
+
+@pytest.mark.asyncio
+async def test_new_tracks_are_identified_in_one_batch(tracker, frame):
+    """Test that several new tracks share one match_batch call."""
+    recognizer = FakeRecognizer()
+    detections = [make_detection(bbox=(10 + 60 * i, 10, 40, 40)) for i in range(2)]
+
+    tracks = await tracker.update(detections, frame, recognizer)
+
+    assert len(tracks) == 2
+    assert recognizer.batches == [2]
+
+@pytest.mark.asyncio
+async def test_spoofed_tracks_are_not_identified(tracker, frame):
+    """Test that tracks failing anti-spoofing are never encoded."""
+    tracker._check_anti_spoofing = AsyncMock(return_value=0.1)
+    recognizer = FakeRecognizer()
+
+    tracks = await tracker.update([make_detection()], frame, recognizer)
+
+    assert recognizer.encode_face.await_count == 0
+    assert tracks[0].face_id is None
+
+@pytest.mark.parametrize("box1, box2, expected", [
+    ((0, 0, 10, 10), (0, 0, 10, 10), 1.0),
+    ((0, 0, 10, 10), (20, 20, 10, 10), 0.0),
+    ((0, 0, 10, 10), (10, 0, 10, 10), 0.0),  # touching edges
+    ((0, 0, 10, 10), (5, 0, 10, 10), 50 / 150),
+    ((0, 0, 10, 10), (5, 5, 10, 10), 25 / 175),
+    ((0, 0, 10, 10), (0, 0, 5, 5), 25 / 100),  # contained
+    ((0, 0, 0, 0), (0, 0, 10, 10), 0.0),  # degenerate
+])
+def test_iou_known_cases(box1, box2, expected):
+    """Test IoU against hand-computed overlaps."""
+    assert iou_matrix([box1], [box2])[0, 0] == pytest.approx(expected)
+    assert iou_matrix([box2], [box1])[0, 0] == pytest.approx(expected)
+
+def test_iou_matrix_shape():
+    """Test that IoU is computed for every track/detection pair."""
+    tracks = [(0, 0, 10, 10), (5, 0, 10, 10), (50, 50, 4, 4)]
+    detections = [(0, 0, 10, 10), (50, 50, 4, 4)]
+
+    iou = iou_matrix(tracks, detections)
+
+    assert iou.shape == (3, 2)
+    assert iou[0, 0] == pytest.approx(1.0)
+    assert iou[1, 0] == pytest.approx(50 / 150)
+    assert iou[2, 1] == pytest.approx(1.0)
+    assert iou[0, 1] == 0.0
+
+def test_match_boxes_direct_and_unmatched():
+    """Test unambiguous matches and leftovers on both sides."""
+    tracks = np.array([(0, 0, 10, 10), (100, 100, 10, 10), (200, 0, 10, 10)])
+    detections = np.array([(101, 100, 10, 10), (1, 0, 10, 10), (300, 300, 5, 5)])
+
+    matches, unmatched_tracks, unmatched_detections = match_boxes(tracks, detections, 0.3)
+
+    assert sorted(matches) == [(0, 1), (1, 0)]
+    assert unmatched_tracks == [2]
+    assert unmatched_detections == [2]
+
+def test_match_boxes_solves_contested_pairs_globally():
+    """Test that contested pairs maximize total IoU instead of taking the best pair first."""
+    tracks = np.array([(0, 0, 10, 10), (5, 0, 10, 10)])
+    detections = np.array([(1, 0, 10, 10), (-2, 0, 10, 10)])
+    # IoU: track 0 -> 0.82 / 0.67, track 1 -> 0.43 / 0.18 (gated)
+
+    matches, unmatched_tracks, unmatched_detections = match_boxes(tracks, detections, 0.3)
+
+    assert sorted(matches) == [(0, 1), (1, 0)]
+    assert unmatched_tracks == []
+    assert unmatched_detections == []
+
+def test_match_boxes_drops_assignments_below_threshold():
+    """Test that a track losing a contested detection stays unmatched."""
+    tracks = np.array([(0, 0, 10, 10), (5, 0, 10, 10)])
+    detections = np.array([(1, 0, 10, 10)])
+
+    matches, unmatched_tracks, unmatched_detections = match_boxes(tracks, detections, 0.3)
+
+    assert matches == [(0, 0)]
+    assert unmatched_tracks == [1]
+    assert unmatched_detections == []
+
+def test_match_boxes_empty_inputs():
+    """Test matching with no tracks or no detections."""
+    boxes = np.array([(0, 0, 10, 10)])
+    empty = np.empty((0, 4))
+
+    assert match_boxes(empty, boxes, 0.3) == ([], [], [0])
+    assert match_boxes(boxes, empty, 0.3) == ([], [0], [])
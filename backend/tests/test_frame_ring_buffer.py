@@ -0,0 +1,64 @@
+"""Tests for the shared-memory camera frame ring buffer."""
+import numpy as np
+import pytest
+
+from src.core.camera.ring_buffer import FrameRingBuffer
+
+@pytest.fixture
+def ring():
+    """Create a small ring buffer and release it afterwards."""
+    buffer = FrameRingBuffer(slots=3, shape=(4, 6, 3))
+    yield buffer
+    buffer.close()
+
+def make_frame(value):
+    """Create a constant test frame."""
+    return np.full((4, 6, 3), value, dtype=np.uint8)
+
+def test_latest_frame_semantics(ring):
+    """Test that the newest frame is returned with its sequence number."""
+    assert ring.latest() is None
+
+    for value in range(1, 5):
+        ring.write(make_frame(value), timestamp=float(value))
+
+    sequence, timestamp, frame = ring.latest()
+    assert sequence == 4
+    assert timestamp == 4.0
+    assert np.all(frame == 4)
+    assert len(ring) == 3
+
+def test_overwritten_frames_are_stale(ring):
+    """Test that frames older than the ring are reported as gone."""
+    first = ring.write(make_frame(1))
+    view = ring.get(first)
+    assert np.all(view == 1)
+
+    for value in range(2, 5):
+        ring.write(make_frame(value))
+
+    assert not ring.is_current(first)
+    assert ring.get(first) is None
+    assert ring.get_stats()['stale_reads'] == 1
+
+def test_views_are_zero_copy_and_read_only(ring):
+    """Test that consumers see the slot memory without copying."""
+    sequence, slot = ring.acquire()
+    slot[:] = 7
+    ring.commit(sequence)
+
+    view = ring.get(sequence)
+    assert np.shares_memory(view, slot)
+    with pytest.raises(ValueError):
+        view[0, 0, 0] = 1
+
+def test_attach_from_name(ring):
+    """Test that a second handle sees frames written by the producer."""
+    sequence = ring.write(make_frame(9))
+
+    consumer = FrameRingBuffer.attach(ring.name, ring.slots, ring.shape)
+    try:
+        assert consumer.latest_sequence == sequence
+        assert np.all(consumer.get(sequence) == 9)
+    finally:
+        consumer.close()
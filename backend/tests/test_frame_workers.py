@@ -0,0 +1,104 @@
+"""Tests for the shared-memory frame worker pool."""
+import asyncio
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from src.core.pool.frame_workers import FrameWorkerPool, image_quality_metrics
+
+@pytest.mark.asyncio
+async def test_shared_memory_round_trip():
+    """Test that frames sent through shared-memory slots reach workers intact."""
+    pool = FrameWorkerPool(max_workers=1, max_in_flight=2,
+                           slot_bytes=64 * 64 * 3, inline_bytes=0)
+    rng = np.random.default_rng(3)
+    frames = [rng.integers(0, 255, (64, 64, 3), dtype=np.uint8) for _ in range(3)]
+    try:
+        for frame in frames:
+            result = await pool.run('copy', np.copy, frame)
+            assert np.array_equal(result, frame)
+        slot_names = [slot.name for slot in pool._slots]
+
+        stats = pool.get_stats()
+        assert stats['shared_memory_frames'] == 3
+        assert stats['pickled_frames'] == 0
+        assert stats['free_slots'] == 2
+        assert stats['stages']['copy']['completed'] == 3
+    finally:
+        await pool.stop()
+
+    # Slots outlive the workers and are unlinked by the pool itself
+    for name in slot_names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+def slow_copy(frame, delay):
+    """Stage that keeps reading its input for a while."""
+    time.sleep(delay)
+    return frame.copy()
+
+@pytest.mark.asyncio
+async def test_cancelled_run_holds_slot_until_worker_finishes():
+    """Test that a cancelled caller does not free a slot a worker still reads."""
+    pool = FrameWorkerPool(max_workers=1, max_in_flight=1,
+                           slot_bytes=16 * 16, inline_bytes=0)
+    frame = np.full((16, 16), 7, dtype=np.uint8)
+    try:
+        await pool.run('copy', np.copy, frame)  # workers are up
+        task = asyncio.create_task(pool.run('slow', slow_copy, frame, 1.0))
+        await asyncio.sleep(0.3)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        stats = pool.get_stats()
+        assert stats['free_slots'] == 0
+        assert stats['stages']['slow']['in_flight'] == 1
+
+        # The next frame waits for the slot instead of overwriting it
+        other = np.full((16, 16), 9, dtype=np.uint8)
+        assert np.array_equal(await pool.run('copy', np.copy, other), other)
+        stats = pool.get_stats()
+        assert stats['free_slots'] == 1
+        assert stats['stages']['slow']['in_flight'] == 0
+    finally:
+        await pool.stop()
+
+@pytest.mark.asyncio
+async def test_oversized_frames_are_pickled():
+    """Test that frames larger than a slot bypass shared memory."""
+    pool = FrameWorkerPool(max_workers=1, max_in_flight=1,
+                           slot_bytes=16, inline_bytes=0)
+    frame = np.arange(64, dtype=np.uint8).reshape(8, 8)
+    try:
+        assert await pool.run('sum', np.sum, frame) == frame.sum()
+        assert pool.get_stats()['pickled_frames'] == 1
+    finally:
+        await pool.stop()
+
+@pytest.mark.asyncio
+async def test_inline_pool_runs_in_caller():
+    """Test that a pool without workers runs stages synchronously."""
+    pool = FrameWorkerPool(max_workers=0)
+    frame = np.ones((4, 4), dtype=np.uint8)
+
+    assert await pool.run('sum', np.sum, frame) == 16
+    assert not pool.is_running
+
+def test_quality_metrics_on_odd_width_crop():
+    """Test that odd-width crops get real metrics and differences do not wrap."""
+    face = np.zeros((120, 121, 3), dtype=np.uint8)
+    face[:, :60] = 100
+    face[:, 61:] = 200
+    face[::2, ::2] = 255
+
+    metrics = image_quality_metrics(face)
+    assert metrics['sharpness'] > 0.0
+    assert 0.0 < metrics['brightness'] < 1.0
+    # Halves differ by 100 grey levels outside the mirrored checker points
+    assert metrics['symmetry'] == pytest.approx(1.0 - 75 / 255)
+
+    mirrored = np.concatenate([face[:, :61], face[:, :60][:, ::-1]], axis=1)
+    assert image_quality_metrics(mirrored)['symmetry'] == pytest.approx(1.0)
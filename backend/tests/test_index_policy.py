@@ -0,0 +1,40 @@
+"""Tests for index selection and recall-targeted parameter tuning."""
+import numpy as np
+
+from src.core.face_recognition.index_policy import (
+    IndexPolicy, exact_top_k, imbalance_factor, tune_search_parameter
+)
+
+def test_index_policy_thresholds():
+    """Test index type selection and retrain/retune triggers."""
+    policy = IndexPolicy(ivf_threshold=100, hnsw_threshold=1000)
+    assert policy.index_type_for(99) == 'flat'
+    assert policy.index_type_for(100) == 'ivf'
+    assert policy.index_type_for(5000) == 'hnsw'
+
+    assert imbalance_factor([10, 10, 10, 10]) == 1.0
+    assert imbalance_factor([40, 0, 0, 0]) == 4.0
+    assert policy.needs_retrain(100, 100, 2.0)
+    assert policy.needs_retrain(250, 100, 1.0)
+    assert not policy.needs_retrain(150, 100, 1.1)
+    assert policy.needs_retune(130, 100)
+    assert not policy.needs_retune(110, 100)
+
+def test_tuning_picks_cheapest_value_reaching_target():
+    """Test exact ground truth and recall-targeted parameter choice."""
+    rng = np.random.default_rng(0)
+    gallery = rng.normal(size=(300, 16)).astype(np.float32)
+    gallery /= np.linalg.norm(gallery, axis=1, keepdims=True)
+    queries = gallery[:20]
+    truth = exact_top_k(queries, gallery, 5, block=64)
+    assert np.array_equal(truth[:, 0], np.arange(20))
+
+    # Stand-in search whose recall grows with the parameter value
+    def search(value):
+        found = truth.copy()
+        found[:, value:] = -1
+        return found
+
+    result = tune_search_parameter(search, truth, [1, 2, 4, 8], 0.8)
+    assert result['value'] == 4 and result['reached']
+    assert not tune_search_parameter(search, truth, [1, 2], 0.8)['reached']
@@ -0,0 +1,62 @@
+"""Tests for the reader-writer locks guarding the face indexes."""
+import asyncio
+import threading
+
+import pytest
+
+from src.core.face_recognition.locks import AsyncReadWriteLock, ReadWriteLock
+
+def test_read_write_lock_shares_reads_and_excludes_writes():
+    """Test that readers overlap and a writer waits for them."""
+    lock = ReadWriteLock()
+    both_reading = threading.Barrier(2, timeout=5)
+    events = []
+
+    def reader():
+        with lock.read():
+            both_reading.wait()  # Fails unless two readers hold the lock together
+            events.append('read')
+
+    def writer():
+        with lock.write():
+            assert lock.readers == 0
+            events.append('write')
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join()
+    writer_thread = threading.Thread(target=writer)
+    writer_thread.start()
+    writer_thread.join()
+    assert events == ['read', 'read', 'write']
+
+@pytest.mark.asyncio
+async def test_async_read_write_lock_prefers_waiting_writer():
+    """Test that new readers queue behind a waiting writer."""
+    lock = AsyncReadWriteLock()
+    order = []
+    release = asyncio.Event()
+
+    async def reader(name, hold=False):
+        async with lock.read():
+            order.append(name)
+            if hold:
+                await release.wait()
+
+    async def writer():
+        async with lock.write():
+            order.append('writer')
+
+    first = asyncio.create_task(reader('first', hold=True))
+    await asyncio.sleep(0)
+    pending_writer = asyncio.create_task(writer())
+    await asyncio.sleep(0)
+    late = asyncio.create_task(reader('late'))
+    await asyncio.sleep(0)
+    assert order == ['first'] and lock.readers == 1
+
+    release.set()
+    await asyncio.gather(first, pending_writer, late)
+    assert order == ['first', 'writer', 'late']
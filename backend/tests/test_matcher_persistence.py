@@ -0,0 +1,78 @@
+"""Tests for the face matcher operation log and snapshots."""
+import numpy as np
+
+from src.core.face_recognition.embedding_store import EmbeddingStore
+from src.core.face_recognition.persistence import WriteAheadLog, read_snapshot, write_snapshot
+
+def test_log_replays_records_in_order(tmp_path):
+    """Test that records survive a restart and later segments are read."""
+    log = WriteAheadLog(tmp_path, sync=False)
+    log.open()
+    vector = np.arange(4, dtype=np.float32)
+    log.append({'op': 'add', 'face_id': 'a'}, vector)
+    log.rotate()
+    log.append({'op': 'remove', 'face_ids': ['a']})
+    log.close()
+
+    records = list(WriteAheadLog(tmp_path).replay())
+
+    assert [header['op'] for header, _ in records] == ['add', 'remove']
+    assert np.array_equal(records[0][1], vector)
+    assert records[1][1] is None
+
+def test_torn_record_is_ignored(tmp_path):
+    """Test that a partially written record does not break replay."""
+    log = WriteAheadLog(tmp_path, sync=False)
+    log.open()
+    log.append({'op': 'add', 'face_id': 'a'}, np.ones(4))
+    log.close()
+    segment = next(tmp_path.glob('*.log'))
+    segment.write_bytes(segment.read_bytes() + b'\x20\x00\x00\x00\x01')
+
+    log = WriteAheadLog(tmp_path)
+    assert [header['face_id'] for header, _ in log.replay()] == ['a']
+
+    # New writes go to a fresh segment after the damaged one
+    log.open()
+    log.append({'op': 'add', 'face_id': 'b'}, np.ones(4))
+    log.close()
+    assert [header['face_id'] for header, _ in log.replay()] == ['a', 'b']
+
+def test_log_is_created_on_first_append(tmp_path):
+    """Test that opening a log writes nothing until a record is appended."""
+    directory = tmp_path / 'wal'
+    log = WriteAheadLog(directory, sync=False)
+    log.open(min_segment=3)
+    assert not directory.exists()
+
+    log.append({'op': 'remove', 'face_ids': ['a']})
+    log.close()
+
+    assert log.segments() == [3]
+
+def test_snapshot_round_trip(tmp_path):
+    """Test that snapshots restore state and encodings."""
+    path = tmp_path / 'snapshot.json'
+    encodings = np.random.default_rng(0).normal(size=(3, 8)).astype(np.float32)
+    write_snapshot(path, {'face_ids': ['a', 'b', 'c'], 'wal_segment': 4}, encodings)
+
+    state, loaded = read_snapshot(path)
+
+    assert state['wal_segment'] == 4
+    assert np.array_equal(loaded, encodings)
+    assert not (tmp_path / 'snapshot.json.tmp').exists()
+
+def test_embedding_store_is_memory_mapped(tmp_path):
+    """Test that stored embeddings are mapped read-only with their IDs."""
+    path = tmp_path / 'features.emb'
+    embeddings = np.random.default_rng(0).normal(size=(5, 16))
+    blocks = [embeddings[:2], embeddings[2:]]
+    EmbeddingStore.write(path, ['a', 'b', 'c', 'd', 'e'], blocks, dtype='float16')
+
+    store = EmbeddingStore.open(path)
+
+    assert isinstance(store.embeddings, np.memmap)
+    assert store.embeddings.dtype == np.float16
+    assert not store.embeddings.flags.writeable
+    assert store.row('d') == 3
+    assert np.allclose(store.vectors([3]), embeddings[3], atol=1e-2)
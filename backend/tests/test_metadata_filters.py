@@ -0,0 +1,45 @@
+"""Tests for metadata filter selection and partition search."""
+import numpy as np
+import pytest
+
+from src.core.face_recognition.filters import AttributeIndex, filter_key, subset_top_k
+
+def test_attribute_index_select_and_remap():
+    """Test AND across fields, OR within a field and multi-valued attributes."""
+    attributes = AttributeIndex()
+    attributes.add(0, {'site': 'hq', 'zone': 'A'})
+    attributes.add(1, {'site': 'hq', 'zone': 'B', 'watchlist': ['vip', 'staff']})
+    attributes.add(2, {'site': 'lab', 'zone': 'B'})
+    attributes.add(3, {'site': 'hq', 'zone': 'C', 'watchlist': 'vip'})
+
+    assert attributes.select({'zone': 'B'}).tolist() == [1, 2]
+    assert attributes.select({'site': 'hq', 'zone': ['B', 'C']}).tolist() == [1, 3]
+    assert attributes.select({'watchlist': 'vip'}).tolist() == [1, 3]
+    assert attributes.select({'site': 'lab', 'watchlist': 'vip'}).tolist() == []
+    with pytest.raises(ValueError):
+        attributes.select({'department': 'x'})
+
+    # Rows 0 and 1 removed by compaction
+    attributes.remap(np.array([-1, -1, 0, 1]))
+    assert attributes.select({'watchlist': 'vip'}).tolist() == [1]
+    assert attributes.select({'zone': 'B'}).tolist() == [0]
+
+    assert filter_key({'zone': ['C', 'B'], 'site': 'hq'}) == filter_key({'site': 'hq', 'zone': ['B', 'C']})
+    assert filter_key(None) == ''
+
+def test_subset_top_k_matches_brute_force():
+    """Test exact partition search for both metrics."""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(40, 8)).astype(np.float32)
+    queries = rng.normal(size=(3, 8)).astype(np.float32)
+
+    scores, positions = subset_top_k(queries, vectors, 5)
+    assert np.array_equal(positions, np.argsort(-(queries @ vectors.T), axis=1)[:, :5])
+
+    distances, positions = subset_top_k(queries, vectors, 5, metric='l2')
+    expected = ((queries[:, None, :] - vectors[None]) ** 2).sum(-1)
+    assert np.array_equal(positions, np.argsort(expected, axis=1)[:, :5])
+    assert np.allclose(distances, np.sort(expected, axis=1)[:, :5], atol=1e-4)
+
+    _, positions = subset_top_k(queries, vectors[:2], 5)
+    assert (positions[:, 2:] == -1).all()
@@ -0,0 +1,84 @@
+"""Tests for the face inference micro-batcher."""
+import asyncio
+
+import pytest
+
+from src.core.face_recognition.batching import MicroBatcher
+
+@pytest.mark.asyncio
+async def test_flush_on_size():
+    """Test that a full batch is flushed without waiting for the deadline."""
+    batches = []
+
+    def double(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=4, max_delay=10.0)
+    try:
+        results = await asyncio.wait_for(batcher.submit_many([1, 2, 3, 4]), timeout=2)
+    finally:
+        await batcher.stop()
+
+    assert results == [2, 4, 6, 8]
+    assert batches == [[1, 2, 3, 4]]
+    stats = batcher.get_stats()
+    assert stats['flushed_full'] == 1 and stats['flushed_deadline'] == 0
+
+@pytest.mark.asyncio
+async def test_flush_on_deadline():
+    """Test that a partial batch is flushed once the oldest item's window closes."""
+    batches = []
+
+    async def identity(items):
+        batches.append(list(items))
+        return items
+
+    batcher = MicroBatcher(identity, max_batch_size=32, max_delay=0.02)
+    try:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.wait_for(batcher.submit_many(['a', 'b']), timeout=2)
+        elapsed = loop.time() - started
+    finally:
+        await batcher.stop()
+
+    assert results == ['a', 'b']
+    assert batches == [['a', 'b']]
+    assert elapsed >= 0.015
+    assert batcher.get_stats()['flushed_deadline'] == 1
+
+@pytest.mark.asyncio
+async def test_batch_error_propagates_to_every_item():
+    """Test that a failing batch fails each caller and the batcher keeps running."""
+    calls = []
+
+    def flaky(items):
+        calls.append(list(items))
+        if len(calls) == 1:
+            raise ValueError("model failed")
+        return items
+
+    batcher = MicroBatcher(flaky, max_batch_size=2, max_delay=0.01)
+    try:
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2),
+                                       return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+
+        assert await asyncio.wait_for(batcher.submit(3), timeout=2) == 3
+    finally:
+        await batcher.stop()
+
+    assert batcher.get_stats()['errors'] == 1
+
+@pytest.mark.asyncio
+async def test_misaligned_results_are_an_error():
+    """Test that a batch returning the wrong number of results fails its items."""
+    batcher = MicroBatcher(lambda items: items[:1], max_batch_size=2, max_delay=0.01)
+    try:
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2),
+                                       return_exceptions=True)
+    finally:
+        await batcher.stop()
+
+    assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,39 @@
+"""Tests for motion-gated detection scheduling."""
+from src.core.camera.motion import AdaptiveDetectionPolicy, CameraActivity
+
+def run(policy, activity, scores, step=0.1):
+    """Feed motion scores at a fixed frame interval and collect decisions."""
+    return [policy.decide(activity, score, i * step) for i, score in enumerate(scores)]
+
+def test_idle_camera_detects_periodically():
+    """Test that a static scene only gets periodic safety detections."""
+    policy = AdaptiveDetectionPolicy(idle_interval=1.0, motion_cooldown=0.0)
+    activity = CameraActivity()
+
+    decisions = run(policy, activity, [0.0] * 30)
+
+    assert decisions.count(True) == 3
+    assert activity.mode == 'idle'
+
+def test_motion_raises_detection_rate():
+    """Test that motion switches a camera to detecting every frame."""
+    policy = AdaptiveDetectionPolicy(idle_interval=1.0, motion_cooldown=0.5)
+    activity = CameraActivity()
+
+    decisions = run(policy, activity, [0.0] * 5 + [0.2] * 5 + [0.0] * 20)
+
+    assert all(decisions[5:10])
+    assert activity.mode == 'idle'
+    # Cooldown keeps detection running briefly after motion stops
+    assert all(decisions[10:14])
+    assert not any(decisions[15:23])
+
+def test_active_tracks_keep_camera_active():
+    """Test that tracked faces keep detection running without motion."""
+    policy = AdaptiveDetectionPolicy(idle_interval=1.0, motion_cooldown=0.0)
+    activity = CameraActivity(active_tracks=2)
+
+    decisions = run(policy, activity, [0.0] * 10)
+
+    assert all(decisions)
+    assert activity.mode == 'active'
@@ -0,0 +1,32 @@
+"""Tests for the person centroid index used for two-stage matching."""
+import numpy as np
+
+from src.core.face_recognition.person_index import PersonIndex
+
+def test_person_index_add_remove_and_search():
+    """Test incremental centroids, bulk loading and person search."""
+    rng = np.random.default_rng(0)
+    centres = rng.normal(size=(20, 16)).astype(np.float32)
+    codes = np.repeat(np.arange(20), 3)
+    encodings = centres[codes] + rng.normal(scale=0.1, size=(60, 16)).astype(np.float32)
+    encodings /= np.linalg.norm(encodings, axis=1, keepdims=True)
+
+    bulk = PersonIndex()
+    bulk.add_batch(codes, np.arange(60), encodings)
+    incremental = PersonIndex()
+    for slot, (code, encoding) in enumerate(zip(codes, encodings)):
+        incremental.add(int(code), slot, encoding)
+
+    queries = centres[[4, 11]] / np.linalg.norm(centres[[4, 11]], axis=1, keepdims=True)
+    for persons in (bulk, incremental):
+        scores, found = persons.search(queries, 3)
+        assert found[:, 0].tolist() == [4, 11]
+        assert np.all(np.diff(scores, axis=1) <= 0)
+    assert bulk.members(4).tolist() == [12, 13, 14]
+
+    # Removing every embedding of a person drops it from the results
+    for slot in (12, 13, 14):
+        bulk.remove(4, slot, encodings[slot])
+    _, found = bulk.search(queries, 25)
+    assert 4 not in found[0] and len(bulk) == 19
+    assert found[0, 19:].tolist() == [-1] * 6
@@ -0,0 +1,35 @@
+"""Tests for compressed index configuration and exact re-ranking."""
+import numpy as np
+import pytest
+
+from src.core.face_recognition.quantization import index_description, rerank_inner_product
+
+def test_index_descriptions():
+    """Test FAISS descriptions for each index type and compression."""
+    assert index_description('flat', 'none', 512) == 'Flat'
+    assert index_description('flat', 'fp16', 512) == 'SQfp16'
+    assert index_description('ivf', 'int8', 512, nlist=256) == 'IVF256,SQ8'
+    assert index_description('hnsw', 'pq', 512, pq_m=64) == 'HNSW32_PQ64x8'
+
+    with pytest.raises(ValueError):
+        index_description('flat', 'pq', 500, pq_m=64)
+
+def test_rerank_restores_exact_order():
+    """Test that re-ranking orders candidates by exact similarity."""
+    rng = np.random.default_rng(0)
+    gallery = rng.normal(size=(50, 16)).astype(np.float32)
+    queries = gallery[:4] + 0.01
+
+    # Shuffled candidates, as a compressed index might return them
+    candidates = np.stack([rng.permutation(50)[:20] for _ in range(4)])
+    candidates[:, 0] = np.arange(4)
+    candidates[:, 4] = -1
+    candidates = np.stack([row[rng.permutation(20)] for row in candidates])
+
+    scores, rows = rerank_inner_product(
+        queries, candidates, gallery[np.where(candidates >= 0, candidates, 0)], 5
+    )
+
+    assert np.array_equal(rows[:, 0], np.arange(4))
+    assert np.all(np.diff(scores, axis=1) <= 0)
+    assert not np.any(rows == -1)
@@ -0,0 +1,218 @@
+"""Tests for batched consumption, retries and handler concurrency in QueueManager."""
+import asyncio
+
+import pytest
+
+from src.lib.queue.manager import QueueManager
+
+@pytest.fixture
+async def make_manager():
+    """Factory for managers over the memory backend."""
+    managers = []
+
+    async def make(**overrides):
+        manager = QueueManager({'queue.max_wait': 0.05, **overrides})
+        await manager.initialize()
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        await manager.cleanup()
+
+async def wait_for(condition, timeout=2.0):
+    """Poll until condition() holds."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+async def test_publish_goes_through_backend(make_manager):
+    """Test that published messages are stored encoded in the backend."""
+    manager = await make_manager()
+
+    assert await manager.publish({'n': 1}, event='created')
+
+    assert await manager.get_queue_size() == 1
+    [raw] = await manager._backend.get_many('default', 10, 0)
+    assert isinstance(raw, (str, bytes))
+    assert manager._deserialize(raw)['data'] == {'n': 1}
+
+@pytest.mark.asyncio
+async def test_publish_respects_queue_max_size(make_manager):
+    """Test that publishing to a full queue fails."""
+    manager = await make_manager(**{'queue.queues': {'small': {'max_size': 1}}})
+
+    assert await manager.publish('a', queue='small')
+    assert not await manager.publish('b', queue='small')
+    assert not await manager.publish('c', queue='missing')
+
+@pytest.mark.asyncio
+async def test_get_many_times_out(make_manager):
+    """Test that get_many returns an empty batch after its timeout."""
+    manager = await make_manager()
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    assert await manager.get_many('default', timeout=0.05) == []
+    assert loop.time() - start >= 0.04
+
+@pytest.mark.asyncio
+async def test_get_many_wakes_on_publish(make_manager):
+    """Test that a waiting get_many returns as soon as a message is published."""
+    manager = await make_manager()
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    batch = asyncio.create_task(manager.get_many('default', timeout=5))
+    await asyncio.sleep(0.01)
+    await manager.publish('hello')
+
+    [payload] = await batch
+    assert payload['data'] == 'hello'
+    assert loop.time() - start < 1
+
+@pytest.mark.asyncio
+async def test_get_many_batches_and_ack_many(make_manager):
+    """Test that get_many caps the batch and ack_many clears acknowledged messages."""
+    manager = await make_manager()
+    for n in range(5):
+        await manager.publish(n)
+
+    first = await manager.get_many('default', max_messages=3)
+    second = await manager.get_many('default', max_messages=3)
+
+    assert [p['data'] for p in first] == [0, 1, 2]
+    assert [p['data'] for p in second] == [3, 4]
+    assert len(manager._unacked['default']) == 5
+    assert await manager.ack_many('default', first)
+    assert len(manager._unacked['default']) == 2
+    assert await manager.ack_many('default', second + first)
+    assert not manager._unacked['default']
+
+@pytest.mark.asyncio
+async def test_undecodable_messages_are_dropped(make_manager):
+    """Test that messages that cannot be decoded are acknowledged and skipped."""
+    manager = await make_manager()
+    await manager._backend.publish('default', 'not a message')
+    await manager.publish('ok')
+
+    [payload] = await manager.get_many('default')
+
+    assert payload['data'] == 'ok'
+    assert list(manager._unacked['default']) == [payload['id']]
+
+@pytest.mark.asyncio
+async def test_handlers_consume_published_messages(make_manager):
+    """Test that registering a handler starts consumers that dispatch by event."""
+    manager = await make_manager(**{'queue.queues': {'jobs': {'consumers': 2}}})
+    created, deleted = [], []
+
+    async def on_created(data):
+        created.append(data)
+
+    manager.register_handler('jobs', 'created', on_created)
+    manager.register_handler('jobs', 'deleted', deleted.append)
+    for n in range(4):
+        await manager.publish(n, queue='jobs', event='created')
+    await manager.publish('x', queue='jobs', event='deleted')
+    await wait_for(lambda: manager._stats['consumed'] == 5)
+
+    assert sorted(created) == [0, 1, 2, 3]
+    assert deleted == ['x']
+    assert (await manager.get_queue_info('jobs'))['consumers'] == 2
+    assert not manager._unacked['jobs']
+
+@pytest.mark.asyncio
+async def test_failed_messages_retry_then_dead_letter(make_manager):
+    """Test that a failing message is retried max_retries times, then dead-lettered."""
+    manager = await make_manager(**{'queue.max_retries': 1, 'queue.retry_delay': 0})
+    attempts = []
+
+    async def fail(data):
+        attempts.append(data)
+        raise RuntimeError("boom")
+
+    manager.register_handler('default', 'work', fail)
+    await manager.publish('job', event='work')
+    await wait_for(lambda: manager._stats['failed'] == 2)
+
+    [dead] = await manager.get_many('default_failed', timeout=1)
+    assert attempts == ['job', 'job']
+    assert dead['data'] == 'job'
+    assert dead['retries'] == 1
+    assert manager._stats['retried'] == 1
+    assert manager._stats['consumed'] == 0
+
+@pytest.mark.asyncio
+async def test_batch_is_acked_when_requeue_fails(make_manager):
+    """Test that a failing retry publish does not leave the rest of the batch unacknowledged."""
+    manager = await make_manager()
+    for n in range(3):
+        await manager.publish(n, event='work')
+
+    async def unavailable(*args):
+        raise ConnectionError("backend down")
+
+    manager._backend.publish = unavailable
+    done = []
+
+    def work(data):
+        if data == 1:
+            raise RuntimeError("boom")
+        done.append(data)
+
+    manager.register_handler('default', 'work', work)
+    await wait_for(lambda: manager._stats['failed'] == 1 and len(done) == 2)
+    await wait_for(lambda: not manager._unacked['default'])
+
+@pytest.mark.asyncio
+async def test_unhandled_event_is_dead_lettered(make_manager):
+    """Test that a message without a handler for its event is dead-lettered."""
+    manager = await make_manager(**{'queue.max_retries': 0})
+    manager.register_handler('default', 'known', lambda data: None)
+
+    await manager.publish('job', event='unknown')
+
+    [dead] = await manager.get_many('default_failed', timeout=1)
+    assert dead['metadata'] == {'event': 'unknown'}
+
+@pytest.mark.asyncio
+async def test_concurrency_limit(make_manager):
+    """Test that no more than queue.concurrency handlers run at once per queue."""
+    manager = await make_manager(**{
+        'queue.concurrency': 2,
+        'queue.queues': {'jobs': {'consumers': 3}}
+    })
+    running = peak = 0
+
+    async def work(data):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    for n in range(10):
+        await manager.publish(n, queue='jobs', event='work')
+    manager.register_handler('jobs', 'work', work)
+    await wait_for(lambda: manager._stats['consumed'] == 10)
+
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_removing_last_handler_stops_consumers(make_manager):
+    """Test that consumers stop once a queue has no handlers left."""
+    manager = await make_manager()
+    manager.register_handler('default', 'work', lambda data: None)
+    assert (await manager.get_queue_info())['consumers'] == 1
+
+    manager.remove_handler('default', 'work')
+    await asyncio.sleep(0)
+    await manager.publish('job', event='work')
+    await asyncio.sleep(0.1)
+
+    assert (await manager.get_queue_info())['consumers'] == 0
+    assert await manager.get_queue_size() == 1
@@ -0,0 +1,184 @@
+"""Tests for the atomic rate limit scripts and the local pre-check tier."""
+from contextlib import asynccontextmanager
+
+import pytest
+
+from src.core.rate_limit.limiter import RateLimit, RateLimiter
+from src.core.rate_limit.local import LocalTier
+from src.core.rate_limit.memory_store import MemoryLimitStore
+from src.core.rate_limit.scripts import LIMIT_SCRIPTS
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('strategy', ['fixed', 'sliding', 'token'])
+async def test_limit_scripts_one_round_trip_per_check(strategy):
+    """Test that every algorithm enforces its limit with a single call per check."""
+    clock = FakeClock()
+    store = MemoryLimitStore(clock=clock)
+    script = LIMIT_SCRIPTS[strategy]
+    await script.load(store)
+
+    granted = 0
+    for _ in range(15):
+        result = await script.run(store, ['ratelimit:test'], [10, 60_000, 1, 10])
+        granted += result[0]
+    assert granted == 10
+    assert store.calls == 16  # Script load plus one EVALSHA per check
+
+    # A batch request is granted partially once the limit is close
+    clock.now += 61
+    result = await script.run(store, ['ratelimit:test'], [10, 60_000, 4, 10])
+    assert result[0] == 4 and result[1] == 6
+    result = await script.run(store, ['ratelimit:test'], [10, 60_000, 8, 10])
+    assert result[0] == 6 and result[1] == 0
+
+@pytest.mark.asyncio
+async def test_script_falls_back_to_eval_when_not_cached():
+    """Test that an uncached script is sent once in full, then by SHA."""
+    store = MemoryLimitStore(clock=FakeClock())
+    script = LIMIT_SCRIPTS['fixed']
+    assert (await script.run(store, ['key'], [5, 1000, 1, 5]))[0] == 1
+    assert store.calls == 2
+    assert (await script.run(store, ['key'], [5, 1000, 1, 5]))[0] == 1
+    assert store.calls == 3
+
+class BrokenConnection:
+    """Connection whose EVALSHA fails for a reason other than NOSCRIPT"""
+
+    def __init__(self):
+        self.commands = []
+
+    async def evalsha(self, *args):
+        self.commands.append('evalsha')
+        raise ConnectionError("Connection reset by peer")
+
+    async def eval(self, *args):
+        self.commands.append('eval')
+        return [1, 4, 0]
+
+class BrokenStore:
+    def __init__(self):
+        self.connection = BrokenConnection()
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.connection
+
+@pytest.mark.asyncio
+async def test_script_errors_other_than_noscript_propagate():
+    """Test that only a missing script triggers the EVAL fallback."""
+    store = BrokenStore()
+    with pytest.raises(ConnectionError):
+        await LIMIT_SCRIPTS['fixed'].run(store, ['key'], [5, 1000, 1, 5])
+    assert store.connection.commands == ['evalsha']
+
+def test_local_tier_spends_leases_and_caches_denials():
+    """Test leased permits, shrinking leases and remembered denials."""
+    clock = FakeClock()
+    tier = LocalTier(lease_size=20, lease_fraction=0.1, lease_ttl=1.0, clock=clock)
+    assert tier.acquire('key') is None
+    assert tier.lease_size('key') == 1
+
+    tier.record('key', granted=5, remaining=300, reset=1060.0)
+    assert [tier.acquire('key')[0] for _ in range(4)] == [True] * 4
+    assert tier.acquire('key') is None
+    assert tier.lease_size('key') == 20
+
+    tier.record('key', granted=1, remaining=15, reset=1060.0)
+    assert tier.lease_size('key') == 1
+
+    tier.record('key', granted=0, remaining=0, reset=1060.0)
+    assert tier.acquire('key') == (False, {'remaining': 0, 'reset': 1060.0})
+    clock.now = 1061.0
+    assert tier.acquire('key') is None
+    assert tier.purge_expired() == 1 and len(tier) == 0
+
+def test_local_tier_lease_ends_with_fixed_window():
+    """Test that leased permits are not spent after their window resets."""
+    clock = FakeClock(1009.5)
+    tier = LocalTier(lease_ttl=1.0, clock=clock)
+    tier.record('key', granted=5, remaining=50, reset=1010.0, lease_until=1010.0)
+    assert tier.acquire('key')[0]
+
+    clock.now = 1010.1
+    assert tier.acquire('key') is None
+
+def make_limiter(clock):
+    """Create a limiter with the local tier over an in-memory store."""
+    store = MemoryLimitStore(clock=clock)
+    limiter = RateLimiter({'rate_limit.local_tier': True}, store=store)
+    limiter._local_tier = LocalTier(lease_size=50, lease_fraction=0.1, lease_ttl=1.0, clock=clock)
+    return limiter, store
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('strategy', ['fixed', 'sliding', 'token'])
+async def test_check_rate_limit_with_local_tier(strategy):
+    """Test that the local tier enforces the exact limit with fewer store calls."""
+    clock = FakeClock()
+    limiter, store = make_limiter(clock)
+    rule = RateLimit('api', limit=100, window=10, strategy=strategy)
+
+    decisions = [await limiter.check_rate_limit(rule, 'client') for _ in range(300)]
+
+    assert sum(allowed for allowed, _ in decisions) == 100
+    assert all(allowed for allowed, _ in decisions[:100])
+    assert decisions[-1][1]['remaining'] == 0
+    assert store.calls < 100
+
+    # Denials are cached until the reset time, then the store is asked again
+    clock.now += 10.5
+    assert (await limiter.check_rate_limit(rule, 'client'))[0]
+
+@pytest.mark.asyncio
+async def test_fixed_window_leases_do_not_carry_over():
+    """Test that permits leased late in a window do not add to the next one."""
+    clock = FakeClock(1009.5)
+    limiter, _ = make_limiter(clock)
+    rule = RateLimit('api', limit=100, window=10, strategy='fixed')
+    for _ in range(2):
+        assert (await limiter.check_rate_limit(rule, 'client'))[0]
+
+    clock.now = 1010.1
+    allowed = 0
+    for _ in range(200):
+        allowed += (await limiter.check_rate_limit(rule, 'client'))[0]
+    assert allowed == 100
+
+class RedisScriptStore:
+    """Store interface over a redis-py client, for running the Lua scripts"""
+
+    def __init__(self, client):
+        self._client = client
+
+    async def execute(self, command, *args):
+        return await getattr(self._client, command)(*args)
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self._client
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('strategy', ['fixed', 'sliding', 'token'])
+async def test_lua_scripts_match_memory_store(strategy):
+    """Test that the Lua scripts and their in-memory equivalents agree."""
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    redis_store = RedisScriptStore(fakeredis.FakeAsyncRedis())
+    memory_store = MemoryLimitStore()
+    script = LIMIT_SCRIPTS[strategy]
+
+    # An hour-long window, so both stores see the same window and refill
+    replies = {'redis': [], 'memory': []}
+    for cost in (1, 1, 4, 8, 3, 1):
+        for name, store in (('redis', redis_store), ('memory', memory_store)):
+            granted, remaining, _ = await script.run(store, ['ratelimit:parity'], [10, 3_600_000, cost, 10])
+            replies[name].append((int(granted), int(remaining)))
+
+    assert replies['redis'] == replies['memory']
+    assert replies['memory'][-3:] == [(4, 0), (0, 0), (0, 0)]
@@ -0,0 +1,40 @@
+"""Tests for shard routing and scatter-gather result merging."""
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.core.face_recognition.index import BatchMatches
+from src.core.face_recognition.sharding import merge_batch_matches, merge_search_results, shard_for
+
+@dataclass
+class Hit:
+    face_id: str
+    similarity: float
+
+def test_shard_routing_is_stable():
+    """Test that faces map to the same shard on every call."""
+    owners = [shard_for(f"face-{i}", 4) for i in range(1000)]
+    assert owners == [shard_for(f"face-{i}", 4) for i in range(1000)]
+    assert set(owners) == {0, 1, 2, 3}
+
+def test_merge_results_across_shards():
+    """Test heap top-k merge and distinct-person merge of batch matches."""
+    shard_a = [Hit('a1', 0.9), Hit('a2', 0.5)]
+    shard_b = [Hit('b1', 0.8), Hit('b2', 0.7), Hit('b3', 0.1)]
+    merged = merge_search_results([shard_a, shard_b], 3)
+    assert [hit.face_id for hit in merged] == ['a1', 'b1', 'b2']
+
+    def matches(query_index, labels, scores):
+        label_array = np.empty(len(labels), dtype=object)
+        label_array[:] = labels
+        return BatchMatches(np.array(query_index), np.arange(len(labels)),
+                            label_array, np.array(scores, dtype=np.float32))
+
+    # Person p1 has faces on both shards; only its best score is kept
+    part_a = matches([0, 0, 1], ['p1', 'p2', 'p3'], [0.9, 0.4, 0.6])
+    part_b = matches([0, 0, 1], ['p1', 'p4', 'p5'], [0.95, 0.5, 0.7])
+    result = merge_batch_matches([part_a, part_b], 2)
+    assert result.query_index.tolist() == [0, 0, 1, 1]
+    assert result.labels.tolist() == ['p1', 'p4', 'p5', 'p3']
+    assert result.rows.tolist() == [1, 3, 5, 4]
+    assert len(merge_batch_matches([BatchMatches.empty(), BatchMatches.empty()], 2)) == 0
@@ -0,0 +1,67 @@
+"""Tests for StreamProcessor frame buffering."""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from src.core.camera import processor as processor_module
+from src.core.camera.processor import StreamProcessor
+
+class FakeCapture:
+    """Capture yielding constant frames and stopping the processor after a few."""
+
+    def __init__(self, stream, frames, shape=(4, 6, 3)):
+        self.stream = stream
+        self.frames = frames
+        self.shape = shape
+        self.reads = 0
+        self.in_place_reads = 0
+
+    def read(self, image=None):
+        self.reads += 1
+        if image is None:
+            image = np.empty(self.shape, dtype=np.uint8)
+        else:
+            self.in_place_reads += 1
+        image[...] = self.reads
+        if self.reads >= self.frames:
+            self.stream._running = False
+        return True, image
+
+    def release(self):
+        pass
+
+@pytest.fixture
+def stream():
+    """Create a stream processor with its event manager and recognizer mocked."""
+    with patch.object(processor_module, 'EventManager', return_value=MagicMock(emit=AsyncMock())), \
+            patch.object(processor_module, 'get_face_recognition_system', MagicMock()):
+        processor = StreamProcessor('cam-1', 'rtsp://camera', {'buffer_size': 3, 'fps': 1000})
+    yield processor
+    processor._release_buffer()
+
+@pytest.mark.asyncio
+async def test_frames_are_decoded_into_the_ring(stream):
+    """Test that captured frames land in the ring buffer, decoded in place after the first."""
+    capture = FakeCapture(stream, frames=5)
+    stream._capture = capture
+    stream._running = True
+
+    await stream._process_stream()
+
+    assert capture.reads == 5
+    assert capture.in_place_reads == 4
+    assert stream._buffer.slots == 3
+    assert len(stream._buffer) == 3
+    assert stream.get_stats()['frames_processed'] == 5
+
+    frame = await stream.get_frame()
+    assert np.all(frame == 5)
+    view = await stream.get_frame(copy=False)
+    assert np.shares_memory(view, stream._buffer.latest()[2])
+    assert not np.shares_memory(frame, view)
+
+@pytest.mark.asyncio
+async def test_get_frame_without_buffer(stream):
+    """Test that no frame is returned before anything was captured."""
+    assert await stream.get_frame() is None
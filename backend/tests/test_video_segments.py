@@ -0,0 +1,180 @@
+"""Tests for the recorded video segment index, clip cutting and storage cleanup."""
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from src.core.services.video.segments import Segment, SegmentIndex, clip_points
+from src.core.services.video.storage import VideoStorage
+
+def make_segment(start, seconds=10, fps=10.0, keyframes=None):
+    """Create a segment of ``seconds`` starting at ``start``."""
+    return Segment(
+        start=float(start),
+        end=float(start + seconds),
+        path=f"cam-1/19700101/{start:06d}_000.mp4",
+        frames=int(seconds * fps),
+        fps=fps,
+        keyframes=keyframes or [(0.0, -1)]
+    )
+
+@pytest.fixture
+def index(tmp_path):
+    """Create an index of three consecutive 10-second segments."""
+    index = SegmentIndex(tmp_path / "cam-1" / "index.jsonl")
+    for start in (100, 110, 120):
+        index.append(make_segment(start))
+    return index
+
+def starts(segments):
+    """Start times of segments."""
+    return [segment.start for segment in segments]
+
+def test_find_returns_overlapping_segments(index):
+    """Test that find returns exactly the segments overlapping a range."""
+    assert starts(index.find(105, 115)) == [100.0, 110.0]
+    assert starts(index.find(110, 120)) == [110.0]
+    assert starts(index.find(0, 1000)) == [100.0, 110.0, 120.0]
+    assert index.find(0, 100) == []
+    assert index.find(130, 140) == []
+
+def test_append_keeps_time_order(tmp_path):
+    """Test that out-of-order appends are found in time order."""
+    index = SegmentIndex(tmp_path / "index.jsonl")
+    for start in (120, 100, 110):
+        index.append(make_segment(start))
+    assert starts(index.find(0, 1000)) == [100.0, 110.0, 120.0]
+
+def test_expire_drops_and_persists(index):
+    """Test that expire returns ended segments and rewrites the index file."""
+    expired = index.expire(115)
+
+    assert starts(expired) == [100.0]
+    assert len(index) == 2
+    assert starts(SegmentIndex(index.path).find(0, 1000)) == [110.0, 120.0]
+    assert index.expire(115) == []
+
+def test_load_drops_torn_and_invalid_lines(index):
+    """Test that loading skips bad lines and truncates an interrupted append."""
+    with open(index.path, 'a', encoding='utf-8') as f:
+        f.write('not json\n')
+        f.write(json.dumps({'start': 130.0}) + '\n')
+        f.write('{"start": 140.0, "end"')
+    size = os.path.getsize(index.path)
+
+    loaded = SegmentIndex(index.path)
+
+    assert starts(loaded.find(0, 1000)) == [100.0, 110.0, 120.0]
+    assert os.path.getsize(index.path) < size
+    assert open(index.path, 'rb').read().endswith(b'\n')
+
+def test_clip_points_single_segment():
+    """Test that a clip starts at the keyframe before its start time."""
+    segment = make_segment(100, keyframes=[(0.0, 0), (2.0, 100), (4.0, 200)])
+
+    [(found, inpoint, outpoint)] = clip_points([segment], 103.5, 106.0)
+
+    assert found is segment
+    assert inpoint == 2.0
+    assert outpoint == pytest.approx(6.0)
+
+def test_clip_points_across_segments(index):
+    """Test that only the first and last segments of a clip are trimmed."""
+    segments = index.find(105, 125)
+
+    points = [(inpoint, outpoint) for _, inpoint, outpoint in clip_points(segments, 105, 125)]
+
+    assert points == [(0.0, None), (0.0, None), (0.0, pytest.approx(5.0))]
+    assert clip_points(segments[:1], 100, 110) == [(segments[0], 0.0, None)]
+
+@pytest.fixture
+def storage(tmp_path):
+    """Create a storage rooted at a temporary directory, without settings or S3."""
+    storage = VideoStorage.__new__(VideoStorage)
+    storage.storage_path = tmp_path
+    storage.logger = logging.getLogger(__name__)
+    storage._indexes = {}
+    return storage
+
+def write_file(path, age=0.0):
+    """Create a file last modified ``age`` seconds ago."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'video')
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+@pytest.mark.asyncio
+async def test_local_cleanup_skips_cache_dirs(storage, tmp_path):
+    """Test that download and export directories are not cleaned up as cameras."""
+    # Named like hourly recordings, which local cleanup deletes by name
+    download = write_file(tmp_path / "temp" / "19700101_00.mp4")
+    export = write_file(tmp_path / "segments" / "19700101_00.mp4")
+
+    await storage._cleanup_local_files(time.time())
+
+    assert download.exists() and export.exists()
+    assert not (tmp_path / "temp" / "index.jsonl").exists()
+    assert "temp" not in storage._indexes and "segments" not in storage._indexes
+
+@pytest.mark.asyncio
+async def test_segment_rollover_does_not_wait_for_upload(storage):
+    """Test that recording continues in a new segment while the last one uploads."""
+    storage.settings = SimpleNamespace(video_fps=10, video_resolution=(32, 24))
+    storage.thread_pool = ThreadPoolExecutor(max_workers=1)
+    storage.writers = {}
+    storage._open_segments = {}
+    storage._finalizing = set()
+    storage.segment_seconds = 10
+    storage.segment_grace = 2.0
+    storage.s3_client = object()
+    uploading = asyncio.Event()
+    uploaded = asyncio.Event()
+
+    async def upload(segment):
+        uploading.set()
+        await uploaded.wait()
+
+    async def no_cleanup(camera_id, path):
+        pass
+
+    storage._upload_to_cloud = upload
+    storage._cleanup_writer = no_cleanup
+    frame = np.zeros((24, 32, 3), dtype=np.uint8)
+    try:
+        assert await storage.store_frame(frame, 'cam-1', 1000.0)
+        first = storage._open_segments['cam-1']['path']
+        assert await asyncio.wait_for(storage.store_frame(frame, 'cam-1', 1010.0), 5)
+        await asyncio.wait_for(uploading.wait(), 5)
+
+        # The upload is still running; the next segment already has the frame
+        segment = storage._open_segments['cam-1']
+        assert segment['path'] != first and segment['frames'] == 1
+        assert await storage.store_frame(frame, 'cam-1', 1010.1)
+        assert segment['frames'] == 2
+        assert [s.path for s in storage._get_index('cam-1').find(0, 2000)] == [first]
+    finally:
+        uploaded.set()
+        await asyncio.gather(*storage._finalizing)
+        storage._open_segments['cam-1']['writer'].release()
+        storage.thread_pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_cache_cleanup_deletes_old_files(storage, tmp_path):
+    """Test that old downloads and exports are deleted and recent ones kept."""
+    old_download = write_file(tmp_path / "temp" / "cam-1" / "19700101" / "000100_000.mp4", age=7200)
+    new_download = write_file(tmp_path / "temp" / "cam-2" / "19700101" / "000100_000.mp4")
+    old_export = write_file(tmp_path / "segments" / "cam-1_100_abcd1234.mp4", age=7200)
+    new_export = write_file(tmp_path / "segments" / "cam-1_200_abcd1234.mp4")
+
+    await storage._cleanup_cache_files(time.time() - 3600)
+
+    assert not old_download.exists() and not old_export.exists()
+    assert new_download.exists() and new_export.exists()
+    assert not (tmp_path / "temp" / "cam-1").exists()